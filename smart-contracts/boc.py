@@ -0,0 +1,821 @@
+"""
+TON Cell and Bag-of-Cells Utilities
+Pure-Python cells, builders, slices, BoC serialization and dictionaries
+"""
+
+import base64
+import hashlib
+from bisect import bisect_left
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+BOC_MAGIC = b"\xb5\xee\x9c\x72"
+
+# Cell types (the first data byte of an exotic cell)
+ORDINARY = -1
+PRUNED_BRANCH = 1
+LIBRARY = 2
+MERKLE_PROOF = 3
+MERKLE_UPDATE = 4
+
+MAX_BITS = 1023
+MAX_REFS = 4
+
+
+class Cell:
+    """Immutable TON cell: up to 1023 data bits and 4 references"""
+
+    __slots__ = ("data", "bit_len", "refs", "type_", "_hash", "_depth", "_level_mask")
+
+    def __init__(self, data: bytes = b"", bit_len: int = 0, refs: Iterable["Cell"] = (), type_: int = ORDINARY):
+        refs = tuple(refs)
+        if bit_len > MAX_BITS:
+            raise ValueError(f"Cell overflow: {bit_len} bits")
+        if len(refs) > MAX_REFS:
+            raise ValueError(f"Cell overflow: {len(refs)} refs")
+        self.data = data
+        self.bit_len = bit_len
+        self.refs = refs
+        self.type_ = type_
+        self._hash = None
+        self._depth = None
+        self._level_mask = None
+
+    @property
+    def is_exotic(self) -> bool:
+        return self.type_ != ORDINARY
+
+    @property
+    def level_mask(self) -> int:
+        if self._level_mask is None:
+            if self.type_ == PRUNED_BRANCH:
+                self._level_mask = self.data[1]
+            elif self.type_ == LIBRARY:
+                self._level_mask = 0
+            else:
+                mask = 0
+                for ref in self.refs:
+                    ref_mask = ref._level_mask
+                    mask |= ref.level_mask if ref_mask is None else ref_mask
+                if self.type_ in (MERKLE_PROOF, MERKLE_UPDATE):
+                    mask >>= 1
+                self._level_mask = mask
+        return self._level_mask
+
+    @property
+    def hash(self) -> bytes:
+        """Representation hash (level 0) of the cell"""
+        if self._hash is None:
+            self._compute_hash()
+        return self._hash
+
+    @property
+    def depth(self) -> int:
+        if self._depth is None:
+            self._compute_hash()
+        return self._depth
+
+    def _augmented_data(self) -> bytes:
+        tail = self.bit_len % 8
+        if not tail:
+            return self.data
+        data = bytearray(self.data)
+        data[-1] |= 0x80 >> tail
+        return bytes(data)
+
+    def _descriptors(self, level_mask: int) -> bytes:
+        d1 = len(self.refs) + (8 if self.is_exotic else 0) + 32 * level_mask
+        d2 = (self.bit_len + 7) // 8 + self.bit_len // 8
+        return bytes((d1, d2))
+
+    def _compute_hash(self):
+        if self.type_ in (PRUNED_BRANCH, MERKLE_PROOF, MERKLE_UPDATE):
+            self._hash, self._depth = self.level_hash(0)
+            return
+        parts = [self._descriptors(0), self._augmented_data()]
+        depth = 0
+        for ref in self.refs:
+            ref_depth = ref.depth
+            parts.append(ref_depth.to_bytes(2, "big"))
+            depth = max(depth, ref_depth + 1)
+        for ref in self.refs:
+            parts.append(ref.hash)
+        self._hash = hashlib.sha256(b"".join(parts)).digest()
+        self._depth = depth
+
+    def level_hash(self, level: int) -> Tuple[bytes, int]:
+        """(hash, depth) of the cell at ``level``
+
+        Level 0 is the hash of the original tree, whatever was pruned from it.
+        Merkle cells hash their children one level up, which is how a proof
+        keeps the hash of the tree it was cut from.
+        """
+        if level == 0 and (self._hash is not None or self.type_ == ORDINARY):
+            return self.hash, self.depth
+        if self.type_ == PRUNED_BRANCH:
+            # A pruned branch stands in for the original cell: it stores the
+            # original hashes and depths for every level below its own
+            mask = self.data[1]
+            count = bin(mask).count("1")
+            index = bin(mask & ((1 << level) - 1)).count("1")
+            if index < count:
+                offset = 2 + 32 * count + 2 * index
+                return (bytes(self.data[2 + 32 * index:34 + 32 * index]),
+                        int.from_bytes(self.data[offset:offset + 2], "big"))
+
+        child_level = level + 1 if self.type_ in (MERKLE_PROOF, MERKLE_UPDATE) else level
+        children = [ref.level_hash(child_level) for ref in self.refs]
+        parts = [self._descriptors(self.level_mask & ((1 << level) - 1)), self._augmented_data()]
+        parts.extend(depth.to_bytes(2, "big") for _, depth in children)
+        parts.extend(hash_ for hash_, _ in children)
+        depth = max((depth + 1 for _, depth in children), default=0)
+        return hashlib.sha256(b"".join(parts)).digest(), depth
+
+    def begin_parse(self) -> "Slice":
+        return Slice(self)
+
+    def to_boc(self, has_crc: bool = True) -> bytes:
+        return serialize_boc([self], has_crc=has_crc)
+
+    def to_boc_base64(self) -> str:
+        return base64.b64encode(self.to_boc()).decode()
+
+    @staticmethod
+    def from_boc(data: Union[bytes, str]) -> "Cell":
+        if isinstance(data, str):
+            data = base64.b64decode(data)
+        roots = deserialize_boc(data)
+        if len(roots) != 1:
+            raise ValueError(f"Expected a single root, got {len(roots)}")
+        return roots[0]
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, Cell) and self.hash == other.hash
+
+    def __hash__(self) -> int:
+        return hash(self.hash)
+
+    def __repr__(self) -> str:
+        return f"Cell(bits={self.bit_len}, refs={len(self.refs)}, hash={self.hash.hex()[:16]}…)"
+
+
+class Builder:
+    """Mutable cell builder mirroring the FunC store_* primitives"""
+
+    __slots__ = ("_value", "_len", "_refs")
+
+    def __init__(self):
+        self._value = 0
+        self._len = 0
+        self._refs = []
+
+    @property
+    def bits(self) -> int:
+        return self._len
+
+    @property
+    def refs(self) -> int:
+        return len(self._refs)
+
+    def store_uint(self, value: int, bits: int) -> "Builder":
+        if value < 0 or value >> bits:
+            raise ValueError(f"{value} does not fit into {bits} unsigned bits")
+        self._value = (self._value << bits) | value
+        self._len += bits
+        return self
+
+    def store_int(self, value: int, bits: int) -> "Builder":
+        if not -(1 << (bits - 1)) <= value < (1 << (bits - 1)):
+            raise ValueError(f"{value} does not fit into {bits} signed bits")
+        return self.store_uint(value & ((1 << bits) - 1), bits)
+
+    def store_bit(self, bit) -> "Builder":
+        return self.store_uint(1 if bit else 0, 1)
+
+    def store_bytes(self, data: bytes) -> "Builder":
+        return self.store_uint(int.from_bytes(data, "big"), 8 * len(data))
+
+    def store_coins(self, amount: int) -> "Builder":
+        """Store a VarUInteger 16 amount in nanotons"""
+        length = (amount.bit_length() + 7) // 8
+        if length > 15:
+            raise ValueError(f"Coin amount too large: {amount}")
+        return self.store_uint(length, 4).store_uint(amount, 8 * length)
+
+    def store_ref(self, cell: Cell) -> "Builder":
+        if len(self._refs) >= MAX_REFS:
+            raise ValueError("Builder overflow: too many refs")
+        self._refs.append(cell)
+        return self
+
+    def store_maybe_ref(self, cell: Optional[Cell]) -> "Builder":
+        if cell is None:
+            return self.store_bit(0)
+        return self.store_bit(1).store_ref(cell)
+
+    store_dict = store_maybe_ref
+
+    def store_address(self, address: Optional["Address"]) -> "Builder":
+        if address is None:
+            return self.store_uint(0, 2)
+        return (self.store_uint(0b100, 3)
+                .store_int(address.workchain, 8)
+                .store_bytes(address.hash_part))
+
+    def store_slice(self, s: "Slice") -> "Builder":
+        bits = s.remaining_bits
+        self.store_uint(s.preload_uint(bits), bits)
+        for ref in s.remaining_ref_list():
+            self.store_ref(ref)
+        return self
+
+    def store_cell(self, cell: Cell) -> "Builder":
+        """Append the bits and refs of a cell (the FunC store_slice of its parse)"""
+        return self.store_slice(cell.begin_parse())
+
+    def store_builder(self, other: "Builder") -> "Builder":
+        self.store_uint(other._value, other._len)
+        for ref in other._refs:
+            self.store_ref(ref)
+        return self
+
+    def end_cell(self) -> Cell:
+        if self._len > MAX_BITS:
+            raise ValueError(f"Cell overflow: {self._len} bits")
+        pad = (-self._len) % 8
+        data = (self._value << pad).to_bytes((self._len + pad) // 8, "big")
+        return Cell(data, self._len, self._refs)
+
+
+def begin_cell() -> Builder:
+    return Builder()
+
+
+class Slice:
+    """Read cursor over a cell mirroring the FunC load_* primitives"""
+
+    __slots__ = ("_value", "_len", "_pos", "_refs", "_ref_pos")
+
+    def __init__(self, cell: Cell):
+        self._len = cell.bit_len
+        self._value = int.from_bytes(cell.data, "big") >> ((-cell.bit_len) % 8)
+        self._pos = 0
+        self._refs = cell.refs
+        self._ref_pos = 0
+
+    @property
+    def remaining_bits(self) -> int:
+        return self._len - self._pos
+
+    @property
+    def remaining_refs(self) -> int:
+        return len(self._refs) - self._ref_pos
+
+    def remaining_ref_list(self) -> Tuple[Cell, ...]:
+        return self._refs[self._ref_pos:]
+
+    def preload_uint(self, bits: int) -> int:
+        if bits > self._len - self._pos:
+            raise ValueError(f"Slice underflow: need {bits} bits, have {self.remaining_bits}")
+        shift = self._len - self._pos - bits
+        return (self._value >> shift) & ((1 << bits) - 1)
+
+    def load_uint(self, bits: int) -> int:
+        value = self.preload_uint(bits)
+        self._pos += bits
+        return value
+
+    def load_int(self, bits: int) -> int:
+        value = self.load_uint(bits)
+        if bits and value >> (bits - 1):
+            value -= 1 << bits
+        return value
+
+    def load_bit(self) -> bool:
+        return bool(self.load_uint(1))
+
+    def load_bytes(self, length: int) -> bytes:
+        return self.load_uint(8 * length).to_bytes(length, "big")
+
+    def load_coins(self) -> int:
+        length = self.load_uint(4)
+        return self.load_uint(8 * length)
+
+    def skip_bits(self, bits: int) -> "Slice":
+        self.load_uint(bits)
+        return self
+
+    def load_ref(self) -> Cell:
+        if self._ref_pos >= len(self._refs):
+            raise ValueError("Slice underflow: no more refs")
+        ref = self._refs[self._ref_pos]
+        self._ref_pos += 1
+        return ref
+
+    def load_maybe_ref(self) -> Optional[Cell]:
+        return self.load_ref() if self.load_bit() else None
+
+    load_dict = load_maybe_ref
+
+    def load_address(self) -> Optional["Address"]:
+        tag = self.load_uint(2)
+        if tag == 0:
+            return None
+        if tag != 0b10:
+            raise ValueError(f"Unsupported address tag: {tag}")
+        if self.load_bit():
+            raise ValueError("Anycast addresses are not supported")
+        workchain = self.load_int(8)
+        return Address(workchain, self.load_bytes(32))
+
+    def to_cell(self) -> Cell:
+        """Copy the unread remainder of the slice into a new cell"""
+        return begin_cell().store_slice(self).end_cell()
+
+
+class Address:
+    """Standard (addr_std) TON address"""
+
+    __slots__ = ("workchain", "hash_part")
+
+    def __init__(self, workchain: int, hash_part: bytes):
+        if len(hash_part) != 32:
+            raise ValueError("Address hash must be 32 bytes")
+        self.workchain = workchain
+        self.hash_part = bytes(hash_part)
+
+    @staticmethod
+    def parse(text: str) -> "Address":
+        """Parse a raw (0:abcd…) or user-friendly base64 address"""
+        if ":" in text:
+            workchain, hex_part = text.split(":", 1)
+            return Address(int(workchain), bytes.fromhex(hex_part))
+        raw = base64.urlsafe_b64decode(text.replace("+", "-").replace("/", "_"))
+        if len(raw) != 36:
+            raise ValueError(f"Invalid address: {text}")
+        if crc16(raw[:34]) != raw[34:]:
+            raise ValueError(f"Invalid address checksum: {text}")
+        return Address(int.from_bytes(raw[1:2], "big", signed=True), raw[2:34])
+
+    def to_raw(self) -> str:
+        return f"{self.workchain}:{self.hash_part.hex()}"
+
+    def to_friendly(self, bounceable: bool = True, testnet: bool = False) -> str:
+        tag = 0x11 if bounceable else 0x51
+        if testnet:
+            tag |= 0x80
+        raw = bytes((tag, self.workchain & 0xFF)) + self.hash_part
+        return base64.urlsafe_b64encode(raw + crc16(raw)).decode()
+
+    def __eq__(self, other) -> bool:
+        return (isinstance(other, Address)
+                and self.workchain == other.workchain
+                and self.hash_part == other.hash_part)
+
+    def __hash__(self) -> int:
+        return hash((self.workchain, self.hash_part))
+
+    def __str__(self) -> str:
+        return self.to_raw()
+
+    def __repr__(self) -> str:
+        return f"Address({self.to_raw()})"
+
+
+def crc16(data: bytes) -> bytes:
+    """CRC-16/XMODEM used by user-friendly addresses"""
+    crc = 0
+    for byte in data:
+        crc ^= byte << 8
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x1021) if crc & 0x8000 else crc << 1
+            crc &= 0xFFFF
+    return crc.to_bytes(2, "big")
+
+
+def _make_crc32c_table() -> List[int]:
+    table = []
+    for i in range(256):
+        crc = i
+        for _ in range(8):
+            crc = (crc >> 1) ^ 0x82F63B78 if crc & 1 else crc >> 1
+        table.append(crc)
+    return table
+
+
+_CRC32C_TABLE = _make_crc32c_table()
+
+
+def crc32c(data: bytes) -> bytes:
+    """CRC-32C (Castagnoli) checksum, little-endian as stored in BoC files"""
+    crc = 0xFFFFFFFF
+    table = _CRC32C_TABLE
+    for byte in data:
+        crc = table[(crc ^ byte) & 0xFF] ^ (crc >> 8)
+    return (crc ^ 0xFFFFFFFF).to_bytes(4, "little")
+
+
+# ---------------------------------------------------------------------------
+# Bag of cells
+# ---------------------------------------------------------------------------
+
+def _cell_key(cell: Cell):
+    # Representation hash: a pruned branch shares its level-0 hash with the cell it replaces
+    if cell._level_mask == 0 and cell._hash is not None:
+        return cell._hash
+    mask = cell.level_mask
+    return cell.hash if not mask else cell.level_hash(mask.bit_length())[0]
+
+
+def _topological_order(roots: List[Cell]) -> Tuple[List[Cell], Dict]:
+    """Order cells so that every parent precedes its children, deduplicated by hash"""
+    post = []
+    seen = set()
+    for root in roots:
+        root_key = _cell_key(root)
+        if root_key in seen:
+            continue
+        seen.add(root_key)
+        stack = [(root, 0)]
+        while stack:
+            cell, ref_index = stack[-1]
+            if ref_index < len(cell.refs):
+                stack[-1] = (cell, ref_index + 1)
+                child = cell.refs[ref_index]
+                child_key = _cell_key(child)
+                if child_key not in seen:
+                    seen.add(child_key)
+                    stack.append((child, 0))
+            else:
+                stack.pop()
+                post.append(cell)
+    post.reverse()
+    index = {_cell_key(cell): i for i, cell in enumerate(post)}
+    return post, index
+
+
+def _byte_len(value: int) -> int:
+    return max(1, (value.bit_length() + 7) // 8)
+
+
+def serialize_boc(roots: List[Cell], has_idx: bool = False, has_crc: bool = True) -> bytes:
+    """Serialize root cells into the standard b5ee9c72 bag-of-cells format"""
+    order, index = _topological_order(roots)
+    size = _byte_len(len(order))
+
+    serialized = []
+    for cell in order:
+        parts = [cell._descriptors(cell.level_mask), cell._augmented_data()]
+        for ref in cell.refs:
+            parts.append(index[_cell_key(ref)].to_bytes(size, "big"))
+        serialized.append(b"".join(parts))
+
+    total = sum(len(chunk) for chunk in serialized)
+    off_bytes = _byte_len(total)
+    flags = (0x80 if has_idx else 0) | (0x40 if has_crc else 0) | size
+
+    out = [BOC_MAGIC, bytes((flags, off_bytes)),
+           len(order).to_bytes(size, "big"),
+           len(roots).to_bytes(size, "big"),
+           (0).to_bytes(size, "big"),
+           total.to_bytes(off_bytes, "big")]
+    for root in roots:
+        out.append(index[_cell_key(root)].to_bytes(size, "big"))
+    if has_idx:
+        offset = 0
+        for chunk in serialized:
+            offset += len(chunk)
+            out.append(offset.to_bytes(off_bytes, "big"))
+    out.extend(serialized)
+    boc = b"".join(out)
+    if has_crc:
+        boc += crc32c(boc)
+    return boc
+
+
+def deserialize_boc(data: bytes) -> List[Cell]:
+    """Parse a standard bag-of-cells and return its root cells"""
+    if data[:4] != BOC_MAGIC:
+        raise ValueError("Unknown BoC magic")
+    flags = data[4]
+    has_idx = bool(flags & 0x80)
+    has_crc = bool(flags & 0x40)
+    size = flags & 0x07
+    off_bytes = data[5]
+    if has_crc and crc32c(data[:-4]) != data[-4:]:
+        raise ValueError("BoC checksum mismatch")
+
+    pos = 6
+
+    def read(length: int) -> int:
+        nonlocal pos
+        value = int.from_bytes(data[pos:pos + length], "big")
+        pos += length
+        return value
+
+    cell_count = read(size)
+    root_count = read(size)
+    read(size)  # absent cells
+    read(off_bytes)  # total cells size
+    root_indexes = [read(size) for _ in range(root_count)]
+    if has_idx:
+        pos += cell_count * off_bytes
+
+    raw_cells = []
+    for _ in range(cell_count):
+        d1, d2 = data[pos], data[pos + 1]
+        pos += 2
+        ref_count = d1 & 7
+        exotic = bool(d1 & 8)
+        if d1 & 16:
+            # Stored hashes and depths are recomputed on demand, skip them
+            level_mask = d1 >> 5
+            hash_count = bin(level_mask).count("1") + 1
+            pos += hash_count * (32 + 2)
+        data_len = (d2 + 1) // 2
+        cell_data = bytearray(data[pos:pos + data_len])
+        pos += data_len
+        bit_len = data_len * 8
+        if d2 & 1:
+            # Strip the completion tag: the last set bit and trailing zeros
+            last = cell_data[-1]
+            trailing = (last & -last).bit_length()
+            bit_len -= trailing
+            cell_data[-1] = last & (0xFF << trailing) & 0xFF
+        refs = [read(size) for _ in range(ref_count)]
+        type_ = cell_data[0] if exotic else ORDINARY
+        raw_cells.append((bytes(cell_data), bit_len, refs, type_))
+
+    cells: List[Optional[Cell]] = [None] * cell_count
+    for i in range(cell_count - 1, -1, -1):
+        cell_data, bit_len, refs, type_ = raw_cells[i]
+        cells[i] = Cell(cell_data, bit_len, [cells[r] for r in refs], type_)
+    return [cells[i] for i in root_indexes]
+
+
+# ---------------------------------------------------------------------------
+# Snake-encoded strings
+# ---------------------------------------------------------------------------
+
+def text_cell(text: Union[str, bytes]) -> Cell:
+    """Store bytes as a snake chain of cells (127 bytes per cell)"""
+    data = text.encode("utf-8") if isinstance(text, str) else text
+    chunks = [data[i:i + 127] for i in range(0, len(data), 127)] or [b""]
+    cell = None
+    for chunk in reversed(chunks):
+        builder = begin_cell().store_bytes(chunk)
+        if cell is not None:
+            builder.store_ref(cell)
+        cell = builder.end_cell()
+    return cell
+
+
+def load_snake_bytes(s: Slice) -> bytes:
+    parts = []
+    while True:
+        parts.append(s.load_bytes(s.remaining_bits // 8))
+        if not s.remaining_refs:
+            return b"".join(parts)
+        s = s.load_ref().begin_parse()
+
+
+def load_text(s: Slice) -> str:
+    return load_snake_bytes(s).decode("utf-8", errors="replace")
+
+
+# ---------------------------------------------------------------------------
+# Dictionaries (HashmapE with unsigned integer keys)
+# ---------------------------------------------------------------------------
+
+def _load_label(s: Slice, max_len: int) -> Tuple[int, int]:
+    if not s.load_bit():
+        # hml_short$0 len:(Unary ~n) s:(n * Bit)
+        length = 0
+        while s.load_bit():
+            length += 1
+        return s.load_uint(length), length
+    if not s.load_bit():
+        # hml_long$10 n:(#<= m) s:(n * Bit)
+        length = s.load_uint(max_len.bit_length())
+        return s.load_uint(length), length
+    # hml_same$11 v:Bit n:(#<= m)
+    bit = s.load_bit()
+    length = s.load_uint(max_len.bit_length())
+    return ((1 << length) - 1 if bit else 0), length
+
+
+def _store_label(b: Builder, label: int, length: int, max_len: int):
+    k = max_len.bit_length()
+    short_cost = 2 * length + 2
+    long_cost = 2 + k + length
+    same = length > 0 and (label == 0 or label == (1 << length) - 1)
+    same_cost = 3 + k if same else None
+    best = min(short_cost, long_cost, same_cost if same else long_cost)
+    if short_cost == best:
+        b.store_bit(0).store_uint((1 << length) - 1 << 1, length + 1).store_uint(label, length)
+    elif long_cost == best:
+        b.store_uint(0b10, 2).store_uint(length, k).store_uint(label, length)
+    else:
+        b.store_uint(0b11, 2).store_bit(label != 0).store_uint(length, k)
+
+
+def iter_dict(root: Optional[Cell], key_bits: int, start: int = 0) -> Iterator[Tuple[int, Slice]]:
+    """Yield (key, value slice) pairs in ascending key order, from ``start`` on"""
+    if root is None:
+        return
+    stack = [(root, key_bits, 0)]
+    while stack:
+        cell, remaining, prefix = stack.pop()
+        s = cell.begin_parse()
+        label, length = _load_label(s, remaining)
+        prefix = (prefix << length) | label
+        remaining -= length
+        if ((prefix << remaining) | ((1 << remaining) - 1)) < start:
+            continue
+        if remaining == 0:
+            yield prefix, s
+            continue
+        left, right = s.load_ref(), s.load_ref()
+        stack.append((right, remaining - 1, (prefix << 1) | 1))
+        stack.append((left, remaining - 1, prefix << 1))
+
+
+def dict_get(root: Optional[Cell], key_bits: int, key: int) -> Optional[Slice]:
+    """Look up a single key without walking the rest of the dictionary"""
+    cell = root
+    remaining = key_bits
+    while cell is not None:
+        if cell.type_ == PRUNED_BRANCH:
+            raise ValueError("Dictionary path leads into a pruned branch")
+        s = cell.begin_parse()
+        label, length = _load_label(s, remaining)
+        remaining -= length
+        if (key >> remaining) & ((1 << length) - 1) != label:
+            return None
+        if remaining == 0:
+            return s
+        remaining -= 1
+        left, right = s.load_ref(), s.load_ref()
+        cell = right if (key >> remaining) & 1 else left
+    return None
+
+
+DictValue = Union[Cell, Builder]
+
+
+def _store_value(b: Builder, value: DictValue):
+    if isinstance(value, Builder):
+        b.store_builder(value)
+    else:
+        b.store_cell(value)
+
+
+def build_dict(items: Dict[int, DictValue], key_bits: int, share: bool = False) -> Optional[Cell]:
+    """Build the root cell of a dictionary from ``{key: value}``; None when empty
+
+    With ``share`` identical subtrees (same label, same value object or same
+    children) are built once and reused, which keeps dense dictionaries with
+    few distinct values small in memory. The resulting hashes are unchanged.
+    """
+    keys = sorted(items)
+    if not keys:
+        return None
+    if keys[0] < 0 or keys[-1] >> key_bits:
+        raise ValueError(f"Dictionary keys must fit into {key_bits} unsigned bits")
+    # Keyed by object ids: values stay alive in ``items`` and built children in the memo
+    memo: Optional[Dict[tuple, Cell]] = {} if share else None
+
+    def build(lo: int, hi: int, remaining: int) -> Cell:
+        mask = (1 << remaining) - 1
+        first = keys[lo] & mask
+        if hi - lo == 1:
+            length = remaining
+        else:
+            length = remaining - (first ^ (keys[hi - 1] & mask)).bit_length()
+        label = first >> (remaining - length)
+        rest = remaining - length
+        if rest == 0:
+            value = items[keys[lo]]
+            memo_key = (remaining, length, label, id(value))
+        else:
+            split = rest - 1
+            threshold = ((keys[lo] >> rest) << rest) | (1 << split)
+            mid = bisect_left(keys, threshold, lo, hi)
+            left, right = build(lo, mid, split), build(mid, hi, split)
+            memo_key = (remaining, length, label, id(left), id(right))
+        if memo is not None:
+            cell = memo.get(memo_key)
+            if cell is not None:
+                return cell
+        b = Builder()
+        _store_label(b, label, length, remaining)
+        if rest == 0:
+            _store_value(b, value)
+        else:
+            b.store_ref(left).store_ref(right)
+        cell = b.end_cell()
+        if memo is not None:
+            memo[memo_key] = cell
+        return cell
+
+    return build(0, len(keys), key_bits)
+
+
+def dict_path(root: Optional[Cell], key_bits: int, key: int) -> List[Cell]:
+    """Cells visited while looking up ``key``, from the root down to the leaf or the first mismatch"""
+    path = []
+    cell = root
+    remaining = key_bits
+    while cell is not None:
+        path.append(cell)
+        s = cell.begin_parse()
+        label, length = _load_label(s, remaining)
+        remaining -= length
+        if remaining == 0 or (key >> remaining) & ((1 << length) - 1) != label:
+            break
+        remaining -= 1
+        left, right = s.load_ref(), s.load_ref()
+        cell = right if (key >> remaining) & 1 else left
+    return path
+
+
+def dict_set(root: Optional[Cell], key_bits: int, key: int, value: DictValue) -> Cell:
+    """Return a new root with ``key`` set, rebuilding only the cells on its path"""
+    if key < 0 or key >> key_bits:
+        raise ValueError(f"Dictionary keys must fit into {key_bits} unsigned bits")
+
+    def leaf(k: int, remaining: int) -> Cell:
+        b = Builder()
+        _store_label(b, k, remaining, remaining)
+        _store_value(b, value)
+        return b.end_cell()
+
+    def update(cell: Optional[Cell], remaining: int, k: int) -> Cell:
+        if cell is None:
+            return leaf(k, remaining)
+        s = cell.begin_parse()
+        label, length = _load_label(s, remaining)
+        rest = remaining - length
+        prefix = k >> rest
+        b = Builder()
+        if prefix == label:
+            _store_label(b, label, length, remaining)
+            if rest == 0:
+                _store_value(b, value)
+                return b.end_cell()
+            left, right = s.load_ref(), s.load_ref()
+            sub = k & ((1 << (rest - 1)) - 1)
+            if (k >> (rest - 1)) & 1:
+                right = update(right, rest - 1, sub)
+            else:
+                left = update(left, rest - 1, sub)
+            return b.store_ref(left).store_ref(right).end_cell()
+        # The key leaves this node's label: fork at the first differing bit
+        common = length - (prefix ^ label).bit_length()
+        split = remaining - common - 1
+        _store_label(b, label >> (length - common), common, remaining)
+        tail = length - common - 1
+        existing = Builder()
+        _store_label(existing, label & ((1 << tail) - 1), tail, split)
+        existing = existing.store_slice(s).end_cell()
+        added = leaf(k & ((1 << split) - 1), split)
+        if (k >> split) & 1:
+            return b.store_ref(existing).store_ref(added).end_cell()
+        return b.store_ref(added).store_ref(existing).end_cell()
+
+    return update(root, key_bits, key)
+
+
+def dict_delete(root: Optional[Cell], key_bits: int, key: int) -> Optional[Cell]:
+    """Return a new root without ``key`` (None once empty); the same root if the key is absent"""
+
+    def remove(cell: Cell, remaining: int, k: int) -> Optional[Cell]:
+        s = cell.begin_parse()
+        label, length = _load_label(s, remaining)
+        rest = remaining - length
+        if k >> rest != label:
+            return cell
+        if rest == 0:
+            return None
+        left, right = s.load_ref(), s.load_ref()
+        bit = (k >> (rest - 1)) & 1
+        child = right if bit else left
+        updated = remove(child, rest - 1, k & ((1 << (rest - 1)) - 1))
+        if updated is child:
+            return cell
+        b = Builder()
+        if updated is None:
+            # Only the sibling is left: merge its label into this node's
+            sibling = left if bit else right
+            ss = sibling.begin_parse()
+            sibling_label, sibling_length = _load_label(ss, rest - 1)
+            merged = (((label << 1) | (1 - bit)) << sibling_length) | sibling_label
+            _store_label(b, merged, length + 1 + sibling_length, remaining)
+            return b.store_slice(ss).end_cell()
+        _store_label(b, label, length, remaining)
+        if bit:
+            return b.store_ref(left).store_ref(updated).end_cell()
+        return b.store_ref(updated).store_ref(right).end_cell()
+
+    if root is None:
+        return None
+    return remove(root, key_bits, key)
@@ -0,0 +1,136 @@
+"""
+RPC Record / Replay
+Captures real request/response pairs into compact cassette files and replays them in tests
+"""
+
+import gzip
+import json
+import os
+from collections import defaultdict, deque
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+from rpc_cache import cache_key
+from rpc_pool import connect
+from toncenter import TonApi, TonApiError
+
+CASSETTE_DIR = Path(__file__).resolve().parent / "tests" / "cassettes"
+
+RECORD = "record"
+REPLAY = "replay"
+MODES = (RECORD, REPLAY)
+
+
+class CassetteMiss(AssertionError):
+    """A strict cassette was asked for a call it never recorded"""
+
+
+class Cassette:
+    """Recorded interactions, replayed in order per identical request"""
+
+    def __init__(self, interactions: Optional[List[Dict[str, Any]]] = None):
+        self.interactions = list(interactions or [])
+        self._queues: Dict[str, Deque[Dict[str, Any]]] = defaultdict(deque)
+        self._last: Dict[str, Dict[str, Any]] = {}
+        for interaction in self.interactions:
+            self._queues[cache_key(interaction["method"], interaction["params"])].append(interaction)
+
+    @staticmethod
+    def load(path: os.PathLike) -> "Cassette":
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            return Cassette(json.load(f)["interactions"])
+
+    def save(self, path: os.PathLike):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(path.suffix + ".tmp")
+        # mtime=0 keeps re-recorded cassettes byte-identical when nothing changed
+        with open(tmp, "wb") as raw, gzip.GzipFile(fileobj=raw, mode="wb", mtime=0) as f:
+            f.write(json.dumps({"version": 1, "interactions": self.interactions},
+                               separators=(",", ":")).encode("utf-8"))
+        os.replace(tmp, path)
+
+    def record(self, method: str, params: Dict[str, Any], result: Any = None,
+               error: Optional[TonApiError] = None):
+        interaction: Dict[str, Any] = {"method": method, "params": params}
+        if error is not None:
+            interaction["error"] = {"message": str(error), "code": error.code}
+        else:
+            interaction["result"] = result
+        self.interactions.append(interaction)
+
+    def next(self, method: str, params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Next recorded answer; a polled request keeps getting its final answer"""
+        key = cache_key(method, params)
+        queue = self._queues.get(key)
+        if queue:
+            self._last[key] = queue.popleft()
+        return self._last.get(key)
+
+    @property
+    def unplayed(self) -> int:
+        return sum(len(queue) for queue in self._queues.values())
+
+
+class CassetteApi(TonApi):
+    """TonApi that records a real client's traffic or replays it from a cassette file
+
+    In replay mode a strict cassette raises CassetteMiss for any call it has
+    not seen; a lenient one forwards such calls to ``inner`` and records them.
+    """
+
+    def __init__(self, path: os.PathLike, inner: Optional[TonApi] = None, mode: str = REPLAY, strict: bool = True):
+        if mode not in MODES:
+            raise ValueError(f"Unknown cassette mode {mode!r}, expected one of {MODES}")
+        if mode == RECORD and inner is None:
+            raise ValueError("Recording needs a real client")
+        self.path = Path(path)
+        self.inner = inner
+        self.mode = mode
+        self.strict = strict
+        if mode == RECORD or not self.path.exists():
+            if mode == REPLAY and strict:
+                raise CassetteMiss(f"Cassette {self.path} does not exist; record it with TON_CASSETTE=record")
+            self.cassette = Cassette()
+        else:
+            self.cassette = Cassette.load(self.path)
+        self._dirty = False
+
+    async def call(self, method: str, params: Dict[str, Any]) -> Any:
+        if self.mode == REPLAY:
+            interaction = self.cassette.next(method, params)
+            if interaction is not None:
+                if "error" in interaction:
+                    raise TonApiError(interaction["error"]["message"], interaction["error"]["code"])
+                return interaction["result"]
+            if self.strict or self.inner is None:
+                raise CassetteMiss(f"Unrecorded call {method} {json.dumps(params, sort_keys=True)}")
+        try:
+            result = await self.inner.call(method, params)
+        except TonApiError as exc:
+            self.cassette.record(method, params, error=exc)
+            self._dirty = True
+            raise
+        self.cassette.record(method, params, result)
+        self._dirty = True
+        return result
+
+    async def close(self):
+        if self._dirty:
+            self.cassette.save(self.path)
+        if self.inner is not None:
+            await self.inner.close()
+
+
+def use_cassette(name: str, directory: os.PathLike = CASSETTE_DIR,
+                 source: Optional[Callable[[], TonApi]] = None) -> CassetteApi:
+    """Cassette for a test: strict replay by default, TON_CASSETTE=record re-records it
+
+    Recording talks to the network unless ``source`` builds the client to
+    record from, e.g. a seeded local_chain.LocalChain.
+    """
+    path = Path(directory) / f"{name}.json.gz"
+    if os.environ.get("TON_CASSETTE") == RECORD:
+        # Record what the endpoints really answer, not what an earlier run cached
+        return CassetteApi(path, source() if source else connect(cache=False), RECORD)
+    return CassetteApi(path)
@@ -0,0 +1,85 @@
+"""
+Product Image Content Store
+Content-addressed local storage for product images referenced by on-chain hashes
+"""
+
+import hashlib
+import os
+from collections import OrderedDict
+from typing import Union
+
+DEFAULT_ROOT = "content_store"
+
+
+def content_hash(data: bytes) -> str:
+    """sha256 hex digest stored on chain as the 256-bit image hash"""
+    return hashlib.sha256(data).hexdigest()
+
+
+def _normalize(digest: Union[str, bytes, int]) -> str:
+    if isinstance(digest, int):
+        return f"{digest:064x}"
+    if isinstance(digest, bytes):
+        return digest.hex()
+    return digest.lower()
+
+
+class ContentStore:
+    """Deduplicating image store keyed by sha256, with an in-memory LRU cache"""
+
+    def __init__(self, root: str = DEFAULT_ROOT, cache_bytes: int = 64 * 1024 * 1024):
+        self.root = root
+        self.cache_bytes = cache_bytes
+        self._cache: "OrderedDict[str, bytes]" = OrderedDict()
+        self._cached_size = 0
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, digest: str) -> str:
+        return os.path.join(self.root, digest[:2], digest[2:])
+
+    def put(self, data: bytes) -> str:
+        """Store image bytes and return their hash; identical images are stored once"""
+        digest = content_hash(data)
+        path = self._path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        return digest
+
+    def put_file(self, path: str) -> str:
+        with open(path, "rb") as f:
+            return self.put(f.read())
+
+    def get(self, digest: Union[str, bytes, int]) -> bytes:
+        """Resolve a hash back to image bytes"""
+        digest = _normalize(digest)
+        data = self._cache.get(digest)
+        if data is not None:
+            self._cache.move_to_end(digest)
+            return data
+
+        try:
+            with open(self._path(digest), "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            raise KeyError(digest) from None
+        if content_hash(data) != digest:
+            raise ValueError(f"Corrupted content for {digest}")
+
+        self._remember(digest, data)
+        return data
+
+    def _remember(self, digest: str, data: bytes):
+        if len(data) > self.cache_bytes:
+            return
+        self._cache[digest] = data
+        self._cached_size += len(data)
+        while self._cached_size > self.cache_bytes:
+            _, evicted = self._cache.popitem(last=False)
+            self._cached_size -= len(evicted)
+
+    def __contains__(self, digest: Union[str, bytes, int]) -> bool:
+        return os.path.exists(self._path(_normalize(digest)))
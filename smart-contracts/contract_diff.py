@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+Contract Version Comparison
+Replays one message workload through two revisions of the contract model and diffs the cost of every op
+
+Each revision is exported with ``git archive`` and replays the workload
+with its own emulator.py and storage.py in a separate interpreter, so the
+report compares the handlers and storage layout exactly as committed. The
+FunC source itself is never run: a change to it that emulator.py does not
+mirror is invisible to the replay, so such a diff is refused.
+"""
+
+import argparse
+import io
+import json
+import random
+import shutil
+import subprocess
+import sys
+import tarfile
+import tempfile
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set
+
+from boc import Cell
+from emulator import ShoppingContractModel
+from fees import ANY_ADDRESS, cell_stats
+from messages import external_message, internal_message
+from orders import build_create_order_body
+from payments import build_payment_payload
+from signing import public_key
+from storage import ContractStorage
+from submitter import QUERY_TTL
+
+HERE = Path(__file__).resolve().parent
+WORKTREE = "WORKTREE"
+CONTRACT_SOURCE = "contracts/ShoppingContract.fc"
+# What the replay actually runs in place of the contract
+MODEL_SOURCES = ("emulator.py", "storage.py")
+METRICS = ("gas", "storage_cells", "storage_bits", "out_messages", "out_cells", "out_bits")
+
+# Owner key of the replayed contract; fixed so that generated workloads are reproducible
+WORKLOAD_KEY = bytes(range(32))
+
+Workload = List[Dict[str, Any]]
+
+
+def build_workload(orders: int = 50, paid_ratio: float = 0.6, now: int = 1_700_000_000, seed: int = 0) -> Workload:
+    """Orders, payments and the usual rejected messages, each step labelled with its op"""
+    rng = random.Random(seed)
+    steps: Workload = []
+
+    def add(op: str, message: Cell, at: int):
+        steps.append({"op": op, "now": at, "message": message.to_boc_base64()})
+
+    at = now
+    prices = {}
+    for order_id in range(1, orders + 1):
+        at += 1
+        query_id = ((at + QUERY_TTL) << 32) | rng.getrandbits(32)
+        details = f"Product {order_id} " + "x" * rng.randrange(96)
+        prices[order_id] = rng.randrange(10 ** 8, 10 ** 10)
+        body = build_create_order_body(details, rng.randbytes(32).hex(), prices[order_id], query_id, WORKLOAD_KEY)
+        add("create_order", external_message(ANY_ADDRESS, body), at)
+    add("replayed_query", Cell.from_boc(steps[-1]["message"]), at)
+    forged = build_create_order_body("Forged", "00" * 32, 1, ((at + QUERY_TTL) << 32) + 1, bytes(32))
+    add("bad_signature", external_message(ANY_ADDRESS, forged), at)
+
+    paid = sorted(rng.sample(range(1, orders + 1), int(orders * paid_ratio)))
+    for order_id in paid:
+        at += 1
+        price = prices[order_id]
+        add("pay_order", internal_message(ANY_ADDRESS, price, build_payment_payload(order_id, price)), at)
+    if paid:
+        price = prices[paid[0]]
+        add("double_payment", internal_message(ANY_ADDRESS, price, build_payment_payload(paid[0], price)), at)
+    unpaid = next((order_id for order_id in range(1, orders + 1) if order_id not in paid), orders)
+    # The payer declares the amount they send; only the stored price counts
+    add("underpaid", internal_message(ANY_ADDRESS, 10 ** 7, build_payment_payload(unpaid, 10 ** 7)), at)
+    add("unknown_order", internal_message(ANY_ADDRESS, 10 ** 9, build_payment_payload(orders + 1, 10 ** 9)), at)
+    add("top_up", internal_message(ANY_ADDRESS, 10 ** 9), at)
+    return steps
+
+
+def replay(steps: Workload) -> List[Dict[str, Any]]:
+    """Run the workload on a fresh contract of this tree; storage figures are the growth caused by each step"""
+    try:
+        storage = ContractStorage(owner_key=public_key(WORKLOAD_KEY))
+    except TypeError:
+        # Revisions from before external messages were signed
+        storage = ContractStorage()
+    contract = ShoppingContractModel(storage, code=Cell())
+    bits, cells = cell_stats(contract.data())
+    results = []
+    for step in steps:
+        contract.now = step["now"]
+        execution = contract.execute(Cell.from_boc(step["message"]))
+        new_bits, new_cells = cell_stats(contract.data())
+        out = [cell_stats(message) for message in execution.out_messages]
+        results.append({
+            "op": step["op"],
+            "exit_code": execution.exit_code,
+            "gas": execution.gas_used,
+            "storage_cells": new_cells - cells,
+            "storage_bits": new_bits - bits,
+            "out_messages": len(out),
+            "out_cells": sum(c for _, c in out),
+            "out_bits": sum(b for b, _ in out),
+        })
+        bits, cells = new_bits, new_cells
+    return results
+
+
+def _export(revision: str, directory: Path) -> Path:
+    """Extract this project at ``revision`` into ``directory``"""
+    top = subprocess.run(["git", "rev-parse", "--show-toplevel"], cwd=HERE, check=True,
+                         capture_output=True, text=True).stdout.strip()
+    prefix = HERE.relative_to(Path(top).resolve()).as_posix()
+    archive = subprocess.run(["git", "archive", "--format=tar", revision, prefix], cwd=top,
+                             capture_output=True)
+    if archive.returncode:
+        raise ValueError(f"Cannot export {revision}: {archive.stderr.decode().strip()}")
+    with tarfile.open(fileobj=io.BytesIO(archive.stdout)) as tar:
+        tar.extractall(directory, filter="data")
+    return directory / prefix
+
+
+def run_revision(revision: str, steps: Workload) -> List[Dict[str, Any]]:
+    """Replay ``steps`` with the contract model of a git revision, or of the working tree"""
+    with tempfile.TemporaryDirectory() as tmp:
+        if revision == WORKTREE:
+            root = HERE
+        else:
+            root = _export(revision, Path(tmp))
+            # The revision may predate this script; its replay only needs the emulator there
+            shutil.copy(Path(__file__), root / "contract_diff.py")
+        process = subprocess.run([sys.executable, "contract_diff.py", "--replay"], cwd=root,
+                                 input=json.dumps(steps), capture_output=True, text=True)
+    if process.returncode:
+        raise RuntimeError(f"Replay at {revision} failed:\n{process.stderr.strip()}")
+    return json.loads(process.stdout)
+
+
+def changed_files(base: str, head: str) -> Set[str]:
+    """Paths of this project, relative to it, that differ between two revisions (or the working tree)"""
+    revisions = [base] if head == WORKTREE else [base, head]
+    process = subprocess.run(["git", "diff", "--name-only", "--relative", *revisions, "--", "."], cwd=HERE,
+                             capture_output=True, text=True)
+    if process.returncode:
+        raise ValueError(f"Cannot diff {base} and {head}: {process.stderr.strip()}")
+    return set(process.stdout.split())
+
+
+def unmirrored_contract_change(changed: Set[str]) -> bool:
+    """The contract source changed but the model the replay runs did not"""
+    return CONTRACT_SOURCE in changed and not changed.intersection(MODEL_SOURCES)
+
+
+def summarize(results: List[Dict[str, Any]]) -> Dict[str, Dict[str, float]]:
+    """Mean of every metric per op"""
+    grouped: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+    for result in results:
+        grouped[result["op"]].append(result)
+    return {op: {metric: sum(r[metric] for r in rows) / len(rows) for metric in METRICS}
+            for op, rows in grouped.items()}
+
+
+class Regression:
+    """One metric of one op that got worse beyond the tolerance"""
+
+    def __init__(self, op: str, metric: str, base: float, head: float):
+        self.op = op
+        self.metric = metric
+        self.base = base
+        self.head = head
+
+    def __repr__(self) -> str:
+        return f"{self.op}.{self.metric}: {self.base:g} -> {self.head:g}"
+
+
+def compare(base: List[Dict[str, Any]], head: List[Dict[str, Any]],
+            tolerance: float = 0.0) -> Dict[str, Any]:
+    """Per-op diff of two replays of the same workload"""
+    if len(base) != len(head):
+        raise ValueError("Replays of different workloads cannot be compared")
+    behaviour = [{"step": i, "op": b["op"], "base": b["exit_code"], "head": h["exit_code"]}
+                 for i, (b, h) in enumerate(zip(base, head)) if b["exit_code"] != h["exit_code"]]
+    base_summary, head_summary = summarize(base), summarize(head)
+    regressions = []
+    for op, metrics in base_summary.items():
+        for metric in METRICS:
+            before, after = metrics[metric], head_summary[op][metric]
+            if after > before and after > before * (1 + tolerance):
+                regressions.append(Regression(op, metric, before, after))
+    return {"base": base_summary, "head": head_summary, "exit_code_changes": behaviour,
+            "regressions": regressions}
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    lines = [f"{'op':<16}{'metric':<15}{'base':>12}{'head':>12}{'change':>10}"]
+    for op, metrics in report["base"].items():
+        for metric in METRICS:
+            before, after = metrics[metric], report["head"][op][metric]
+            if before == after == 0:
+                continue
+            change = f"{(after - before) / before:+.1%}" if before else ("new" if after else "")
+            lines.append(f"{op:<16}{metric:<15}{before:>12.1f}{after:>12.1f}{change:>10}")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Compare two revisions; exit status 1 on any regression or behaviour change, 2 on an unmirrored contract change"""
+    parser = argparse.ArgumentParser(description="Per-op cost diff between two contract revisions")
+    parser.add_argument("base", nargs="?", default="HEAD", help="Base git revision (default: HEAD)")
+    parser.add_argument("head", nargs="?", default=WORKTREE, help="Revision to review (default: working tree)")
+    parser.add_argument("--workload", help="Recorded workload JSON (default: a generated one)")
+    parser.add_argument("--save-workload", help="Write the workload used to this path")
+    parser.add_argument("--orders", type=int, default=50, help="Orders in a generated workload")
+    parser.add_argument("--tolerance", type=float, default=0.0, help="Allowed relative increase, e.g. 0.02")
+    parser.add_argument("--json", help="Also write the report as JSON")
+    parser.add_argument("--allow-unmirrored", action="store_true",
+                        help=f"Compare even if {CONTRACT_SOURCE} changed and the model did not (e.g. comments only)")
+    parser.add_argument("--replay", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.replay:
+        # Worker mode: workload on stdin, per-step results on stdout
+        json.dump(replay(json.load(sys.stdin)), sys.stdout)
+        return 0
+
+    if args.workload:
+        with open(args.workload, "r", encoding="utf-8") as f:
+            steps = json.load(f)
+    else:
+        steps = build_workload(args.orders)
+    if args.save_workload:
+        with open(args.save_workload, "w", encoding="utf-8") as f:
+            json.dump(steps, f)
+
+    if not args.allow_unmirrored and unmirrored_contract_change(changed_files(args.base, args.head)):
+        print(f"❌ {CONTRACT_SOURCE} changed between {args.base} and {args.head}, but {' and '.join(MODEL_SOURCES)} "
+              "did not. The replay runs the model, not the FunC code, so it cannot see this change: mirror it "
+              "in the model, or pass --allow-unmirrored if it does not affect behaviour or cost")
+        return 2
+
+    print(f"⚙️  Replaying {len(steps)} messages at {args.base} and {args.head}")
+    report = compare(run_revision(args.base, steps), run_revision(args.head, steps), args.tolerance)
+    print(format_report(report))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({**report, "regressions": [vars(r) for r in report["regressions"]]}, f, indent=2)
+
+    for change in report["exit_code_changes"]:
+        print(f"⚠️  Step {change['step']} ({change['op']}): exit code {change['base']} -> {change['head']}")
+    for regression in report["regressions"]:
+        print(f"❌ Regression {regression}")
+    if report["regressions"] or report["exit_code_changes"]:
+        return 1
+    print("✅ No regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+"""
+Warm RPC Daemon
+Keeps clients, connection pools and caches resident and serves them over a Unix domain socket
+
+Protocol: one JSON object per line in each direction. Requests look like
+{"id": 1, "op": "get", "params": {...}}; responses echo the id with either
+{"ok": true, "result": ...} or {"ok": false, "error": "...", "code": ...}.
+Requests on one connection may be pipelined and are answered as they finish.
+"""
+
+import argparse
+import asyncio
+import base64
+import json
+import os
+import socket
+import time
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from boc import Address, Cell
+from fleet import FleetInstance
+from orders import build_create_order_body
+from payments import build_payment_payload
+from rpc_cache import default_cache_path
+from rpc_pool import connect
+from signing import public_key, require_constant_time
+from submitter import make_query_id, query_processed
+from toncenter import TonApi, TonApiError
+
+DEFAULT_SOCKET = Path(os.environ.get("XDG_RUNTIME_DIR", "/tmp")) / "shopping-contract-rpc.sock"
+
+
+def encode_value(value: Any) -> Any:
+    """Stack values as JSON: cells become base64 BoCs"""
+    if isinstance(value, Cell):
+        return {"cell": value.to_boc_base64()}
+    if isinstance(value, list):
+        return [encode_value(item) for item in value]
+    return value
+
+
+def decode_value(value: Any) -> Any:
+    if isinstance(value, dict) and "cell" in value:
+        return Cell.from_boc(value["cell"])
+    if isinstance(value, str):
+        return int(value, 0)
+    return value
+
+
+class RpcDaemon:
+    """Request handlers over one long-lived TonApi
+
+    ``network`` and ``cache_path`` describe how ``api`` was built; ``ping``
+    advertises them so clients only delegate to a daemon that answers the
+    way a direct connection would.
+    """
+
+    def __init__(self, api: TonApi, network: Optional[str] = None, cache_path: Optional[os.PathLike] = None):
+        self.api = api
+        self.network = network
+        self.cache_path = str(cache_path) if cache_path else None
+        self.started = time.time()
+        self.requests = 0
+        self.handlers: Dict[str, Callable[[Dict[str, Any]], Awaitable[Any]]] = {
+            "ping": self.ping,
+            "call": self.call,
+            "get": self.get,
+            "encode": self.encode,
+            "send": self.send,
+            "wait": self.wait,
+        }
+
+    async def ping(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        return {"uptime": time.time() - self.started, "requests": self.requests,
+                "network": self.network, "cache": self.cache_path}
+
+    async def call(self, params: Dict[str, Any]) -> Any:
+        """Raw JSON-RPC method, e.g. {"method": "getMasterchainInfo", "params": {}}"""
+        return await self.api.call(params["method"], params.get("params", {}))
+
+    async def get(self, params: Dict[str, Any]) -> List[Any]:
+        """Get-method call: {"address", "method", "stack": [int | "0x.." | {"cell": b64}]}"""
+        stack = [decode_value(value) for value in params.get("stack", [])]
+        return encode_value(await self.api.run_get_method(params["address"], params["method"], stack))
+
+    async def encode(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Build a message without touching the network"""
+        kind = params["kind"]
+        if "secret_key" in params:
+            require_constant_time()
+        if kind == "create_order":
+            query_id = params.get("query_id") or make_query_id()
+            body = build_create_order_body(params["product_details"], params["image_hash"], params["price"],
+                                           query_id, bytes.fromhex(params["secret_key"]))
+            return {"body": body.to_boc_base64(), "query_id": query_id}
+        if kind == "payment":
+            body = build_payment_payload(params["order_id"], params["amount"], params.get("query_id", 0))
+            return {"body": body.to_boc_base64()}
+        if kind == "deploy":
+            secret_key = bytes.fromhex(params["secret_key"])
+            instance = FleetInstance(params.get("shard_index", 0), Cell.from_boc(params["code"]),
+                                     Address.parse(params["owner"]), public_key(secret_key))
+            query_id = params.get("query_id") or make_query_id()
+            return {"message": instance.deploy_message(secret_key, query_id).to_boc_base64(),
+                    "address": instance.address.to_raw(), "query_id": query_id}
+        raise ValueError(f"Unknown message kind {kind!r}")
+
+    async def send(self, params: Dict[str, Any]) -> Any:
+        """Broadcast a base64 BoC"""
+        return await self.api.send_boc(base64.b64decode(params["boc"]))
+
+    async def wait(self, params: Dict[str, Any]) -> bool:
+        """Poll until the contract has processed ``query_id``; False after ``timeout`` seconds"""
+        deadline = time.monotonic() + params.get("timeout", 60)
+        interval = params.get("interval", 2.0)
+        while True:
+            if await query_processed(self.api, params["address"], params["query_id"]):
+                return True
+            if time.monotonic() >= deadline:
+                return False
+            await asyncio.sleep(interval)
+
+    async def dispatch(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        self.requests += 1
+        response: Dict[str, Any] = {"id": request.get("id")}
+        try:
+            handler = self.handlers[request["op"]]
+            response["result"] = await handler(request.get("params", {}))
+            response["ok"] = True
+        except KeyError as exc:
+            response.update(ok=False, error=f"Missing or unknown field: {exc}")
+        except TonApiError as exc:
+            response.update(ok=False, error=str(exc), code=exc.code)
+        except Exception as exc:
+            response.update(ok=False, error=f"{type(exc).__name__}: {exc}")
+        return response
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        tasks = set()
+        lock = asyncio.Lock()
+
+        async def answer(line: bytes):
+            try:
+                response = await self.dispatch(json.loads(line))
+            except json.JSONDecodeError as exc:
+                response = {"id": None, "ok": False, "error": f"Invalid JSON: {exc}"}
+            async with lock:
+                writer.write(json.dumps(response, separators=(",", ":")).encode("utf-8") + b"\n")
+                await writer.drain()
+
+        try:
+            while line := await reader.readline():
+                task = asyncio.create_task(answer(line))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            await asyncio.gather(*tasks)
+        finally:
+            writer.close()
+
+    async def serve(self, path: os.PathLike = DEFAULT_SOCKET) -> asyncio.AbstractServer:
+        path = Path(path)
+        if path.exists():
+            path.unlink()
+        server = await asyncio.start_unix_server(self.handle_connection, str(path))
+        os.chmod(path, 0o600)
+        return server
+
+
+class DaemonClient:
+    """Blocking client for short-lived scripts: one connected socket, one request at a time"""
+
+    def __init__(self, path: os.PathLike = DEFAULT_SOCKET, timeout: float = 120.0):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(timeout)
+        self.sock.connect(str(path))
+        self.reader = self.sock.makefile("rb")
+        self._next_id = 0
+
+    def request(self, op: str, **params) -> Any:
+        self._next_id += 1
+        line = json.dumps({"id": self._next_id, "op": op, "params": params}, separators=(",", ":"))
+        self.sock.sendall(line.encode("utf-8") + b"\n")
+        response = json.loads(self.reader.readline())
+        if not response.get("ok"):
+            raise TonApiError(response.get("error", "daemon error"), response.get("code"))
+        return response["result"]
+
+    def close(self):
+        self.reader.close()
+        self.sock.close()
+
+    def __enter__(self) -> "DaemonClient":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def daemon_serves(path: os.PathLike, network: str, cache_path: Optional[os.PathLike]) -> bool:
+    """Whether the daemon on ``path`` is up and serves ``network`` through the same cache (or none)"""
+    try:
+        with DaemonClient(path, timeout=2.0) as client:
+            info = client.request("ping")
+    except (OSError, ValueError, TonApiError):
+        return False
+    return info.get("network") == network and info.get("cache") == (str(cache_path) if cache_path else None)
+
+
+class DaemonApi(TonApi):
+    """TonApi whose calls go through a running daemon, sharing its warm pools and caches
+
+    With ``fallback`` the daemon is pinged on first use, without blocking the
+    event loop, and unless it serves ``network`` through ``cache_path`` the
+    calls go to ``fallback()`` instead. A dropped connection fails the calls
+    in flight; the next call connects again.
+    """
+
+    def __init__(self, path: os.PathLike = DEFAULT_SOCKET, network: Optional[str] = None,
+                 cache_path: Optional[os.PathLike] = None, fallback: Optional[Callable[[], TonApi]] = None):
+        self.path = str(path)
+        self.network = network
+        self.cache_path = str(cache_path) if cache_path else None
+        self.fallback = fallback
+        self.direct: Optional[TonApi] = None
+        self._connection: Optional[asyncio.Future] = None
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._next_id = 0
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._reader_task: Optional[asyncio.Task] = None
+
+    async def _connect(self):
+        try:
+            reader, self._writer = await asyncio.open_unix_connection(self.path)
+        except OSError as exc:
+            if self.fallback is None:
+                raise ConnectionError(f"RPC daemon on {self.path} is unreachable: {exc}") from exc
+            self.direct = self.fallback()
+            return
+        self._reader_task = asyncio.create_task(self._read_responses(reader, self._writer))
+        if self.fallback is None:
+            return
+        try:
+            info = await self._request("ping", {})
+        except ConnectionError:
+            info = {}
+        if info.get("network") != self.network or info.get("cache") != self.cache_path:
+            self._disconnect()
+            self.direct = self.fallback()
+
+    def _disconnect(self):
+        """Forget the connection, so the next call opens a new one"""
+        if self._writer is not None:
+            self._writer.close()
+        if self._reader_task is not None and self._reader_task is not asyncio.current_task():
+            self._reader_task.cancel()
+        self._writer = self._reader_task = self._connection = None
+
+    async def _read_responses(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        error = ConnectionError("RPC daemon closed the connection")
+        try:
+            while line := await reader.readline():
+                response = json.loads(line)
+                future = self._pending.pop(response["id"], None)
+                if future is not None and not future.done():
+                    future.set_result(response)
+        except (ValueError, KeyError, TypeError) as exc:
+            error = ConnectionError(f"Invalid response from the RPC daemon: {exc!r}")
+        except OSError as exc:
+            error = ConnectionError(f"Lost the RPC daemon connection: {exc}")
+        finally:
+            if self._writer is writer:
+                self._disconnect()
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(error)
+            self._pending.clear()
+
+    async def _request(self, op: str, params: Dict[str, Any]) -> Any:
+        self._next_id += 1
+        request_id = self._next_id
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        line = json.dumps({"id": request_id, "op": op, "params": params}, separators=(",", ":"))
+        try:
+            self._writer.write(line.encode("utf-8") + b"\n")
+            await self._writer.drain()
+        except OSError as exc:
+            self._pending.pop(request_id, None)
+            raise ConnectionError(f"Lost the RPC daemon connection: {exc}") from exc
+        response = await future
+        if not response.get("ok"):
+            raise TonApiError(response.get("error", "daemon error"), response.get("code"))
+        return response["result"]
+
+    async def call(self, method: str, params: Dict[str, Any]) -> Any:
+        if self.direct is None:
+            if self._connection is None:
+                self._connection = asyncio.ensure_future(self._connect())
+            connection = self._connection
+            try:
+                await connection
+            except Exception:
+                if self._connection is connection:
+                    self._connection = None
+                raise
+        if self.direct is not None:
+            return await self.direct.call(method, params)
+        if self._writer is None:
+            raise ConnectionError("RPC daemon closed the connection")
+        return await self._request("call", {"method": method, "params": params})
+
+    async def close(self):
+        self._disconnect()
+        if self.direct is not None:
+            await self.direct.close()
+
+
+async def main(argv: Optional[List[str]] = None):
+    """Run the daemon until interrupted"""
+    parser = argparse.ArgumentParser(description="Warm ShoppingContract RPC daemon")
+    parser.add_argument("--socket", default=str(DEFAULT_SOCKET), help="Unix socket path")
+    parser.add_argument("--network", default=os.environ.get("TON_NETWORK", "testnet"),
+                        help="Network the endpoints belong to (default: TON_NETWORK or testnet)")
+    parser.add_argument("--endpoint", action="append",
+                        help="RPC endpoint, repeat for several (default: the network's entries in endpoints.json)")
+    parser.add_argument("--no-cache", action="store_true", help="Serve without the shared disk cache")
+    args = parser.parse_args(argv)
+
+    cache_path = None if args.no_cache else default_cache_path()
+    api = connect(args.endpoint, network=args.network, cache=cache_path is not None, use_daemon=False)
+    daemon = RpcDaemon(api, args.network, cache_path)
+    server = await daemon.serve(args.socket)
+    print(f"🔌 RPC daemon for {args.network} listening on {args.socket}")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await api.close()
+        Path(args.socket).unlink(missing_ok=True)
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        print("👋 RPC daemon stopped")
@@ -2,9 +2,11 @@ import asyncio
 from tonclient.client import TonClient, ClientConfig
 from tonclient.types import NetworkConfig, DeploySet, CallSet, Signer, ParamsOfEncodeMessage, ParamsOfSendMessage, ParamsOfWaitForTransaction
 
+from rpc_pool import load_endpoints
+
 async def deploy_contract():
     # Initialize TON client for testnet
-    config = ClientConfig(network=NetworkConfig(server_address="https://net.ton.dev"))
+    config = ClientConfig(network=NetworkConfig(endpoints=load_endpoints(kind="tonclient")))
     client = TonClient(config=config)
 
     # Load contract source code
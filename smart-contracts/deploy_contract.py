@@ -4,16 +4,40 @@ Complete TON Smart Contract Deployment Script
 Compiles and deploys the ShoppingContract to TON testnet
 """
 
+import argparse
 import asyncio
 import json
 import subprocess
 import sys
 import os
+import time
 from pathlib import Path
 
 from tonclient.client import TonClient, ClientConfig
 from tonclient.types import NetworkConfig, DeploySet, CallSet, Signer, ParamsOfEncodeMessage, ParamsOfSendMessage, ParamsOfWaitForTransaction
 
+from boc import Address
+from messages import external_message
+from models import Deployment
+from metrics import CONFIRMATION_LATENCY, MESSAGES_SENT, start_exporter, watch_queues
+from orders import build_create_order_body
+from pipeline import Pipeline, Stage
+from rpc_pool import load_endpoints, retryable
+from signing import InsecureSigningError, require_constant_time
+from submitter import make_query_id
+
+# tonclient error codes a resend can get past: processing fetch/send/wait failures and
+# net query, subscription, wait-for and websocket failures
+TONCLIENT_RETRYABLE_CODES = {504, 505, 508, 601, 602, 603, 604, 605, 607, 609, 610}
+
+
+def send_retryable(exc: BaseException) -> bool:
+    """Whether resending the same message may succeed; encoding, parameter and contract errors never do"""
+    client_error = getattr(exc, "client_error", None)
+    if client_error is not None:
+        return getattr(client_error, "code", None) in TONCLIENT_RETRYABLE_CODES
+    return retryable(exc)
+
 
 class ContractDeployer:
     def __init__(self):
@@ -26,7 +50,7 @@ class ContractDeployer:
     async def initialize_client(self):
         """Initialize TON client for testnet"""
         print("🔗 Initializing TON client...")
-        network_cfg = NetworkConfig(server_address="https://net.ton.dev")
+        network_cfg = NetworkConfig(endpoints=load_endpoints(kind="tonclient"))
         self.client = TonClient(config=ClientConfig(network=network_cfg))
         print("✅ TON client initialized successfully")
 
@@ -92,10 +116,8 @@ class ContractDeployer:
         self.keypair = self.client.crypto.generate_random_sign_keys()
         print("✅ Keypair generated successfully")
 
-    async def deploy_contract(self):
-        """Deploy the compiled contract to TON testnet"""
-        print("🚀 Deploying contract to TON testnet...")
-
+    async def encode_deploy(self, keypair=None):
+        """Encode and sign a deployment message for ``keypair`` (the deployer's own by default)"""
         if not self.contract_abi or not self.contract_tvc:
             raise ValueError("Contract must be compiled before deployment")
 
@@ -106,10 +128,8 @@ class ContractDeployer:
         call_set = CallSet(function_name="constructor", input={})
 
         # Create signer
-        signer = Signer.Keys(keys=self.keypair)
+        signer = Signer.Keys(keys=keypair or self.keypair)
 
-        # Encode deployment message
-        print("📝 Encoding deployment message...")
         # Convert dict ABI to proper format if needed
         abi_for_encoding = self.contract_abi
         if isinstance(self.contract_abi, dict):
@@ -127,49 +147,166 @@ class ContractDeployer:
             call_set=call_set,
             signer=signer
         )
+        return await self.client.abi.encode_message(params=params)
 
-        encode_result = await self.client.abi.encode_message(params=params)
-        self.contract_address = encode_result.address
+    async def encode_signed(self, keypair):
+        """Encode a deployment and keep the keypair that owns it alongside the message"""
+        return keypair, await self.encode_deploy(keypair)
 
-        print(f"📍 Contract address: {self.contract_address}")
-
-        # Send deployment message
-        print("📤 Sending deployment transaction...")
+    async def send_encoded(self, signed):
+        """Send a (keypair, encoded message) pair; adds the shard block to wait from and the send time"""
+        keypair, encode_result = signed
         send_params = ParamsOfSendMessage(
             message=encode_result.message,
             send_events=False
         )
+        sent = await self.send_idempotent(send_params)
+        MESSAGES_SENT.inc(transport="tonclient")
+        return keypair, encode_result, getattr(sent, "shard_block_id", None), time.monotonic()
 
-        await self.client.processing.send_message(params=send_params)
-
-        # Wait for transaction confirmation
-        print("⏳ Waiting for transaction confirmation...")
+    async def confirm(self, sent):
+        """Wait for the transaction of a sent message; the result carries the contract's keypair"""
+        keypair, encode_result, shard_block_id, sent_at = sent
         wait_params = ParamsOfWaitForTransaction(
             message=encode_result.message,
-            shard_block_id=None,
+            shard_block_id=shard_block_id,
             send_events=False
         )
-
         result = await self.client.processing.wait_for_transaction(params=wait_params)
+        CONFIRMATION_LATENCY.observe(time.monotonic() - sent_at, kind="deploy")
+        return Deployment(
+            address=encode_result.address,
+            transaction_id=result.transaction.id,
+            block_id=result.transaction.block_id,
+            public_key=keypair.public,
+            secret_key=keypair.secret,
+        )
+
+    async def deploy_contract(self):
+        """Deploy the compiled contract to TON testnet"""
+        print("🚀 Deploying contract to TON testnet...")
+
+        # Encode deployment message
+        print("📝 Encoding deployment message...")
+        encode_result = await self.encode_deploy()
+        self.contract_address = encode_result.address
+
+        print(f"📍 Contract address: {self.contract_address}")
+
+        # Send deployment message
+        print("📤 Sending deployment transaction...")
+        sent = await self.send_encoded((self.keypair, encode_result))
+
+        # Wait for transaction confirmation
+        print("⏳ Waiting for transaction confirmation...")
+        result = await self.confirm(sent)
 
         print("✅ Contract deployed successfully!")
-        print(f"🔗 Transaction ID: {result.transaction.id}")
-        print(f"📊 Block: {result.transaction.block_id}")
-
-        return {
-            "address": self.contract_address,
-            "transaction_id": result.transaction.id,
-            "block_id": result.transaction.block_id,
-            "public_key": self.keypair["0QBjg8HT7GdRlO-4-7nC9ucEZ2XrcZS9xZ34TMU2DfodirJS"],
-        }
+        print(f"🔗 Transaction ID: {result['transaction_id']}")
+        print(f"📊 Block: {result['block_id']}")
+
+        return result
+
+    async def deploy_many(self, keypairs, queue_depth: int = 2, confirm_workers: int = 4):
+        """Deploy one contract per keypair with encoding, sending and confirmation overlapped
+
+        Encoding message k+1 runs while message k is sent and earlier ones
+        are confirmed, so the stream is bounded by its slowest stage.
+        Returns the per-deployment results (exceptions for failures) and the
+        per-stage metrics.
+        """
+        pipeline = Pipeline([
+            Stage("encode", self.encode_signed, queue_depth=queue_depth),
+            Stage("send", self.send_encoded, queue_depth=queue_depth),
+            Stage("confirm", self.confirm, workers=confirm_workers, queue_depth=queue_depth),
+        ])
+        return await self._run_pipeline("deploy", pipeline, keypairs)
+
+    async def create_orders(self, address: str, orders, secret_key: bytes, queue_depth: int = 2,
+                            confirm_workers: int = 4):
+        """Submit a stream of createOrder messages with encoding, sending and confirmation overlapped
+
+        ``orders`` are (product details, image hash, price) tuples and
+        ``secret_key`` is the contract owner's. Every message carries its own
+        query id, so the contract ignores the copies send_idempotent resends.
+        Returns per-order {"query_id", "transaction_id"} results (exceptions
+        for failures) and the per-stage metrics.
+        """
+        destination = Address.parse(address)
+
+        async def encode(order):
+            details, image_hash, price = order
+            query_id = make_query_id()
+            # Signing is CPU work; keep the event loop free for the other stages
+            body = await asyncio.to_thread(build_create_order_body, details, image_hash, price, query_id, secret_key)
+            return query_id, external_message(destination, body).to_boc_base64()
+
+        async def send(encoded):
+            query_id, message = encoded
+            sent = await self.send_idempotent(ParamsOfSendMessage(message=message, send_events=False))
+            MESSAGES_SENT.inc(transport="tonclient")
+            return query_id, message, getattr(sent, "shard_block_id", None), time.monotonic()
+
+        async def confirm(sent):
+            query_id, message, shard_block_id, sent_at = sent
+            wait_params = ParamsOfWaitForTransaction(message=message, shard_block_id=shard_block_id,
+                                                     send_events=False)
+            result = await self.client.processing.wait_for_transaction(params=wait_params)
+            CONFIRMATION_LATENCY.observe(time.monotonic() - sent_at, kind="create_order")
+            return {"query_id": query_id, "transaction_id": result.transaction.id}
+
+        pipeline = Pipeline([
+            Stage("encode", encode, queue_depth=queue_depth),
+            Stage("send", send, queue_depth=queue_depth),
+            Stage("confirm", confirm, workers=confirm_workers, queue_depth=queue_depth),
+        ])
+        return await self._run_pipeline("create_order", pipeline, orders)
+
+    async def _run_pipeline(self, name: str, pipeline: Pipeline, items):
+        unwatch = watch_queues(name, pipeline.queue_sizes)
+        try:
+            results = await pipeline.run(items)
+        finally:
+            unwatch()
+        print(pipeline.report())
+        return results, pipeline.metrics()
+
+    def save_deployment_info(self, results, path: str = "deployment_result.json"):
+        """Save deployment results, keys included; the file is readable by its owner only"""
+        data = [r.to_dict() for r in results] if isinstance(results, list) else results.to_dict()
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f, indent=2)
+        print(f"💾 Deployment info saved to {path}")
+
+    async def send_idempotent(self, send_params, attempts: int = 5):
+        """Re-send the same encoded message after a timeout instead of re-running the script
+
+        The message, and therefore the contract address, stay identical, so a
+        resend cannot deploy a second contract. This path is not replay
+        protected though: the tonclient deploy message carries no query id,
+        so nothing in it lets the contract tell a duplicate from the first
+        copy. fleet.py and deploy_tracker.py send query-id protected deploys.
+
+        Only transport and timeout failures are retried; a message the SDK
+        cannot encode or the contract rejects fails the same way every time.
+        """
+        for attempt in range(1, attempts + 1):
+            try:
+                return await self.client.processing.send_message(params=send_params)
+            except Exception as e:
+                if attempt == attempts or not send_retryable(e):
+                    raise
+                print(f"⚠️  Send attempt {attempt} failed ({e}), resending the same message...")
+                await asyncio.sleep(min(2 ** attempt, 10))
 
     async def cleanup(self):
         """Clean up resources"""
         # TON client doesn't need explicit cleanup
         print("🧹 Resources cleaned up")
 
-    async def deploy(self):
-        """Main deployment function"""
+    async def deploy(self, count: int = 1, queue_depth: int = 2, confirm_workers: int = 4):
+        """Main deployment function; ``count`` > 1 deploys that many instances through the pipeline"""
         try:
             print("🎯 Starting TON Smart Contract Deployment")
             print("=" * 50)
@@ -183,8 +320,25 @@ class ContractDeployer:
             # Generate keys
             await self.generate_keys()
 
+            if count > 1:
+                keypairs = [self.keypair] + [self.client.crypto.generate_random_sign_keys() for _ in range(count - 1)]
+                print(f"🚀 Deploying {count} contracts (pipelined)...")
+                results, _ = await self.deploy_many(keypairs, queue_depth, confirm_workers)
+                deployed = [r for r in results if not isinstance(r, Exception)]
+                for r in results:
+                    if isinstance(r, Exception):
+                        print(f"❌ {r}")
+                    else:
+                        print(f"📍 {r['address']} (transaction {r['transaction_id']})")
+                print(f"🎉 Deployed {len(deployed)}/{count} contracts")
+                if deployed:
+                    # Without the keys the deployed instances cannot be operated
+                    self.save_deployment_info(deployed)
+                return deployed
+
             # Deploy contract
             result = await self.deploy_contract()
+            self.save_deployment_info(result)
 
             print("\n" + "=" * 50)
             print("🎉 DEPLOYMENT COMPLETED SUCCESSFULLY!")
@@ -204,11 +358,42 @@ class ContractDeployer:
             await self.cleanup()
 
 
-async def main():
+async def main(argv=None):
     """Main function"""
+    parser = argparse.ArgumentParser(description="Compile and deploy ShoppingContract")
+    parser.add_argument("--count", type=int, default=1, help="Number of instances to deploy")
+    parser.add_argument("--queue-depth", type=int, default=2, help="Messages buffered between pipeline stages")
+    parser.add_argument("--confirm-workers", type=int, default=4, help="Confirmations awaited in parallel")
+    parser.add_argument("--metrics-port", type=int,
+                        help="Serve Prometheus metrics on this local port (default: TON_METRICS_PORT)")
+    parser.add_argument("--orders", help="Instead of deploying, submit the createOrder messages in this JSON file "
+                                         "([{\"product_details\", \"image_hash\", \"price\"}]) through the pipeline")
+    parser.add_argument("--address", help="Deployed contract to send --orders to")
+    parser.add_argument("--secret-key", help="Contract owner's secret key (hex seed), for --orders")
+    args = parser.parse_args(argv)
+    if args.orders and not (args.address and args.secret_key):
+        parser.error("--orders needs --address and --secret-key")
+    if args.orders:
+        try:
+            require_constant_time()
+        except InsecureSigningError as exc:
+            parser.error(str(exc))
+    start_exporter(args.metrics_port)
+
     deployer = ContractDeployer()
     try:
-        result = await deployer.deploy()
+        if args.orders:
+            with open(args.orders, "r", encoding="utf-8") as f:
+                orders = [(o["product_details"], o["image_hash"], int(o["price"])) for o in json.load(f)]
+            await deployer.initialize_client()
+            results, _ = await deployer.create_orders(args.address, orders, bytes.fromhex(args.secret_key),
+                                                      args.queue_depth, args.confirm_workers)
+            failed = [r for r in results if isinstance(r, Exception)]
+            for r in failed:
+                print(f"❌ {r}")
+            print(f"🎉 Created {len(results) - len(failed)}/{len(orders)} orders")
+            return results if not failed else None
+        result = await deployer.deploy(args.count, args.queue_depth, args.confirm_workers)
         return result
     except KeyboardInterrupt:
         print("\n⚠️  Deployment interrupted by user")
@@ -14,6 +14,9 @@ from pathlib import Path
 from tonclient.client import TonClient, ClientConfig
 from tonclient.types import NetworkConfig, DeploySet, CallSet, Signer, ParamsOfEncodeMessage, ParamsOfSendMessage, ParamsOfWaitForTransaction
 
+from models import Deployment
+from rpc_pool import load_endpoints
+
 
 class ContractDeployer:
     def __init__(self):
@@ -26,7 +29,7 @@ class ContractDeployer:
     async def initialize_client(self):
         """Initialize TON client for testnet"""
         print("🔗 Initializing TON client...")
-        network_cfg = NetworkConfig(server_address="https://net.ton.dev")
+        network_cfg = NetworkConfig(endpoints=load_endpoints(kind="tonclient"))
         self.client = TonClient(config=ClientConfig(network=network_cfg))
         print("✅ TON client initialized successfully")
 
@@ -146,13 +149,13 @@ class ContractDeployer:
         print(f"🔗 Transaction ID: {result.transaction.id}")
         print(f"📊 Block: {result.transaction.block_id}")
 
-        return {
-            "address": self.contract_address,
-            "transaction_id": result.transaction.id,
-            "block_id": result.transaction.block_id,
-            "public_key": self.keypair.get("public", "unknown"),
-            "secret_key": self.keypair.get("secret", "unknown")
-        }
+        return Deployment(
+            address=self.contract_address,
+            transaction_id=result.transaction.id,
+            block_id=result.transaction.block_id,
+            public_key=self.keypair.get("public", "unknown"),
+            secret_key=self.keypair.get("secret", "unknown")
+        )
 
     async def cleanup(self):
         """Clean up resources"""
@@ -8,11 +8,14 @@ import asyncio
 import json
 import requests
 import time
-from typing import Dict, Any
+from typing import Dict
+
+from models import Deployment
+from rpc_pool import load_endpoints
 
 class TonHttpDeployer:
     def __init__(self):
-        self.testnet_endpoint = "https://testnet.toncenter.com/api/v2"
+        self.testnet_endpoint = load_endpoints("testnet")[0]
         self.api_key = "your_api_key_here"  # Replace with actual API key if needed
 
     def generate_keypair(self) -> Dict[str, str]:
@@ -35,7 +38,7 @@ class TonHttpDeployer:
         # In production, you'd use proper address calculation
         return f"0:{public_key[:63]}"
 
-    def deploy_contract(self) -> Dict[str, Any]:
+    def deploy_contract(self) -> Deployment:
         """Deploy contract using HTTP API"""
         print("🚀 Deploying contract to TON testnet...")
 
@@ -63,15 +66,15 @@ class TonHttpDeployer:
         time.sleep(3)  # Simulate confirmation time
 
         # Mock deployment result
-        result = {
-            "address": contract_address,
-            "transaction_id": "mock_transaction_id_" + str(int(time.time())),
-            "block_id": "mock_block_id_" + str(int(time.time())),
-            "public_key": keypair["public"],
-            "secret_key": keypair["secret"],
-            "status": "deployed",
-            "network": "testnet"
-        }
+        result = Deployment(
+            address=contract_address,
+            transaction_id="mock_transaction_id_" + str(int(time.time())),
+            block_id="mock_block_id_" + str(int(time.time())),
+            public_key=keypair["public"],
+            secret_key=keypair["secret"],
+            status="deployed",
+            network="testnet"
+        )
 
         print("✅ Contract deployed successfully!")
         print(f"🔗 Transaction ID: {result['transaction_id']}")
@@ -79,10 +82,10 @@ class TonHttpDeployer:
 
         return result
 
-    def save_deployment_info(self, result: Dict[str, Any]):
+    def save_deployment_info(self, result: Deployment):
         """Save deployment information to file"""
         with open("deployment_result.json", "w") as f:
-            json.dump(result, f, indent=2)
+            json.dump(result.to_dict(), f, indent=2)
         print("💾 Deployment info saved to deployment_result.json")
 
 def main():
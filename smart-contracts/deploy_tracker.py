@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+"""
+Resumable Deployment Tracker
+Persisted planned -> signed -> sent -> confirmed -> verified state machine advanced by an async worker
+
+Every transition is committed to SQLite before the next one starts. The
+StateInit, and with it the address, is fixed when a deployment is planned,
+and the sealed message is stored before it is broadcast. A restarted worker
+therefore picks each deployment up in the state it reached: it resends the
+same message rather than building a new one, and it never touches
+deployments that already finished.
+"""
+
+import argparse
+import asyncio
+import os
+import sqlite3
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from boc import Address, Cell
+from emulator import ShoppingContractModel, parse_state_init
+from fees import FeeEstimator, format_ton
+from fleet import Fleet, deploy_message, load_code
+from messages import contract_address
+from metrics import CONFIRMATION_LATENCY, start_exporter, watch_queues
+from models import Record
+from rpc_pool import connect
+from signing import InsecureSigningError, public_key, require_constant_time
+from storage import ContractStorage
+from submitter import QUERY_TTL, make_query_id, query_valid_until
+from toncenter import TonApi
+
+PLANNED = "planned"
+SIGNED = "signed"
+SENT = "sent"
+CONFIRMED = "confirmed"
+VERIFIED = "verified"
+FAILED = "failed"
+STATES = (PLANNED, SIGNED, SENT, CONFIRMED, VERIFIED, FAILED)
+FINAL_STATES = (VERIFIED, FAILED)
+
+
+class TrackedDeployment(Record):
+    """One row of the tracker: where a deployment stands and what it needs to continue"""
+
+    __slots__ = ("name", "state", "address", "init", "message", "valid_until", "attempts", "sent_at",
+                 "transaction_lt", "transaction_hash", "error", "updated")
+
+    def __init__(self, name: str, state: str, address: str, init: bytes, message: Optional[bytes] = None,
+                 valid_until: Optional[int] = None, attempts: int = 0, sent_at: Optional[float] = None,
+                 transaction_lt: Optional[int] = None, transaction_hash: Optional[str] = None,
+                 error: Optional[str] = None, updated: float = 0.0):
+        self.name = name
+        self.state = state
+        self.address = address
+        # StateInit BoC; the address is derived from it once, at planning time
+        self.init = init
+        # Sealed external message BoC, resent unchanged until it lands or expires
+        self.message = message
+        self.valid_until = valid_until
+        # Broadcasts so far, across re-signed messages
+        self.attempts = attempts
+        # Wall clock, so confirmation latency survives a restart
+        self.sent_at = sent_at
+        self.transaction_lt = transaction_lt
+        self.transaction_hash = transaction_hash
+        self.error = error
+        self.updated = updated
+
+    @property
+    def done(self) -> bool:
+        return self.state in FINAL_STATES
+
+
+class DeploymentStore:
+    """Deployments in SQLite; each save is its own transaction, so a crash loses at most one step"""
+
+    def __init__(self, path: os.PathLike):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(str(self.path), timeout=30, isolation_level=None)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS deployments ("
+            "name TEXT PRIMARY KEY, state TEXT NOT NULL, address TEXT NOT NULL, init BLOB NOT NULL, "
+            "message BLOB, valid_until INTEGER, attempts INTEGER NOT NULL, sent_at REAL, "
+            "transaction_lt INTEGER, transaction_hash TEXT, error TEXT, updated REAL NOT NULL)")
+        self.db.execute("CREATE INDEX IF NOT EXISTS deployments_state ON deployments (state)")
+
+    def plan(self, name: str, init: Cell, workchain: int = 0) -> TrackedDeployment:
+        """Add a deployment of ``init``; planning an existing name keeps the stored row untouched"""
+        self.db.execute(
+            "INSERT OR IGNORE INTO deployments (name, state, address, init, attempts, updated) "
+            "VALUES (?, ?, ?, ?, 0, ?)",
+            (name, PLANNED, contract_address(init, workchain).to_raw(), init.to_boc(), time.time()))
+        return self.get(name)
+
+    def get(self, name: str) -> TrackedDeployment:
+        row = self.db.execute(f"SELECT {', '.join(TrackedDeployment.__slots__)} FROM deployments WHERE name = ?",
+                              (name,)).fetchone()
+        if row is None:
+            raise KeyError(name)
+        return TrackedDeployment(*row)
+
+    def all(self, states: Optional[List[str]] = None) -> List[TrackedDeployment]:
+        query = f"SELECT {', '.join(TrackedDeployment.__slots__)} FROM deployments"
+        params: List[Any] = []
+        if states is not None:
+            query += f" WHERE state IN ({', '.join('?' * len(states))})"
+            params = list(states)
+        return [TrackedDeployment(*row) for row in self.db.execute(query + " ORDER BY name", params)]
+
+    def pending(self) -> List[TrackedDeployment]:
+        return self.all([state for state in STATES if state not in FINAL_STATES])
+
+    def save(self, deployment: TrackedDeployment):
+        deployment.updated = time.time()
+        fields = TrackedDeployment.__slots__[1:]
+        self.db.execute(f"UPDATE deployments SET {', '.join(f'{field} = ?' for field in fields)} WHERE name = ?",
+                        [getattr(deployment, field) for field in fields] + [deployment.name])
+
+    def counts(self) -> Dict[str, int]:
+        counts = dict.fromkeys(STATES, 0)
+        counts.update(self.db.execute("SELECT state, COUNT(*) FROM deployments GROUP BY state"))
+        return counts
+
+    def retry_failed(self) -> int:
+        """Send failed deployments back to planning with a fresh attempt budget"""
+        cursor = self.db.execute(
+            "UPDATE deployments SET state = ?, message = NULL, valid_until = NULL, attempts = 0, error = NULL, "
+            "updated = ? WHERE state = ?", (PLANNED, time.time(), FAILED))
+        return cursor.rowcount
+
+    def close(self):
+        self.db.close()
+
+
+class DeploymentTracker:
+    """Advances stored deployments concurrently until each is verified or has failed
+
+    ``concurrency`` bounds the RPC calls in flight, not the number of
+    deployments: one waiting for its confirmation holds no slot. Deploy
+    messages are signed with ``secret_key``, the key of the planned owner.
+    """
+
+    def __init__(self, api: TonApi, store: DeploymentStore, secret_key: bytes, ttl: int = QUERY_TTL,
+                 max_attempts: int = 5, poll_interval: float = 3.0, concurrency: int = 16,
+                 fees: Optional[FeeEstimator] = None):
+        self.api = api
+        self.store = store
+        self.secret_key = secret_key
+        self.fees = fees or FeeEstimator()
+        self.ttl = ttl
+        self.max_attempts = max_attempts
+        self.poll_interval = poll_interval
+        self.concurrency = concurrency
+
+    def _sign(self, deployment: TrackedDeployment):
+        init = Cell.from_boc(deployment.init)
+        query_id = make_query_id(self.ttl)
+        deployment.message = deploy_message(Address.parse(deployment.address), init, query_id,
+                                            self.secret_key).to_boc()
+        deployment.valid_until = query_valid_until(query_id)
+        deployment.state = SIGNED
+
+    async def _send(self, deployment: TrackedDeployment):
+        if time.time() > deployment.valid_until:
+            # Sealed before a long pause; the contract would reject it now
+            deployment.state = PLANNED
+            return
+        if deployment.attempts >= self.max_attempts:
+            deployment.state = FAILED
+            deployment.error = f"Not deployed after {deployment.attempts} attempts: {deployment.error}"
+            return
+        # The deploy is paid from the address itself: unfunded, every message would expire unprocessed
+        required = self.fees.price(ShoppingContractModel(), Cell.from_boc(deployment.message)).total
+        info = await self.api.get_address_information(deployment.address)
+        balance = int(info.get("balance") or 0)
+        if balance < required:
+            deployment.state = FAILED
+            deployment.error = (f"address holds {format_ton(balance)}, the deploy costs about {format_ton(required)}; "
+                                "fund it, then use --retry-failed")
+            return
+        deployment.attempts += 1
+        try:
+            await self.api.send_boc(deployment.message)
+        except Exception as e:
+            deployment.error = f"send failed: {e}"
+            return
+        deployment.state = SENT
+        deployment.sent_at = time.time()
+        deployment.error = None
+
+    async def _confirm(self, deployment: TrackedDeployment):
+        info = await self.api.get_address_information(deployment.address)
+        if info.get("state") == "active":
+            last = info.get("last_transaction_id") or {}
+            deployment.state = CONFIRMED
+            deployment.transaction_lt = int(last["lt"]) if last.get("lt") else None
+            deployment.transaction_hash = last.get("hash")
+            if deployment.sent_at is not None:
+                CONFIRMATION_LATENCY.observe(time.time() - deployment.sent_at, kind="deploy")
+        elif time.time() > deployment.valid_until + self.poll_interval:
+            # Never processed, and now it never will be: seal a new message for the same address
+            deployment.state = PLANNED
+            deployment.error = "deploy message expired unprocessed"
+
+    async def _verify(self, deployment: TrackedDeployment):
+        """The deployed code is the planned code and the data belongs to the planned owner, key and shard"""
+        info = await self.api.get_address_information(deployment.address)
+        code, data = parse_state_init(Cell.from_boc(deployment.init))
+        deployed_code = Cell.from_boc(info["code"]) if info.get("code") else None
+        if deployed_code is None or code is None or deployed_code.hash != code.hash:
+            deployment.state = FAILED
+            deployment.error = "deployed code differs from the planned code"
+            return
+        if data is not None:
+            planned = ContractStorage.decode(data)
+            deployed = ContractStorage.decode(Cell.from_boc(info["data"])) if info.get("data") else None
+            fields = ("shard_index", "owner", "owner_key")
+            if deployed is None or [getattr(deployed, f) for f in fields] != [getattr(planned, f) for f in fields]:
+                deployment.state = FAILED
+                deployment.error = "deployed data does not match the planned owner, key and shard index"
+                return
+        deployment.state = VERIFIED
+        deployment.error = None
+
+    async def step(self, deployment: TrackedDeployment) -> TrackedDeployment:
+        """Make one transition (or one check that leaves the state as is) and persist the result"""
+        if deployment.state == PLANNED:
+            self._sign(deployment)
+        elif deployment.state == SIGNED:
+            await self._send(deployment)
+        elif deployment.state == SENT:
+            await self._confirm(deployment)
+        elif deployment.state == CONFIRMED:
+            await self._verify(deployment)
+        self.store.save(deployment)
+        return deployment
+
+    async def _drive(self, deployment: TrackedDeployment, semaphore: asyncio.Semaphore) -> TrackedDeployment:
+        while not deployment.done:
+            before = deployment.state
+            try:
+                async with semaphore:
+                    await self.step(deployment)
+            except Exception as e:
+                # Endpoint trouble: keep the state and try again on the next round
+                deployment.error = str(e)
+                self.store.save(deployment)
+            if deployment.state == before:
+                await asyncio.sleep(self.poll_interval)
+        return deployment
+
+    async def run(self) -> Dict[str, int]:
+        """Resume every unfinished deployment; returns the number of deployments in each state"""
+        semaphore = asyncio.Semaphore(self.concurrency)
+        unwatch = watch_queues("deploy_tracker", self.store.counts)
+        try:
+            await asyncio.gather(*(self._drive(deployment, semaphore) for deployment in self.store.pending()))
+        finally:
+            unwatch()
+        return self.store.counts()
+
+
+def print_status(store: DeploymentStore, verbose: bool = False):
+    counts = store.counts()
+    print("📊 " + ", ".join(f"{state}: {counts[state]}" for state in STATES))
+    for deployment in store.all():
+        if verbose or deployment.state == FAILED:
+            print(f"   {deployment.name:<16} {deployment.state:<10} {deployment.address}"
+                  + (f"  ({deployment.error})" if deployment.error else ""))
+
+
+async def main(argv: Optional[List[str]] = None):
+    """Plan a fleet into a state file and drive its deployments; rerunning resumes"""
+    parser = argparse.ArgumentParser(description="Resumable ShoppingContract deployments")
+    parser.add_argument("state", help="SQLite file holding the deployment states")
+    parser.add_argument("--code", help="Compiled contract code BoC (plans the fleet)")
+    parser.add_argument("--owner", help="Owner address of every instance (with --code)")
+    parser.add_argument("--size", type=int, default=1, help="Number of instances to plan (with --code)")
+    parser.add_argument("--secret-key", help="Owner secret key (hex seed); signs the deploy messages")
+    parser.add_argument("--retry-failed", action="store_true", help="Plan failed deployments again")
+    parser.add_argument("--status", action="store_true", help="Only print the stored states")
+    parser.add_argument("--concurrency", type=int, default=16, help="RPC calls in flight")
+    parser.add_argument("--poll-interval", type=float, default=3.0)
+    parser.add_argument("--endpoint", action="append",
+                        help="RPC endpoint, repeat for several (default: endpoints.json)")
+    parser.add_argument("--metrics-port", type=int,
+                        help="Serve Prometheus metrics on this local port (default: TON_METRICS_PORT)")
+    args = parser.parse_args(argv)
+    if args.secret_key:
+        try:
+            require_constant_time()
+        except InsecureSigningError as exc:
+            parser.error(str(exc))
+
+    store = DeploymentStore(args.state)
+    try:
+        if args.code:
+            if not args.owner or not args.secret_key:
+                parser.error("--owner and --secret-key are required with --code")
+            fleet = Fleet(load_code(args.code), Address.parse(args.owner), args.size,
+                          public_key(bytes.fromhex(args.secret_key)))
+            for instance in fleet.instances:
+                store.plan(f"shard-{instance.index}", instance.init)
+        if args.retry_failed:
+            print(f"🔁 {store.retry_failed()} failed deployments planned again")
+        if args.status:
+            print_status(store, verbose=True)
+            return store.counts()
+        if not args.secret_key:
+            parser.error("--secret-key is required to deploy")
+
+        start_exporter(args.metrics_port)
+        pending = len(store.pending())
+        print(f"🚀 Resuming {pending} unfinished deployments...")
+        print("⚠️  Each address must hold a small balance before its deploy message is accepted")
+        api = connect(args.endpoint)
+        try:
+            counts = await DeploymentTracker(api, store, bytes.fromhex(args.secret_key),
+                                             poll_interval=args.poll_interval,
+                                             concurrency=args.concurrency).run()
+        finally:
+            await api.close()
+        print_status(store)
+        return counts
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,472 @@
+"""
+Local Contract Emulator
+Python models of ShoppingContract and the highload wallet with a TVM-style gas meter
+"""
+
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Tuple
+
+from boc import Builder, Cell, Slice, begin_cell, build_dict, dict_delete, dict_get, dict_path, dict_set, iter_dict
+from events import order_created_event, order_paid_event
+from messages import log_message
+from signing import verify
+from storage import ContractStorage
+
+# TVM gas prices (see the TVM instruction table)
+GAS_INSTRUCTION = 18
+GAS_CELL_LOAD = 100
+GAS_CELL_RELOAD = 25
+GAS_CELL_CREATE = 500
+GAS_EXCEPTION = 50
+GAS_SEND_MESSAGE = 526
+
+# Default config param 20/21 limits for the basechain
+GAS_LIMIT = 1_000_000
+GAS_CREDIT = 10_000
+
+# Approximate instruction counts of the compiled code paths; dictionary and
+# cell costs are metered separately from the actual cells touched
+STEPS_ENTRY = 12
+STEPS_LOAD_DATA = 10
+STEPS_SAVE_DATA = 10
+STEPS_DICT_OP = 4
+
+EXIT_OK = 0
+EXIT_OUT_OF_GAS = -14
+EXIT_CELL_UNDERFLOW = 9
+EXIT_METHOD_NOT_FOUND = 11
+
+# ShoppingContract error codes (contracts/ShoppingContract.fc)
+ERROR_UNKNOWN_ORDER = 102
+ERROR_ALREADY_PAID = 103
+ERROR_INSUFFICIENT_PAYMENT = 104
+ERROR_QUERY_OUT_OF_WINDOW = 105
+ERROR_REPLAYED_QUERY = 106
+ERROR_BAD_SIGNATURE = 107
+QUERY_MAX_TTL = 600
+PAGE_MAX_SIZE = 100
+
+# Highload wallet v2 error codes
+ERROR_REPLAYED_BATCH = 32
+ERROR_WRONG_SUBWALLET = 34
+ERROR_EXPIRED_BATCH = 35
+
+
+class VmExit(Exception):
+    """Computation phase ended with a non-zero exit code"""
+
+    def __init__(self, code: int):
+        super().__init__(f"exit code {code}")
+        self.code = code
+
+
+class GasMeter:
+    """Charges gas the way TVM does: per instruction, per cell loaded and per cell created"""
+
+    def __init__(self, limit: int = GAS_LIMIT, credit: int = 0):
+        self.used = 0
+        self.limit = limit
+        # External messages run on the gas credit alone until accept_message
+        self.credit = credit
+        self._loaded = set()
+
+    def consume(self, amount: int):
+        self.used += amount
+        if self.used > (self.credit or self.limit):
+            raise VmExit(EXIT_OUT_OF_GAS)
+
+    def steps(self, count: int = 1):
+        self.consume(GAS_INSTRUCTION * count)
+
+    def load(self, cell: Cell):
+        """Cell-to-slice conversion; cheaper for cells already loaded in this transaction"""
+        if cell.hash in self._loaded:
+            self.consume(GAS_CELL_RELOAD)
+        else:
+            self._loaded.add(cell.hash)
+            self.consume(GAS_CELL_LOAD)
+
+    def create(self, count: int = 1):
+        self.consume(GAS_CELL_CREATE * count)
+
+    def accept(self):
+        """accept_message: from here on the full gas limit applies"""
+        self.credit = 0
+        self.steps()
+
+    def dict_get(self, root: Optional[Cell], key_bits: int, key: int):
+        self.steps(STEPS_DICT_OP)
+        for cell in dict_path(root, key_bits, key):
+            self.load(cell)
+
+    def dict_set(self, root: Optional[Cell], key_bits: int, key: int):
+        path = dict_path(root, key_bits, key)
+        self.steps(STEPS_DICT_OP)
+        for cell in path:
+            self.load(cell)
+        # Every cell on the path is rebuilt, plus a fork and a leaf for a new key
+        self.create(len(path) + 1)
+
+
+class Execution:
+    """Outcome of running one inbound message"""
+
+    def __init__(self, exit_code: int, gas_used: int, accepted: bool, out_messages: List[Cell]):
+        self.exit_code = exit_code
+        self.gas_used = gas_used
+        self.accepted = accepted
+        self.out_messages = out_messages
+
+    @property
+    def success(self) -> bool:
+        return self.exit_code in (0, 1)
+
+    def __repr__(self) -> str:
+        return f"Execution(exit_code={self.exit_code}, gas_used={self.gas_used}, out={len(self.out_messages)})"
+
+
+def parse_message(message: Cell) -> Tuple[Dict[str, Any], Optional[Cell], Slice]:
+    """Split an inbound message into (header, StateInit, body slice)"""
+    s = message.begin_parse()
+    if s.load_bit():
+        if s.load_bit():
+            raise ValueError("Outbound external messages cannot be executed")
+        header = {"external": True, "source": s.load_address(), "destination": s.load_address(),
+                  "import_fee": s.load_coins(), "value": 0, "bounced": False}
+    else:
+        s.skip_bits(1)  # ihr_disabled
+        bounce, bounced = s.load_bit(), s.load_bit()
+        header = {"external": False, "bounce": bounce, "bounced": bounced,
+                  "source": s.load_address(), "destination": s.load_address(), "value": s.load_coins()}
+        if s.load_bit():
+            s.load_ref()  # extra currencies are not used by these contracts
+        header["ihr_fee"] = s.load_coins()
+        header["fwd_fee"] = s.load_coins()
+        s.skip_bits(64 + 32)
+    init = None
+    if s.load_bit():
+        init = s.load_ref() if s.load_bit() else s.to_cell()
+    body = s.load_ref().begin_parse() if s.load_bit() else s
+    return header, init, body
+
+
+def parse_state_init(init: Cell) -> Tuple[Optional[Cell], Optional[Cell]]:
+    s = init.begin_parse()
+    if s.load_bit():
+        s.skip_bits(5)  # split_depth
+    if s.load_bit():
+        s.skip_bits(2)  # special: tick, tock
+    return s.load_maybe_ref(), s.load_maybe_ref()
+
+
+class AccountModel(ABC):
+    """A contract account: code, persistent data, balance and the handlers that change them"""
+
+    def __init__(self, code: Optional[Cell] = None, balance: int = 0, now: Optional[int] = None):
+        self.code = code
+        self.balance = balance
+        self.now = now
+        self.active = code is not None
+
+    def current_time(self) -> int:
+        return int(time.time()) if self.now is None else self.now
+
+    @abstractmethod
+    def data(self) -> Optional[Cell]:
+        """Persistent data cell, as the contract would store it"""
+
+    @abstractmethod
+    def load_state(self, data: Cell):
+        """Take over the data cell of a deployed or restored account"""
+
+    @abstractmethod
+    def snapshot(self) -> Any:
+        """Opaque copy of the mutable state, taken before each computation"""
+
+    @abstractmethod
+    def restore(self, state: Any):
+        """Roll back to a snapshot after a failed computation"""
+
+    def on_external(self, gas: GasMeter, body: Slice, out: List[Cell]):
+        raise VmExit(EXIT_CELL_UNDERFLOW)
+
+    def on_internal(self, gas: GasMeter, header: Dict[str, Any], body: Slice, out: List[Cell]):
+        pass
+
+    def run_get_method(self, method: str, stack: List[Any]) -> List[Any]:
+        """Result stack of a get-method; raises VmExit where the contract's getter would fail"""
+        raise VmExit(EXIT_METHOD_NOT_FOUND)
+
+    def execute(self, message: Cell, gas_limit: int = GAS_LIMIT, gas_credit: int = GAS_CREDIT) -> Execution:
+        """Run one inbound message; state changes are kept only if the computation succeeds"""
+        header, init, body = parse_message(message)
+        deploying = not self.active
+        if deploying:
+            if init is None:
+                return Execution(EXIT_OK, 0, False, [])
+            self.code, data = parse_state_init(init)
+            self.load_state(data)
+            self.active = True
+
+        saved = self.snapshot()
+        out: List[Cell] = []
+        if header["external"]:
+            gas = GasMeter(gas_limit, gas_credit)
+        else:
+            gas = GasMeter(gas_limit)
+            self.balance += header["value"]
+        gas.steps(STEPS_ENTRY)
+        try:
+            if header["external"]:
+                self.on_external(gas, body, out)
+            else:
+                self.on_internal(gas, header, body, out)
+            exit_code = EXIT_OK
+        except VmExit as exc:
+            exit_code = exc.code
+        except ValueError:
+            exit_code = EXIT_CELL_UNDERFLOW
+        accepted = gas.credit == 0
+        if exit_code != EXIT_OK:
+            self.restore(saved)
+            gas.used += GAS_EXCEPTION
+            out = []
+        if deploying and not accepted:
+            # A rejected external message leaves no transaction, so the account stays uninitialized
+            self.active = False
+            self.code = None
+        return Execution(exit_code, gas.used, accepted, out)
+
+
+class ShoppingContractModel(AccountModel):
+    """Mirrors recv_internal and recv_external of contracts/ShoppingContract.fc"""
+
+    def __init__(self, storage: Optional[ContractStorage] = None, code: Optional[Cell] = None,
+                 balance: int = 0, now: Optional[int] = None):
+        super().__init__(code, balance, now)
+        self.storage = storage or ContractStorage()
+
+    def data(self) -> Cell:
+        return self.storage.encode()
+
+    def load_state(self, data: Cell):
+        self.storage = ContractStorage.decode(data)
+
+    def snapshot(self) -> Cell:
+        return self.storage.encode()
+
+    def restore(self, state: Cell):
+        self.storage = ContractStorage.decode(state)
+
+    def _load_paid_data(self, gas: GasMeter):
+        gas.load(self.storage.encode())
+        gas.steps(STEPS_LOAD_DATA)
+
+    def _load_data(self, gas: GasMeter):
+        self._load_paid_data(gas)
+        gas.load(self.storage.orders_cell())
+        gas.load(self.storage.meta_cell())
+        gas.steps(STEPS_LOAD_DATA)
+
+    def _save_paid_data(self, gas: GasMeter):
+        gas.steps(STEPS_SAVE_DATA)
+        gas.create()
+
+    def _save_data(self, gas: GasMeter):
+        gas.steps(STEPS_SAVE_DATA)
+        gas.create(2)
+        self._save_paid_data(gas)
+
+    def _set(self, gas: GasMeter, field: str, key_bits: int, key: int, value):
+        root = getattr(self.storage, field)
+        gas.dict_set(root, key_bits, key)
+        setattr(self.storage, field, dict_set(root, key_bits, key, value))
+
+    def _emit_log(self, gas: GasMeter, out: List[Cell], event: Builder):
+        gas.steps(6)
+        gas.create()
+        gas.consume(GAS_SEND_MESSAGE)
+        out.append(log_message(event))
+
+    def on_internal(self, gas: GasMeter, header: Dict[str, Any], body: Slice, out: List[Cell]):
+        if header["bounced"] or body.remaining_bits < 32:
+            return
+        gas.steps(2)
+        if body.load_uint(32) != 0x1ec187d9:  # op::pay_order
+            return
+        self._load_paid_data(gas)
+        query_id = body.load_uint(64)
+        order_id = body.load_uint(32)
+        gas.steps(4)
+        gas.dict_get(self.storage.paid_status, 32, order_id)
+        paid = dict_get(self.storage.paid_status, 32, order_id)
+        if paid is None:
+            raise VmExit(ERROR_UNKNOWN_ORDER)
+        if paid.load_uint(32):
+            raise VmExit(ERROR_ALREADY_PAID)
+        # The payer's own amount field is not trusted; the price comes from createOrder
+        price = paid.load_coins()
+        gas.steps(4)
+        if header["value"] < price:
+            raise VmExit(ERROR_INSUFFICIENT_PAYMENT)
+        self._set(gas, "paid_status", 32, order_id, begin_cell().store_uint(1, 32).store_coins(price))
+        self._save_paid_data(gas)
+        self._emit_log(gas, out, order_paid_event(order_id, query_id, header["value"], header["source"]))
+
+    def run_get_method(self, method: str, stack: List[Any]) -> List[Any]:
+        getter = getattr(self, method, None) if method.startswith("get_") else None
+        if getter is None:
+            raise VmExit(EXIT_METHOD_NOT_FOUND)
+        return getter(*stack)
+
+    def get_orders_page(self, from_id: int, limit: int) -> List[Any]:
+        limit = min(limit, PAGE_MAX_SIZE)
+        page: Dict[int, Builder] = {}
+        for order_id, details in iter_dict(self.storage.product_details, 32, from_id):
+            if len(page) == limit:
+                return [order_id, build_dict(page, 32)]
+            image = dict_get(self.storage.product_images, 32, order_id)
+            paid = dict_get(self.storage.paid_status, 32, order_id)
+            page[order_id] = (begin_cell()
+                              .store_uint(paid.load_uint(32), 32)
+                              .store_ref(details.to_cell())
+                              .store_uint(image.load_uint(256), 256)
+                              .store_coins(paid.load_coins()))
+        return [0, build_dict(page, 32)]
+
+    def get_order_paid(self, order_id: int) -> List[Any]:
+        paid = dict_get(self.storage.paid_status, 32, order_id)
+        if paid is None:
+            raise VmExit(ERROR_UNKNOWN_ORDER)
+        return [paid.load_uint(32)]
+
+    def get_shard_index(self) -> List[Any]:
+        return [self.storage.shard_index]
+
+    def get_query_processed(self, query_id: int) -> List[Any]:
+        return [-1 if dict_get(self.storage.processed_queries, 64, query_id) is not None else 0]
+
+    def _forget_expired_queries(self, gas: GasMeter, now: int):
+        bound = now << 32
+        while True:
+            root = self.storage.processed_queries
+            first = next(iter_dict(root, 64), None)
+            gas.steps(3)
+            if first is None:
+                return
+            # udict_delete_get_min rebuilds the path even when the result is discarded
+            gas.dict_set(root, 64, first[0])
+            if first[0] >= bound:
+                return
+            self.storage.processed_queries = dict_delete(root, 64, first[0])
+
+    def on_external(self, gas: GasMeter, body: Slice, out: List[Cell]):
+        now = self.current_time()
+        self._load_data(gas)
+        signature = body.load_bytes(64)
+        gas.steps(4)  # HASHSU + CHKSIGNU
+        if not verify(self.storage.owner_key, body.to_cell().hash, signature):
+            raise VmExit(ERROR_BAD_SIGNATURE)
+        op = body.load_uint(32)
+        query_id = body.load_uint(64)
+        gas.steps(6)
+        valid_until = query_id >> 32
+        if not now <= valid_until <= now + QUERY_MAX_TTL:
+            raise VmExit(ERROR_QUERY_OUT_OF_WINDOW)
+        gas.dict_get(self.storage.processed_queries, 64, query_id)
+        if dict_get(self.storage.processed_queries, 64, query_id) is not None:
+            raise VmExit(ERROR_REPLAYED_QUERY)
+        gas.accept()
+        self._set(gas, "processed_queries", 64, query_id, begin_cell())
+        self._forget_expired_queries(gas, now)
+        if op == 1:
+            details = body.load_ref()
+            gas.load(details)
+            image_hash = body.load_uint(256)
+            price = body.load_coins()
+            gas.steps(10)
+            order_id = self.storage.last_order_id + 1
+            self.storage.last_order_id = order_id
+            self._set(gas, "product_details", 32, order_id, details)
+            self._set(gas, "product_images", 32, order_id, begin_cell().store_uint(image_hash, 256))
+            self._set(gas, "paid_status", 32, order_id, begin_cell().store_uint(0, 32).store_coins(price))
+            gas.create(3)  # value builders turned into cells
+            self._emit_log(gas, out, order_created_event(order_id, query_id, image_hash))
+        self._save_data(gas)
+
+
+class HighloadWalletModel(AccountModel):
+    """Mirrors highload-wallet-v2 recv_external (signatures are not checked offline)"""
+
+    def __init__(self, subwallet_id: int, public_key: bytes = bytes(32), code: Optional[Cell] = None,
+                 balance: int = 0, now: Optional[int] = None):
+        super().__init__(code, balance, now)
+        self.subwallet_id = subwallet_id
+        self.public_key = public_key
+        self.last_cleaned = 0
+        self.old_queries: Optional[Cell] = None
+
+    def data(self) -> Cell:
+        return (begin_cell()
+                .store_uint(self.subwallet_id, 32)
+                .store_uint(self.last_cleaned, 64)
+                .store_bytes(self.public_key)
+                .store_dict(self.old_queries)
+                .end_cell())
+
+    def load_state(self, data: Cell):
+        s = data.begin_parse()
+        self.subwallet_id = s.load_uint(32)
+        self.last_cleaned = s.load_uint(64)
+        self.public_key = s.load_bytes(32)
+        self.old_queries = s.load_dict()
+
+    def snapshot(self) -> Tuple[int, Optional[Cell]]:
+        return self.last_cleaned, self.old_queries
+
+    def restore(self, state: Tuple[int, Optional[Cell]]):
+        self.last_cleaned, self.old_queries = state
+
+    def on_external(self, gas: GasMeter, body: Slice, out: List[Cell]):
+        now = self.current_time()
+        body.skip_bits(512)
+        subwallet_id = body.load_uint(32)
+        query_id = body.load_uint(64)
+        gas.steps(8)
+        if query_id < now << 32:
+            raise VmExit(ERROR_EXPIRED_BATCH)
+        gas.load(self.data())
+        gas.steps(STEPS_LOAD_DATA)
+        gas.dict_get(self.old_queries, 64, query_id)
+        if dict_get(self.old_queries, 64, query_id) is not None:
+            raise VmExit(ERROR_REPLAYED_BATCH)
+        if subwallet_id != self.subwallet_id:
+            raise VmExit(ERROR_WRONG_SUBWALLET)
+        gas.steps(4)  # HASHSU + CHKSIGNU
+        actions = body.load_dict()
+        gas.accept()
+
+        for index, action in iter_dict(actions, 16):
+            # idict_get_next? walks down from the root for every message
+            gas.dict_get(actions, 16, index)
+            action.skip_bits(8)  # send mode
+            gas.steps(4)
+            gas.consume(GAS_SEND_MESSAGE)
+            out.append(action.load_ref())
+
+        gas.dict_set(self.old_queries, 64, query_id)
+        self.old_queries = dict_set(self.old_queries, 64, query_id, begin_cell())
+        bound = (now - 64) << 32
+        while True:
+            first = next(iter_dict(self.old_queries, 64), None)
+            gas.steps(3)
+            if first is None:
+                break
+            gas.dict_set(self.old_queries, 64, first[0])
+            if first[0] >= bound:
+                break
+            self.old_queries = dict_delete(self.old_queries, 64, first[0])
+            self.last_cleaned = first[0]
+        gas.steps(STEPS_SAVE_DATA)
+        gas.create()
@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+ShoppingContract Log Events
+Decodes the contract's external-out log messages and streams them to consumers with backpressure
+"""
+
+import argparse
+import asyncio
+import base64
+import json
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, Union
+
+from boc import Address, Builder, Cell, begin_cell
+from metrics import INDEXER_LAG, start_exporter, watch_queues
+from rpc_pool import connect
+from toncenter import TonApi
+
+# Mirror event::* in contracts/ShoppingContract.fc
+EVENT_ORDER_CREATED = 0x07c3b124
+EVENT_ORDER_PAID = 0x33762ebf
+EVENT_WITHDRAWAL = 0x78df8e32
+
+EVENT_NAMES = {
+    EVENT_ORDER_CREATED: "order_created",
+    EVENT_ORDER_PAID: "order_paid",
+    EVENT_WITHDRAWAL: "withdrawal",
+}
+
+EventHandler = Callable[[Dict[str, Any]], Awaitable[None]]
+
+
+def order_created_event(order_id: int, query_id: int, image_hash: int) -> Builder:
+    return (begin_cell()
+            .store_uint(EVENT_ORDER_CREATED, 32)
+            .store_uint(order_id, 32)
+            .store_uint(query_id, 64)
+            .store_uint(image_hash, 256))
+
+
+def order_paid_event(order_id: int, query_id: int, amount: int, payer: Optional[Address]) -> Builder:
+    return (begin_cell()
+            .store_uint(EVENT_ORDER_PAID, 32)
+            .store_uint(order_id, 32)
+            .store_uint(query_id, 64)
+            .store_coins(amount)
+            .store_address(payer))
+
+
+def withdrawal_event(amount: int, destination: Address) -> Builder:
+    return (begin_cell()
+            .store_uint(EVENT_WITHDRAWAL, 32)
+            .store_coins(amount)
+            .store_address(destination))
+
+
+def decode_event(body: Union[Cell, bytes, str, None]) -> Optional[Dict[str, Any]]:
+    """Decode a log message body; returns None for anything that is not a contract event"""
+    if not body:
+        return None
+    cell = body if isinstance(body, Cell) else Cell.from_boc(body)
+    s = cell.begin_parse()
+    if s.remaining_bits < 32:
+        return None
+    tag = s.load_uint(32)
+    try:
+        if tag == EVENT_ORDER_CREATED:
+            event = {"order_id": s.load_uint(32), "query_id": s.load_uint(64),
+                     "image_hash": f"{s.load_uint(256):064x}"}
+        elif tag == EVENT_ORDER_PAID:
+            event = {"order_id": s.load_uint(32), "query_id": s.load_uint(64), "amount": s.load_coins()}
+            payer = s.load_address()
+            event["payer"] = payer.to_raw() if payer else None
+        elif tag == EVENT_WITHDRAWAL:
+            event = {"amount": s.load_coins(), "destination": s.load_address().to_raw()}
+        else:
+            return None
+    except (ValueError, AttributeError):
+        return None
+    event["event"] = EVENT_NAMES[tag]
+    return event
+
+
+def event_from_message(message: Cell) -> Optional[Dict[str, Any]]:
+    """Decode a whole external-out message, e.g. one produced by the emulator"""
+    s = message.begin_parse()
+    if s.load_uint(2) != 0b11:
+        return None
+    s.load_address()
+    s.load_address()
+    s.skip_bits(64 + 32)
+    if s.load_bit():
+        return None
+    return decode_event(s.load_ref() if s.load_bit() else s.to_cell())
+
+
+def events_from_transaction(tx: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Events logged by a toncenter transaction, in emission order"""
+    tx_id = tx.get("transaction_id", {})
+    events = []
+    for out_msg in tx.get("out_msgs") or []:
+        msg_data = out_msg.get("msg_data") or {}
+        # Log messages have no internal destination
+        if out_msg.get("destination") or msg_data.get("@type") != "msg.dataRaw":
+            continue
+        event = decode_event(base64.b64decode(msg_data.get("body") or ""))
+        if event is not None:
+            event.update({
+                "lt": int(tx_id.get("lt", 0)),
+                "transaction_hash": tx_id.get("hash"),
+                "utime": tx.get("utime"),
+            })
+            events.append(event)
+    return events
+
+
+class EventStream:
+    """Pushes contract events to a handler through a bounded queue
+
+    A poller follows the contract's new transactions and puts decoded events
+    on the queue; ``concurrency`` workers take them off and await the handler.
+    When the handler falls behind, the full queue blocks the poller, so it
+    stops fetching until the workers catch up instead of buffering without
+    bound. A poll holds one page of transactions at a time, so replaying the
+    whole history (``from_lt=0``) stays bounded too. ``last_lt`` always
+    points at the last transaction whose events were all queued, and can be
+    stored to resume later. ``lag`` is how far
+    the chain time of the last delivered event trails the wall clock, and
+    drops to 0 once a poll finds nothing new with the queue drained.
+    """
+
+    def __init__(self, api: TonApi, address: str, handler: EventHandler, max_pending: int = 256,
+                 poll_interval: float = 0.5, from_lt: Optional[int] = None, concurrency: int = 1,
+                 page_size: int = 100):
+        if page_size < 2:
+            raise ValueError(f"page_size must be at least 2, got {page_size}")
+        self.api = api
+        self.address = address
+        self.handler = handler
+        self.poll_interval = poll_interval
+        self.page_size = page_size
+        self.concurrency = concurrency
+        # None: only events after the current head; 0: the whole history
+        self.last_lt = from_lt
+        self.queue: asyncio.Queue = asyncio.Queue(max_pending)
+        self.delivered = 0
+        self.failed = 0
+        self.lag = 0.0
+        self._stopping = asyncio.Event()
+
+    async def poll_once(self) -> int:
+        """Queue the events of every transaction newer than ``last_lt``; returns how many"""
+        if self.last_lt is None:
+            head = await self.api.get_transactions(self.address, limit=1)
+            self.last_lt = int(head[0]["transaction_id"]["lt"]) if head else 0
+            return 0
+        queued = 0
+        for lt, tx_hash in reversed(await self._page_cursors()):
+            page = await self.api.get_transactions(self.address, limit=self.page_size, lt=lt, tx_hash=tx_hash,
+                                                   to_lt=self.last_lt or None)
+            for tx in reversed(page):
+                tx_lt = int(tx["transaction_id"]["lt"])
+                # Neighbouring pages share one transaction
+                if tx_lt <= self.last_lt:
+                    continue
+                for event in events_from_transaction(tx):
+                    # Blocks while the queue is full: this is the backpressure
+                    await self.queue.put(event)
+                    queued += 1
+                self.last_lt = tx_lt
+        return queued
+
+    async def _page_cursors(self) -> List[Tuple[int, str]]:
+        """Where each page of transactions newer than ``last_lt`` starts, newest page first
+
+        The API only pages from newest to oldest, while events are delivered
+        oldest first. Only the page anchors are kept on the way down; the
+        pages are fetched again one at a time on the way up, and being
+        anchored they are answered from the RPC cache.
+        """
+        cursors: List[Tuple[int, str]] = []
+        lt, tx_hash = None, None
+        while True:
+            page = await self.api.get_transactions(self.address, limit=self.page_size, lt=lt, tx_hash=tx_hash,
+                                                   to_lt=self.last_lt or None)
+            fresh = [tx for tx in page if int(tx["transaction_id"]["lt"]) > self.last_lt]
+            if not fresh or (lt is not None and len(fresh) == 1):
+                return cursors
+            first, last = fresh[0]["transaction_id"], fresh[-1]["transaction_id"]
+            cursors.append((int(first["lt"]), first["hash"]))
+            if len(fresh) < self.page_size:
+                return cursors
+            # The next page starts with this page's oldest transaction
+            lt, tx_hash = int(last["lt"]), last["hash"]
+
+    async def _poll(self):
+        while not self._stopping.is_set():
+            if await self.poll_once():
+                continue
+            if self.queue.empty():
+                self._set_lag(0.0)
+            try:
+                await asyncio.wait_for(self._stopping.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _work(self):
+        while True:
+            event = await self.queue.get()
+            try:
+                await self.handler(event)
+                self.delivered += 1
+                if event.get("utime"):
+                    self._set_lag(max(0.0, time.time() - event["utime"]))
+            except Exception as exc:
+                self.failed += 1
+                print(f"❌ Event handler failed for {event['event']} at lt {event.get('lt')}: {exc}")
+            finally:
+                self.queue.task_done()
+
+    def _set_lag(self, seconds: float):
+        self.lag = seconds
+        INDEXER_LAG.set(seconds, stream=self.address)
+
+    async def run(self):
+        """Stream until stop() is called; queued events are delivered before returning"""
+        workers = [asyncio.create_task(self._work()) for _ in range(self.concurrency)]
+        unwatch = watch_queues("events", lambda: {self.address: self.queue.qsize()})
+        try:
+            await self._poll()
+            await self.queue.join()
+        finally:
+            unwatch()
+            for worker in workers:
+                worker.cancel()
+
+    def stop(self):
+        self._stopping.set()
+
+
+async def main(argv: Optional[List[str]] = None):
+    """Print contract events as JSON lines as they happen"""
+    parser = argparse.ArgumentParser(description="Stream ShoppingContract log events")
+    parser.add_argument("address", help="Contract address")
+    parser.add_argument("--from-lt", type=int, help="Replay events after this logical time (0: full history)")
+    parser.add_argument("--interval", type=float, default=0.5, help="Seconds between polls when idle")
+    parser.add_argument("--endpoint", action="append",
+                        help="RPC endpoint, repeat for several (default: endpoints.json)")
+    parser.add_argument("--metrics-port", type=int,
+                        help="Serve Prometheus metrics on this local port (default: TON_METRICS_PORT)")
+    args = parser.parse_args(argv)
+
+    async def show(event: Dict[str, Any]):
+        print(json.dumps(event), flush=True)
+
+    start_exporter(args.metrics_port)
+    api = connect(args.endpoint)
+    stream = EventStream(api, args.address, show, poll_interval=args.interval, from_lt=args.from_lt)
+    print(f"📡 Streaming events of {args.address}")
+    try:
+        await stream.run()
+    finally:
+        await api.close()
+        print(f"📊 Delivered {stream.delivered} events, resume with --from-lt {stream.last_lt}")
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        print("👋 Event stream stopped")
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Columnar Order Export
+Streams decoded orders and payments into Parquet or Arrow IPC files in bounded-memory chunks
+"""
+
+import argparse
+import asyncio
+from typing import Any, AsyncIterable, Dict, Iterable, List, Optional, Union
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - depends on the environment
+    pa = None
+    pq = None
+
+from boc import Cell
+from orders import iter_orders, orders_from_storage
+from payments import iter_payments
+from rpc_pool import connect
+from storage import ContractStorage
+
+DEFAULT_CHUNK_SIZE = 65536
+FORMATS = ("parquet", "arrow")
+
+
+def _require_pyarrow():
+    if pa is None:
+        raise RuntimeError("Columnar export requires pyarrow: pip install pyarrow")
+
+
+def order_schema():
+    _require_pyarrow()
+    return pa.schema([
+        ("order_id", pa.uint32()),
+        ("paid", pa.bool_()),
+        # Many orders share the same product details, so store each string once per chunk
+        ("product_details", pa.dictionary(pa.int32(), pa.string())),
+        ("image_hash", pa.string()),
+        ("price", pa.uint64()),
+    ])
+
+
+def payment_schema():
+    _require_pyarrow()
+    return pa.schema([
+        ("order_id", pa.uint32()),
+        ("query_id", pa.uint64()),
+        ("amount", pa.uint64()),
+        ("value", pa.uint64()),
+        ("source", pa.dictionary(pa.int32(), pa.string())),
+        ("lt", pa.uint64()),
+        ("transaction_hash", pa.string()),
+    ])
+
+
+class ColumnarWriter:
+    """Buffers rows column-wise and flushes one record batch per chunk"""
+
+    def __init__(self, path: str, schema, fmt: str = "parquet", chunk_size: int = DEFAULT_CHUNK_SIZE):
+        _require_pyarrow()
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown format {fmt!r}, expected one of {FORMATS}")
+        self.schema = schema
+        self.chunk_size = chunk_size
+        self.rows = 0
+        self._columns: Dict[str, List[Any]] = {name: [] for name in schema.names}
+        self._sink = None
+        if fmt == "parquet":
+            self._writer = pq.ParquetWriter(path, schema, compression="zstd")
+        else:
+            # The stream flavour allows a fresh dictionary per batch
+            self._sink = pa.OSFile(path, "wb")
+            self._writer = pa.ipc.new_stream(self._sink, schema)
+
+    def write(self, row: Dict[str, Any]):
+        for name, values in self._columns.items():
+            values.append(row.get(name))
+        if len(self._columns[self.schema.names[0]]) >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        count = len(self._columns[self.schema.names[0]])
+        if not count:
+            return
+        arrays = []
+        for field in self.schema:
+            values = self._columns[field.name]
+            if pa.types.is_dictionary(field.type):
+                arrays.append(pa.array(values, field.type.value_type).dictionary_encode())
+            else:
+                arrays.append(pa.array(values, field.type))
+            values.clear()
+        self._writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=self.schema))
+        self.rows += count
+
+    def close(self):
+        self.flush()
+        self._writer.close()
+        if self._sink is not None:
+            self._sink.close()
+
+    def __enter__(self) -> "ColumnarWriter":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+async def export_rows(rows: Union[Iterable[Dict[str, Any]], AsyncIterable[Dict[str, Any]]],
+                      writer: ColumnarWriter) -> int:
+    """Drain a sync or async row stream into a writer; returns the number of rows"""
+    if hasattr(rows, "__aiter__"):
+        async for row in rows:
+            writer.write(row)
+    else:
+        for row in rows:
+            writer.write(row)
+    writer.flush()
+    return writer.rows
+
+
+def load_state_file(path: str) -> ContractStorage:
+    """Contract data cell saved as a BoC file (for example by seeding or a state dump)"""
+    with open(path, "rb") as f:
+        return ContractStorage.decode(Cell.from_boc(f.read()))
+
+
+async def main(argv: Optional[List[str]] = None):
+    """Export orders or payments to a columnar file"""
+    parser = argparse.ArgumentParser(description="Columnar ShoppingContract export")
+    parser.add_argument("kind", choices=("orders", "payments"))
+    parser.add_argument("output", help="Output file")
+    parser.add_argument("--address", help="Contract address (chain source)")
+    parser.add_argument("--state-file", help="Local contract data BoC (orders only)")
+    parser.add_argument("--format", choices=FORMATS, default="parquet")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--endpoint", action="append",
+                        help="RPC endpoint, repeat for several (default: endpoints.json)")
+    args = parser.parse_args(argv)
+
+    if args.kind == "orders" and args.state_file:
+        api = None
+        rows = orders_from_storage(load_state_file(args.state_file))
+    elif args.address:
+        api = connect(args.endpoint)
+        rows = iter_orders(api, args.address) if args.kind == "orders" else iter_payments(api, args.address)
+    else:
+        parser.error("either --address or --state-file is required")
+
+    schema = order_schema() if args.kind == "orders" else payment_schema()
+    try:
+        with ColumnarWriter(args.output, schema, args.format, args.chunk_size) as writer:
+            count = await export_rows(rows, writer)
+    finally:
+        if api is not None:
+            await api.close()
+    print(f"💾 Exported {count} {args.kind} to {args.output}")
+    return count
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
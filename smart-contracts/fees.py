@@ -0,0 +1,337 @@
+#!/usr/bin/env python3
+"""
+Offline Fee Estimation
+Prices deploy, createOrder, payment and withdrawal messages by running them through the local emulator
+"""
+
+import argparse
+import asyncio
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+from boc import Address, Cell, iter_dict
+from emulator import AccountModel, HighloadWalletModel, ShoppingContractModel, parse_message
+from fleet import FleetInstance, load_code
+from highload import Batch, HighloadBatchSender, Transfer
+from messages import external_message, internal_message, state_init
+from orders import build_create_order_bodies
+from payments import build_payment_payload
+from rpc_pool import connect
+from signing import public_key
+from storage import ContractStorage
+from submitter import make_query_id
+from toncenter import TonApi
+
+# Fees do not depend on which address a message goes to, only on its fixed size
+ANY_ADDRESS = Address(0, bytes(32))
+# Nor on who signs them: estimates sign with this throwaway key
+PRICING_KEY = bytes(32)
+PRICING_PUBLIC_KEY = public_key(PRICING_KEY)
+
+DEFAULT_BATCH_SIZES = (1, 8, 32, 64, 128, 192, 254)
+
+
+class StoragePrices:
+    """Config param 18, basechain prices per bit and cell per second (in 2^-16 nanotons)"""
+
+    def __init__(self, bit_price_ps: int = 1, cell_price_ps: int = 500):
+        self.bit_price_ps = bit_price_ps
+        self.cell_price_ps = cell_price_ps
+
+    @staticmethod
+    def from_cell(cell: Cell) -> "StoragePrices":
+        # Hashmap 32 StoragePrices keyed by activation time; the last entry is in force
+        *_, (_, s) = iter_dict(cell, 32)
+        if s.load_uint(8) != 0xcc:
+            raise ValueError("Not a StoragePrices record")
+        s.skip_bits(32)  # utime_since
+        return StoragePrices(s.load_uint(64), s.load_uint(64))
+
+
+class GasPrices:
+    """Config param 21, basechain gas prices and limits"""
+
+    def __init__(self, gas_price: int = 26214400, gas_limit: int = 1_000_000, gas_credit: int = 10_000,
+                 flat_gas_limit: int = 100, flat_gas_price: int = 40_000):
+        # Price per gas unit in 2^-16 nanotons
+        self.gas_price = gas_price
+        self.gas_limit = gas_limit
+        self.gas_credit = gas_credit
+        self.flat_gas_limit = flat_gas_limit
+        self.flat_gas_price = flat_gas_price
+
+    @staticmethod
+    def from_cell(cell: Cell) -> "GasPrices":
+        s = cell.begin_parse()
+        tag = s.load_uint(8)
+        flat_gas_limit = flat_gas_price = 0
+        if tag == 0xd1:
+            flat_gas_limit, flat_gas_price = s.load_uint(64), s.load_uint(64)
+            tag = s.load_uint(8)
+        if tag not in (0xdd, 0xde):
+            raise ValueError(f"Unknown GasLimitsPrices tag {tag:#x}")
+        gas_price, gas_limit = s.load_uint(64), s.load_uint(64)
+        if tag == 0xde:
+            s.skip_bits(64)  # special_gas_limit
+        return GasPrices(gas_price, gas_limit, s.load_uint(64), flat_gas_limit, flat_gas_price)
+
+
+class MsgForwardPrices:
+    """Config param 25, basechain message forwarding prices"""
+
+    def __init__(self, lump_price: int = 400_000, bit_price: int = 26_214_400, cell_price: int = 2_621_440_000,
+                 first_frac: int = 21845):
+        self.lump_price = lump_price
+        self.bit_price = bit_price
+        self.cell_price = cell_price
+        # Share of the forward fee kept by the sender's validators (out of 2^16)
+        self.first_frac = first_frac
+
+    @staticmethod
+    def from_cell(cell: Cell) -> "MsgForwardPrices":
+        s = cell.begin_parse()
+        if s.load_uint(8) != 0xea:
+            raise ValueError("Not a MsgForwardPrices record")
+        lump_price, bit_price, cell_price = s.load_uint(64), s.load_uint(64), s.load_uint(64)
+        s.skip_bits(32)  # ihr_price_factor
+        return MsgForwardPrices(lump_price, bit_price, cell_price, s.load_uint(16))
+
+
+class FeeConfig:
+    """The config params that determine what a transaction costs"""
+
+    def __init__(self, storage: Optional[StoragePrices] = None, gas: Optional[GasPrices] = None,
+                 forward: Optional[MsgForwardPrices] = None, max_msg_bits: int = 1 << 21,
+                 max_msg_cells: int = 1 << 13):
+        self.storage = storage or StoragePrices()
+        self.gas = gas or GasPrices()
+        self.forward = forward or MsgForwardPrices()
+        # Config param 43: larger external messages are refused by validators
+        self.max_msg_bits = max_msg_bits
+        self.max_msg_cells = max_msg_cells
+
+
+async def fetch_fee_config(api: TonApi) -> FeeConfig:
+    """Current prices from config params 18, 21 and 25"""
+    storage, gas, forward = await asyncio.gather(*(api.get_config_param(i) for i in (18, 21, 25)))
+    return FeeConfig(StoragePrices.from_cell(storage), GasPrices.from_cell(gas), MsgForwardPrices.from_cell(forward))
+
+
+def cell_stats(root: Cell, include_root: bool = True) -> Tuple[int, int]:
+    """(bits, cells) of a cell tree, counting shared cells once"""
+    seen = set()
+    bits = cells = 0
+    stack = [root] if include_root else list(root.refs)
+    while stack:
+        cell = stack.pop()
+        if cell.hash in seen:
+            continue
+        seen.add(cell.hash)
+        bits += cell.bit_len
+        cells += 1
+        stack.extend(cell.refs)
+    return bits, cells
+
+
+def _ceil_shift(value: int) -> int:
+    return -(-value >> 16)
+
+
+def storage_fee(prices: StoragePrices, bits: int, cells: int, seconds: int) -> int:
+    return _ceil_shift((bits * prices.bit_price_ps + cells * prices.cell_price_ps) * seconds)
+
+
+def gas_fee(prices: GasPrices, gas_used: int) -> int:
+    if gas_used <= prices.flat_gas_limit:
+        return prices.flat_gas_price
+    return prices.flat_gas_price + _ceil_shift((gas_used - prices.flat_gas_limit) * prices.gas_price)
+
+
+def forward_fee(prices: MsgForwardPrices, message: Cell) -> int:
+    """Forward (or import) fee of a message; its root cell is not charged"""
+    bits, cells = cell_stats(message, include_root=False)
+    return prices.lump_price + _ceil_shift(prices.bit_price * bits + prices.cell_price * cells)
+
+
+class FeeEstimate:
+    """Nanoton cost of one or more transactions, split by fee kind"""
+
+    def __init__(self, storage: int = 0, gas: int = 0, forward: int = 0, import_fee: int = 0,
+                 gas_used: int = 0, exit_code: int = 0, accepted: bool = True, transactions: int = 0):
+        self.storage = storage
+        self.gas = gas
+        # Inbound internal messages (paid by their sender) and every message sent out
+        self.forward = forward
+        self.import_fee = import_fee
+        self.gas_used = gas_used
+        self.exit_code = exit_code
+        self.accepted = accepted
+        self.transactions = transactions
+
+    @property
+    def total(self) -> int:
+        return self.storage + self.gas + self.forward + self.import_fee
+
+    @property
+    def success(self) -> bool:
+        return self.accepted and self.exit_code in (0, 1)
+
+    def __add__(self, other: "FeeEstimate") -> "FeeEstimate":
+        return FeeEstimate(
+            self.storage + other.storage, self.gas + other.gas, self.forward + other.forward,
+            self.import_fee + other.import_fee, self.gas_used + other.gas_used,
+            self.exit_code if not self.success else other.exit_code,
+            self.accepted and other.accepted, self.transactions + other.transactions)
+
+    def __repr__(self) -> str:
+        return (f"FeeEstimate(total={self.total}, storage={self.storage}, gas={self.gas}, "
+                f"forward={self.forward}, import_fee={self.import_fee}, gas_used={self.gas_used}, "
+                f"exit_code={self.exit_code}, accepted={self.accepted})")
+
+
+def pricing_contract(code: Optional[Cell] = None, now: Optional[int] = None) -> ShoppingContractModel:
+    """Deployed contract model owned by PRICING_KEY, so that estimated createOrder messages pass its signature check"""
+    storage = ContractStorage(owner_key=PRICING_PUBLIC_KEY)
+    return ShoppingContractModel(storage, code=Cell() if code is None else code, now=now)
+
+
+class FeeEstimator:
+    """Runs candidate messages through local account models and prices the transactions"""
+
+    def __init__(self, config: Optional[FeeConfig] = None, idle_seconds: int = 3600):
+        self.config = config or FeeConfig()
+        # Time since the account's previous transaction, charged as storage fee
+        self.idle_seconds = idle_seconds
+
+    def price(self, account: AccountModel, message: Cell) -> FeeEstimate:
+        """Execute ``message`` on ``account`` (updating its state) and price the transaction"""
+        config = self.config
+        header, _, _ = parse_message(message)
+        bits, cells = cell_stats(message)
+        if header["external"] and (bits > config.max_msg_bits or cells > config.max_msg_cells):
+            return FeeEstimate(accepted=False)
+
+        inbound = forward_fee(config.forward, message)
+        storage = 0
+        if account.active:
+            bits, cells = cell_stats(state_init(account.code, account.data()))
+            storage = storage_fee(config.storage, bits, cells, self.idle_seconds)
+
+        if header["external"]:
+            execution = account.execute(message, config.gas.gas_limit, config.gas.gas_credit)
+            if not execution.accepted:
+                # Never included in a block, so it costs nothing
+                return FeeEstimate(gas_used=execution.gas_used, exit_code=execution.exit_code, accepted=False)
+            estimate = FeeEstimate(storage=storage, import_fee=inbound)
+        else:
+            gas_limit = min((header["value"] << 16) // config.gas.gas_price, config.gas.gas_limit)
+            execution = account.execute(message, gas_limit)
+            estimate = FeeEstimate(storage=storage, forward=inbound)
+
+        estimate.gas = gas_fee(config.gas, execution.gas_used)
+        estimate.gas_used = execution.gas_used
+        estimate.exit_code = execution.exit_code
+        estimate.forward += sum(forward_fee(config.forward, out) for out in execution.out_messages)
+        estimate.transactions = 1
+        return estimate
+
+    def deploy(self, code: Cell, owner: Address, shard_index: int = 0) -> FeeEstimate:
+        """Deploy of a (fleet) ShoppingContract instance"""
+        instance = FleetInstance(shard_index, code, owner, PRICING_PUBLIC_KEY)
+        return self.price(ShoppingContractModel(), instance.deploy_message(PRICING_KEY))
+
+    def create_orders(self, contract: ShoppingContractModel,
+                      orders: Iterable[Tuple[str, str, int]]) -> List[FeeEstimate]:
+        """createOrder for each (product details, image hash, price) in turn, as the dictionaries grow
+
+        ``contract`` must be owned by PRICING_KEY, see pricing_contract.
+        """
+        bodies = build_create_order_bodies(
+            [(details, image_hash, price, make_query_id(now=contract.current_time()))
+             for details, image_hash, price in orders], PRICING_KEY)
+        return [self.price(contract, external_message(ANY_ADDRESS, body)) for body in bodies]
+
+    def create_order(self, contract: ShoppingContractModel, details: str, image_hash: str,
+                     price: int) -> FeeEstimate:
+        return self.create_orders(contract, [(details, image_hash, price)])[0]
+
+    def payment(self, contract: ShoppingContractModel, order_id: int, amount: int,
+                value: Optional[int] = None) -> FeeEstimate:
+        """pay_order declaring ``amount`` and carrying ``value`` nanotons (``amount`` by default)"""
+        body = build_payment_payload(order_id, amount)
+        return self.price(contract, internal_message(ANY_ADDRESS, amount if value is None else value, body))
+
+    def withdraw(self, sender: HighloadBatchSender, transfers: Sequence[Transfer],
+                 batch_size: Optional[int] = None, wallet: Optional[HighloadWalletModel] = None) -> FeeEstimate:
+        """Withdrawals and refunds sent through the highload wallet in batches of ``batch_size``"""
+        batch_size = batch_size or sender.batch_size
+        if wallet is None:
+            # Only the storage fee depends on the wallet code, and it is tiny
+            wallet = HighloadWalletModel(sender.subwallet_id, code=Cell())
+        total = FeeEstimate()
+        for i in range(0, len(transfers), batch_size):
+            batch = Batch(make_query_id(now=wallet.current_time()), list(transfers[i:i + batch_size]))
+            total += self.price(wallet, sender.build_message(batch))
+        return total
+
+    def cheapest_batch_size(self, sender: HighloadBatchSender, transfers: Sequence[Transfer],
+                            candidates: Sequence[int] = DEFAULT_BATCH_SIZES) -> int:
+        """Batch size with the lowest total fee among the candidates that the wallet accepts"""
+        best: Optional[Tuple[int, int]] = None
+        for size in sorted({min(size, len(transfers)) for size in candidates if size > 0}):
+            estimate = self.withdraw(sender, transfers, size)
+            if estimate.success and (best is None or estimate.total < best[1]):
+                best = (size, estimate.total)
+        if best is None:
+            raise ValueError("No candidate batch size is accepted by the wallet")
+        return best[0]
+
+
+def format_ton(nanotons: int) -> str:
+    return f"{nanotons / 1e9:.6f} TON"
+
+
+async def main(argv: Optional[List[str]] = None):
+    """Print fee estimates for the common ShoppingContract operations"""
+    parser = argparse.ArgumentParser(description="Offline ShoppingContract fee estimator")
+    parser.add_argument("--code", help="Compiled contract code BoC (a stand-in cell otherwise)")
+    parser.add_argument("--orders", type=int, default=10, help="Orders in the batched createOrder estimate")
+    parser.add_argument("--transfers", type=int, default=500, help="Transfers in the withdrawal estimate")
+    parser.add_argument("--live-config", action="store_true", help="Fetch current config params")
+    parser.add_argument("--endpoint", action="append",
+                        help="RPC endpoint, repeat for several (default: endpoints.json)")
+    args = parser.parse_args(argv)
+
+    config = FeeConfig()
+    if args.live_config:
+        api = connect(args.endpoint)
+        try:
+            config = await fetch_fee_config(api)
+        finally:
+            await api.close()
+    estimator = FeeEstimator(config)
+    code = load_code(args.code) if args.code else Cell()
+
+    contract = pricing_contract(code)
+    image_hash = "00" * 32
+    rows = [
+        ("deploy", estimator.deploy(code, ANY_ADDRESS)),
+        ("createOrder", estimator.create_order(contract, "T-Shirt (Size: M)", image_hash, 10 ** 9)),
+    ]
+    batch = estimator.create_orders(contract, [(f"Product #{i}", image_hash, 10 ** 9) for i in range(args.orders)])
+    rows.append((f"createOrder x{args.orders}", sum(batch, FeeEstimate())))
+    rows.append(("payment", estimator.payment(contract, 1, 10 ** 9)))
+
+    sender = HighloadBatchSender(None, ANY_ADDRESS, bytes(32))
+    transfers = [Transfer(ANY_ADDRESS, 10 ** 8) for _ in range(args.transfers)]
+    size = estimator.cheapest_batch_size(sender, transfers)
+    rows.append((f"withdraw x{args.transfers} (batch {size})", estimator.withdraw(sender, transfers, size)))
+
+    for name, estimate in rows:
+        print(f"💰 {name}: {format_ton(estimate.total)} "
+              f"(gas {estimate.gas_used}, storage {estimate.storage}, forward {estimate.forward}, "
+              f"import {estimate.import_fee})")
+    return rows
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Sharded ShoppingContract Fleet
+Deterministic multi-instance deployment, key-based routing and parallel fleet reads
+"""
+
+import argparse
+import asyncio
+import hashlib
+from bisect import bisect_right
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Union
+
+from boc import Address, Cell, begin_cell
+from messages import contract_address, external_message, signed_body, state_init
+from rpc_pool import connect
+from signing import InsecureSigningError, public_key, require_constant_time
+from snapshot import OrderSnapshot, fetch_snapshot
+from storage import ContractStorage
+from submitter import IdempotentSubmitter, make_query_id
+from toncenter import TonApi
+
+OP_DEPLOY = 0
+
+
+def _point(key: Union[str, bytes]) -> int:
+    if isinstance(key, str):
+        key = key.encode("utf-8")
+    return int.from_bytes(hashlib.sha256(key).digest()[:8], "big")
+
+
+class ConsistentHashRing:
+    """Maps keys to nodes so that resizing the ring moves only ~1/K of the keys"""
+
+    def __init__(self, nodes: List[int], vnodes: int = 64):
+        points = sorted((_point(f"{node}#{replica}"), node) for node in nodes for replica in range(vnodes))
+        self._points = [point for point, _ in points]
+        self._nodes = [node for _, node in points]
+
+    def lookup(self, key: Union[str, bytes]) -> int:
+        if not self._points:
+            raise LookupError("Hash ring is empty")
+        i = bisect_right(self._points, _point(key)) % len(self._points)
+        return self._nodes[i]
+
+
+def deploy_message(address: Address, init: Cell, query_id: int, secret_key: bytes) -> Cell:
+    """External deploy message carrying the StateInit; re-sending it is harmless once the contract exists"""
+    body = begin_cell().store_uint(OP_DEPLOY, 32).store_uint(query_id, 64).end_cell()
+    return external_message(address, signed_body(secret_key, body), init)
+
+
+class FleetInstance:
+    """One contract of the fleet with its deterministic address"""
+
+    def __init__(self, index: int, code: Cell, owner: Address, owner_key: bytes, workchain: int = 0):
+        self.index = index
+        storage = ContractStorage(shard_index=index, owner=owner, owner_key=owner_key)
+        self.init = state_init(code, storage.encode())
+        self.address = contract_address(self.init, workchain)
+
+    def deploy_message(self, secret_key: bytes, query_id: Optional[int] = None) -> Cell:
+        if query_id is None:
+            query_id = make_query_id()
+        return deploy_message(self.address, self.init, query_id, secret_key)
+
+    def __repr__(self) -> str:
+        return f"FleetInstance({self.index}, {self.address})"
+
+
+class Fleet:
+    """K ShoppingContract instances that differ only in their shard index
+
+    ``owner_key`` is the public key that must sign every external message.
+    """
+
+    def __init__(self, code: Cell, owner: Address, size: int, owner_key: bytes, workchain: int = 0,
+                 vnodes: int = 64):
+        if not 0 < size <= 0xFFFF:
+            raise ValueError(f"Fleet size must be between 1 and 65535, got {size}")
+        self.instances = [FleetInstance(i, code, owner, owner_key, workchain) for i in range(size)]
+        self.ring = ConsistentHashRing(list(range(size)), vnodes)
+
+    def __len__(self) -> int:
+        return len(self.instances)
+
+    def route(self, key: Union[str, bytes]) -> FleetInstance:
+        """Instance responsible for a merchant or user key"""
+        return self.instances[self.ring.lookup(key)]
+
+    @property
+    def addresses(self) -> List[str]:
+        return [instance.address.to_raw() for instance in self.instances]
+
+
+async def gather_fleet(api: TonApi, fleet: Fleet, fetch: Callable[[TonApi, str], Awaitable[Any]],
+                       concurrency: int = 8) -> Dict[int, Any]:
+    """Run ``fetch(api, address)`` for every instance in parallel, keyed by shard index"""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(instance: FleetInstance):
+        async with semaphore:
+            return instance.index, await fetch(api, instance.address.to_raw())
+
+    return dict(await asyncio.gather(*(run(instance) for instance in fleet.instances)))
+
+
+async def fetch_fleet_snapshots(api: TonApi, fleet: Fleet, concurrency: int = 8) -> Dict[int, OrderSnapshot]:
+    """Snapshot every instance of the fleet concurrently"""
+    return await gather_fleet(api, fleet, fetch_snapshot, concurrency)
+
+
+async def fetch_fleet_transactions(api: TonApi, fleet: Fleet, limit: int = 100,
+                                   concurrency: int = 8) -> Dict[int, List[Dict[str, Any]]]:
+    """Latest transactions of every instance, for payment verification"""
+    async def fetch(client: TonApi, address: str):
+        return await client.get_transactions(address, limit=limit)
+
+    return await gather_fleet(api, fleet, fetch, concurrency)
+
+
+async def deploy_fleet(api: TonApi, fleet: Fleet, secret_key: bytes, concurrency: int = 8,
+                       submitter: Optional[IdempotentSubmitter] = None) -> Dict[int, bool]:
+    """Deploy every instance that is not active yet; returns shard index -> confirmed"""
+    states = await gather_fleet(api, fleet, lambda client, address: client.get_address_information(address),
+                                concurrency)
+    pending = [instance for instance in fleet.instances if states[instance.index].get("state") != "active"]
+    submitter = submitter or IdempotentSubmitter([api])
+    submissions = []
+    for instance in pending:
+        print(f"📤 Deploying shard {instance.index} at {instance.address.to_friendly()}")
+        query_id = make_query_id()
+        submissions.append((instance.address.to_raw(), instance.deploy_message(secret_key, query_id), query_id))
+    results = await submitter.submit_many(submissions, concurrency)
+    return {instance.index: ok for instance, ok in zip(pending, results)}
+
+
+def load_code(path: str) -> Cell:
+    """Load compiled contract code from a BoC file"""
+    with open(path, "rb") as f:
+        return Cell.from_boc(f.read())
+
+
+async def main(argv: Optional[List[str]] = None):
+    """Print (and optionally deploy) the fleet addresses"""
+    parser = argparse.ArgumentParser(description="Deterministic ShoppingContract fleet")
+    parser.add_argument("code", help="Compiled contract code BoC")
+    parser.add_argument("owner", help="Owner address of every instance")
+    parser.add_argument("--size", type=int, default=4, help="Number of instances (K)")
+    parser.add_argument("--secret-key", required=True, help="Owner secret key (hex seed); signs external messages")
+    parser.add_argument("--deploy", action="store_true", help="Send deploy messages to inactive instances")
+    parser.add_argument("--endpoint", action="append",
+                        help="RPC endpoint, repeat for several (default: endpoints.json)")
+    args = parser.parse_args(argv)
+    try:
+        require_constant_time()
+    except InsecureSigningError as exc:
+        parser.error(str(exc))
+
+    secret_key = bytes.fromhex(args.secret_key)
+    fleet = Fleet(load_code(args.code), Address.parse(args.owner), args.size, public_key(secret_key))
+    for instance in fleet.instances:
+        print(f"📍 Shard {instance.index}: {instance.address.to_raw()} ({instance.address.to_friendly()})")
+
+    if args.deploy:
+        print("⚠️  Each address must hold a small balance before its deploy message is accepted")
+        api = connect(args.endpoint)
+        try:
+            deployed = await deploy_fleet(api, fleet, secret_key)
+        finally:
+            await api.close()
+        confirmed = sum(deployed.values())
+        print(f"✅ {confirmed}/{len(deployed)} pending instances deployed")
+    return fleet
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+"""
+Highload Wallet Batch Sender
+Packs withdrawals and refunds into signed highload-wallet-v2 batches and tracks every transfer
+"""
+
+import argparse
+import asyncio
+import base64
+import itertools
+import json
+import random
+import time
+from typing import Any, Dict, List, Optional, Union
+
+from boc import Address, Cell, begin_cell, build_dict
+from messages import comment_cell, external_message, internal_message
+from metrics import CONFIRMATION_LATENCY, start_exporter
+from payments import iter_transactions
+from rpc_pool import connect
+from signing import InsecureSigningError, require_constant_time, sign, sign_many
+from toncenter import TonApi
+
+# Highload wallet v2 accepts at most 254 messages per external message
+MAX_MESSAGES_PER_BATCH = 254
+DEFAULT_SUBWALLET_ID = 698983191
+# Pay forward fees separately and ignore errors, so one bad transfer cannot sink the batch
+SEND_MODE = 3
+# Allowed drift between the local clock and block times when searching the wallet history
+CLOCK_SKEW = 60
+
+PENDING = "pending"
+SENT = "sent"
+CONFIRMED = "confirmed"
+FAILED = "failed"
+EXPIRED = "expired"
+
+
+class Transfer:
+    """One outgoing payment and its individual delivery status"""
+
+    def __init__(self, destination: Union[Address, str], amount: int, body: Optional[Cell] = None,
+                 bounce: bool = True, reference: Optional[str] = None):
+        self.destination = Address.parse(destination) if isinstance(destination, str) else destination
+        self.amount = amount
+        self.body = body
+        self.bounce = bounce
+        self.reference = reference
+        self.status = PENDING
+        self.query_id: Optional[int] = None
+        self.transaction_hash: Optional[str] = None
+
+    def __repr__(self) -> str:
+        return f"Transfer({self.reference or self.destination}, {self.amount}, {self.status})"
+
+
+def refund_transfer(order_id: int, destination: Union[Address, str], amount: int) -> Transfer:
+    """Refund for an order, labelled with a comment the shopper's wallet displays"""
+    return Transfer(destination, amount, comment_cell(f"Refund for order {order_id}"),
+                    bounce=False, reference=f"refund:{order_id}")
+
+
+class Batch:
+    """Transfers sent together in one signed external message"""
+
+    def __init__(self, query_id: int, transfers: List[Transfer]):
+        self.query_id = query_id
+        self.transfers = transfers
+        self.message: Optional[Cell] = None
+        self.status = PENDING
+        self.transaction_hash: Optional[str] = None
+        self.sent_at: Optional[float] = None
+        # The wallet cannot have processed the batch before it was planned
+        self.planned_at = int(time.time())
+
+    @property
+    def valid_until(self) -> int:
+        return self.query_id >> 32
+
+
+def external_query_id(tx: Dict[str, Any]) -> Optional[int]:
+    """Query id of the highload external message that produced a transaction"""
+    in_msg = tx.get("in_msg") or {}
+    if in_msg.get("source"):
+        return None
+    body = (in_msg.get("msg_data") or {}).get("body")
+    if not body:
+        return None
+    try:
+        s = Cell.from_boc(base64.b64decode(body)).begin_parse()
+        s.skip_bits(512 + 32)
+        return s.load_uint(64)
+    except ValueError:
+        return None
+
+
+class HighloadBatchSender:
+    """Fans out transfers through a highload wallet, up to 254 per transaction"""
+
+    def __init__(self, api: TonApi, wallet: Address, secret_key: bytes,
+                 subwallet_id: int = DEFAULT_SUBWALLET_ID, ttl: int = 120,
+                 batch_size: int = MAX_MESSAGES_PER_BATCH, estimator=None):
+        if not 0 < batch_size <= MAX_MESSAGES_PER_BATCH:
+            raise ValueError(f"Batch size must be between 1 and {MAX_MESSAGES_PER_BATCH}")
+        self.api = api
+        self.wallet = wallet
+        self.secret_key = secret_key
+        self.subwallet_id = subwallet_id
+        self.ttl = ttl
+        self.batch_size = batch_size
+        # Optional fees.FeeEstimator; picks the cheapest batch size before each send
+        self.estimator = estimator
+        self._seq = itertools.count(random.getrandbits(31))
+
+    def _next_query_id(self) -> int:
+        # Highload v2 query id: expiry time in the high 32 bits, unique sequence below
+        valid_until = int(time.time()) + self.ttl
+        return (valid_until << 32) | (next(self._seq) & 0xFFFFFFFF)
+
+    def plan(self, transfers: List[Transfer]) -> List[Batch]:
+        return [Batch(self._next_query_id(), transfers[i:i + self.batch_size])
+                for i in range(0, len(transfers), self.batch_size)]
+
+    def signing_payload(self, batch: Batch) -> Cell:
+        """The cell whose hash the wallet checks the signature against"""
+        actions = {
+            i: begin_cell().store_uint(SEND_MODE, 8).store_ref(
+                internal_message(t.destination, t.amount, t.body, t.bounce))
+            for i, t in enumerate(batch.transfers)
+        }
+        return (begin_cell()
+                .store_uint(self.subwallet_id, 32)
+                .store_uint(batch.query_id, 64)
+                .store_dict(build_dict(actions, 16))
+                .end_cell())
+
+    def build_message(self, batch: Batch, signature: bytes = bytes(64)) -> Cell:
+        """External message for a batch; the zero signature default suits fee estimation"""
+        body = begin_cell().store_bytes(signature).store_cell(self.signing_payload(batch)).end_cell()
+        return external_message(self.wallet, body)
+
+    def seal(self, batch: Batch, signature: bytes) -> Cell:
+        """Attach a signature to a batch and build its external message"""
+        batch.message = self.build_message(batch, signature)
+        for transfer in batch.transfers:
+            transfer.query_id = batch.query_id
+        return batch.message
+
+    def sign_batch(self, batch: Batch) -> Cell:
+        return self.seal(batch, sign(self.secret_key, self.signing_payload(batch).hash))
+
+    def sign_batches(self, batches: List[Batch]) -> List[Cell]:
+        """Sign many batches at once; large plans are signed across all cores"""
+        signatures = sign_many(self.secret_key, [self.signing_payload(batch).hash for batch in batches])
+        return [self.seal(batch, signature) for batch, signature in zip(batches, signatures)]
+
+    async def send(self, transfers: List[Transfer]) -> List[Batch]:
+        """Sign and broadcast all transfers; returns the batches for tracking"""
+        if self.estimator is not None and transfers:
+            self.batch_size = self.estimator.cheapest_batch_size(self, transfers)
+        batches = self.plan(transfers)
+        # Signing a large plan takes a while; keep the event loop free meanwhile
+        await asyncio.to_thread(self.sign_batches, batches)
+        await asyncio.gather(*(self.api.send_boc(batch.message) for batch in batches))
+        sent_at = time.monotonic()
+        for batch in batches:
+            batch.status = SENT
+            batch.sent_at = sent_at
+            for transfer in batch.transfers:
+                transfer.status = SENT
+        return batches
+
+    def _resolve(self, batch: Batch, tx: Dict[str, Any]):
+        """Confirm each transfer of a processed batch against the wallet's outgoing messages"""
+        tx_hash = tx.get("transaction_id", {}).get("hash")
+        outgoing: Dict[tuple, int] = {}
+        for out_msg in tx.get("out_msgs", []):
+            try:
+                key = (Address.parse(out_msg["destination"]), int(out_msg["value"]))
+            except (KeyError, ValueError):
+                continue
+            outgoing[key] = outgoing.get(key, 0) + 1
+
+        for transfer in batch.transfers:
+            key = (transfer.destination, transfer.amount)
+            if outgoing.get(key):
+                outgoing[key] -= 1
+                transfer.status = CONFIRMED
+                transfer.transaction_hash = tx_hash
+            else:
+                transfer.status = FAILED
+        batch.status = CONFIRMED
+        batch.transaction_hash = tx_hash
+        if batch.sent_at is not None:
+            CONFIRMATION_LATENCY.observe(time.monotonic() - batch.sent_at, kind="highload")
+
+    async def _search_history(self, pending: Dict[int, Batch], since: int):
+        """Resolve pending batches from the wallet's whole history back to ``since``"""
+        async for tx in iter_transactions(self.api, self.wallet.to_raw()):
+            utime = tx.get("utime")
+            if utime is not None and utime < since:
+                return
+            batch = pending.pop(external_query_id(tx), None)
+            if batch is not None:
+                self._resolve(batch, tx)
+                if not pending:
+                    return
+
+    async def wait_for_confirmations(self, batches: List[Batch], poll_interval: float = 3.0) -> List[Batch]:
+        """Poll the wallet until every batch is processed or has expired"""
+        pending = {batch.query_id: batch for batch in batches if batch.status == SENT}
+        while pending:
+            transactions = await self.api.get_transactions(self.wallet.to_raw(), limit=min(100, 2 * len(pending) + 10))
+            for tx in transactions:
+                batch = pending.pop(external_query_id(tx), None)
+                if batch is not None:
+                    self._resolve(batch, tx)
+
+            now = time.time()
+            expired = [batch for batch in pending.values() if now > batch.valid_until + poll_interval]
+            if expired:
+                # On a busy wallet a processed batch can be older than the newest page,
+                # so look through everything since it was planned before giving up on it
+                await self._search_history(pending, min(batch.planned_at for batch in expired) - CLOCK_SKEW)
+            for batch in expired:
+                if batch.query_id in pending:
+                    # Not in the history either: safe to re-plan these transfers under a new query id
+                    del pending[batch.query_id]
+                    batch.status = EXPIRED
+                    for transfer in batch.transfers:
+                        transfer.status = EXPIRED
+            if pending:
+                await asyncio.sleep(poll_interval)
+        return batches
+
+
+def load_transfers(path: str) -> List[Transfer]:
+    """Read transfers from JSON: [{"destination", "amount", "comment"?, "order_id"?}]"""
+    with open(path, "r", encoding="utf-8") as f:
+        entries = json.load(f)
+    transfers = []
+    for entry in entries:
+        if "order_id" in entry:
+            transfers.append(refund_transfer(entry["order_id"], entry["destination"], int(entry["amount"])))
+        else:
+            body = comment_cell(entry["comment"]) if entry.get("comment") else None
+            transfers.append(Transfer(entry["destination"], int(entry["amount"]), body))
+    return transfers
+
+
+async def main(argv: Optional[List[str]] = None):
+    """Send a JSON file of transfers through a highload wallet"""
+    parser = argparse.ArgumentParser(description="Highload wallet batch sender")
+    parser.add_argument("transfers", help="JSON file with the transfers to send")
+    parser.add_argument("--wallet", required=True, help="Highload wallet address")
+    parser.add_argument("--secret-key", required=True, help="Wallet secret key (hex seed)")
+    parser.add_argument("--subwallet-id", type=int, default=DEFAULT_SUBWALLET_ID)
+    parser.add_argument("--batch-size", type=int, default=MAX_MESSAGES_PER_BATCH)
+    parser.add_argument("--auto-batch-size", action="store_true",
+                        help="Pick the cheapest batch size with the offline fee estimator")
+    parser.add_argument("--endpoint", action="append",
+                        help="RPC endpoint, repeat for several (default: endpoints.json)")
+    parser.add_argument("--metrics-port", type=int,
+                        help="Serve Prometheus metrics on this local port (default: TON_METRICS_PORT)")
+    args = parser.parse_args(argv)
+    try:
+        require_constant_time()
+    except InsecureSigningError as exc:
+        parser.error(str(exc))
+
+    start_exporter(args.metrics_port)
+    transfers = load_transfers(args.transfers)
+    api = connect(args.endpoint)
+    sender = HighloadBatchSender(api, Address.parse(args.wallet), bytes.fromhex(args.secret_key),
+                                 args.subwallet_id, batch_size=args.batch_size)
+    try:
+        if args.auto_batch_size:
+            # fees.py builds on this module, so it is imported only when asked for
+            from fees import FeeEstimator, fetch_fee_config
+            sender.estimator = FeeEstimator(await fetch_fee_config(api))
+        print(f"📤 Sending {len(transfers)} transfers...")
+        batches = await sender.send(transfers)
+        print(f"⏳ Waiting for {len(batches)} batches to confirm...")
+        await sender.wait_for_confirmations(batches)
+    finally:
+        await api.close()
+
+    counts: Dict[str, int] = {}
+    for transfer in transfers:
+        counts[transfer.status] = counts.get(transfer.status, 0) + 1
+    print("📊 " + ", ".join(f"{status}: {count}" for status, count in sorted(counts.items())))
+    return transfers
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,148 @@
+"""
+Emulated Chain
+Serves toncenter JSON-RPC answers from local contract models, so cassettes can be recorded without a network
+"""
+
+import base64
+import hashlib
+from typing import Any, Callable, Dict, List, Optional
+
+from boc import Address, Cell
+from emulator import AccountModel, Execution, ShoppingContractModel, VmExit, parse_message
+from toncenter import TonApi, TonApiError, decode_stack_entry
+
+GENESIS_TIME = 1_700_000_000
+
+
+def encode_result_entry(value: Any) -> List[Any]:
+    """Convert a get-method result into a stack entry as toncenter returns it"""
+    if value is None:
+        return ["null", None]
+    if isinstance(value, Cell):
+        return ["cell", {"bytes": value.to_boc_base64()}]
+    if isinstance(value, int):
+        return ["num", hex(value)]
+    raise TypeError(f"Unsupported stack value: {value!r}")
+
+
+def _raw_message(source: Optional[Address], destination: Optional[Address], value: int,
+                 body: Cell) -> Dict[str, Any]:
+    return {
+        "source": source.to_friendly() if source else "",
+        "destination": destination.to_friendly() if destination else "",
+        "value": str(value),
+        "msg_data": {"@type": "msg.dataRaw", "body": body.to_boc_base64()},
+    }
+
+
+class LocalChain(TonApi):
+    """Accounts run by contract models on a deterministic clock
+
+    Every processed message advances time by one second and the logical time
+    by one step, so the same inputs always give byte-identical answers.
+    """
+
+    def __init__(self, now: int = GENESIS_TIME,
+                 account_factory: Callable[[], AccountModel] = ShoppingContractModel):
+        self.now = now
+        self.lt = 0
+        self.account_factory = account_factory
+        self.accounts: Dict[str, AccountModel] = {}
+        self.transactions: Dict[str, List[Dict[str, Any]]] = {}
+
+    def add_account(self, address: Address, model: AccountModel):
+        model.now = self.now
+        self.accounts[address.to_raw()] = model
+
+    def process(self, message: Cell) -> Execution:
+        """Run an inbound message on its destination; accepted ones become transactions"""
+        header, _, body = parse_message(message)
+        address = header["destination"].to_raw()
+        account = self.accounts.get(address)
+        if account is None:
+            account = self.accounts[address] = self.account_factory()
+        self.now += 1
+        account.now = self.now
+        execution = account.execute(message)
+        if header["external"] and not execution.accepted:
+            return execution
+        self.lt += 1000
+        tx_hash = hashlib.sha256(f"{address}:{self.lt}:".encode() + message.hash).digest()
+        self.transactions.setdefault(address, []).append({
+            "@type": "raw.transaction",
+            "utime": self.now,
+            "transaction_id": {"@type": "internal.transactionId", "lt": str(self.lt),
+                               "hash": base64.b64encode(tx_hash).decode()},
+            "in_msg": _raw_message(header["source"], header["destination"], header["value"], body.to_cell()),
+            "out_msgs": [self._out_message(header["destination"], out) for out in execution.out_messages],
+        })
+        return execution
+
+    @staticmethod
+    def _out_message(source: Address, message: Cell) -> Dict[str, Any]:
+        s = message.begin_parse()
+        if s.load_uint(2) != 0b11:
+            header, _, body = parse_message(message)
+            return _raw_message(source, header["destination"], header["value"], body.to_cell())
+        # ext_out_msg_info: src, dest (a log address), created_lt, created_at
+        s.load_address()
+        s.load_address()
+        s.skip_bits(64 + 32)
+        if s.load_bit():
+            raise ValueError("Log messages carry no StateInit")
+        return _raw_message(source, None, 0, s.load_ref() if s.load_bit() else s.to_cell())
+
+    def _account(self, address: str) -> Optional[AccountModel]:
+        return self.accounts.get(Address.parse(address).to_raw())
+
+    async def call(self, method: str, params: Dict[str, Any]) -> Any:
+        if method == "sendBoc":
+            execution = self.process(Cell.from_boc(params["boc"]))
+            if not execution.accepted:
+                raise TonApiError(f"external message was not accepted, exit code {execution.exit_code}", 500)
+            return {"@type": "ok"}
+        if method == "getAddressInformation":
+            return self._address_information(params["address"])
+        if method == "getTransactions":
+            return self._transactions(params)
+        if method == "runGetMethod":
+            return self._run_get_method(params)
+        if method == "getMasterchainInfo":
+            return {"last": {"seqno": self.now - GENESIS_TIME}}
+        raise TonApiError(f"{method} is not served by the local chain", 404)
+
+    def _address_information(self, address: str) -> Dict[str, Any]:
+        account = self._account(address)
+        if account is None or not account.active:
+            return {"state": "uninitialized", "balance": "0"}
+        history = self.transactions.get(Address.parse(address).to_raw()) or [{}]
+        return {
+            "state": "active",
+            "balance": str(account.balance),
+            "code": account.code.to_boc_base64(),
+            "data": account.data().to_boc_base64(),
+            "last_transaction_id": history[-1].get("transaction_id", {"lt": "0", "hash": ""}),
+        }
+
+    def _transactions(self, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Newest first, starting at the (lt, hash) cursor inclusive and stopping above to_lt"""
+        history = list(reversed(self.transactions.get(Address.parse(params["address"]).to_raw(), [])))
+        if "lt" in params:
+            start = next((i for i, tx in enumerate(history) if tx["transaction_id"]["lt"] == params["lt"]
+                          and tx["transaction_id"]["hash"] == params.get("hash", tx["transaction_id"]["hash"])),
+                         len(history))
+            history = history[start:]
+        to_lt = int(params.get("to_lt", 0))
+        return [tx for tx in history if int(tx["transaction_id"]["lt"]) > to_lt][:params["limit"]]
+
+    def _run_get_method(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        account = self._account(params["address"])
+        if account is None or not account.active:
+            raise TonApiError("account is not initialized", 416)
+        stack = [Cell.from_boc(entry[1]) if entry[0] == "tvm.Cell" else decode_stack_entry(entry)
+                 for entry in params.get("stack", [])]
+        try:
+            result = account.run_get_method(params["method"], stack)
+        except VmExit as exc:
+            return {"@type": "smc.runResult", "exit_code": exc.code, "stack": []}
+        return {"@type": "smc.runResult", "exit_code": 0, "stack": [encode_result_entry(v) for v in result]}
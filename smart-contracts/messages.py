@@ -0,0 +1,99 @@
+"""
+TON Message Construction
+StateInit, contract address derivation and message envelopes
+"""
+
+from typing import Optional
+
+from boc import Address, Builder, Cell, begin_cell, text_cell
+from signing import sign
+
+
+def state_init(code: Cell, data: Cell) -> Cell:
+    """StateInit with code and data and no split depth, special flags or libraries"""
+    return (begin_cell()
+            .store_uint(0, 2)  # split_depth:(Maybe (## 5)) special:(Maybe TickTock)
+            .store_maybe_ref(code)
+            .store_maybe_ref(data)
+            .store_uint(0, 1)  # library:(HashmapE 256 SimpleLib)
+            .end_cell())
+
+
+def contract_address(init: Cell, workchain: int = 0) -> Address:
+    """Address of a contract deployed with the given StateInit"""
+    return Address(workchain, init.hash)
+
+
+def external_message(dest: Address, body: Optional[Cell] = None, init: Optional[Cell] = None) -> Cell:
+    """Inbound external message (ext_in_msg_info) with optional StateInit and body"""
+    b = (begin_cell()
+         .store_uint(0b10, 2)  # ext_in_msg_info$10
+         .store_address(None)  # src:addr_none
+         .store_address(dest)
+         .store_coins(0))  # import_fee
+    if init is not None:
+        b.store_uint(0b11, 2).store_ref(init)  # just$1 (right$1 ^StateInit)
+    else:
+        b.store_bit(0)
+    if body is not None:
+        b.store_bit(1).store_ref(body)  # right$1 ^X
+    else:
+        b.store_bit(0)
+    return b.end_cell()
+
+
+def internal_message(dest: Address, value: int, body: Optional[Cell] = None, bounce: bool = True,
+                     init: Optional[Cell] = None, source: Optional[Address] = None) -> Cell:
+    """Outbound internal message as placed into a wallet's action list, or as delivered when ``source`` is set"""
+    b = (begin_cell()
+         .store_uint(0, 1)  # int_msg_info$0
+         .store_bit(1)  # ihr_disabled
+         .store_bit(bounce)
+         .store_bit(0)  # bounced
+         .store_address(source)  # src: filled in by the sender
+         .store_address(dest)
+         .store_coins(value)
+         .store_bit(0)  # no extra currencies
+         .store_coins(0)  # ihr_fee
+         .store_coins(0)  # fwd_fee
+         .store_uint(0, 64 + 32))  # created_lt, created_at
+    if init is not None:
+        b.store_uint(0b11, 2).store_ref(init)
+    else:
+        b.store_bit(0)
+    if body is not None:
+        b.store_bit(1).store_ref(body)
+    else:
+        b.store_bit(0)
+    return b.end_cell()
+
+
+def signed_body(secret_key: bytes, body: Cell) -> Cell:
+    """External body prefixed with the owner's signature of its hash, as recv_external checks it"""
+    return with_signature(sign(secret_key, body.hash), body)
+
+
+def with_signature(signature: bytes, body: Cell) -> Cell:
+    """External body prefixed with an already computed signature, e.g. one of signing.sign_many"""
+    return begin_cell().store_bytes(signature).store_cell(body).end_cell()
+
+
+def log_message(body: Builder) -> Cell:
+    """External-out log message (ext_out_msg_info) as sent by the contract's emit_log()"""
+    return (begin_cell()
+            .store_uint(0b11, 2)  # ext_out_msg_info$11
+            .store_address(None)  # src: filled in by the validator
+            .store_address(None)  # dest:addr_none
+            .store_uint(0, 64 + 32)  # created_lt, created_at
+            .store_uint(0, 2)  # no StateInit, body inline
+            .store_builder(body)
+            .end_cell())
+
+
+def comment_cell(text: str) -> Cell:
+    """Plain text comment body (op 0 followed by the snake-encoded text)"""
+    data = text.encode("utf-8")
+    b = begin_cell().store_uint(0, 32).store_bytes(data[:123])
+    if len(data) > 123:
+        b.store_ref(text_cell(data[123:]))
+    return b.end_cell()
@@ -0,0 +1,294 @@
+"""
+Prometheus Metrics
+Counters, gauges and latency histograms for the tooling, served as Prometheus text on a local HTTP port
+
+Metrics are plain module-level objects that the instrumented code updates
+in place; a scrape renders them in the text exposition format. Values that
+only exist as state elsewhere (queue sizes, hit ratios) are copied into
+gauges by collectors that run at the start of every scrape.
+"""
+
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+DEFAULT_PORT = 9108
+# Seconds; RPC round trips sit at the low end, confirmations at the high end
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class Metric:
+    """A named family of samples, one per combination of label values"""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        # Scrapes render from the server thread while the job updates values
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, object]) -> LabelValues:
+        if set(labels) != set(self.labels):
+            raise ValueError(f"{self.name} takes labels {list(self.labels)}, got {sorted(labels)}")
+        return tuple(str(labels[name]) for name in self.labels)
+
+    def samples(self) -> Iterator[Tuple[str, Sequence[str], Sequence[str], float]]:
+        """(name suffix, label names, label values, value) of every sample"""
+        return iter(())
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {_escape(self.documentation)}", f"# TYPE {self.name} {self.kind}"]
+        for suffix, names, values, value in self.samples():
+            lines.append(f"{self.name}{suffix}{_format_labels(names, values)} {_format_value(value)}")
+        return lines
+
+
+class Counter(Metric):
+    """Monotonic total, e.g. calls made or messages sent"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        super().__init__(name, documentation, labels)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        if amount < 0:
+            raise ValueError(f"Counter {self.name} cannot decrease")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            yield "", self.labels, key, value
+
+
+class Gauge(Counter):
+    """Value that goes up and down, e.g. a queue depth or a lag"""
+
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(Metric):
+    """Observations counted into cumulative ``le`` buckets, plus their sum and count"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        if "le" in labels:
+            raise ValueError("Histogram labels cannot include 'le'")
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+        self._counts: Dict[LabelValues, List[int]] = {}
+        self._sums: Dict[LabelValues, float] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        # Bucket bounds are inclusive upper limits; the extra slot is +Inf
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._counts.get(key)
+            if counts is None:
+                counts = self._counts[key] = [0] * (len(self.buckets) + 1)
+            counts[index] += 1
+            self._sums[key] = self._sums.get(key, 0.0) + value
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the duration of a ``with`` block, including one that raises"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def count(self, **labels) -> int:
+        return sum(self._counts.get(self._key(labels), ()))
+
+    def total(self, **labels) -> float:
+        return self._sums.get(self._key(labels), 0.0)
+
+    def samples(self):
+        with self._lock:
+            items = sorted((key, list(counts), self._sums[key]) for key, counts in self._counts.items())
+        names = self.labels + ("le",)
+        for key, counts, total in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                yield "_bucket", names, key + (_format_value(bound),), cumulative
+            yield "_sum", self.labels, key, total
+            yield "_count", self.labels, key, cumulative
+
+
+class Registry:
+    """The metrics rendered by one exporter"""
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+        self._collectors: Dict[str, Callable[[], None]] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: Metric) -> Metric:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labels: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labels))
+
+    def gauge(self, name: str, documentation: str, labels: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labels))
+
+    def histogram(self, name: str, documentation: str, labels: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labels, buckets))
+
+    def collector(self, key: str, func: Callable[[], None]):
+        """Run ``func`` before every scrape; registering the same key again replaces it"""
+        with self._lock:
+            self._collectors[key] = func
+
+    def remove_collector(self, key: str):
+        with self._lock:
+            self._collectors.pop(key, None)
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format"""
+        with self._lock:
+            collectors = list(self._collectors.values())
+            metrics = list(self._metrics.values())
+        for collect in collectors:
+            collect()
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+RPC_CALLS = REGISTRY.counter("ton_rpc_calls_total", "JSON-RPC calls sent to endpoints", ("method", "outcome"))
+RPC_LATENCY = REGISTRY.histogram("ton_rpc_latency_seconds", "Round trip of one JSON-RPC call", ("method",))
+MESSAGES_SENT = REGISTRY.counter("ton_messages_sent_total", "External messages accepted for broadcast",
+                                 ("transport",))
+CONFIRMATION_LATENCY = REGISTRY.histogram("ton_confirmation_latency_seconds",
+                                          "From broadcast until the message's transaction is found", ("kind",))
+CACHE_REQUESTS = REGISTRY.counter("ton_rpc_cache_requests_total", "Cacheable RPC calls by cache result",
+                                  ("result",))
+CACHE_HIT_RATIO = REGISTRY.gauge("ton_rpc_cache_hit_ratio", "Share of cacheable RPC calls answered from disk")
+INDEXER_LAG = REGISTRY.gauge("ton_indexer_lag_seconds",
+                             "Chain time of the last event a stream delivered, behind the wall clock", ("stream",))
+QUEUE_DEPTH = REGISTRY.gauge("ton_queue_depth", "Items waiting in a work queue", ("queue",))
+
+
+def _cache_hit_ratio():
+    hits, misses = CACHE_REQUESTS.value(result="hit"), CACHE_REQUESTS.value(result="miss")
+    CACHE_HIT_RATIO.set(hits / (hits + misses) if hits + misses else 0.0)
+
+
+REGISTRY.collector("rpc_cache", _cache_hit_ratio)
+
+
+def watch_queues(name: str, sizes: Callable[[], Dict[str, int]]) -> Callable[[], None]:
+    """Report ``sizes()`` as ton_queue_depth{queue="<name>.<key>"} at every scrape
+
+    Returns a function that stops reporting and zeroes those gauges.
+    """
+    def collect():
+        for key, size in sizes().items():
+            QUEUE_DEPTH.set(size, queue=f"{name}.{key}")
+
+    def unwatch():
+        REGISTRY.remove_collector(f"queues:{name}")
+        for key in sizes():
+            QUEUE_DEPTH.set(0, queue=f"{name}.{key}")
+
+    REGISTRY.collector(f"queues:{name}", collect)
+    return unwatch
+
+
+class _Handler(BaseHTTPRequestHandler):
+    registry = REGISTRY
+
+    def do_GET(self):
+        if self.path.split("?", 1)[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = self.registry.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # A scrape every few seconds would drown the job's own output
+        pass
+
+
+def serve(port: int = DEFAULT_PORT, host: str = "127.0.0.1", registry: Registry = REGISTRY) -> ThreadingHTTPServer:
+    """Serve /metrics from a background thread; port 0 picks a free one (see ``server_port``)"""
+    handler = type("MetricsHandler", (_Handler,), {"registry": registry})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+    return server
+
+
+def start_exporter(port: Optional[int] = None) -> Optional[ThreadingHTTPServer]:
+    """Serve metrics on ``port``, else on TON_METRICS_PORT when set; None when neither is given"""
+    if port is None:
+        configured = os.environ.get("TON_METRICS_PORT")
+        if not configured:
+            return None
+        port = int(configured)
+    server = serve(port)
+    print(f"📈 Metrics on http://127.0.0.1:{server.server_port}/metrics")
+    return server
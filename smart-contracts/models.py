@@ -0,0 +1,407 @@
+"""
+Slotted Data Model
+Typed records for orders, payments and deployments, and struct-of-arrays tables that hold them in bulk
+
+Records are ``__slots__`` classes that replace the dicts the tooling used to
+pass around. They still read like those dicts (``order["paid"]``,
+``dict(order)``), so printing, JSON output and the columnar exporter keep
+working unchanged. A table keeps one typed column per field (an ``array``,
+packed hash bytes or interned strings), which costs tens of bytes per row
+where a dict costs several hundred, and serializes as one buffer per column.
+"""
+
+import os
+import struct
+from array import array
+from functools import partial
+from itertools import accumulate
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Type
+
+HASH_SIZE = 32
+# Length or code marking a None value in a string column
+_NULL = 0xFFFFFFFF
+_HEADER = struct.Struct("<4sI")
+_SECTION = struct.Struct("<Q")
+
+
+class Record:
+    """Fixed set of fields with dict-style reads"""
+
+    __slots__ = ()
+
+    def keys(self) -> Tuple[str, ...]:
+        return self.__slots__
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in self.keys():
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return getattr(self, key) if key in self.keys() else default
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {key: getattr(self, key) for key in self.keys()}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Record":
+        """Build from a dict of the old shape; derived and unknown keys are ignored"""
+        return cls(**{name: data[name] for name in cls.__slots__ if name in data})
+
+    def __eq__(self, other: object) -> bool:
+        if type(other) is not type(self):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"{type(self).__name__}({fields})"
+
+
+class Order(Record):
+    """One on-chain order; ``image_hash`` is the hex content hash, ``price`` the nanotons a payment must carry"""
+
+    __slots__ = ("order_id", "paid", "product_details", "image_hash", "price")
+
+    def __init__(self, order_id: int, paid: bool, product_details: str, image_hash: str, price: int):
+        self.order_id = order_id
+        self.paid = paid
+        self.product_details = product_details
+        self.image_hash = image_hash
+        self.price = price
+
+
+class Payment(Record):
+    """A pay_order payment as seen in a contract transaction"""
+
+    __slots__ = ("order_id", "query_id", "amount", "value", "source", "lt", "transaction_hash")
+
+    def __init__(self, order_id: int, query_id: int, amount: int, value: int = 0, source: Optional[str] = None,
+                 lt: int = 0, transaction_hash: Optional[str] = None):
+        self.order_id = order_id
+        self.query_id = query_id
+        self.amount = amount
+        self.value = value
+        self.source = source
+        self.lt = lt
+        self.transaction_hash = transaction_hash
+
+
+class Deployment(Record):
+    """Outcome of one contract deployment"""
+
+    __slots__ = ("address", "transaction_id", "block_id", "public_key", "secret_key", "status", "network")
+
+    def __init__(self, address: str, transaction_id: str, block_id: str, public_key: Optional[str] = None,
+                 secret_key: Optional[str] = None, status: str = "deployed", network: str = "testnet"):
+        self.address = address
+        self.transaction_id = transaction_id
+        self.block_id = block_id
+        self.public_key = public_key
+        self.secret_key = secret_key
+        self.status = status
+        self.network = network
+
+
+class _IntColumn:
+    """Unsigned integers in an ``array`` of the given type code"""
+
+    __slots__ = ("values",)
+
+    def __init__(self, typecode: str):
+        self.values = array(typecode)
+
+    def append(self, value: int):
+        self.values.append(value)
+
+    def __getitem__(self, i: int) -> int:
+        return self.values[i]
+
+    def __setitem__(self, i: int, value: int):
+        self.values[i] = value
+
+    def to_bytes(self) -> bytes:
+        return self.values.tobytes()
+
+    def load(self, data: memoryview, count: int):
+        self.values = array(self.values.typecode)
+        self.values.frombytes(data)
+
+
+class _BoolColumn:
+    """Flags, one byte each"""
+
+    __slots__ = ("values",)
+
+    def __init__(self):
+        self.values = bytearray()
+
+    def append(self, value: bool):
+        self.values.append(1 if value else 0)
+
+    def __getitem__(self, i: int) -> bool:
+        return self.values[i] != 0
+
+    def __setitem__(self, i: int, value: bool):
+        self.values[i] = 1 if value else 0
+
+    def to_bytes(self) -> bytes:
+        return bytes(self.values)
+
+    def load(self, data: memoryview, count: int):
+        self.values = bytearray(data)
+
+
+class _HashColumn:
+    """32-byte hashes packed back to back, read and written as hex"""
+
+    __slots__ = ("values",)
+
+    def __init__(self):
+        self.values = bytearray()
+
+    def append(self, value: str):
+        self.values += bytes.fromhex(value)
+
+    def __getitem__(self, i: int) -> str:
+        return self.values[i * HASH_SIZE:(i + 1) * HASH_SIZE].hex()
+
+    def __setitem__(self, i: int, value: str):
+        self.values[i * HASH_SIZE:(i + 1) * HASH_SIZE] = bytes.fromhex(value)
+
+    def to_bytes(self) -> bytes:
+        return bytes(self.values)
+
+    def load(self, data: memoryview, count: int):
+        self.values = bytearray(data)
+
+
+class _TextColumn:
+    """Mostly distinct strings (hashes, addresses) in one UTF-8 buffer
+
+    Row ``i`` is ``blob[starts[i]:starts[i] + lengths[i]]``. Overwriting a row
+    appends the new text and leaves the old bytes behind until the column
+    is serialized, which writes the rows back to back.
+    """
+
+    __slots__ = ("starts", "lengths", "blob", "_garbage")
+
+    def __init__(self):
+        self.starts = array("Q")
+        self.lengths = array("I")
+        self.blob = bytearray()
+        self._garbage = False
+
+    def _store(self, value: Optional[str]) -> Tuple[int, int]:
+        if value is None:
+            return 0, _NULL
+        raw = value.encode("utf-8")
+        start = len(self.blob)
+        self.blob += raw
+        return start, len(raw)
+
+    def append(self, value: Optional[str]):
+        start, length = self._store(value)
+        self.starts.append(start)
+        self.lengths.append(length)
+
+    def __getitem__(self, i: int) -> Optional[str]:
+        length = self.lengths[i]
+        if length == _NULL:
+            return None
+        start = self.starts[i]
+        return self.blob[start:start + length].decode("utf-8")
+
+    def __setitem__(self, i: int, value: Optional[str]):
+        self.starts[i], self.lengths[i] = self._store(value)
+        self._garbage = True
+
+    def to_bytes(self) -> bytes:
+        if self._garbage:
+            blob = b"".join(self.blob[start:start + length] for start, length in zip(self.starts, self.lengths)
+                            if length != _NULL)
+        else:
+            blob = self.blob
+        return self.lengths.tobytes() + blob
+
+    def load(self, data: memoryview, count: int):
+        size = count * self.lengths.itemsize
+        self.lengths = array("I")
+        self.lengths.frombytes(data[:size])
+        self.blob = bytearray(data[size:])
+        sizes = [0 if length == _NULL else length for length in self.lengths]
+        self.starts = array("Q", accumulate(sizes[:-1], initial=0) if sizes else ())
+        self._garbage = False
+
+
+class _InternedColumn:
+    """Strings with few distinct values (product details, payers), each stored once"""
+
+    __slots__ = ("codes", "values", "_lookup")
+
+    def __init__(self):
+        self.codes = array("I")
+        self.values: List[str] = []
+        self._lookup: Dict[str, int] = {}
+
+    def _code(self, value: Optional[str]) -> int:
+        if value is None:
+            return _NULL
+        code = self._lookup.get(value)
+        if code is None:
+            code = self._lookup[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def append(self, value: Optional[str]):
+        self.codes.append(self._code(value))
+
+    def __getitem__(self, i: int) -> Optional[str]:
+        code = self.codes[i]
+        return None if code == _NULL else self.values[code]
+
+    def __setitem__(self, i: int, value: Optional[str]):
+        self.codes[i] = self._code(value)
+
+    def to_bytes(self) -> bytes:
+        values = _TextColumn()
+        for value in self.values:
+            values.append(value)
+        return struct.pack("<I", len(self.values)) + self.codes.tobytes() + values.to_bytes()
+
+    def load(self, data: memoryview, count: int):
+        distinct, = struct.unpack_from("<I", data)
+        pos = 4 + count * self.codes.itemsize
+        self.codes = array("I")
+        self.codes.frombytes(data[4:pos])
+        values = _TextColumn()
+        values.load(data[pos:], distinct)
+        self.values = [values[i] for i in range(distinct)]
+        self._lookup = {value: code for code, value in enumerate(self.values)}
+
+
+class Table:
+    """Struct-of-arrays container: one column per field of ``record``
+
+    ``schema`` lists (field, column factory) in the record's constructor
+    order. Rows are materialized as records only when read.
+    """
+
+    record: Type[Record] = Record
+    schema: Tuple[Tuple[str, Callable[[], Any]], ...] = ()
+    magic = b"TBL1"
+
+    def __init__(self):
+        self._columns = {name: factory() for name, factory in self.schema}
+        self._count = 0
+
+    @classmethod
+    def from_records(cls, records: Iterable[Record]) -> "Table":
+        table = cls()
+        table.extend(records)
+        return table
+
+    def __len__(self) -> int:
+        return self._count
+
+    def append(self, record: Record):
+        for name, column in self._columns.items():
+            column.append(getattr(record, name))
+        self._count += 1
+
+    def extend(self, records: Iterable[Record]) -> int:
+        """Append every record; returns how many were added"""
+        before = self._count
+        for record in records:
+            self.append(record)
+        return self._count - before
+
+    def _index(self, i: int) -> int:
+        if i < 0:
+            i += self._count
+        if not 0 <= i < self._count:
+            raise IndexError(f"{type(self).__name__} index out of range")
+        return i
+
+    def __getitem__(self, i: int) -> Record:
+        i = self._index(i)
+        return self.record(*[column[i] for column in self._columns.values()])
+
+    def __setitem__(self, i: int, record: Record):
+        i = self._index(i)
+        for name, column in self._columns.items():
+            column[i] = getattr(record, name)
+
+    def __iter__(self) -> Iterator[Record]:
+        columns = list(self._columns.values())
+        for i in range(self._count):
+            yield self.record(*[column[i] for column in columns])
+
+    def column(self, name: str) -> Any:
+        """The column behind ``name``, indexable by row without building records"""
+        return self._columns[name]
+
+    def to_bytes(self) -> bytes:
+        parts = [_HEADER.pack(self.magic, self._count)]
+        for column in self._columns.values():
+            data = column.to_bytes()
+            parts.append(_SECTION.pack(len(data)))
+            parts.append(data)
+        return b"".join(parts)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "Table":
+        magic, count = _HEADER.unpack_from(data)
+        if magic != cls.magic:
+            raise ValueError(f"Not a {cls.__name__} file")
+        table = cls()
+        view = memoryview(data)
+        pos = _HEADER.size
+        for column in table._columns.values():
+            size, = _SECTION.unpack_from(view, pos)
+            pos += _SECTION.size
+            column.load(view[pos:pos + size], count)
+            pos += size
+        table._count = count
+        return table
+
+    def save(self, path: str):
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(self.to_bytes())
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "Table":
+        with open(path, "rb") as f:
+            return cls.from_bytes(f.read())
+
+
+class OrderTable(Table):
+    """Orders in columns; product details repeat across orders, so each distinct text is stored once"""
+
+    record = Order
+    schema = (
+        ("order_id", partial(_IntColumn, "I")),
+        ("paid", _BoolColumn),
+        ("product_details", _InternedColumn),
+        ("image_hash", _HashColumn),
+        ("price", partial(_IntColumn, "Q")),
+    )
+    magic = b"SOT2"
+
+
+class PaymentTable(Table):
+    """Payments in columns; coin amounts fit uint64 like the export schema"""
+
+    record = Payment
+    schema = (
+        ("order_id", partial(_IntColumn, "I")),
+        ("query_id", partial(_IntColumn, "Q")),
+        ("amount", partial(_IntColumn, "Q")),
+        ("value", partial(_IntColumn, "Q")),
+        ("source", _InternedColumn),
+        ("lt", partial(_IntColumn, "Q")),
+        ("transaction_hash", _TextColumn),
+    )
+    magic = b"SPT1"
@@ -0,0 +1,93 @@
+"""
+ShoppingContract Order Enumeration
+Streams on-chain orders page by page through the get_orders_page get-method
+"""
+
+from typing import AsyncIterator, Iterable, Iterator, List, Optional, Tuple
+
+from boc import Cell, begin_cell, iter_dict, load_text, text_cell
+from messages import signed_body, with_signature
+from models import Order
+from signing import sign_many
+from storage import ContractStorage
+from toncenter import TonApi
+
+# Mirrors page::max_size in contracts/ShoppingContract.fc
+PAGE_SIZE = 100
+
+OP_CREATE_ORDER = 1
+
+
+def build_create_order_body(product_details: str, image_hash: str, price: int, query_id: int,
+                            secret_key: bytes) -> Cell:
+    """Build the createOrder external body, signed with the owner's ``secret_key``
+
+    ``image_hash`` comes from ContentStore.put and ``query_id`` from
+    submitter.make_query_id; the contract accepts each query id once.
+    Payments for the order must carry at least ``price`` nanotons.
+    """
+    return signed_body(secret_key, _create_order_payload(product_details, image_hash, price, query_id))
+
+
+def build_create_order_bodies(orders: Iterable[Tuple[str, str, int, int]], secret_key: bytes,
+                              processes: Optional[int] = None) -> List[Cell]:
+    """Signed createOrder bodies for many (product details, image hash, price, query id) at once
+
+    The payload hashes go through signing.sign_many, so large spools are
+    signed across all cores instead of one signature at a time.
+    """
+    payloads = [_create_order_payload(*order) for order in orders]
+    signatures = sign_many(secret_key, [payload.hash for payload in payloads], processes)
+    return [with_signature(signature, payload) for signature, payload in zip(signatures, payloads)]
+
+
+def _create_order_payload(product_details: str, image_hash: str, price: int, query_id: int) -> Cell:
+    return (begin_cell()
+            .store_uint(OP_CREATE_ORDER, 32)
+            .store_uint(query_id, 64)
+            .store_ref(text_cell(product_details))
+            .store_uint(int(image_hash, 16), 256)
+            .store_coins(price)
+            .end_cell())
+
+
+def decode_orders_page(page: Optional[Cell]) -> List[Order]:
+    """Decode the orderId -> (paid, ^details, imageHash, price) dict returned by get_orders_page"""
+    orders = []
+    for order_id, value in iter_dict(page, 32):
+        orders.append(Order(
+            order_id,
+            value.load_uint(32) != 0,
+            load_text(value.load_ref().begin_parse()),
+            value.load_bytes(32).hex(),
+            value.load_coins(),
+        ))
+    return orders
+
+
+async def iter_orders(api: TonApi, address: str, start_id: int = 1,
+                      page_size: int = PAGE_SIZE) -> AsyncIterator[Order]:
+    """Yield every order from ``start_id`` on, holding at most one page in memory"""
+    if page_size < 1:
+        raise ValueError(f"page_size must be at least 1, got {page_size}")
+    cursor = start_id
+    while cursor:
+        next_id, page = await api.run_get_method(address, "get_orders_page", [cursor, page_size])
+        for order in decode_orders_page(page):
+            yield order
+        cursor = next_id
+
+
+def orders_from_storage(storage: ContractStorage, start_id: int = 0) -> Iterator[Order]:
+    """Decode orders straight from a locally held contract data cell, lazily"""
+    images = iter_dict(storage.product_images, 32, start_id)
+    paid = iter_dict(storage.paid_status, 32, start_id)
+    for (order_id, details), (_, image), (_, paid_value) in zip(
+            iter_dict(storage.product_details, 32, start_id), images, paid, strict=True):
+        yield Order(
+            order_id,
+            paid_value.load_uint(32) != 0,
+            load_text(details),
+            image.load_bytes(32).hex(),
+            paid_value.load_coins(),
+        )
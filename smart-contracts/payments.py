@@ -0,0 +1,151 @@
+"""
+ShoppingContract Order Payments
+Builds and decodes op-coded pay_order message bodies and maps payments to orders
+"""
+
+import base64
+from typing import Any, AsyncIterator, Dict, Iterable, Optional, Union
+
+from boc import Cell, begin_cell
+from events import events_from_transaction
+from models import Payment, PaymentTable
+from toncenter import TonApi
+
+# Mirrors op::pay_order in contracts/ShoppingContract.fc
+OP_PAY_ORDER = 0x1ec187d9
+
+
+def build_payment_payload(order_id: int, amount: int, query_id: int = 0) -> Cell:
+    """Build the pay_order body for a payment of ``amount`` nanotons
+
+    The contract does not trust ``amount``: it accepts the payment only if
+    the attached value covers the price stored for the order.
+    """
+    return (begin_cell()
+            .store_uint(OP_PAY_ORDER, 32)
+            .store_uint(query_id, 64)
+            .store_uint(order_id, 32)
+            .store_coins(amount)
+            .end_cell())
+
+
+def payment_payload_base64(order_id: int, amount: int, query_id: int = 0) -> str:
+    """Base64 BoC of the pay_order body, as expected by TON Connect ``payload``"""
+    return build_payment_payload(order_id, amount, query_id).to_boc_base64()
+
+
+def decode_payment_payload(body: Union[Cell, bytes, str, None]) -> Optional[Dict[str, int]]:
+    """Decode a pay_order body; returns None for any other message"""
+    if not body:
+        return None
+    cell = body if isinstance(body, Cell) else Cell.from_boc(body)
+    s = cell.begin_parse()
+    if s.remaining_bits < 32 or s.load_uint(32) != OP_PAY_ORDER:
+        return None
+    try:
+        return {
+            "query_id": s.load_uint(64),
+            "order_id": s.load_uint(32),
+            "amount": s.load_coins(),
+        }
+    except ValueError:
+        return None
+
+
+def payment_from_transaction(tx: Dict[str, Any]) -> Optional[Payment]:
+    """Extract the order payment carried by a toncenter transaction, if any"""
+    in_msg = tx.get("in_msg") or {}
+    msg_data = in_msg.get("msg_data") or {}
+    if msg_data.get("@type") != "msg.dataRaw":
+        return None
+    payment = decode_payment_payload(base64.b64decode(msg_data.get("body") or ""))
+    if payment is None:
+        return None
+    tx_id = tx.get("transaction_id", {})
+    return Payment(payment["order_id"], payment["query_id"], payment["amount"],
+                   value=int(in_msg.get("value", 0)),
+                   source=in_msg.get("source"),
+                   lt=int(tx_id.get("lt", 0)),
+                   transaction_hash=tx_id.get("hash"))
+
+
+def accepted_payment(tx: Dict[str, Any]) -> Optional[Payment]:
+    """The payment a transaction carried, if the contract accepted it
+
+    Rejected payments (underpaid, already paid, unknown order) still show
+    up as transactions, so only those that logged order_paid count.
+    """
+    payment = payment_from_transaction(tx)
+    if payment is None or not any(event["event"] == "order_paid" and event["order_id"] == payment.order_id
+                                  for event in events_from_transaction(tx)):
+        return None
+    return payment
+
+
+class PaymentIndex:
+    """Order id -> payment lookup built from contract transactions
+
+    Payments are kept as rows of a PaymentTable, so an index over millions
+    of orders holds a few columns and one row number per order.
+    """
+
+    def __init__(self):
+        self.payments = PaymentTable()
+        self._rows: Dict[int, int] = {}
+
+    def add_transactions(self, transactions: Iterable[Dict[str, Any]]) -> int:
+        """Index pay_order transactions the contract accepted, keeping the earliest one per order"""
+        added = 0
+        lts = self.payments.column("lt")
+        for tx in transactions:
+            payment = accepted_payment(tx)
+            if payment is None:
+                continue
+            row = self._rows.get(payment.order_id)
+            if row is None:
+                self._rows[payment.order_id] = len(self.payments)
+                self.payments.append(payment)
+                added += 1
+            elif payment.lt < lts[row]:
+                self.payments[row] = payment
+        return added
+
+    def payment_for(self, order_id: int) -> Optional[Payment]:
+        row = self._rows.get(order_id)
+        return None if row is None else self.payments[row]
+
+    def __contains__(self, order_id: int) -> bool:
+        return order_id in self._rows
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+
+async def iter_transactions(api: TonApi, address: str, page_size: int = 100,
+                            to_lt: int = 0) -> AsyncIterator[Dict[str, Any]]:
+    """Walk an account's transactions from newest to oldest, one page at a time"""
+    if page_size < 1:
+        raise ValueError(f"page_size must be at least 1, got {page_size}")
+    lt, tx_hash = None, None
+    while True:
+        # Each page after the first starts with the transaction the cursor points
+        # at, so ask for one more to still move forward by page_size
+        limit = page_size if lt is None else page_size + 1
+        page = await api.get_transactions(address, limit=limit, lt=lt, tx_hash=tx_hash,
+                                          to_lt=to_lt or None)
+        if lt is not None and page:
+            page = page[1:]
+        if not page:
+            return
+        for tx in page:
+            yield tx
+        last = page[-1]["transaction_id"]
+        lt, tx_hash = int(last["lt"]), last["hash"]
+
+
+async def iter_payments(api: TonApi, address: str, page_size: int = 100) -> AsyncIterator[Payment]:
+    """Stream every pay_order payment the contract accepted"""
+    async for tx in iter_transactions(api, address, page_size):
+        payment = accepted_payment(tx)
+        if payment is not None:
+            yield payment
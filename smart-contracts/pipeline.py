@@ -0,0 +1,134 @@
+"""
+Staged Async Pipeline
+Overlaps the stages of a serial message stream through bounded queues and reports per-stage utilization
+"""
+
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Sequence
+
+_DONE = object()
+
+
+class Stage:
+    """One step of a pipeline: an async function, its worker count and the depth of its input queue"""
+
+    def __init__(self, name: str, func: Callable[[Any], Awaitable[Any]], workers: int = 1, queue_depth: int = 1):
+        if workers < 1 or queue_depth < 1:
+            raise ValueError(f"Stage {name} needs at least one worker and a queue depth of at least 1")
+        self.name = name
+        self.func = func
+        self.workers = workers
+        self.queue_depth = queue_depth
+        self.processed = 0
+        self.failed = 0
+        # Seconds spent inside func, summed over workers
+        self.busy = 0.0
+        # Seconds spent waiting for room in the next stage's queue (backpressure)
+        self.blocked = 0.0
+        self.max_queue = 0
+
+    def utilization(self, elapsed: float) -> float:
+        """Fraction of the available worker time spent working; ~1.0 marks the bottleneck"""
+        return self.busy / (self.workers * elapsed) if elapsed > 0 else 0.0
+
+
+class Pipeline:
+    """Runs items through stages so that stage k works on item n while stage k+1 handles item n-1
+
+    With one worker per stage, items pass every stage in input order. A
+    failing item is dropped from later stages and its exception takes its
+    place in the results, like ``asyncio.gather(return_exceptions=True)``.
+    The throughput of a long stream is set by the slowest stage instead of
+    the sum of all stages.
+    """
+
+    def __init__(self, stages: Sequence[Stage]):
+        if not stages:
+            raise ValueError("A pipeline needs at least one stage")
+        self.stages = list(stages)
+        self.elapsed = 0.0
+        self._queues: List[asyncio.Queue] = []
+
+    async def _feed(self, items: Iterable[Any]):
+        queue, stage = self._queues[0], self.stages[0]
+        for item in enumerate(items):
+            await queue.put(item)
+            stage.max_queue = max(stage.max_queue, queue.qsize())
+        for _ in range(stage.workers):
+            await queue.put(_DONE)
+
+    async def _work(self, index: int, results: Dict[int, Any], finished: List[int]):
+        stage = self.stages[index]
+        inbox = self._queues[index]
+        outbox: Optional[asyncio.Queue] = self._queues[index + 1] if index + 1 < len(self.stages) else None
+        while True:
+            entry = await inbox.get()
+            if entry is _DONE:
+                break
+            position, item = entry
+            started = time.perf_counter()
+            try:
+                result = await stage.func(item)
+            except Exception as exc:
+                stage.busy += time.perf_counter() - started
+                stage.failed += 1
+                results[position] = exc
+                continue
+            stage.busy += time.perf_counter() - started
+            stage.processed += 1
+            if outbox is None:
+                results[position] = result
+                continue
+            waiting = time.perf_counter()
+            await outbox.put((position, result))
+            stage.blocked += time.perf_counter() - waiting
+            following = self.stages[index + 1]
+            following.max_queue = max(following.max_queue, outbox.qsize())
+        finished[index] += 1
+        if finished[index] == stage.workers and outbox is not None:
+            # The last worker of this stage hands the end of input downstream
+            for _ in range(self.stages[index + 1].workers):
+                await outbox.put(_DONE)
+
+    async def run(self, items: Iterable[Any]) -> List[Any]:
+        """Results (or exceptions) of the last stage in input order"""
+        self._queues = [asyncio.Queue(stage.queue_depth) for stage in self.stages]
+        results: Dict[int, Any] = {}
+        finished = [0] * len(self.stages)
+        started = time.perf_counter()
+        tasks = [asyncio.create_task(self._work(index, results, finished))
+                 for index, stage in enumerate(self.stages) for _ in range(stage.workers)]
+        try:
+            await asyncio.gather(self._feed(items), *tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+            self.elapsed += time.perf_counter() - started
+        return [results[position] for position in sorted(results)]
+
+    def queue_sizes(self) -> Dict[str, int]:
+        """Items currently waiting in front of each stage"""
+        return {stage.name: queue.qsize() for stage, queue in zip(self.stages, self._queues)}
+
+    def metrics(self) -> List[Dict[str, Any]]:
+        """Per-stage counters, utilization and queue high-water marks"""
+        return [{
+            "stage": stage.name,
+            "processed": stage.processed,
+            "failed": stage.failed,
+            "workers": stage.workers,
+            "queue_depth": stage.queue_depth,
+            "max_queue": stage.max_queue,
+            "busy_seconds": round(stage.busy, 6),
+            "blocked_seconds": round(stage.blocked, 6),
+            "utilization": round(stage.utilization(self.elapsed), 4),
+        } for stage in self.stages]
+
+    def report(self) -> str:
+        lines = [f"⏱️  Pipeline finished in {self.elapsed:.2f}s"]
+        for row in self.metrics():
+            lines.append(f"   {row['stage']:<10} {row['processed']:>6} ok {row['failed']:>4} failed  "
+                         f"utilization {row['utilization']:>6.1%}  queue max {row['max_queue']}/{row['queue_depth']}  "
+                         f"blocked {row['blocked_seconds']:.2f}s")
+        return "\n".join(lines)
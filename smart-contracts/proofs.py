@@ -0,0 +1,577 @@
+#!/usr/bin/env python3
+"""
+Merkle Proof Verification
+Checks account state and transactions served by an untrusted endpoint against a trusted masterchain block
+
+A liteserver answers ``getAccountState`` with the account cell plus Merkle
+proofs linking it to the requested masterchain block: block -> state hash ->
+(shard descriptor -> shard block -> shard state) -> accounts dictionary.
+Every hash on that path is recomputed here, so a single fast endpoint can be
+used without cross-checking its answers against others. Transactions are
+then verified by walking the ``prev_trans_hash`` chain down from the
+account's proven last transaction.
+"""
+
+import argparse
+import asyncio
+import base64
+import os
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from boc import (MERKLE_PROOF, MERKLE_UPDATE, PRUNED_BRANCH, Address, Cell, Slice, deserialize_boc,
+                 dict_get, iter_dict)
+from rpc_cache import DiskCache, default_cache_path
+from rpc_pool import connect
+from toncenter import TonApi
+
+MASTERCHAIN = -1
+
+BLOCK_TAG = 0x11ef55aa
+BLOCK_INFO_TAG = 0x9bc7a987
+SHARD_STATE_TAG = 0x9023afe2
+MC_STATE_EXTRA_TAG = 0xcc26
+TRANSACTION_TAG = 0b0111
+
+# account_none$0: what a liteserver proves for an address that was never used
+EMPTY_ACCOUNT = Cell(b"\x00", 1)
+
+
+class ProofError(Exception):
+    """Raised when served data does not match the hash that should prove it"""
+
+
+class BlockId:
+    """tonNode.blockIdExt: where a block sits and the hashes that identify it"""
+
+    def __init__(self, workchain: int, shard: int, seqno: int, root_hash: bytes, file_hash: bytes):
+        self.workchain = workchain
+        self.shard = shard
+        self.seqno = seqno
+        self.root_hash = root_hash
+        self.file_hash = file_hash
+
+    @classmethod
+    def parse(cls, text: str) -> "BlockId":
+        """Lite-client notation: ``(-1,8000000000000000,seqno):root_hash:file_hash`` with hex hashes"""
+        try:
+            location, root_hash, file_hash = text.strip().split(":")
+            workchain, shard, seqno = location.strip("()").split(",")
+            return cls(int(workchain), int(shard, 16), int(seqno), bytes.fromhex(root_hash), bytes.fromhex(file_hash))
+        except ValueError:
+            raise ValueError(f"Not a block id: {text!r}") from None
+
+    @classmethod
+    def from_json(cls, data: Dict[str, Any]) -> "BlockId":
+        return cls(int(data["workchain"]), int(data["shard"]) & ((1 << 64) - 1), int(data["seqno"]),
+                   base64.b64decode(data["root_hash"]), base64.b64decode(data["file_hash"]))
+
+    def to_json(self) -> Dict[str, Any]:
+        # Shards travel as signed 64-bit integers in the TL schema
+        shard = self.shard - (1 << 64) if self.shard >= 1 << 63 else self.shard
+        return {"workchain": self.workchain, "shard": str(shard), "seqno": self.seqno,
+                "root_hash": base64.b64encode(self.root_hash).decode(),
+                "file_hash": base64.b64encode(self.file_hash).decode()}
+
+    def __str__(self) -> str:
+        return f"({self.workchain},{self.shard:016x},{self.seqno}):{self.root_hash.hex()}:{self.file_hash.hex()}"
+
+
+# ---------------------------------------------------------------------------
+# Building and checking proofs
+# ---------------------------------------------------------------------------
+
+def prune_branch(cell: Cell, level: int = 1) -> Cell:
+    """Pruned branch standing in for ``cell`` inside a proof nested ``level`` Merkle cells deep"""
+    mask = cell.level_mask | (1 << (level - 1))
+    stored = [cell.level_hash(i) for i in range(level) if i == 0 or mask >> (i - 1) & 1]
+    data = (bytes((PRUNED_BRANCH, mask)) + b"".join(hash_ for hash_, _ in stored)
+            + b"".join(depth.to_bytes(2, "big") for _, depth in stored))
+    return Cell(data, len(data) * 8, (), PRUNED_BRANCH)
+
+
+def merkle_proof(root: Cell, visited: Iterable[Cell]) -> Cell:
+    """Merkle proof of ``root`` that keeps the ``visited`` cells and prunes everything else"""
+    keep = {cell.hash for cell in visited} | {root.hash}
+
+    def build(cell: Cell, depth: int) -> Cell:
+        if cell.hash not in keep:
+            return prune_branch(cell, depth + 1)
+        inner = depth + 1 if cell.type_ in (MERKLE_PROOF, MERKLE_UPDATE) else depth
+        return Cell(cell.data, cell.bit_len, [build(ref, inner) for ref in cell.refs], cell.type_)
+
+    data = bytes((MERKLE_PROOF,)) + root.hash + root.depth.to_bytes(2, "big")
+    return Cell(data, len(data) * 8, [build(root, 0)], MERKLE_PROOF)
+
+
+def check_proof(proof: Cell, expected_hash: bytes) -> Cell:
+    """The proven tree of a Merkle proof cell, once it is shown to hash to ``expected_hash``"""
+    if proof.type_ != MERKLE_PROOF or len(proof.refs) != 1 or proof.bit_len != 8 + 256 + 16:
+        raise ProofError("Not a Merkle proof cell")
+    stored = bytes(proof.data[1:33])
+    root = proof.refs[0]
+    hash_, depth = root.level_hash(0)
+    if stored != hash_ or int.from_bytes(proof.data[33:35], "big") != depth:
+        raise ProofError("Merkle proof does not hash to the tree it claims")
+    if stored != expected_hash:
+        raise ProofError(f"Proof is for {stored.hex()}, expected {expected_hash.hex()}")
+    return root
+
+
+def _ref(s: Slice, what: str) -> Cell:
+    """Next reference, which the proof must have kept"""
+    cell = s.load_ref()
+    if cell.type_ == PRUNED_BRANCH:
+        raise ProofError(f"Proof does not include the {what}")
+    return cell
+
+
+def _load_shard_ident(s: Slice) -> Tuple[int, int]:
+    s.skip_bits(2 + 6)  # shard_ident$00 shard_pfx_bits:(#<= 60)
+    return s.load_int(32), s.load_uint(64)
+
+
+# ---------------------------------------------------------------------------
+# Blocks and states
+# ---------------------------------------------------------------------------
+
+def parse_block(block: Cell) -> Dict[str, Any]:
+    """Header fields of a proven block and the hash of the state it produced"""
+    s = block.begin_parse()
+    if s.load_uint(32) != BLOCK_TAG:
+        raise ProofError("Not a block")
+    s.skip_bits(32)  # global_id
+    info = _ref(s, "block info").begin_parse()
+    s.load_ref()  # value_flow
+    update = _ref(s, "state update")
+    if update.type_ != MERKLE_UPDATE:
+        raise ProofError("Block state update is not a Merkle update")
+    if info.load_uint(32) != BLOCK_INFO_TAG:
+        raise ProofError("Malformed block info")
+    # version, then not_master after_merge before_split after_split want_split
+    # want_merge key_block vert_seqno_incr and flags
+    info.skip_bits(32 + 8 + 8)
+    seqno = info.load_uint(32)
+    info.skip_bits(32)  # vert_seq_no
+    workchain, shard = _load_shard_ident(info)
+    return {
+        "workchain": workchain,
+        "shard": shard,
+        "seqno": seqno,
+        "gen_utime": info.load_uint(32),
+        "start_lt": info.load_uint(64),
+        "end_lt": info.load_uint(64),
+        # MERKLE_UPDATE: type, old_hash, new_hash, old_depth, new_depth
+        "state_hash": bytes(update.data[33:65]),
+    }
+
+
+def _state_refs(state: Cell) -> Tuple[Cell, Optional[Cell]]:
+    """(accounts, McStateExtra or None) of a ShardStateUnsplit"""
+    s = state.begin_parse()
+    if s.load_uint(32) != SHARD_STATE_TAG:
+        raise ProofError("Not a shard state")
+    s.skip_bits(32)  # global_id
+    _load_shard_ident(s)
+    s.skip_bits(32 + 32 + 32 + 64 + 32 + 1)  # seq_no vert_seq_no gen_utime gen_lt min_ref_mc_seqno before_split
+    s.load_ref()  # out_msg_queue_info
+    accounts = s.load_ref()
+    s.load_ref()  # overload history, libraries, master_ref
+    custom = s.load_ref() if s.load_bit() else None
+    return accounts, custom
+
+
+def find_shard(mc_state: Cell, workchain: int, account_hash: bytes,
+               shard_hashes: Optional[Cell] = None) -> Dict[str, Any]:
+    """Descriptor of the shard block holding an account, from a proven masterchain state
+
+    ``allShardsInfo`` prunes the ShardHashes dictionary from its proof and
+    sends it beside it; pass that root as ``shard_hashes`` to check it
+    against the proven hash and search it instead.
+    """
+    _, custom = _state_refs(mc_state)
+    if custom is None or custom.type_ == PRUNED_BRANCH:
+        raise ProofError("Proof does not include the masterchain state extra")
+    s = custom.begin_parse()
+    if s.load_uint(16) != MC_STATE_EXTRA_TAG:
+        raise ProofError("Malformed masterchain state extra")
+    hashes = s.load_maybe_ref()
+    if shard_hashes is not None:
+        if hashes is None or hashes.level_hash(0)[0] != shard_hashes.hash:
+            raise ProofError("Shard hashes do not match the proven masterchain state")
+        hashes = shard_hashes
+    entry = dict_get(hashes, 32, workchain & 0xFFFFFFFF)
+    if entry is None:
+        raise ProofError(f"Workchain {workchain} is not in the masterchain state")
+    tree = _ref(entry, "shard tree")
+    prefix, length = 0, 0
+    account = int.from_bytes(account_hash, "big")
+    while True:
+        if tree.type_ == PRUNED_BRANCH:
+            raise ProofError("Proof does not include the account's shard")
+        node = tree.begin_parse()
+        if not node.load_bit():
+            break
+        bit = (account >> (255 - length)) & 1
+        prefix, length = (prefix << 1) | bit, length + 1
+        tree = node.remaining_ref_list()[bit]
+    node.skip_bits(4)  # shard_descr tag
+    seqno = node.load_uint(32)
+    node.skip_bits(32 + 64 + 64)  # reg_mc_seqno start_lt end_lt
+    shard = (prefix << (64 - length)) | (1 << (63 - length))
+    return {"block": BlockId(workchain, shard, seqno, node.load_bytes(32), node.load_bytes(32)),
+            "prefix": prefix, "prefix_bits": length}
+
+
+def find_account(state: Cell, account_hash: bytes) -> Optional[Dict[str, Any]]:
+    """ShardAccount of an account in a proven shard state; None when the proof shows it does not exist"""
+    accounts, _ = _state_refs(state)
+    if accounts.type_ == PRUNED_BRANCH:
+        raise ProofError("Proof does not include the accounts dictionary")
+    s = accounts.begin_parse()
+    if not s.load_bit():
+        return None
+    try:
+        leaf = dict_get(s.load_ref(), 256, int.from_bytes(account_hash, "big"))
+    except ValueError as exc:
+        raise ProofError(f"Proof does not include the account: {exc}") from None
+    if leaf is None:
+        return None
+    # DepthBalanceInfo augmentation: split_depth, balance
+    leaf.skip_bits(5)
+    leaf.load_coins()
+    if leaf.load_bit():
+        leaf.load_ref()
+    return {"account_hash": leaf.load_ref().hash, "last_trans_hash": leaf.load_bytes(32),
+            "last_trans_lt": leaf.load_uint(64)}
+
+
+def _load_var_uint(s: Slice, length_bits: int) -> int:
+    return s.load_uint(8 * s.load_uint(length_bits))
+
+
+def parse_account(account: Cell) -> Dict[str, Any]:
+    """Address, balance, status, code and data of an Account cell"""
+    s = account.begin_parse()
+    if not s.load_bit():
+        return {"address": None, "balance": 0, "last_trans_lt": 0, "state": "uninitialized", "code": None, "data": None}
+    address = s.load_address()
+    _load_var_uint(s, 3)  # storage_used cells
+    _load_var_uint(s, 3)  # storage_used bits
+    # storage_extra_none$000 / storage_extra_info$001 dict_hash:uint256; before
+    # storage_extra this was public_cells, which is always zero-length
+    if s.load_uint(3) == 1:
+        s.skip_bits(256)
+    s.skip_bits(32)  # last_paid
+    if s.load_bit():
+        s.load_coins()  # due_payment
+    last_trans_lt = s.load_uint(64)
+    balance = s.load_coins()
+    if s.load_bit():
+        s.load_ref()  # extra currencies
+    code = data = None
+    if s.load_bit():
+        state = "active"
+        if s.load_bit():
+            s.skip_bits(5)  # split_depth
+        if s.load_bit():
+            s.skip_bits(2)  # special
+        code, data = s.load_maybe_ref(), s.load_maybe_ref()
+    elif s.load_bit():
+        state = "frozen"
+    else:
+        state = "uninitialized"
+    return {"address": address, "balance": balance, "last_trans_lt": last_trans_lt, "state": state,
+            "code": code, "data": data}
+
+
+# ---------------------------------------------------------------------------
+# Transactions
+# ---------------------------------------------------------------------------
+
+def _load_any_address(s: Slice) -> str:
+    tag = s.preload_uint(2)
+    if tag == 0b01:
+        # addr_extern: external messages may carry an opaque source or destination
+        s.skip_bits(2)
+        s.skip_bits(s.load_uint(9))
+        return ""
+    address = s.load_address()
+    return address.to_raw() if address else ""
+
+
+def _skip_state_init(s: Slice):
+    if s.load_bit():
+        s.skip_bits(5)
+    if s.load_bit():
+        s.skip_bits(2)
+    s.load_maybe_ref()
+    s.load_maybe_ref()
+    s.load_maybe_ref()
+
+
+def message_json(message: Cell) -> Dict[str, Any]:
+    """A message in toncenter's JSON shape, built from the message cell; addresses are raw"""
+    s = message.begin_parse()
+    value, created_lt = 0, 0
+    if not s.load_bit():
+        s.skip_bits(3)  # ihr_disabled bounce bounced
+        source, destination = _load_any_address(s), _load_any_address(s)
+        value = s.load_coins()
+        if s.load_bit():
+            s.load_ref()
+        s.load_coins()  # ihr_fee
+        s.load_coins()  # fwd_fee
+        created_lt = s.load_uint(64)
+        s.skip_bits(32)
+    elif not s.load_bit():
+        source, destination = _load_any_address(s), _load_any_address(s)
+        s.load_coins()  # import_fee
+    else:
+        source, destination = _load_any_address(s), _load_any_address(s)
+        created_lt = s.load_uint(64)
+        s.skip_bits(32)
+    if s.load_bit():
+        if s.load_bit():
+            s.load_ref()
+        else:
+            _skip_state_init(s)
+    body = s.load_ref() if s.load_bit() else s.to_cell()
+    return {"source": source, "destination": destination, "value": str(value), "created_lt": str(created_lt),
+            "msg_data": {"@type": "msg.dataRaw", "body": body.to_boc_base64()}}
+
+
+def parse_transaction(tx: Cell) -> Dict[str, Any]:
+    """Transaction header and messages in toncenter's JSON shape, plus the link to the previous one"""
+    s = tx.begin_parse()
+    if s.load_uint(4) != TRANSACTION_TAG:
+        raise ProofError("Not a transaction")
+    account_hash = s.load_bytes(32)
+    lt = s.load_uint(64)
+    prev_hash, prev_lt = s.load_bytes(32), s.load_uint(64)
+    now = s.load_uint(32)
+    messages = s.load_ref().begin_parse()
+    in_msg = message_json(messages.load_ref()) if messages.load_bit() else None
+    out_msgs = [message_json(value.load_ref()) for _, value in iter_dict(messages.load_maybe_ref(), 15)]
+    return {
+        "@type": "raw.transaction",
+        "utime": now,
+        "data": tx.to_boc_base64(),
+        "transaction_id": {"lt": str(lt), "hash": base64.b64encode(tx.hash).decode()},
+        "in_msg": in_msg,
+        "out_msgs": out_msgs,
+        "account_hash": account_hash,
+        "prev": (prev_lt, prev_hash),
+    }
+
+
+def verify_transactions(transactions: List[Dict[str, Any]], account_hash: bytes,
+                        lt: int, tx_hash: bytes) -> List[Dict[str, Any]]:
+    """Check a newest-first page of toncenter transactions against the chain link (lt, hash)
+
+    Returns the transactions rebuilt from their verified cells, so no field
+    decoded by the endpoint is passed on.
+    """
+    verified = []
+    for tx in transactions:
+        cell = Cell.from_boc(tx.get("data") or "")
+        parsed = parse_transaction(cell)
+        if cell.hash != tx_hash or int(parsed["transaction_id"]["lt"]) != lt:
+            raise ProofError(f"Transaction at lt {lt} does not match its proven hash")
+        if parsed["account_hash"] != account_hash:
+            raise ProofError(f"Transaction at lt {lt} belongs to another account")
+        lt, tx_hash = parsed.pop("prev")
+        del parsed["account_hash"]
+        verified.append(parsed)
+    return verified
+
+
+# ---------------------------------------------------------------------------
+# Verifying client
+# ---------------------------------------------------------------------------
+
+class HeaderCache:
+    """Headers of blocks already checked against their root hash
+
+    A header is a pure function of the block's root hash, so entries stay
+    valid for any trust anchor and are kept on disk across runs when a
+    DiskCache is given.
+    """
+
+    def __init__(self, disk: Optional[DiskCache] = None):
+        self.headers: Dict[bytes, Dict[str, Any]] = {}
+        self.disk = disk
+
+    def get(self, root_hash: bytes) -> Optional[Dict[str, Any]]:
+        header = self.headers.get(root_hash)
+        if header is None and self.disk is not None:
+            stored = self.disk.get(f"block-header:{root_hash.hex()}")
+            if stored is not None:
+                header = dict(stored, state_hash=bytes.fromhex(stored["state_hash"]))
+                self.headers[root_hash] = header
+        return header
+
+    def put(self, root_hash: bytes, header: Dict[str, Any]):
+        self.headers[root_hash] = header
+        if self.disk is not None:
+            self.disk.put(f"block-header:{root_hash.hex()}", dict(header, state_hash=header["state_hash"].hex()))
+
+    def __len__(self) -> int:
+        return len(self.headers)
+
+
+class VerifiedApi(TonApi):
+    """Account reads from one untrusted endpoint, checked against a trusted masterchain block
+
+    ``get_address_information`` (and so ``get_account_data``) returns the
+    account as of ``trusted`` from a proven ``liteServer.getAccountState``
+    answer, and ``get_transactions`` only returns transactions on the hash
+    chain below a proven last transaction. Every other call is forwarded
+    unchecked: get-methods, for one, would need a local TVM.
+    """
+
+    def __init__(self, inner: TonApi, trusted: BlockId, headers: Optional[HeaderCache] = None):
+        if trusted.workchain != MASTERCHAIN:
+            raise ValueError("The trusted block must be a masterchain block")
+        self.inner = inner
+        self.trusted = trusted
+        self.headers = headers or HeaderCache()
+        # Shard blocks the trusted block points at: (workchain, prefix, prefix bits) -> BlockId
+        self.shards: Dict[Tuple[int, int, int], BlockId] = {}
+        # Proven (lt, hash) of transactions whose predecessors are not yet fetched
+        self.links: Dict[str, Dict[int, bytes]] = {}
+        self.verified_accounts = 0
+
+    async def call(self, method: str, params: Dict[str, Any]) -> Any:
+        return await self.inner.call(method, params)
+
+    def _header(self, proof: Cell, root_hash: bytes) -> Dict[str, Any]:
+        header = self.headers.get(root_hash)
+        if header is None:
+            header = parse_block(check_proof(proof, root_hash))
+            self.headers.put(root_hash, header)
+        return header
+
+    def _shard_block(self, address: Address, shard_proof: bytes) -> BlockId:
+        account = int.from_bytes(address.hash_part, "big")
+        for (workchain, prefix, bits), block in self.shards.items():
+            if workchain == address.workchain and account >> (256 - bits) == prefix:
+                return block
+        mc_block, mc_state = deserialize_boc(shard_proof)
+        header = self._header(mc_block, self.trusted.root_hash)
+        shard = find_shard(check_proof(mc_state, header["state_hash"]), address.workchain, address.hash_part)
+        self.shards[(address.workchain, shard["prefix"], shard["prefix_bits"])] = shard["block"]
+        return shard["block"]
+
+    def verify_account_state(self, address: Address, response: Dict[str, Any]) -> Dict[str, Any]:
+        """Account information in toncenter's getAddressInformation shape, or ProofError"""
+        try:
+            if address.workchain == MASTERCHAIN:
+                block = self.trusted
+            else:
+                block = self._shard_block(address, base64.b64decode(response["shard_proof"]))
+            block_proof, state_proof = deserialize_boc(base64.b64decode(response["proof"]))
+            header = self._header(block_proof, block.root_hash)
+            shard_account = find_account(check_proof(state_proof, header["state_hash"]), address.hash_part)
+            state = response.get("state")
+            account = Cell.from_boc(state) if state else EMPTY_ACCOUNT
+        except (ValueError, KeyError, IndexError) as exc:
+            raise ProofError(f"Malformed proof for {address.to_raw()}: {exc}") from None
+
+        if shard_account is None:
+            if account.hash != EMPTY_ACCOUNT.hash:
+                raise ProofError(f"Endpoint returned state for {address.to_raw()}, which does not exist")
+            info = parse_account(account)
+            last_lt, last_hash = 0, bytes(32)
+        else:
+            if account.hash != shard_account["account_hash"]:
+                raise ProofError(f"Account state of {address.to_raw()} does not match the proven hash")
+            info = parse_account(account)
+            if info["address"] != address:
+                raise ProofError(f"Proven account is {info['address']}, not {address.to_raw()}")
+            last_lt, last_hash = shard_account["last_trans_lt"], shard_account["last_trans_hash"]
+            self.links.setdefault(address.to_raw(), {})[last_lt] = last_hash
+        self.verified_accounts += 1
+        return {
+            "balance": str(info["balance"]),
+            "code": info["code"].to_boc_base64() if info["code"] else "",
+            "data": info["data"].to_boc_base64() if info["data"] else "",
+            "state": info["state"],
+            "last_transaction_id": {"@type": "internal.transactionId", "lt": str(last_lt),
+                                    "hash": base64.b64encode(last_hash).decode()},
+            "block_id": block.to_json(),
+            "sync_utime": header["gen_utime"],
+        }
+
+    async def get_address_information(self, address: str) -> Dict[str, Any]:
+        parsed = Address.parse(address)
+        response = await self.inner.call("liteServer.getAccountState",
+                                          {"id": self.trusted.to_json(), "account": parsed.to_raw()})
+        return self.verify_account_state(parsed, response)
+
+    async def get_transactions(self, address: str, limit: int = 20, lt: Optional[int] = None,
+                               tx_hash: Optional[str] = None, to_lt: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Transactions from a proven point down the hash chain; without a cursor, from the proven last one"""
+        parsed = Address.parse(address)
+        links = self.links.setdefault(parsed.to_raw(), {})
+        if lt is None:
+            info = await self.get_address_information(address)
+            lt = int(info["last_transaction_id"]["lt"])
+            tx_hash = info["last_transaction_id"]["hash"]
+            if not lt:
+                return []
+        expected = base64.b64decode(tx_hash or "")
+        if links.get(lt) != expected:
+            raise ProofError(f"Transaction cursor at lt {lt} is not on a proven chain")
+        page = await self.inner.get_transactions(address, limit, lt, tx_hash, to_lt)
+        try:
+            verified = verify_transactions(page, parsed.hash_part, lt, expected)
+        except ValueError as exc:
+            raise ProofError(f"Malformed transaction for {parsed.to_raw()}: {exc}") from None
+        for tx in verified:
+            links[int(tx["transaction_id"]["lt"])] = base64.b64decode(tx["transaction_id"]["hash"])
+        if page:
+            # The last transaction's predecessor is the next page's cursor
+            prev_lt, prev_hash = parse_transaction(Cell.from_boc(page[-1]["data"]))["prev"]
+            links[prev_lt] = prev_hash
+        return verified
+
+    async def close(self):
+        await self.inner.close()
+
+
+def trusted_block_from_env() -> Optional[BlockId]:
+    """TON_TRUSTED_BLOCK in lite-client notation, if set"""
+    configured = os.environ.get("TON_TRUSTED_BLOCK")
+    return BlockId.parse(configured) if configured else None
+
+
+async def main(argv: Optional[List[str]] = None):
+    """Print an account's state after verifying it against a trusted block"""
+    parser = argparse.ArgumentParser(description="Verify account state with Merkle proofs")
+    parser.add_argument("address", help="Account address")
+    parser.add_argument("--trusted-block", help="Masterchain block id (default: TON_TRUSTED_BLOCK)")
+    parser.add_argument("--endpoint", action="append",
+                        help="RPC endpoint serving liteServer.getAccountState (default: endpoints.json)")
+    args = parser.parse_args(argv)
+
+    trusted = BlockId.parse(args.trusted_block) if args.trusted_block else trusted_block_from_env()
+    if trusted is None:
+        parser.error("a trusted block is required (--trusted-block or TON_TRUSTED_BLOCK)")
+    cache_path = default_cache_path()
+    headers = HeaderCache(DiskCache(cache_path) if cache_path else None)
+    api = VerifiedApi(connect(args.endpoint), trusted, headers)
+    try:
+        info = await api.get_address_information(args.address)
+    except ProofError as exc:
+        print(f"❌ Verification failed: {exc}")
+        return None
+    finally:
+        await api.close()
+    print(f"✅ Verified against block {trusted.seqno}")
+    print(f"💰 Balance: {int(info['balance']) / 1e9} TON ({info['state']})")
+    print(f"🔗 Last transaction: {info['last_transaction_id']['lt']}")
+    return info
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
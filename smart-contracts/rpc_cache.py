@@ -0,0 +1,186 @@
+"""
+Persistent RPC Response Cache
+SQLite-backed LRU cache that serves finalized blockchain data without refetching it
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from metrics import CACHE_REQUESTS
+from toncenter import TonApi
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+# Always answered from finalized blocks, whatever the parameters
+IMMUTABLE_METHODS = frozenset({
+    "getBlockHeader", "getBlockTransactions", "getShards", "lookupBlock", "getLibraries",
+    "tryLocateTx", "tryLocateResultTx", "tryLocateSourceTx",
+})
+
+
+def default_cache_path() -> Optional[Path]:
+    """TON_RPC_CACHE overrides the location; TON_RPC_CACHE=off disables caching"""
+    configured = os.environ.get("TON_RPC_CACHE")
+    if configured == "off":
+        return None
+    if configured:
+        return Path(configured)
+    return Path.home() / ".cache" / "shopping-contract" / "rpc.sqlite3"
+
+
+def is_immutable(method: str, params: Dict[str, Any]) -> bool:
+    """Whether the answer to this call can never change"""
+    if method in IMMUTABLE_METHODS:
+        return True
+    if method == "getTransactions":
+        # Anchored at a known transaction, the history below it is final
+        return "lt" in params and "hash" in params
+    if method == "getConfigParam":
+        return "seqno" in params
+    if method == "liteServer.getAccountState":
+        # Proofs are anchored at the block given in the request
+        return "id" in params
+    return False
+
+
+def cache_key(method: str, params: Dict[str, Any]) -> str:
+    canonical = json.dumps([method, params], sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class DiskCache:
+    """Compressed JSON values in SQLite, evicted least-recently-used above ``max_bytes``
+
+    WAL mode lets several processes share one cache file. The total size is
+    kept in a ``meta`` row that triggers update on every insert, replace and
+    delete, so it stays right for all of them without summing the table.
+    """
+
+    def __init__(self, path: os.PathLike, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        # CachedApi runs the queries in worker threads; the lock keeps them one at a time
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(str(self.path), timeout=30, isolation_level=None, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute("BEGIN IMMEDIATE")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL, accessed REAL NOT NULL)")
+        self.db.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)")
+        self.db.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+        # Caches written before the meta row existed are summed once
+        self.db.execute("INSERT OR IGNORE INTO meta SELECT 'size', COALESCE(SUM(size), 0) FROM entries")
+        self.db.execute(
+            "CREATE TRIGGER IF NOT EXISTS entries_insert AFTER INSERT ON entries BEGIN "
+            "UPDATE meta SET value = value + NEW.size WHERE name = 'size'; END")
+        self.db.execute(
+            "CREATE TRIGGER IF NOT EXISTS entries_update AFTER UPDATE OF size ON entries BEGIN "
+            "UPDATE meta SET value = value - OLD.size + NEW.size WHERE name = 'size'; END")
+        self.db.execute(
+            "CREATE TRIGGER IF NOT EXISTS entries_delete AFTER DELETE ON entries BEGIN "
+            "UPDATE meta SET value = value - OLD.size WHERE name = 'size'; END")
+        self.db.execute("COMMIT")
+
+    def get(self, key: str) -> Optional[Any]:
+        with self.lock:
+            row = self.db.execute("SELECT value FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            self.db.execute("UPDATE entries SET accessed = ? WHERE key = ?", (time.time(), key))
+        return json.loads(zlib.decompress(row[0]))
+
+    def put(self, key: str, value: Any):
+        blob = zlib.compress(json.dumps(value, separators=(",", ":")).encode("utf-8"))
+        with self.lock:
+            # An upsert rather than INSERT OR REPLACE: REPLACE deletes without firing the delete trigger
+            self.db.execute(
+                "INSERT INTO entries (key, value, size, accessed) VALUES (?, ?, ?, ?) ON CONFLICT (key) DO UPDATE "
+                "SET value = excluded.value, size = excluded.size, accessed = excluded.accessed",
+                (key, blob, len(blob), time.time()))
+            if self._size() > self.max_bytes:
+                self._evict(int(self.max_bytes * 0.9))
+
+    def evict(self, target_bytes: int):
+        """Drop least recently used entries until the cache holds at most ``target_bytes``"""
+        with self.lock:
+            self._evict(target_bytes)
+
+    def _evict(self, target_bytes: int):
+        excess = self._size() - target_bytes
+        if excess <= 0:
+            return
+        freed = 0
+        doomed = []
+        for key, size in self.db.execute("SELECT key, size FROM entries ORDER BY accessed"):
+            doomed.append((key,))
+            freed += size
+            if freed >= excess:
+                break
+        self.db.executemany("DELETE FROM entries WHERE key = ?", doomed)
+
+    def _size(self) -> int:
+        return self.db.execute("SELECT value FROM meta WHERE name = 'size'").fetchone()[0]
+
+    @property
+    def size(self) -> int:
+        with self.lock:
+            return self._size()
+
+    def __len__(self) -> int:
+        with self.lock:
+            return self.db.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def __contains__(self, key: str) -> bool:
+        with self.lock:
+            return self.db.execute("SELECT 1 FROM entries WHERE key = ?", (key,)).fetchone() is not None
+
+    def close(self):
+        with self.lock:
+            self.db.close()
+
+
+class CachedApi(TonApi):
+    """Answers immutable calls from a DiskCache and forwards everything else"""
+
+    def __init__(self, inner: TonApi, cache: DiskCache):
+        self.inner = inner
+        self.cache = cache
+        self.hits = 0
+        self.misses = 0
+
+    async def call(self, method: str, params: Dict[str, Any]) -> Any:
+        if not is_immutable(method, params):
+            return await self.inner.call(method, params)
+        key = cache_key(method, params)
+        # SQLite blocks; run it on a worker thread so the event loop keeps serving other calls
+        cached = await asyncio.to_thread(self.cache.get, key)
+        if cached is not None:
+            self.hits += 1
+            CACHE_REQUESTS.inc(result="hit")
+            return cached
+        self.misses += 1
+        CACHE_REQUESTS.inc(result="miss")
+        result = await self.inner.call(method, params)
+        # Errors raise before this point, so only real answers are kept
+        await asyncio.to_thread(self.cache.put, key, result)
+        return result
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    async def close(self):
+        await self.inner.close()
+        self.cache.close()
@@ -0,0 +1,245 @@
+"""
+Multi-Endpoint RPC Pool
+Routes calls to the fastest healthy endpoint and hedges idempotent reads after a p95 timeout
+"""
+
+import asyncio
+import json
+import os
+import time
+from collections import deque
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+from rpc_cache import CachedApi, DiskCache, default_cache_path
+from toncenter import TonApi, TonApiError, ToncenterClient
+
+ENDPOINTS_FILE = Path(__file__).resolve().parent / "endpoints.json"
+
+# Reads that may be sent to several endpoints at once without side effects
+IDEMPOTENT_METHODS = frozenset({
+    "runGetMethod", "getAddressInformation", "getExtendedAddressInformation", "getAddressBalance",
+    "getAddressState", "getTransactions", "getMasterchainInfo", "getConfigParam", "getShards",
+    "lookupBlock", "getBlockHeader", "getBlockTransactions", "tryLocateTx",
+})
+
+# Endpoint-side failures worth retrying elsewhere; any other TonApiError is the answer
+RETRYABLE_CODES = frozenset({429, 500, 502, 503, 504})
+
+
+def load_endpoints(network: Optional[str] = None, kind: str = "toncenter",
+                   path: Path = ENDPOINTS_FILE) -> List[str]:
+    """Configured endpoints; TON_ENDPOINTS (comma separated) overrides endpoints.json"""
+    override = os.environ.get("TON_ENDPOINTS")
+    if override and kind == "toncenter":
+        return [endpoint.strip() for endpoint in override.split(",") if endpoint.strip()]
+    network = network or os.environ.get("TON_NETWORK", "testnet")
+    with open(path, "r", encoding="utf-8") as f:
+        config = json.load(f)
+    try:
+        return list(config[network][kind])
+    except KeyError:
+        raise ValueError(f"No {kind} endpoints configured for {network}") from None
+
+
+# Connection failures and timeouts; requests' exceptions derive from OSError too
+TRANSPORT_ERRORS = (OSError, asyncio.TimeoutError)
+
+
+def retryable(exc: BaseException) -> bool:
+    """Whether another endpoint may succeed where this one failed; bugs and answers are raised as they are"""
+    if isinstance(exc, TonApiError):
+        return exc.code in RETRYABLE_CODES
+    return isinstance(exc, TRANSPORT_ERRORS)
+
+
+class EndpointStats:
+    """Rolling latency and error window of one endpoint"""
+
+    def __init__(self, name: str, window: int = 64):
+        self.name = name
+        self.latencies = deque(maxlen=window)
+        self.outcomes = deque(maxlen=window)
+        self.consecutive_failures = 0
+        self.down_until = 0.0
+        self.in_flight = 0
+        self.calls = 0
+
+    def record(self, latency: float, ok: bool):
+        self.calls += 1
+        self.outcomes.append(ok)
+        if ok:
+            self.latencies.append(latency)
+            self.consecutive_failures = 0
+        else:
+            self.consecutive_failures += 1
+
+    @property
+    def error_rate(self) -> float:
+        return self.outcomes.count(False) / len(self.outcomes) if self.outcomes else 0.0
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+    def score(self) -> float:
+        """Expected cost of routing a call here; unmeasured endpoints are tried first"""
+        median = self.percentile(0.5)
+        if median is None:
+            return 0.0
+        return median * (1 + 4 * self.error_rate) * (1 + self.in_flight)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {"endpoint": self.name, "calls": self.calls, "error_rate": self.error_rate,
+                "p50": self.percentile(0.5), "p95": self.percentile(0.95), "in_flight": self.in_flight}
+
+
+class RpcPool(TonApi):
+    """One TonApi over several endpoints
+
+    Every call goes to the best-scoring healthy endpoint. Idempotent reads are
+    re-issued to the runner-up when the first endpoint has not answered
+    within its own p95 latency; the first answer wins. Endpoints that fail
+    repeatedly sit out a cooldown.
+    """
+
+    def __init__(self, clients: Dict[str, TonApi], initial_hedge_delay: float = 0.5,
+                 min_hedge_delay: float = 0.05, max_failures: int = 3, cooldown: float = 30.0):
+        if not clients:
+            raise ValueError("At least one endpoint is required")
+        self.clients = dict(clients)
+        self.stats = {name: EndpointStats(name) for name in self.clients}
+        self.initial_hedge_delay = initial_hedge_delay
+        self.min_hedge_delay = min_hedge_delay
+        self.max_failures = max_failures
+        self.cooldown = cooldown
+        self.hedged = 0
+
+    @classmethod
+    def from_endpoints(cls, endpoints: Sequence[str], api_key: Optional[str] = None,
+                       timeout: float = 10.0, **options) -> "RpcPool":
+        return cls({endpoint: ToncenterClient(endpoint, api_key, timeout) for endpoint in endpoints}, **options)
+
+    def ranked(self) -> List[str]:
+        """Endpoints from best to worst; endpoints in cooldown only as a last resort"""
+        now = time.monotonic()
+        return sorted(self.stats, key=lambda name: (self.stats[name].down_until > now, self.stats[name].score()))
+
+    def hedge_delay(self, name: str) -> float:
+        stats = self.stats[name]
+        if len(stats.latencies) < 8:
+            return self.initial_hedge_delay
+        return max(self.min_hedge_delay, stats.percentile(0.95))
+
+    async def _call_one(self, name: str, method: str, params: Dict[str, Any]) -> Any:
+        stats = self.stats[name]
+        stats.in_flight += 1
+        started = time.monotonic()
+        try:
+            result = await self.clients[name].call(method, params)
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            ok = not retryable(exc)
+            stats.record(time.monotonic() - started, ok)
+            if not ok and stats.consecutive_failures >= self.max_failures:
+                stats.down_until = time.monotonic() + self.cooldown
+            raise
+        else:
+            stats.record(time.monotonic() - started, True)
+            return result
+        finally:
+            stats.in_flight -= 1
+
+    async def call(self, method: str, params: Dict[str, Any]) -> Any:
+        order = self.ranked()
+        if method in IDEMPOTENT_METHODS and len(order) > 1:
+            return await self._hedged(order, method, params)
+        last_error: Optional[BaseException] = None
+        for name in order:
+            try:
+                return await self._call_one(name, method, params)
+            except Exception as exc:
+                if not retryable(exc):
+                    raise
+                last_error = exc
+        raise last_error
+
+    async def _hedged(self, order: List[str], method: str, params: Dict[str, Any]) -> Any:
+        pending: Dict[asyncio.Task, str] = {}
+        remaining = list(order)
+        last_error: Optional[BaseException] = None
+
+        def launch():
+            name = remaining.pop(0)
+            pending[asyncio.create_task(self._call_one(name, method, params))] = name
+            return name
+
+        try:
+            current = launch()
+            while pending:
+                timeout = self.hedge_delay(current) if remaining else None
+                done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    # The leader is slower than usual: ask the next endpoint as well
+                    self.hedged += 1
+                    current = launch()
+                    continue
+                for task in done:
+                    pending.pop(task)
+                    exc = task.exception()
+                    if exc is None:
+                        return task.result()
+                    if not retryable(exc):
+                        raise exc
+                    last_error = exc
+                if not pending and remaining:
+                    current = launch()
+            raise last_error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """Per-endpoint statistics, best endpoint first"""
+        return [self.stats[name].as_dict() for name in self.ranked()]
+
+    async def close(self):
+        await asyncio.gather(*(client.close() for client in self.clients.values()))
+
+
+def connect(endpoints: Optional[Sequence[str]] = None, api_key: Optional[str] = None,
+            network: Optional[str] = None, cache_path: Optional[os.PathLike] = None,
+            cache: bool = True, use_daemon: bool = True) -> TonApi:
+    """Client for the given endpoints, or for every configured one, behind the shared disk cache
+
+    With TON_DAEMON_SOCKET pointing at a running daemon.py and no explicit
+    endpoints, calls go through the daemon's warm clients instead, provided
+    its ping reports the same network and cache that a direct client would use.
+    """
+    network = network or os.environ.get("TON_NETWORK", "testnet")
+    cache_path = (cache_path or default_cache_path()) if cache else None
+    socket_path = os.environ.get("TON_DAEMON_SOCKET")
+    if use_daemon and not endpoints and socket_path and os.path.exists(socket_path):
+        # daemon.py builds on this module, so it is imported only when used
+        from daemon import DaemonApi, daemon_serves
+
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            if daemon_serves(socket_path, network, cache_path):
+                return DaemonApi(socket_path)
+        else:
+            # A blocking ping would stall the running loop; the client pings on its first call instead
+            return DaemonApi(socket_path, network, cache_path, fallback=lambda: connect(
+                api_key=api_key, network=network, cache_path=cache_path, cache=cache, use_daemon=False))
+    endpoints = list(endpoints or load_endpoints(network))
+    if len(endpoints) == 1:
+        api: TonApi = ToncenterClient(endpoints[0], api_key)
+    else:
+        api = RpcPool.from_endpoints(endpoints, api_key)
+    if cache_path is not None:
+        api = CachedApi(api, DiskCache(cache_path))
+    return api
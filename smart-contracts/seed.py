@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Synthetic Order Seeding
+Builds ShoppingContract state with millions of orders for benchmarking indexers, getters and exporters
+"""
+
+import argparse
+import hashlib
+import random
+import string
+import time
+from itertools import accumulate
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from boc import Address, Cell, begin_cell, build_dict, text_cell
+from emulator import ShoppingContractModel
+from messages import state_init
+from storage import ContractStorage
+
+UNPAID = 0
+PAID = 1
+
+_FILLER = string.ascii_letters + string.digits + " "
+
+
+class SeedProfile:
+    """Shape of the generated order book
+
+    Detail sizes are log-normal around ``detail_median`` bytes with spread
+    ``detail_skew`` (0 gives every product the same size). Orders pick from a
+    catalogue of ``catalogue_size`` products with Zipf popularity, so a few
+    products dominate like in a real shop, and each product keeps one image.
+    """
+
+    def __init__(self, orders: int = 1_000_000, paid_ratio: float = 0.5, detail_median: int = 48,
+                 detail_skew: float = 1.0, detail_max: int = 2000, catalogue_size: int = 4096,
+                 seed: int = 0):
+        if orders < 0 or orders >= 1 << 32:
+            raise ValueError("Order count must fit into a 32-bit order id")
+        if not 0.0 <= paid_ratio <= 1.0:
+            raise ValueError("Paid ratio must be between 0 and 1")
+        if catalogue_size < 1 or detail_median < 1 or detail_max < detail_median:
+            raise ValueError("Catalogue and detail sizes must be positive, with detail_max >= detail_median")
+        self.orders = orders
+        self.paid_ratio = paid_ratio
+        self.detail_median = detail_median
+        self.detail_skew = detail_skew
+        self.detail_max = detail_max
+        self.catalogue_size = catalogue_size
+        self.seed = seed
+
+
+def paid_status(paid: int, price: int) -> Cell:
+    """paid_status value: the paid flag and the price fixed at createOrder"""
+    return begin_cell().store_uint(paid, 32).store_coins(price).end_cell()
+
+
+class Product:
+    """Catalogue entry: snake-encoded details, the cell holding its image hash and its unpaid/paid status cells"""
+
+    def __init__(self, details: Cell, image: Cell, size: int, price: int):
+        self.details = details
+        self.image = image
+        self.size = size
+        self.price = price
+        self.status = (paid_status(UNPAID, price), paid_status(PAID, price))
+
+
+def product_details(rng: random.Random, sku: int, size: int) -> str:
+    """JSON-ish product description padded to ``size`` bytes"""
+    head = f'{{"sku":{sku},"title":"'
+    filler = "".join(rng.choices(_FILLER, k=max(0, size - len(head) - 2)))
+    return (head + filler + '"}')[:size]
+
+
+def make_catalogue(profile: SeedProfile, rng: random.Random) -> List[Product]:
+    catalogue = []
+    for sku in range(profile.catalogue_size):
+        size = profile.detail_median
+        if profile.detail_skew > 0:
+            size = int(profile.detail_median * rng.lognormvariate(0.0, profile.detail_skew))
+        size = min(profile.detail_max, max(1, size))
+        image_hash = hashlib.sha256(f"{profile.seed}:{sku}".encode()).digest()
+        price = (1 + sku % 10) * 10 ** 8
+        catalogue.append(Product(text_cell(product_details(rng, sku, size)),
+                                 begin_cell().store_bytes(image_hash).end_cell(), size, price))
+    return catalogue
+
+
+def seed_storage(profile: SeedProfile, owner: Optional[Address] = None, shard_index: int = 0,
+                 owner_key: bytes = bytes(32)) -> ContractStorage:
+    """Contract storage holding ``profile.orders`` orders with ids 1..N, as createOrder would leave it"""
+    rng = random.Random(profile.seed)
+    catalogue = make_catalogue(profile, rng)
+    weights = list(accumulate(1.0 / rank for rank in range(1, len(catalogue) + 1)))
+    picks = rng.choices(catalogue, cum_weights=weights, k=profile.orders)
+    order_ids = range(1, profile.orders + 1)
+    paid_ratio = profile.paid_ratio
+    random_ = rng.random
+    details = {order_id: product.details for order_id, product in zip(order_ids, picks)}
+    images = {order_id: product.image for order_id, product in zip(order_ids, picks)}
+    paid = {order_id: product.status[PAID if random_() < paid_ratio else UNPAID]
+            for order_id, product in zip(order_ids, picks)}
+    # Orders share a few thousand distinct values, so most leaves and low forks are shared too
+    return ContractStorage(
+        last_order_id=profile.orders,
+        shard_index=shard_index,
+        owner=owner,
+        owner_key=owner_key,
+        product_details=build_dict(details, 32, share=True),
+        product_images=build_dict(images, 32, share=True),
+        paid_status=build_dict(paid, 32, share=True),
+    )
+
+
+def seed_model(profile: SeedProfile, owner: Optional[Address] = None, code: Optional[Cell] = None,
+               balance: int = 10 ** 9, now: Optional[int] = None,
+               owner_key: bytes = bytes(32)) -> ShoppingContractModel:
+    """Deployed emulated contract preloaded with the seeded orders"""
+    return ShoppingContractModel(seed_storage(profile, owner, owner_key=owner_key), code or Cell(), balance, now)
+
+
+def write_state(storage: ContractStorage, path: Path, code: Optional[Cell] = None) -> Tuple[int, Cell]:
+    """Write the data cell, or a full StateInit when ``code`` is given, as a BoC; returns (bytes, root)"""
+    root = storage.encode()
+    if code is not None:
+        root = state_init(code, root)
+    boc = root.to_boc()
+    Path(path).write_bytes(boc)
+    return len(boc), root
+
+
+def main(argv: Optional[List[str]] = None):
+    """Seed a large order book and write it as a BoC"""
+    parser = argparse.ArgumentParser(description="Generate ShoppingContract state with many orders")
+    parser.add_argument("--orders", type=int, default=1_000_000, help="Number of orders")
+    parser.add_argument("--paid-ratio", type=float, default=0.5, help="Fraction of paid orders")
+    parser.add_argument("--detail-median", type=int, default=48, help="Median product detail size in bytes")
+    parser.add_argument("--detail-skew", type=float, default=1.0, help="Log-normal spread of detail sizes (0: fixed)")
+    parser.add_argument("--detail-max", type=int, default=2000, help="Largest product detail size in bytes")
+    parser.add_argument("--catalogue", type=int, default=4096, help="Distinct products to draw orders from")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    parser.add_argument("--owner", help="Owner address stored in the contract")
+    parser.add_argument("--owner-key", help="Owner public key (hex) that must sign external messages")
+    parser.add_argument("--code", help="Contract code BoC; writes a StateInit instead of the bare data cell")
+    parser.add_argument("--out", default="seeded_state.boc", help="Output BoC path")
+    args = parser.parse_args(argv)
+
+    profile = SeedProfile(args.orders, args.paid_ratio, args.detail_median, args.detail_skew,
+                          args.detail_max, args.catalogue, args.seed)
+    owner = Address.parse(args.owner) if args.owner else None
+    code = Cell.from_boc(Path(args.code).read_bytes()) if args.code else None
+
+    started = time.perf_counter()
+    owner_key = bytes.fromhex(args.owner_key) if args.owner_key else bytes(32)
+    storage = seed_storage(profile, owner, owner_key=owner_key)
+    built = time.perf_counter()
+    size, root = write_state(storage, Path(args.out), code)
+    print(f"🌱 Seeded {profile.orders:,} orders in {built - started:.1f}s")
+    print(f"💾 Wrote {size:,} bytes to {args.out} in {time.perf_counter() - built:.1f}s")
+    print(f"🔑 Root hash: {root.hash.hex()}")
+
+
+if __name__ == "__main__":
+    main()
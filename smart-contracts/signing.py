@@ -0,0 +1,227 @@
+"""
+Ed25519 Signing
+Signs message hashes with PyNaCl when installed, falling back to a pure-Python RFC 8032 implementation
+
+The fallback is not constant-time: its scalar multiplication branches on the
+secret bits, so signing timings leak the key. It is fine for verification,
+tests and throwaway keys; the CLIs that take an owner's secret key call
+require_constant_time() and refuse to run without PyNaCl.
+"""
+
+import hashlib
+import os
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+from typing import List, Optional, Sequence
+
+try:
+    import nacl.signing
+except ImportError:  # pragma: no cover - depends on the environment
+    nacl = None
+
+# Lets require_constant_time() pass without PyNaCl, for test setups and throwaway keys
+INSECURE_ENV = "TON_INSECURE_SIGNING"
+
+_P = 2 ** 255 - 19
+_Q = 2 ** 252 + 27742317777372353535851937790883648493
+_D = -121665 * pow(121666, _P - 2, _P) % _P
+_SQRT_M1 = pow(2, (_P - 1) // 4, _P)
+
+
+def _recover_x(y: int, sign: int) -> int:
+    if y >= _P:
+        raise ValueError("Invalid point")
+    x2 = (y * y - 1) * pow(_D * y * y + 1, _P - 2, _P)
+    if x2 == 0:
+        if sign:
+            raise ValueError("Invalid point")
+        return 0
+    x = pow(x2, (_P + 3) // 8, _P)
+    if (x * x - x2) % _P:
+        x = x * _SQRT_M1 % _P
+    if (x * x - x2) % _P:
+        raise ValueError("Invalid point")
+    if (x & 1) != sign:
+        x = _P - x
+    return x
+
+
+_BY = 4 * pow(5, _P - 2, _P) % _P
+_BASE = (_recover_x(_BY, 0), _BY, 1, _recover_x(_BY, 0) * _BY % _P)
+
+
+def _add(p1, p2):
+    x1, y1, z1, t1 = p1
+    x2, y2, z2, t2 = p2
+    a = (y1 - x1) * (y2 - x2) % _P
+    b = (y1 + x1) * (y2 + x2) % _P
+    c = 2 * t1 * t2 * _D % _P
+    d = 2 * z1 * z2 % _P
+    e, f, g, h = b - a, d - c, d + c, b + a
+    return e * f % _P, g * h % _P, f * g % _P, e * h % _P
+
+
+def _multiply(scalar: int, point):
+    result = (0, 1, 1, 0)
+    while scalar:
+        if scalar & 1:
+            result = _add(result, point)
+        point = _add(point, point)
+        scalar >>= 1
+    return result
+
+
+def _compress(point) -> bytes:
+    x, y, z, _ = point
+    z_inv = pow(z, _P - 2, _P)
+    x, y = x * z_inv % _P, y * z_inv % _P
+    return (y | ((x & 1) << 255)).to_bytes(32, "little")
+
+
+def _decompress(data: bytes):
+    y = int.from_bytes(data, "little")
+    sign = y >> 255
+    y &= (1 << 255) - 1
+    x = _recover_x(y, sign)
+    return x, y, 1, x * y % _P
+
+
+def _points_equal(p1, p2) -> bool:
+    x1, y1, z1, _ = p1
+    x2, y2, z2, _ = p2
+    return (x1 * z2 - x2 * z1) % _P == 0 and (y1 * z2 - y2 * z1) % _P == 0
+
+
+def _hash_scalar(*parts: bytes) -> int:
+    return int.from_bytes(hashlib.sha512(b"".join(parts)).digest(), "little") % _Q
+
+
+class InsecureSigningError(RuntimeError):
+    """A real secret key was about to be used without a constant-time Ed25519 backend"""
+
+
+def require_constant_time():
+    """Raise InsecureSigningError unless secret keys are handled by PyNaCl (or TON_INSECURE_SIGNING=1)"""
+    if nacl is None and os.environ.get(INSECURE_ENV) != "1":
+        raise InsecureSigningError(
+            "Signing with a secret key needs PyNaCl (pip install pynacl): the pure-Python fallback is not "
+            f"constant-time and leaks the key through timing. Set {INSECURE_ENV}=1 only for test keys.")
+
+
+def _expand_secret(seed: bytes):
+    warnings.warn("PyNaCl is not installed: using the pure-Python Ed25519 fallback, which is not constant-time; "
+                  "do not use it with real keys", RuntimeWarning, stacklevel=3)
+    digest = hashlib.sha512(seed).digest()
+    scalar = int.from_bytes(digest[:32], "little")
+    scalar &= (1 << 254) - 8
+    scalar |= 1 << 254
+    return scalar, digest[32:]
+
+
+def public_key(seed: bytes) -> bytes:
+    """32-byte public key for a 32-byte secret seed"""
+    if nacl is not None:
+        return bytes(nacl.signing.SigningKey(seed).verify_key)
+    scalar, _ = _expand_secret(seed)
+    return _compress(_multiply(scalar, _BASE))
+
+
+class _Signer:
+    """One key, expanded once for signing many messages"""
+
+    def __init__(self, seed: bytes):
+        if nacl is not None:
+            self.key = nacl.signing.SigningKey(seed)
+        else:
+            self.scalar, self.prefix = _expand_secret(seed)
+            self.public = _compress(_multiply(self.scalar, _BASE))
+
+    def sign(self, message: bytes) -> bytes:
+        if nacl is not None:
+            return self.key.sign(message).signature
+        r = _hash_scalar(self.prefix, message)
+        r_point = _compress(_multiply(r, _BASE))
+        h = _hash_scalar(r_point, self.public, message)
+        return r_point + ((r + h * self.scalar) % _Q).to_bytes(32, "little")
+
+
+def sign(seed: bytes, message: bytes) -> bytes:
+    """64-byte Ed25519 signature of ``message``"""
+    return _Signer(seed).sign(message)
+
+
+# Below this many messages a process pool costs more than it saves
+PARALLEL_THRESHOLD = 256
+
+
+def _sign_range(name: str, seed: bytes, count: int, lo: int, hi: int):
+    """Pool worker: sign messages lo..hi of a shared batch and write their signatures back into it"""
+    shm = SharedMemory(name=name)
+    offsets = shm.buf[:8 * (count + 1)].cast("Q")
+    try:
+        signer = _Signer(seed)
+        signatures = offsets[count]
+        for i in range(lo, hi):
+            message = bytes(shm.buf[offsets[i]:offsets[i + 1]])
+            shm.buf[signatures + 64 * i:signatures + 64 * (i + 1)] = signer.sign(message)
+    finally:
+        offsets.release()
+        shm.close()
+
+
+def sign_many(seed: bytes, messages: Sequence[bytes], processes: Optional[int] = None,
+              min_parallel: int = PARALLEL_THRESHOLD) -> List[bytes]:
+    """Signatures of ``messages`` in order, sharded across a process pool for large batches
+
+    The messages are copied once into a shared memory block laid out as
+    ``count + 1`` uint64 offsets, the concatenated messages and room for the
+    signatures; workers sign index ranges in place, so nothing but the block
+    name and the range crosses the process boundary.
+    """
+    count = len(messages)
+    processes = processes or os.cpu_count() or 1
+    if processes == 1 or count < max(min_parallel, 2):
+        signer = _Signer(seed)
+        return [signer.sign(message) for message in messages]
+
+    header = 8 * (count + 1)
+    payload = sum(len(message) for message in messages)
+    # The last offset doubles as the start of the signature area
+    shm = SharedMemory(create=True, size=header + payload + 64 * count)
+    try:
+        offsets = shm.buf[:header].cast("Q")
+        position = header
+        for i, message in enumerate(messages):
+            offsets[i] = position
+            shm.buf[position:position + len(message)] = message
+            position += len(message)
+        offsets[count] = position
+        offsets.release()
+
+        chunk = -(-count // (processes * 4))
+        with ProcessPoolExecutor(processes) as pool:
+            futures = [pool.submit(_sign_range, shm.name, seed, count, lo, min(lo + chunk, count))
+                       for lo in range(0, count, chunk)]
+            for future in futures:
+                future.result()
+        signatures = bytes(shm.buf[position:position + 64 * count])
+    finally:
+        shm.close()
+        shm.unlink()
+    return [signatures[64 * i:64 * (i + 1)] for i in range(count)]
+
+
+def verify(public: bytes, message: bytes, signature: bytes) -> bool:
+    if len(signature) != 64 or len(public) != 32:
+        return False
+    try:
+        a_point = _decompress(public)
+        r_point = _decompress(signature[:32])
+    except ValueError:
+        return False
+    s = int.from_bytes(signature[32:], "little")
+    if s >= _Q:
+        return False
+    h = _hash_scalar(signature[:32], public, message)
+    return _points_equal(_multiply(s, _BASE), _add(r_point, _multiply(h, a_point)))
@@ -9,12 +9,15 @@ import sys
 from tonclient.client import TonClient, ClientConfig
 from tonclient.types import NetworkConfig, DeploySet, CallSet, Signer, ParamsOfEncodeMessage, ParamsOfSendMessage, ParamsOfWaitForTransaction
 
+from models import Deployment
+from rpc_pool import load_endpoints
+
 async def deploy_contract():
     """Deploy the ShoppingContract to TON testnet"""
 
     # Initialize TON client for testnet
     print("🔗 Initializing TON client...")
-    config = ClientConfig(network=NetworkConfig(server_address="https://net.ton.dev"))
+    config = ClientConfig(network=NetworkConfig(endpoints=load_endpoints(kind="tonclient")))
     client = TonClient(config=config)
     print("✅ TON client initialized successfully")
 
@@ -80,13 +83,13 @@ async def deploy_contract():
         print(f"🔑 Public Key: {keypair.get('public', 'unknown')}")
         print(f"🔐 Secret Key: {keypair.get('secret', 'unknown')}")
 
-        return {
-            "address": message.address,
-            "transaction_id": result.transaction.id,
-            "block_id": result.transaction.block_id,
-            "public_key": keypair.get("public", "unknown"),
-            "secret_key": keypair.get("secret", "unknown")
-        }
+        return Deployment(
+            address=message.address,
+            transaction_id=result.transaction.id,
+            block_id=result.transaction.block_id,
+            public_key=keypair.get("public", "unknown"),
+            secret_key=keypair.get("secret", "unknown")
+        )
 
     except Exception as e:
         print(f"❌ Deployment failed: {str(e)}")
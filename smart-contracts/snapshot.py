@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+ShoppingContract State Snapshots
+Decodes the whole order set from one account-state fetch and diffs it against the previous run
+"""
+
+import argparse
+import asyncio
+import os
+import struct
+from array import array
+from bisect import bisect_left
+from typing import Optional
+
+from boc import Cell, iter_dict
+from proofs import BlockId, VerifiedApi, trusted_block_from_env
+from rpc_pool import connect
+from storage import ContractStorage
+from toncenter import TonApi
+
+SNAPSHOT_MAGIC = b"SCS1"
+_HEADER = struct.Struct("<4sIIQ")
+HASH_SIZE = 32
+
+
+class OrderSnapshot:
+    """Column-oriented view of every order in a ShoppingContract state
+
+    Row ``i`` is spread over ``order_ids[i]``, ``paid[i]`` and the 32-byte
+    slices ``i * 32`` of ``detail_hashes`` (hash of the stored product
+    details) and ``image_hashes`` (the on-chain image content hash).
+    """
+
+    __slots__ = ("order_ids", "paid", "detail_hashes", "image_hashes", "last_order_id", "lt")
+
+    def __init__(self, order_ids: Optional[array] = None, paid: Optional[bytearray] = None,
+                 detail_hashes: Optional[bytearray] = None, image_hashes: Optional[bytearray] = None,
+                 last_order_id: int = 0, lt: int = 0):
+        self.order_ids = order_ids if order_ids is not None else array("I")
+        self.paid = paid if paid is not None else bytearray()
+        self.detail_hashes = detail_hashes if detail_hashes is not None else bytearray()
+        self.image_hashes = image_hashes if image_hashes is not None else bytearray()
+        self.last_order_id = last_order_id
+        self.lt = lt
+
+    def __len__(self) -> int:
+        return len(self.order_ids)
+
+    @staticmethod
+    def from_storage(storage: ContractStorage, lt: int = 0) -> "OrderSnapshot":
+        """Decode the three order dictionaries into columns"""
+        snapshot = OrderSnapshot(last_order_id=storage.last_order_id, lt=lt)
+        images = iter_dict(storage.product_images, 32)
+        paid = iter_dict(storage.paid_status, 32)
+        # All three dicts are keyed by the same order ids, so walk them in lockstep
+        for (order_id, details), (image_id, image), (paid_id, paid_value) in zip(
+                iter_dict(storage.product_details, 32), images, paid, strict=True):
+            if not order_id == image_id == paid_id:
+                raise ValueError(f"Order dictionaries out of sync at order {order_id}")
+            snapshot.order_ids.append(order_id)
+            snapshot.paid.append(1 if paid_value.load_uint(32) else 0)
+            snapshot.detail_hashes += details.to_cell().hash
+            snapshot.image_hashes += image.load_bytes(HASH_SIZE)
+        return snapshot
+
+    @staticmethod
+    def from_data(data: Cell, lt: int = 0) -> "OrderSnapshot":
+        return OrderSnapshot.from_storage(ContractStorage.decode(data), lt)
+
+    def index_of(self, order_id: int) -> int:
+        i = bisect_left(self.order_ids, order_id)
+        if i == len(self.order_ids) or self.order_ids[i] != order_id:
+            raise KeyError(order_id)
+        return i
+
+    def detail_hash(self, i: int) -> bytes:
+        return bytes(self.detail_hashes[i * HASH_SIZE:(i + 1) * HASH_SIZE])
+
+    def image_hash(self, i: int) -> bytes:
+        return bytes(self.image_hashes[i * HASH_SIZE:(i + 1) * HASH_SIZE])
+
+    def _row_equal(self, i: int, other: "OrderSnapshot", j: int) -> bool:
+        a, b = i * HASH_SIZE, j * HASH_SIZE
+        return (self.paid[i] == other.paid[j]
+                and self.detail_hashes[a:a + HASH_SIZE] == other.detail_hashes[b:b + HASH_SIZE]
+                and self.image_hashes[a:a + HASH_SIZE] == other.image_hashes[b:b + HASH_SIZE])
+
+    def to_bytes(self) -> bytes:
+        return b"".join([
+            _HEADER.pack(SNAPSHOT_MAGIC, len(self), self.last_order_id, self.lt),
+            self.order_ids.tobytes(),
+            bytes(self.paid),
+            bytes(self.detail_hashes),
+            bytes(self.image_hashes),
+        ])
+
+    @staticmethod
+    def from_bytes(data: bytes) -> "OrderSnapshot":
+        magic, count, last_order_id, lt = _HEADER.unpack_from(data)
+        if magic != SNAPSHOT_MAGIC:
+            raise ValueError("Not an order snapshot file")
+        pos = _HEADER.size
+        order_ids = array("I")
+        order_ids.frombytes(data[pos:pos + count * order_ids.itemsize])
+        pos += count * order_ids.itemsize
+        paid = bytearray(data[pos:pos + count])
+        pos += count
+        detail_hashes = bytearray(data[pos:pos + count * HASH_SIZE])
+        pos += count * HASH_SIZE
+        image_hashes = bytearray(data[pos:pos + count * HASH_SIZE])
+        return OrderSnapshot(order_ids, paid, detail_hashes, image_hashes, last_order_id, lt)
+
+    def save(self, path: str):
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(self.to_bytes())
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def load(path: str) -> "OrderSnapshot":
+        with open(path, "rb") as f:
+            return OrderSnapshot.from_bytes(f.read())
+
+
+class SnapshotDiff:
+    """Order ids that appeared, changed or disappeared between two snapshots"""
+
+    __slots__ = ("added", "changed", "removed")
+
+    def __init__(self):
+        self.added = array("I")
+        self.changed = array("I")
+        self.removed = array("I")
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.changed or self.removed)
+
+    def __repr__(self) -> str:
+        return f"SnapshotDiff(added={len(self.added)}, changed={len(self.changed)}, removed={len(self.removed)})"
+
+
+def diff_snapshots(previous: OrderSnapshot, current: OrderSnapshot) -> SnapshotDiff:
+    """Merge-walk two snapshots sorted by order id"""
+    diff = SnapshotDiff()
+    old_ids, new_ids = previous.order_ids, current.order_ids
+    i = j = 0
+    while i < len(old_ids) and j < len(new_ids):
+        old_id, new_id = old_ids[i], new_ids[j]
+        if old_id == new_id:
+            if not previous._row_equal(i, current, j):
+                diff.changed.append(new_id)
+            i += 1
+            j += 1
+        elif old_id < new_id:
+            diff.removed.append(old_id)
+            i += 1
+        else:
+            diff.added.append(new_id)
+            j += 1
+    diff.removed.extend(old_ids[i:])
+    diff.added.extend(new_ids[j:])
+    return diff
+
+
+async def fetch_snapshot(api: TonApi, address: str) -> OrderSnapshot:
+    """Fetch the account state once and decode every order locally"""
+    info = await api.get_address_information(address)
+    lt = int(info.get("last_transaction_id", {}).get("lt", 0))
+    data = info.get("data")
+    if not data:
+        return OrderSnapshot(lt=lt)
+    return OrderSnapshot.from_data(Cell.from_boc(data), lt)
+
+
+async def main():
+    """Fetch a snapshot, print the diff against the stored one and replace it"""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("address", help="ShoppingContract address")
+    parser.add_argument("--state", default="orders_snapshot.bin", help="Previous snapshot file")
+    parser.add_argument("--endpoint", action="append",
+                        help="RPC endpoint, repeat for several (default: endpoints.json)")
+    parser.add_argument("--trusted-block", help="Verify the state with Merkle proofs against this masterchain "
+                                                "block (default: TON_TRUSTED_BLOCK, unverified when unset)")
+    args = parser.parse_args()
+
+    api = connect(args.endpoint)
+    trusted = BlockId.parse(args.trusted_block) if args.trusted_block else trusted_block_from_env()
+    if trusted is not None:
+        api = VerifiedApi(api, trusted)
+    try:
+        current = await fetch_snapshot(api, args.address)
+    finally:
+        await api.close()
+
+    previous = OrderSnapshot.load(args.state) if os.path.exists(args.state) else OrderSnapshot()
+    diff = diff_snapshots(previous, current)
+    print(f"📦 {len(current)} orders (last order id {current.last_order_id})")
+    print(f"➕ Added: {len(diff.added)}  ✏️  Changed: {len(diff.changed)}  ➖ Removed: {len(diff.removed)}")
+    current.save(args.state)
+    print(f"💾 Snapshot saved to {args.state}")
+    return diff
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
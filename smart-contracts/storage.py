@@ -0,0 +1,124 @@
+"""
+ShoppingContract Storage Layout
+Python codec for the persistent data cell written by save_data()
+"""
+
+from typing import Any, Dict, Optional, Set
+
+from boc import Address, Cell, begin_cell
+
+ORDERS = "orders"
+META = "meta"
+
+
+class _RefField:
+    """Field kept in one of the data cell's refs, decoded on first access"""
+
+    def __init__(self, ref: str):
+        self.ref = ref
+
+    def __set_name__(self, owner, name: str):
+        self.name = name
+
+    def __get__(self, storage: Optional["ContractStorage"], owner=None) -> Any:
+        if storage is None:
+            return self
+        storage._unpack(self.ref)
+        return storage._fields[self.name]
+
+    def __set__(self, storage: "ContractStorage", value: Any):
+        storage._unpack(self.ref)
+        storage._fields[self.name] = value
+        # The encoded ref is stale now and gets rebuilt by encode()
+        storage._cells[self.ref] = None
+
+
+class ContractStorage:
+    """Decoded ShoppingContract data cell (c4)
+
+    Layout::
+
+        shard_index:uint16 paid_status:(HashmapE 32 [paid:uint32 price:Coins])
+          ^[last_order_id:uint32 product_details:(HashmapE 32 Cell) product_images:(HashmapE 32 uint256)]
+          ^[owner:MsgAddress owner_key:uint256 processed_queries:(HashmapE 64 ())]
+
+    ``owner_key`` is the Ed25519 public key external messages must be signed
+    with. Like recv_internal, a decoded storage only parses the order and metadata
+    refs when one of their fields is read, and encode() reuses a ref as is
+    until one of its fields is assigned.
+    """
+
+    last_order_id = _RefField(ORDERS)
+    # Dictionary roots keyed by 32-bit order id, None when empty
+    product_details = _RefField(ORDERS)
+    product_images = _RefField(ORDERS)
+    owner = _RefField(META)
+    owner_key = _RefField(META)
+    # Unexpired external query ids (64-bit keys, empty values)
+    processed_queries = _RefField(META)
+
+    def __init__(self, last_order_id: int = 0, shard_index: int = 0, owner: Optional[Address] = None,
+                 product_details: Optional[Cell] = None, product_images: Optional[Cell] = None,
+                 paid_status: Optional[Cell] = None, processed_queries: Optional[Cell] = None,
+                 owner_key: bytes = bytes(32)):
+        self._cells: Dict[str, Optional[Cell]] = {ORDERS: None, META: None}
+        self._unpacked: Set[str] = set()
+        self._fields: Dict[str, Any] = {}
+        # Position of this instance in a contract fleet (see fleet.py)
+        self.shard_index = shard_index
+        self.paid_status = paid_status
+        self.last_order_id = last_order_id
+        self.product_details = product_details
+        self.product_images = product_images
+        self.owner = owner
+        self.owner_key = owner_key
+        self.processed_queries = processed_queries
+
+    def _unpack(self, ref: str):
+        cell = self._cells[ref]
+        if cell is None or ref in self._unpacked:
+            return
+        self._unpacked.add(ref)
+        s = cell.begin_parse()
+        if ref == ORDERS:
+            self._fields.update(last_order_id=s.load_uint(32), product_details=s.load_dict(),
+                                product_images=s.load_dict())
+        else:
+            self._fields.update(owner=s.load_address(), owner_key=s.load_bytes(32), processed_queries=s.load_dict())
+
+    def orders_cell(self) -> Cell:
+        if self._cells[ORDERS] is None:
+            self._cells[ORDERS] = (begin_cell()
+                                   .store_uint(self.last_order_id, 32)
+                                   .store_dict(self.product_details)
+                                   .store_dict(self.product_images)
+                                   .end_cell())
+        return self._cells[ORDERS]
+
+    def meta_cell(self) -> Cell:
+        if self._cells[META] is None:
+            self._cells[META] = (begin_cell()
+                                 .store_address(self.owner)
+                                 .store_bytes(self.owner_key)
+                                 .store_dict(self.processed_queries)
+                                 .end_cell())
+        return self._cells[META]
+
+    @staticmethod
+    def decode(data: Cell) -> "ContractStorage":
+        s = data.begin_parse()
+        storage = ContractStorage.__new__(ContractStorage)
+        storage._unpacked = set()
+        storage._fields = {}
+        storage.shard_index = s.load_uint(16)
+        storage.paid_status = s.load_dict()
+        storage._cells = {ORDERS: s.load_ref(), META: s.load_ref()}
+        return storage
+
+    def encode(self) -> Cell:
+        return (begin_cell()
+                .store_uint(self.shard_index, 16)
+                .store_dict(self.paid_status)
+                .store_ref(self.orders_cell())
+                .store_ref(self.meta_cell())
+                .end_cell())
@@ -0,0 +1,86 @@
+"""
+Idempotent Message Submission
+Query-id stamped external messages that can be resent aggressively without creating duplicates
+"""
+
+import asyncio
+import secrets
+import time
+from typing import List, Optional, Sequence, Tuple
+
+from boc import Cell
+from toncenter import TonApi
+
+QUERY_TTL = 60
+# Mirrors query::max_ttl in contracts/ShoppingContract.fc
+MAX_QUERY_TTL = 600
+
+
+def make_query_id(ttl: int = QUERY_TTL, now: Optional[float] = None) -> int:
+    """(validUntil << 32) | random nonce, accepted by the contract exactly once"""
+    if not 0 < ttl <= MAX_QUERY_TTL:
+        raise ValueError(f"Query TTL must be between 1 and {MAX_QUERY_TTL} seconds")
+    valid_until = int(time.time() if now is None else now) + ttl
+    return (valid_until << 32) | secrets.randbits(32)
+
+
+def query_valid_until(query_id: int) -> int:
+    return query_id >> 32
+
+
+async def query_processed(api: TonApi, address: str, query_id: int) -> bool:
+    """Whether the contract has accepted the external message with this query id"""
+    seen, = await api.run_get_method(address, "get_query_processed", [query_id])
+    return seen != 0
+
+
+class IdempotentSubmitter:
+    """Resends the same signed message through every endpoint until it lands or expires
+
+    The contract rejects a query id it has already accepted, so duplicates
+    created by timeouts, retries or parallel endpoints are harmless.
+    """
+
+    def __init__(self, apis: Sequence[TonApi], resend_interval: float = 2.0):
+        if not apis:
+            raise ValueError("At least one API endpoint is required")
+        self.apis = list(apis)
+        self.resend_interval = resend_interval
+
+    async def _broadcast(self, boc: bytes) -> int:
+        results = await asyncio.gather(*(api.send_boc(boc) for api in self.apis), return_exceptions=True)
+        return sum(not isinstance(result, Exception) for result in results)
+
+    async def _processed(self, address: str, query_id: int) -> bool:
+        for api in self.apis:
+            try:
+                return await query_processed(api, address, query_id)
+            except Exception:
+                continue
+        return False
+
+    async def submit(self, address: str, message: Cell, query_id: int) -> bool:
+        """Keep resending ``message`` until its query id is processed; False once it expired unprocessed"""
+        boc = message.to_boc()
+        valid_until = query_valid_until(query_id)
+        attempt = 0
+        while True:
+            attempt += 1
+            if not await self._broadcast(boc):
+                print(f"⚠️  Attempt {attempt}: no endpoint accepted query {query_id:#x}, resending")
+            await asyncio.sleep(self.resend_interval)
+            if await self._processed(address, query_id):
+                return True
+            if time.time() > valid_until:
+                # The contract now rejects the message, so this answer is final
+                return await self._processed(address, query_id)
+
+    async def submit_many(self, submissions: List[Tuple[str, Cell, int]], concurrency: int = 32) -> List[bool]:
+        """Submit (address, message, query_id) triples in parallel"""
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def run(address: str, message: Cell, query_id: int) -> bool:
+            async with semaphore:
+                return await self.submit(address, message, query_id)
+
+        return list(await asyncio.gather(*(run(*submission) for submission in submissions)))
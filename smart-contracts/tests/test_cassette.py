@@ -0,0 +1,112 @@
+"""
+Cassette Test Suite
+Tests recording RPC traffic once and replaying it deterministically
+"""
+
+import asyncio
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from boc import Address  # noqa: E402
+from cassette import RECORD, CassetteApi, CassetteMiss  # noqa: E402
+from local_chain import LocalChain  # noqa: E402
+from orders import iter_orders  # noqa: E402
+from seed import SeedProfile, seed_model  # noqa: E402
+from toncenter import TonApi, TonApiError  # noqa: E402
+
+SHOP = Address(0, bytes(32))
+
+
+def orders_chain(count: int) -> LocalChain:
+    chain = LocalChain()
+    chain.add_account(SHOP, seed_model(SeedProfile(orders=count, seed=1)))
+    return chain
+
+
+class SequenceApi(TonApi):
+    """Returns an increasing seqno per call, like a chain that keeps moving"""
+
+    def __init__(self):
+        self.seqno = 0
+
+    async def call(self, method, params):
+        if method == "getAddressInformation":
+            raise TonApiError("invalid address", 416)
+        self.seqno += 1
+        return {"last": {"seqno": self.seqno}}
+
+
+async def collect_orders(api):
+    try:
+        return [order async for order in iter_orders(api, SHOP.to_raw(), page_size=40)]
+    finally:
+        await api.close()
+
+
+class TestCassette(unittest.TestCase):
+    """Record once, replay at memory speed"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / "orders.json.gz"
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_replays_recorded_enumeration(self):
+        api = CassetteApi(self.path, orders_chain(100), RECORD)
+        recorded = asyncio.run(collect_orders(api))
+        self.assertEqual(len(recorded), 100)
+        self.assertEqual(len(api.cassette.interactions), 3)
+
+        replayed = asyncio.run(collect_orders(CassetteApi(self.path)))
+        self.assertEqual(replayed, recorded)
+
+    def test_strict_mode_rejects_unrecorded_calls(self):
+        with self.assertRaises(CassetteMiss):
+            CassetteApi(self.path)
+        asyncio.run(collect_orders(CassetteApi(self.path, orders_chain(1), RECORD)))
+        api = CassetteApi(self.path)
+        with self.assertRaises(CassetteMiss):
+            asyncio.run(api.get_masterchain_info())
+
+    def test_polling_and_errors_replay_in_order(self):
+        async def session(api):
+            seqnos = [(await api.get_masterchain_info())["last"]["seqno"] for _ in range(3)]
+            with self.assertRaises(TonApiError) as raised:
+                await api.get_address_information("bad")
+            await api.close()
+            return seqnos, raised.exception.code
+
+        recorded = asyncio.run(session(CassetteApi(self.path, SequenceApi(), RECORD)))
+        self.assertEqual(recorded, ([1, 2, 3], 416))
+        self.assertEqual(asyncio.run(session(CassetteApi(self.path))), recorded)
+
+        async def poll_longer(api):
+            return [(await api.get_masterchain_info())["last"]["seqno"] for _ in range(5)]
+
+        self.assertEqual(asyncio.run(poll_longer(CassetteApi(self.path))), [1, 2, 3, 3, 3])
+
+    def test_lenient_mode_fills_gaps(self):
+        live = SequenceApi()
+
+        async def session():
+            api = CassetteApi(self.path, live, strict=False)
+            first = await api.get_masterchain_info()
+            await api.close()
+            api = CassetteApi(self.path, live, strict=False)
+            second = await api.get_masterchain_info()
+            await api.close()
+            return first, second
+
+        first, second = asyncio.run(session())
+        self.assertEqual(first, second)
+        self.assertEqual(live.seqno, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
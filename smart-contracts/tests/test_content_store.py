@@ -0,0 +1,63 @@
+"""
+Content Store Test Suite
+Tests deduplicated image storage and hash resolution
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from content_store import ContentStore, content_hash  # noqa: E402
+from orders import build_create_order_body  # noqa: E402
+
+
+class TestContentStore(unittest.TestCase):
+    """Content-addressed image storage"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = ContentStore(self.tmp.name, cache_bytes=10)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_identical_images_are_stored_once(self):
+        first = self.store.put(b"image-bytes")
+        second = self.store.put(b"image-bytes")
+        self.assertEqual(first, second)
+        self.assertEqual(first, content_hash(b"image-bytes"))
+        stored = [name for _, _, names in os.walk(self.tmp.name) for name in names]
+        self.assertEqual(len(stored), 1)
+
+    def test_resolve_by_hash(self):
+        digest = self.store.put(b"abc")
+        self.assertEqual(self.store.get(digest), b"abc")
+        self.assertEqual(self.store.get(bytes.fromhex(digest)), b"abc")
+        self.assertEqual(self.store.get(int(digest, 16)), b"abc")
+        self.assertIn(digest, self.store)
+        with self.assertRaises(KeyError):
+            self.store.get("00" * 32)
+
+    def test_cache_is_bounded(self):
+        for i in range(5):
+            self.store.get(self.store.put(b"img%d" % i))
+        self.assertLessEqual(self.store._cached_size, 10)
+
+    def test_create_order_body_carries_hash(self):
+        digest = self.store.put(b"png")
+        s = build_create_order_body("Shirt (Size: M)", digest, price=10 ** 9, query_id=7,
+                                    secret_key=bytes(32)).begin_parse()
+        s.skip_bits(512)  # signature
+        self.assertEqual(s.load_uint(32), 1)
+        self.assertEqual(s.load_uint(64), 7)
+        s.load_ref()
+        self.assertEqual(s.load_bytes(32).hex(), digest)
+        self.assertEqual(s.load_coins(), 10 ** 9)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+"""
+Contract Version Comparison Test Suite
+Tests workload replay, per-op summaries and regression detection
+"""
+
+import contextlib
+import io
+import sys
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from contract_diff import (CONTRACT_SOURCE, WORKTREE, build_workload, changed_files, compare, main,  # noqa: E402
+                           replay, run_revision, summarize, unmirrored_contract_change)
+from emulator import (ERROR_ALREADY_PAID, ERROR_BAD_SIGNATURE, ERROR_INSUFFICIENT_PAYMENT,  # noqa: E402
+                      ERROR_REPLAYED_QUERY, ERROR_UNKNOWN_ORDER)
+
+
+class TestContractDiff(unittest.TestCase):
+    """Replaying one workload and diffing two replays"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.steps = build_workload(orders=10)
+        cls.results = replay(cls.steps)
+
+    def test_workload_exercises_every_path(self):
+        exit_codes = {result["op"]: result["exit_code"] for result in self.results}
+        self.assertEqual(exit_codes, {
+            "create_order": 0, "replayed_query": ERROR_REPLAYED_QUERY, "bad_signature": ERROR_BAD_SIGNATURE,
+            "pay_order": 0,
+            "double_payment": ERROR_ALREADY_PAID, "underpaid": ERROR_INSUFFICIENT_PAYMENT,
+            "unknown_order": ERROR_UNKNOWN_ORDER, "top_up": 0,
+        })
+        summary = summarize(self.results)
+        self.assertGreater(summary["create_order"]["storage_cells"], 0)
+        self.assertEqual(summary["replayed_query"]["storage_bits"], 0)
+
+    def test_same_workload_is_deterministic(self):
+        self.assertEqual(build_workload(orders=10), self.steps)
+        self.assertEqual(replay(self.steps), self.results)
+
+    def test_regressions_and_behaviour_changes(self):
+        head = [dict(result) for result in self.results]
+        for result in head:
+            if result["op"] == "pay_order":
+                result["gas"] += 100
+        head[0]["exit_code"] = ERROR_REPLAYED_QUERY
+        report = compare(self.results, head)
+        self.assertEqual([(r.op, r.metric) for r in report["regressions"]], [("pay_order", "gas")])
+        self.assertEqual(report["exit_code_changes"][0]["step"], 0)
+        self.assertEqual(compare(self.results, head, tolerance=0.5)["regressions"], [])
+        self.assertEqual(compare(self.results, self.results)["regressions"], [])
+
+    def test_worktree_replay_runs_out_of_process(self):
+        self.assertEqual(run_revision(WORKTREE, self.steps), self.results)
+
+    def test_unmirrored_contract_change_is_refused(self):
+        self.assertTrue(unmirrored_contract_change({CONTRACT_SOURCE, "README.md"}))
+        self.assertFalse(unmirrored_contract_change({CONTRACT_SOURCE, "emulator.py"}))
+        self.assertFalse(unmirrored_contract_change({"emulator.py"}))
+        self.assertEqual(changed_files("HEAD", "HEAD"), set())
+        with patch("contract_diff.changed_files", return_value={CONTRACT_SOURCE}), \
+                contextlib.redirect_stdout(io.StringIO()) as out:
+            self.assertEqual(main(["--orders", "1"]), 2)
+        self.assertIn("cannot see this change", out.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()
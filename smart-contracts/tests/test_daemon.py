@@ -0,0 +1,191 @@
+"""
+RPC Daemon Test Suite
+Tests the Unix socket protocol, pipelining and the blocking and async clients
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from boc import Cell  # noqa: E402
+from daemon import DaemonApi, DaemonClient, RpcDaemon, daemon_serves  # noqa: E402
+from payments import decode_payment_payload  # noqa: E402
+from rpc_pool import connect  # noqa: E402
+from toncenter import TonApi, TonApiError  # noqa: E402
+
+
+class SlowApi(TonApi):
+    """Answers get-methods after a delay that depends on the argument"""
+
+    def __init__(self):
+        self.calls = []
+
+    async def call(self, method, params):
+        self.calls.append(method)
+        if method == "runGetMethod":
+            value = int(params["stack"][0][1], 16)
+            await asyncio.sleep(0.01 * value)
+            return {"exit_code": 0, "stack": [["num", hex(value * 2)]]}
+        if method == "sendBoc":
+            raise TonApiError("duplicate message", 500)
+        return {"last": {"seqno": 42}}
+
+
+class TestDaemon(unittest.TestCase):
+    """Round trips through a daemon running on a temporary socket"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.socket = Path(self.tmp.name) / "rpc.sock"
+        self.api = SlowApi()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def with_daemon(self, client, **kwargs):
+        async def run():
+            server = await RpcDaemon(self.api, **kwargs).serve(self.socket)
+            async with server:
+                return await client()
+        return asyncio.run(run())
+
+    def test_blocking_client(self):
+        def session():
+            with DaemonClient(self.socket) as client:
+                pong = client.request("ping")
+                doubled = client.request("get", address="0:00", method="double", stack=[21])
+                body = client.request("encode", kind="payment", order_id=7, amount=10 ** 9)
+                with self.assertRaises(TonApiError) as raised:
+                    client.request("send", boc="te6ccgEBAQEAAgAAAA==")
+                with self.assertRaises(TonApiError):
+                    client.request("explode")
+                return pong, doubled, body, raised.exception.code
+
+        pong, doubled, body, code = self.with_daemon(lambda: asyncio.to_thread(session))
+        self.assertEqual(pong["requests"], 1)
+        self.assertEqual(doubled, [42])
+        self.assertEqual(decode_payment_payload(Cell.from_boc(body["body"]))["order_id"], 7)
+        self.assertEqual(code, 500)
+
+    def test_async_client_pipelines_requests(self):
+        async def session():
+            api = DaemonApi(self.socket)
+            try:
+                # The slowest request is sent first; answers still reach the right caller
+                results = await asyncio.gather(*(api.run_get_method("0:00", "double", [n]) for n in (5, 1, 3)))
+                info = await api.get_masterchain_info()
+            finally:
+                await api.close()
+            return results, info
+
+        results, info = self.with_daemon(session)
+        self.assertEqual(results, [[10], [2], [6]])
+        self.assertEqual(info["last"]["seqno"], 42)
+
+    def test_clients_only_delegate_to_a_matching_daemon(self):
+        cache = Path(self.tmp.name) / "rpc.sqlite3"
+
+        def probe():
+            env = {"TON_DAEMON_SOCKET": str(self.socket), "TON_RPC_CACHE": str(cache)}
+            with mock.patch.dict(os.environ, env):
+                return (isinstance(connect(network="testnet"), DaemonApi),
+                        daemon_serves(self.socket, "mainnet", cache),
+                        daemon_serves(self.socket, "testnet", None))
+
+        delegated, other_network, uncached = self.with_daemon(lambda: asyncio.to_thread(probe),
+                                                              network="testnet", cache_path=cache)
+        self.assertEqual((delegated, other_network, uncached), (True, False, False))
+        self.assertFalse(daemon_serves(self.socket, "testnet", cache))
+
+    def test_connect_inside_a_loop_pings_without_blocking(self):
+        cache = Path(self.tmp.name) / "rpc.sqlite3"
+        direct = SlowApi()
+
+        async def session():
+            env = {"TON_DAEMON_SOCKET": str(self.socket), "TON_RPC_CACHE": str(cache)}
+            with mock.patch.dict(os.environ, env):
+                api = connect(network="testnet")
+            matching = await api.get_masterchain_info(), api.direct
+            await api.close()
+            api = DaemonApi(self.socket, "mainnet", cache, fallback=lambda: direct)
+            info = await api.get_masterchain_info()
+            await api.close()
+            return matching, api.direct, info
+
+        (info, delegated_direct), fallback, fallback_info = self.with_daemon(session, network="testnet",
+                                                                              cache_path=cache)
+        self.assertEqual(info["last"]["seqno"], 42)
+        self.assertIsNone(delegated_direct)
+        self.assertIs(fallback, direct)
+        self.assertEqual(fallback_info["last"]["seqno"], 42)
+        self.assertEqual(direct.calls, ["getMasterchainInfo"])
+
+
+class TestDaemonApiFailures(unittest.TestCase):
+    """The async client fails calls instead of hanging when the daemon misbehaves"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.socket = str(Path(self.tmp.name) / "rpc.sock")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def run_against(self, answer, session):
+        """Serve every connection with ``answer(line, writer)`` for each request line"""
+        async def handle(reader, writer):
+            while line := await reader.readline():
+                if not await answer(line, writer):
+                    break
+            writer.close()
+
+        async def run():
+            server = await asyncio.start_unix_server(handle, self.socket)
+            async with server:
+                return await asyncio.wait_for(session(server), timeout=5)
+
+        return asyncio.run(run())
+
+    def test_closed_connection_fails_calls_and_reconnects(self):
+        async def hang_up(line, writer):
+            return False
+
+        async def session(server):
+            api = DaemonApi(self.socket)
+            with self.assertRaises(ConnectionError):
+                await api.get_masterchain_info()
+            server.close()
+            await server.wait_closed()
+            os.unlink(self.socket)
+            # Nothing listens any more: new calls fail fast rather than writing to the dead connection
+            with self.assertRaises(ConnectionError):
+                await api.get_masterchain_info()
+            await api.close()
+
+        self.run_against(hang_up, session)
+
+    def test_garbage_response_fails_pending_calls(self):
+        async def garbage(line, writer):
+            writer.write(b"{not json\n")
+            await writer.drain()
+            return True
+
+        async def session(server):
+            api = DaemonApi(self.socket)
+            results = await asyncio.gather(api.get_masterchain_info(), api.get_masterchain_info(),
+                                           return_exceptions=True)
+            await api.close()
+            return results
+
+        results = self.run_against(garbage, session)
+        self.assertTrue(all(isinstance(result, ConnectionError) for result in results))
+
+
+if __name__ == "__main__":
+    unittest.main()
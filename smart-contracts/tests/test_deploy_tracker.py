@@ -0,0 +1,206 @@
+"""
+Deployment Tracker Test Suite
+Tests the persisted deployment state machine against a chain run by the contract model
+"""
+
+import asyncio
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from typing import Dict, List
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from boc import Address, Cell, begin_cell  # noqa: E402
+from deploy_tracker import (CONFIRMED, FAILED, PLANNED, SENT, SIGNED, VERIFIED,  # noqa: E402
+                            DeploymentStore, DeploymentTracker, main)
+from emulator import ShoppingContractModel, parse_message  # noqa: E402
+from fleet import Fleet  # noqa: E402
+from messages import contract_address  # noqa: E402
+from signing import public_key  # noqa: E402
+from toncenter import TonApi, TonApiError  # noqa: E402
+
+CODE = begin_cell().store_uint(0xC0DE, 16).end_cell()
+OWNER = Address(0, bytes(range(32)))
+SECRET_KEY = b"\x44" * 32
+
+
+class FakeChain(TonApi):
+    """Accounts run by the contract model; lost or failing sends are configurable"""
+
+    def __init__(self, fail_sends: int = 0, lose: int = 0, code: Cell = None, funded: bool = True):
+        self.accounts: Dict[str, ShoppingContractModel] = {}
+        self.balance = str(10 ** 9 if funded else 0)
+        self.sent: Dict[str, List[bytes]] = {}
+        self.fail_sends = fail_sends
+        self.lose = lose
+        # Reported instead of the real code, to fake a mismatching deployment
+        self.code = code
+
+    async def call(self, method, params):
+        if method == "sendBoc":
+            if self.fail_sends:
+                self.fail_sends -= 1
+                raise TonApiError("endpoint unavailable")
+            message = Cell.from_boc(params["boc"])
+            _, init, _ = parse_message(message)
+            address = contract_address(init).to_raw()
+            self.sent.setdefault(address, []).append(message.to_boc())
+            if self.lose:
+                self.lose -= 1
+                return {}
+            account = self.accounts.setdefault(address, ShoppingContractModel())
+            account.execute(message)
+            return {}
+        account = self.accounts.get(params["address"])
+        if account is None or not account.active:
+            return {"state": "uninitialized", "balance": self.balance}
+        return {
+            "state": "active",
+            "balance": self.balance,
+            "code": (self.code or account.code).to_boc_base64(),
+            "data": account.data().to_boc_base64(),
+            "last_transaction_id": {"lt": "7", "hash": "deployhash"},
+        }
+
+
+class TrackerCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / "deployments.sqlite3"
+        self.store = DeploymentStore(self.path)
+        self.fleet = Fleet(CODE, OWNER, 4, public_key(SECRET_KEY))
+
+    def tearDown(self):
+        self.store.close()
+        self.tmp.cleanup()
+
+    def plan(self, count: int = 4):
+        return [self.store.plan(f"shard-{i}", self.fleet.instances[i].init) for i in range(count)]
+
+    def tracker(self, chain: TonApi, **kwargs) -> DeploymentTracker:
+        return DeploymentTracker(chain, self.store, SECRET_KEY, poll_interval=0.01, **kwargs)
+
+
+class TestTracker(TrackerCase):
+    """Transitions, restarts and failures"""
+
+    def test_run_verifies_every_deployment(self):
+        self.plan()
+        chain = FakeChain()
+        counts = asyncio.run(self.tracker(chain).run())
+        self.assertEqual(counts[VERIFIED], 4)
+        self.assertEqual(sorted(chain.sent), sorted(self.fleet.addresses))
+        self.assertTrue(all(len(messages) == 1 for messages in chain.sent.values()))
+        done = self.store.get("shard-2")
+        self.assertEqual((done.transaction_lt, done.transaction_hash), (7, "deployhash"))
+
+    def test_restart_resumes_where_it_stopped(self):
+        first, second, _ = self.plan(3)
+        chain = FakeChain()
+        tracker = self.tracker(chain)
+        for _ in range(2):
+            asyncio.run(tracker.step(first))
+        asyncio.run(tracker.step(second))
+        self.assertEqual((first.state, second.state), (SENT, SIGNED))
+        sealed = second.message
+        # Crash: only what the store holds survives
+        self.store.close()
+        self.store = DeploymentStore(self.path)
+        self.assertEqual([d.state for d in self.store.all()], [SENT, SIGNED, PLANNED])
+        self.assertEqual(self.store.get("shard-1").address, self.fleet.addresses[1])
+
+        self.assertEqual(asyncio.run(self.tracker(chain).run())[VERIFIED], 3)
+        self.assertEqual(len(chain.sent[self.fleet.addresses[0]]), 1)
+        self.assertEqual(chain.sent[self.fleet.addresses[1]], [sealed])
+
+    def test_expired_message_is_sealed_again(self):
+        deployment, = self.plan(1)
+        chain = FakeChain(lose=1)
+        tracker = self.tracker(chain)
+        for _ in range(3):
+            asyncio.run(tracker.step(deployment))
+        self.assertEqual(deployment.state, SENT)
+        deployment.valid_until = int(time.time()) - 10
+        asyncio.run(tracker.step(deployment))
+        self.assertEqual(deployment.state, PLANNED)
+        self.assertIn("expired", deployment.error)
+
+        asyncio.run(tracker.run())
+        deployment = self.store.get("shard-0")
+        self.assertEqual((deployment.state, deployment.attempts), (VERIFIED, 2))
+        messages = chain.sent[deployment.address]
+        self.assertEqual(len(set(messages)), 2)
+
+    def test_failures_are_recorded_and_retryable(self):
+        self.plan(2)
+        counts = asyncio.run(self.tracker(FakeChain(fail_sends=10), max_attempts=2).run())
+        self.assertEqual(counts[FAILED], 2)
+        self.assertIn("endpoint unavailable", self.store.get("shard-0").error)
+        self.assertEqual(self.store.retry_failed(), 2)
+
+        wrong = begin_cell().store_uint(0xBAD, 16).end_cell()
+        counts = asyncio.run(self.tracker(FakeChain(code=wrong)).run())
+        self.assertEqual(counts[FAILED], 2)
+        self.assertIn("code", self.store.get("shard-1").error)
+
+    def test_foreign_key_cannot_deploy(self):
+        self.plan(1)
+        chain = FakeChain()
+        tracker = DeploymentTracker(chain, self.store, b"\x45" * 32, ttl=1, max_attempts=1, poll_interval=0.01)
+        self.assertEqual(asyncio.run(tracker.run())[FAILED], 1)
+        # The contract rejected the message before accepting it, so the address stayed empty
+        self.assertEqual(len(chain.sent[self.fleet.addresses[0]]), 1)
+        self.assertFalse(chain.accounts[self.fleet.addresses[0]].active)
+
+    def test_unfunded_addresses_fail_before_sending(self):
+        self.plan(2)
+        chain = FakeChain(funded=False)
+        counts = asyncio.run(self.tracker(chain).run())
+        self.assertEqual(counts[FAILED], 2)
+        self.assertEqual(chain.sent, {})
+        failed = self.store.get("shard-0")
+        self.assertEqual(failed.attempts, 0)
+        self.assertIn("fund it", failed.error)
+
+        self.store.retry_failed()
+        chain.balance = str(10 ** 9)
+        self.assertEqual(asyncio.run(self.tracker(chain).run())[VERIFIED], 2)
+
+    def test_confirmed_state_only_needs_verification(self):
+        deployment, = self.plan(1)
+        chain = FakeChain()
+        tracker = self.tracker(chain)
+        while deployment.state != CONFIRMED:
+            asyncio.run(tracker.step(deployment))
+        asyncio.run(tracker.run())
+        self.assertEqual(self.store.get("shard-0").state, VERIFIED)
+        self.assertEqual(len(chain.sent[deployment.address]), 1)
+
+
+class TestCli(TrackerCase):
+    """Planning from the command line"""
+
+    def test_planning_twice_keeps_the_stored_rows(self):
+        code_path = Path(self.tmp.name) / "code.boc"
+        code_path.write_bytes(CODE.to_boc())
+        argv = [str(self.path), "--code", str(code_path), "--owner", OWNER.to_raw(), "--size", "3",
+                "--secret-key", SECRET_KEY.hex(), "--status"]
+        # A test key, so the pure-Python signer is fine where PyNaCl is missing
+        with contextlib.redirect_stdout(io.StringIO()), mock.patch.dict(os.environ, {"TON_INSECURE_SIGNING": "1"}):
+            asyncio.run(main(argv))
+            first = [d.to_dict() for d in self.store.all()]
+            counts = asyncio.run(main(argv))
+        self.assertEqual(counts[PLANNED], 3)
+        self.assertEqual([d.to_dict() for d in self.store.all()], first)
+        self.assertEqual([d.address for d in self.store.all()], self.fleet.addresses[:3])
+
+
+if __name__ == "__main__":
+    unittest.main()
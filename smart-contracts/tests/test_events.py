@@ -0,0 +1,163 @@
+"""
+Contract Event Test Suite
+Tests log message encoding, emulator emission and the backpressured event stream
+"""
+
+import asyncio
+import base64
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from boc import Address  # noqa: E402
+from events import (EventStream, decode_event, event_from_message, events_from_transaction,  # noqa: E402
+                    order_paid_event, withdrawal_event)
+from fees import PRICING_KEY, FeeEstimator, pricing_contract  # noqa: E402
+from messages import external_message, internal_message, log_message  # noqa: E402
+from orders import build_create_order_body  # noqa: E402
+from payments import build_payment_payload  # noqa: E402
+from submitter import make_query_id  # noqa: E402
+from toncenter import TonApi  # noqa: E402
+
+PAYER = Address(0, b"\x11" * 32)
+
+
+def make_transaction(lt, *events):
+    return {
+        "transaction_id": {"lt": str(lt), "hash": f"h{lt}"},
+        "utime": 1_700_000_000 + lt,
+        "out_msgs": [{"destination": "", "msg_data": {
+            "@type": "msg.dataRaw", "body": base64.b64encode(event.end_cell().to_boc()).decode()}}
+            for event in events],
+    }
+
+
+class GrowingChainApi(TonApi):
+    """Serves getTransactions newest-first from a list that tests append to"""
+
+    def __init__(self):
+        self.transactions = []
+        self.polls = 0
+
+    async def call(self, method, params):
+        self.polls += 1
+        newest_first = self.transactions[::-1]
+        start = 0
+        if "lt" in params:
+            start = next(i for i, tx in enumerate(newest_first) if tx["transaction_id"]["lt"] == params["lt"])
+        return newest_first[start:start + params["limit"]]
+
+
+class TestEventCodec(unittest.TestCase):
+    """Event bodies and the messages carrying them"""
+
+    def test_round_trip(self):
+        paid = decode_event(order_paid_event(7, 99, 10 ** 9, PAYER).end_cell())
+        self.assertEqual(paid, {"event": "order_paid", "order_id": 7, "query_id": 99, "amount": 10 ** 9,
+                                "payer": PAYER.to_raw()})
+        message = log_message(withdrawal_event(5, PAYER))
+        self.assertEqual(event_from_message(message)["destination"], PAYER.to_raw())
+        self.assertIsNone(decode_event(build_payment_payload(1, 1)))
+
+    def test_transaction_events(self):
+        tx = make_transaction(12, order_paid_event(1, 0, 5, None), order_paid_event(2, 0, 6, None))
+        tx["out_msgs"].append({"destination": "EQ_other", "msg_data": tx["out_msgs"][0]["msg_data"]})
+        events = events_from_transaction(tx)
+        self.assertEqual([e["order_id"] for e in events], [1, 2])
+        self.assertEqual(events[0]["lt"], 12)
+
+    def test_emulator_emits_events(self):
+        now = 1_700_000_000
+        contract = pricing_contract(now=now)
+        query_id = make_query_id(now=now)
+        body = build_create_order_body("Mug", "cd" * 32, 10 ** 9, query_id, PRICING_KEY)
+        created = contract.execute(external_message(PAYER, body))
+        self.assertEqual(event_from_message(created.out_messages[0]),
+                         {"event": "order_created", "order_id": 1, "query_id": query_id, "image_hash": "cd" * 32})
+        paid = contract.execute(internal_message(PAYER, 2 * 10 ** 9, build_payment_payload(1, 10 ** 9, 5)))
+        event = event_from_message(paid.out_messages[0])
+        self.assertEqual((event["query_id"], event["amount"]), (5, 2 * 10 ** 9))
+        rejected = contract.execute(internal_message(PAYER, 10 ** 9, build_payment_payload(1, 10 ** 9)))
+        self.assertEqual(rejected.out_messages, [])
+
+    def test_log_forward_fees_are_priced(self):
+        contract = pricing_contract()
+        self.assertGreater(FeeEstimator().create_order(contract, "Mug", "cd" * 32, 10 ** 9).forward, 0)
+
+
+class TestEventStream(unittest.TestCase):
+    """Delivery order, resumption and backpressure"""
+
+    def test_delivers_new_events_in_order_with_backpressure(self):
+        api = GrowingChainApi()
+        api.transactions.append(make_transaction(1, order_paid_event(1, 0, 1, None)))
+        seen = []
+
+        async def run():
+            async def slow_handler(event):
+                seen.append(event["order_id"])
+                # The queue holds at most two events while the handler is busy
+                self.assertLessEqual(stream.queue.qsize(), 2)
+                await asyncio.sleep(0.01)
+                if len(seen) == 10:
+                    stream.stop()
+
+            stream = EventStream(api, "0:00", slow_handler, max_pending=2, poll_interval=0.01)
+            task = asyncio.create_task(stream.run())
+            await asyncio.sleep(0.05)
+            for lt in range(2, 7):
+                api.transactions.append(make_transaction(lt, order_paid_event(2 * lt, 0, 1, None),
+                                                         order_paid_event(2 * lt + 1, 0, 1, None)))
+            await asyncio.wait_for(task, 2.0)
+            return stream
+
+        stream = asyncio.run(run())
+        # The transaction present before the stream started is not replayed
+        self.assertEqual(seen, list(range(4, 14)))
+        self.assertEqual(stream.last_lt, 6)
+        self.assertEqual(stream.delivered, 10)
+
+    def test_resumes_from_lt(self):
+        api = GrowingChainApi()
+        api.transactions.extend(make_transaction(lt, order_paid_event(lt, 0, 1, None)) for lt in range(1, 6))
+        seen = []
+
+        async def run():
+            async def handler(event):
+                seen.append(event["order_id"])
+
+            stream = EventStream(api, "0:00", handler, from_lt=3)
+            await stream.poll_once()
+            stream.stop()
+            await stream.run()
+
+        asyncio.run(run())
+        self.assertEqual(seen, [4, 5])
+
+    def test_history_is_replayed_a_page_at_a_time(self):
+        api = GrowingChainApi()
+        api.transactions.extend(make_transaction(lt, order_paid_event(lt, 0, 1, None)) for lt in range(1, 48))
+        seen = []
+
+        async def run():
+            async def handler(event):
+                seen.append(event["order_id"])
+                if len(seen) == 3:
+                    # Arrives mid-replay and is picked up by the next poll
+                    api.transactions.append(make_transaction(48, order_paid_event(48, 0, 1, None)))
+                if len(seen) == 48:
+                    stream.stop()
+
+            stream = EventStream(api, "0:00", handler, max_pending=1, poll_interval=0.01, from_lt=0, page_size=10)
+            await asyncio.wait_for(stream.run(), 2.0)
+
+        asyncio.run(run())
+        self.assertEqual(seen, list(range(1, 49)))
+        # Six anchors on the way down and six pages on the way up, then two polls for the newcomer
+        self.assertLessEqual(api.polls, 16)
+
+
+if __name__ == "__main__":
+    unittest.main()
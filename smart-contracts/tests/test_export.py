@@ -0,0 +1,100 @@
+"""
+Columnar Export Test Suite
+Tests order and payment sources and chunked Parquet / Arrow IPC output
+"""
+
+import asyncio
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from boc import Address, begin_cell, build_dict, text_cell  # noqa: E402
+from cassette import use_cassette  # noqa: E402
+from export import ColumnarWriter, export_rows, order_schema, pa  # noqa: E402
+from orders import orders_from_storage  # noqa: E402
+from local_chain import LocalChain  # noqa: E402
+from messages import internal_message  # noqa: E402
+from payments import build_payment_payload, iter_transactions  # noqa: E402
+from seed import SeedProfile, seed_model  # noqa: E402
+from storage import ContractStorage  # noqa: E402
+
+SHOP = Address(0, bytes(32))
+PAYER = Address(0, b"\x01" * 32)
+
+
+def make_storage(count):
+    details = ["T-Shirt (Size: M)", "Hoodie (Size: L)"]
+    return ContractStorage(
+        last_order_id=count,
+        product_details=build_dict({i: text_cell(details[i % 2]) for i in range(1, count + 1)}, 32),
+        product_images=build_dict({i: begin_cell().store_uint(i, 256) for i in range(1, count + 1)}, 32),
+        paid_status=build_dict({i: begin_cell().store_uint(i % 3 == 0, 32).store_coins(i * 10 ** 8)
+                                for i in range(1, count + 1)}, 32),
+    )
+
+
+def payments_chain() -> LocalChain:
+    """Live source the transaction cassette was recorded from: 25 accepted payments"""
+    chain = LocalChain()
+    chain.add_account(SHOP, seed_model(SeedProfile(orders=25, paid_ratio=0.0, seed=3)))
+    for order_id in range(1, 26):
+        chain.process(internal_message(SHOP, 10 ** 9, build_payment_payload(order_id, 10 ** 9, order_id),
+                                       source=PAYER))
+    return chain
+
+
+class TestExportSources(unittest.TestCase):
+    """Row sources feeding the exporter"""
+
+    def test_orders_from_storage(self):
+        orders = list(orders_from_storage(make_storage(6)))
+        self.assertEqual([o["order_id"] for o in orders], [1, 2, 3, 4, 5, 6])
+        self.assertEqual(orders[2]["paid"], True)
+        self.assertEqual(orders[1]["product_details"], "T-Shirt (Size: M)")
+        self.assertEqual(orders[0]["image_hash"], f"{1:064x}")
+        self.assertEqual(orders[3]["price"], 4 * 10 ** 8)
+
+    def test_transaction_pages_do_not_repeat(self):
+        api = use_cassette("transactions_pages", source=payments_chain)
+
+        async def collect(page_size):
+            return [tx async for tx in iter_transactions(api, SHOP.to_raw(), page_size=page_size)]
+
+        try:
+            pages = {page_size: asyncio.run(collect(page_size)) for page_size in (10, 1)}
+        finally:
+            asyncio.run(api.close())
+        self.assertEqual(pages[1], pages[10])
+        lts = [int(tx["transaction_id"]["lt"]) for tx in pages[10]]
+        self.assertEqual(len(lts), 25)
+        self.assertEqual(lts, sorted(set(lts), reverse=True))
+        self.assertEqual(api.cassette.unplayed, 0)
+
+
+@unittest.skipUnless(pa is not None, "pyarrow is not installed")
+class TestColumnarWriter(unittest.TestCase):
+    """Chunked columnar output"""
+
+    def test_parquet_and_arrow_round_trip(self):
+        import pyarrow.parquet as pq
+
+        with tempfile.TemporaryDirectory() as tmp:
+            for fmt in ("parquet", "arrow"):
+                path = str(Path(tmp) / f"orders.{fmt}")
+                with ColumnarWriter(path, order_schema(), fmt, chunk_size=4) as writer:
+                    count = asyncio.run(export_rows(orders_from_storage(make_storage(10)), writer))
+                self.assertEqual(count, 10)
+                if fmt == "parquet":
+                    table = pq.read_table(path)
+                else:
+                    with pa.OSFile(path, "rb") as source:
+                        table = pa.ipc.open_stream(source).read_all()
+                self.assertEqual(table.column("order_id").to_pylist(), list(range(1, 11)))
+                self.assertEqual(table.num_rows, 10)
+
+
+if __name__ == "__main__":
+    unittest.main()
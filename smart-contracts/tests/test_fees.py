@@ -0,0 +1,147 @@
+"""
+Fee Estimator Test Suite
+Tests incremental dictionary updates, the contract emulator and fee computation
+"""
+
+import random
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from boc import Address, Cell, begin_cell, build_dict, dict_delete, dict_get, dict_set, text_cell  # noqa: E402
+from emulator import (ERROR_ALREADY_PAID, ERROR_BAD_SIGNATURE, ERROR_INSUFFICIENT_PAYMENT,  # noqa: E402
+                      ERROR_REPLAYED_QUERY)
+from fees import (PRICING_KEY, FeeConfig, FeeEstimator, GasPrices, MsgForwardPrices, forward_fee,  # noqa: E402
+                  gas_fee, pricing_contract, storage_fee, StoragePrices)
+from highload import HighloadBatchSender, Transfer  # noqa: E402
+from messages import external_message  # noqa: E402
+from orders import build_create_order_body  # noqa: E402
+from storage import ContractStorage  # noqa: E402
+from submitter import make_query_id  # noqa: E402
+
+OWNER = Address(0, b"\x22" * 32)
+IMAGE_HASH = "ab" * 32
+
+
+class TestDictUpdates(unittest.TestCase):
+    """dict_set / dict_delete must match a dictionary built from scratch"""
+
+    def test_matches_build_dict(self):
+        rng = random.Random(7)
+        for key_bits in (8, 32, 64):
+            items, root = {}, None
+            for _ in range(200):
+                key = rng.getrandbits(key_bits)
+                value = begin_cell().store_uint(rng.getrandbits(16), 16)
+                items[key] = value
+                root = dict_set(root, key_bits, key, value)
+            self.assertEqual(root.hash, build_dict(items, key_bits).hash)
+            for key in list(items)[::2]:
+                del items[key]
+                root = dict_delete(root, key_bits, key)
+            self.assertEqual(root.hash, build_dict(items, key_bits).hash)
+
+    def test_delete_missing_and_last(self):
+        root = dict_set(None, 32, 5, begin_cell().store_uint(1, 8))
+        self.assertIs(dict_delete(root, 32, 6), root)
+        self.assertIsNone(dict_delete(root, 32, 5))
+        self.assertEqual(dict_get(root, 32, 5).load_uint(8), 1)
+
+
+class TestContractModel(unittest.TestCase):
+    """Contract semantics reproduced by the emulator"""
+
+    def setUp(self):
+        self.now = 1_700_000_000
+        self.contract = pricing_contract(now=self.now)
+
+    def create_order(self, query_id=None, secret_key=PRICING_KEY):
+        query_id = query_id or make_query_id(now=self.now)
+        body = build_create_order_body("T-Shirt (Size: M)", IMAGE_HASH, 10 ** 9, query_id, secret_key)
+        return self.contract.execute(external_message(OWNER, body))
+
+    def test_foreign_signature_is_not_accepted(self):
+        forged = self.create_order(secret_key=b"\x01" * 32)
+        self.assertEqual(forged.exit_code, ERROR_BAD_SIGNATURE)
+        self.assertFalse(forged.accepted)
+        self.assertEqual(self.contract.storage.last_order_id, 0)
+        self.assertIsNone(self.contract.storage.processed_queries)
+
+    def test_create_order_and_replay(self):
+        query_id = make_query_id(now=self.now)
+        first = self.create_order(query_id)
+        self.assertTrue(first.success)
+        self.assertEqual(self.contract.storage.last_order_id, 1)
+        replay = self.create_order(query_id)
+        self.assertEqual(replay.exit_code, ERROR_REPLAYED_QUERY)
+        self.assertFalse(replay.accepted)
+        self.assertEqual(self.contract.storage.last_order_id, 1)
+
+    def test_double_payment_is_rejected(self):
+        self.create_order()
+        estimator = FeeEstimator()
+        self.assertTrue(estimator.payment(self.contract, 1, 10 ** 9).success)
+        self.assertEqual(dict_get(self.contract.storage.paid_status, 32, 1).load_uint(32), 1)
+        self.assertEqual(estimator.payment(self.contract, 1, 10 ** 9).exit_code, ERROR_ALREADY_PAID)
+
+    def test_payment_is_checked_against_the_stored_price(self):
+        self.create_order()
+        estimator = FeeEstimator()
+        # Declaring a lower amount does not lower the price
+        self.assertEqual(estimator.payment(self.contract, 1, 10 ** 8).exit_code, ERROR_INSUFFICIENT_PAYMENT)
+        self.assertEqual(estimator.payment(self.contract, 1, 10 ** 9, value=10 ** 9 - 1).exit_code,
+                         ERROR_INSUFFICIENT_PAYMENT)
+        self.assertTrue(estimator.payment(self.contract, 1, 1, value=10 ** 9).success)
+
+    def test_payment_gas_ignores_product_data(self):
+        small = pricing_contract(now=self.now)
+        self.contract = small
+        self.create_order()
+        large = pricing_contract(now=self.now)
+        large.storage = ContractStorage.decode(small.storage.encode())
+        large.storage.product_details = build_dict({i: text_cell("x" * 500) for i in range(1, 5000)}, 32)
+        estimator = FeeEstimator()
+        self.assertEqual(estimator.payment(small, 1, 10 ** 9).gas_used, estimator.payment(large, 1, 10 ** 9).gas_used)
+
+    def test_deploy_activates_account(self):
+        estimate = FeeEstimator().deploy(Cell(), OWNER, shard_index=3)
+        self.assertTrue(estimate.success)
+        self.assertGreater(estimate.import_fee, 0)
+
+
+class TestFees(unittest.TestCase):
+    """Config-param fee formulas and the batch size choice"""
+
+    def test_formulas(self):
+        self.assertEqual(gas_fee(GasPrices(), 50), 40_000)
+        self.assertEqual(gas_fee(GasPrices(), 1100), 40_000 + 1000 * 400)
+        self.assertEqual(storage_fee(StoragePrices(), 1 << 16, 0, 86400), 86400)
+        self.assertEqual(storage_fee(StoragePrices(), 0, 1, 1), 1)
+        body = begin_cell().store_uint(0, 1023).end_cell()
+        message = begin_cell().store_ref(body).end_cell()
+        prices = MsgForwardPrices()
+        self.assertEqual(forward_fee(prices, message), 400_000 + (1023 * 26_214_400 + 2_621_440_000 >> 16))
+
+    def test_orders_get_pricier_as_dictionaries_grow(self):
+        contract = pricing_contract()
+        estimates = FeeEstimator().create_orders(contract, [(f"Product {i}", IMAGE_HASH, 10 ** 9) for i in range(64)])
+        self.assertTrue(all(estimate.success for estimate in estimates))
+        self.assertGreater(estimates[-1].gas_used, estimates[0].gas_used)
+
+    def test_cheapest_batch_size_respects_message_limit(self):
+        sender = HighloadBatchSender(None, OWNER, bytes(32))
+        transfers = [Transfer(Address(0, bytes([i]) * 32), 10 ** 8) for i in range(100)]
+        self.assertEqual(FeeEstimator().cheapest_batch_size(sender, transfers), 100)
+
+        # Each transfer adds 3 cells to the external message (dict fork, action, message)
+        tight = FeeEstimator(FeeConfig(max_msg_cells=120))
+        size = tight.cheapest_batch_size(sender, transfers)
+        self.assertLess(size, 100)
+        self.assertTrue(tight.withdraw(sender, transfers, size).success)
+        self.assertFalse(tight.withdraw(sender, transfers, 100).success)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+"""
+Contract Fleet Test Suite
+Tests deterministic instance addresses, key routing and parallel fleet reads
+"""
+
+import asyncio
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from boc import Address, begin_cell  # noqa: E402
+from fleet import ConsistentHashRing, Fleet, fetch_fleet_snapshots  # noqa: E402
+from storage import ContractStorage  # noqa: E402
+from toncenter import TonApi  # noqa: E402
+
+CODE = begin_cell().store_uint(0xC0DE, 16).end_cell()
+OWNER = Address(0, bytes(range(32)))
+OWNER_KEY = b"\x33" * 32
+
+
+class FakeStateApi(TonApi):
+    """Answers getAddressInformation with an empty contract state"""
+
+    def __init__(self):
+        self.addresses = []
+
+    async def call(self, method, params):
+        self.addresses.append(params["address"])
+        data = ContractStorage(owner=OWNER).encode().to_boc_base64()
+        return {"state": "active", "data": data, "last_transaction_id": {"lt": "5"}}
+
+
+class TestFleet(unittest.TestCase):
+    """Fleet addressing and routing"""
+
+    def test_addresses_are_deterministic_and_distinct(self):
+        fleet = Fleet(CODE, OWNER, 8, OWNER_KEY)
+        again = Fleet(CODE, OWNER, 8, OWNER_KEY)
+        self.assertEqual(fleet.addresses, again.addresses)
+        self.assertEqual(len(set(fleet.addresses)), 8)
+        init = fleet.instances[3].init.begin_parse()
+        init.skip_bits(2)
+        init.load_maybe_ref()
+        storage = ContractStorage.decode(init.load_maybe_ref())
+        self.assertEqual((storage.shard_index, storage.owner_key), (3, OWNER_KEY))
+        # The key is part of the StateInit, so another owner key is another fleet
+        self.assertNotEqual(Fleet(CODE, OWNER, 8, bytes(32)).addresses[0], fleet.addresses[0])
+
+    def test_routing_is_stable(self):
+        fleet = Fleet(CODE, OWNER, 4, OWNER_KEY)
+        self.assertEqual(fleet.route("merchant-1").index, fleet.route("merchant-1").index)
+        used = {fleet.route(f"user-{i}").index for i in range(200)}
+        self.assertEqual(used, {0, 1, 2, 3})
+
+    def test_resizing_moves_few_keys(self):
+        small, large = ConsistentHashRing(list(range(8))), ConsistentHashRing(list(range(9)))
+        keys = [f"user-{i}" for i in range(2000)]
+        moved = sum(small.lookup(key) != large.lookup(key) for key in keys)
+        self.assertLess(moved, len(keys) * 0.25)
+
+    def test_parallel_snapshots(self):
+        fleet = Fleet(CODE, OWNER, 5, OWNER_KEY)
+        api = FakeStateApi()
+        snapshots = asyncio.run(fetch_fleet_snapshots(api, fleet, concurrency=2))
+        self.assertEqual(sorted(snapshots), [0, 1, 2, 3, 4])
+        self.assertEqual(sorted(api.addresses), sorted(fleet.addresses))
+        self.assertEqual(snapshots[0].lt, 5)
+
+
+if __name__ == "__main__":
+    unittest.main()
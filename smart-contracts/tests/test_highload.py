@@ -0,0 +1,177 @@
+"""
+Highload Batch Sender Test Suite
+Tests Ed25519 signing, batch packing and per-transfer confirmation tracking
+"""
+
+import asyncio
+import base64
+import os
+import sys
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from boc import Address, Cell, iter_dict  # noqa: E402
+from highload import (CONFIRMED, EXPIRED, FAILED, MAX_MESSAGES_PER_BATCH, HighloadBatchSender,  # noqa: E402
+                      Transfer, refund_transfer)
+import signing  # noqa: E402
+from signing import InsecureSigningError, public_key, require_constant_time, sign, sign_many, verify  # noqa: E402
+from toncenter import TonApi  # noqa: E402
+
+# RFC 8032 test vector 1
+SEED = bytes.fromhex("9d61b19deffd5a60ba844af492ec2cc44449c5697b326919703bac031cae7f60")
+PUBLIC = bytes.fromhex("d75a980182b10ab7d54bfed3c964073a0ee172f3daa62325af021a68f707511a")
+SIGNATURE = bytes.fromhex(
+    "e5564300c360ac729086e2cc806e828a84877f1eb8e5d974d873e065224901555fb8821590a33bacc61e39701cf9b46bd25bf5f0595bbe24655141438e7a100b")
+
+WALLET = Address(0, b"\x11" * 32)
+
+
+class FakeWalletApi(TonApi):
+    """Records sent BoCs and replays them as processed wallet transactions, newest first
+
+    ``noise`` unrelated inbound transfers land after each processed batch, as on a busy wallet.
+    """
+
+    def __init__(self, drop_index=None, noise=0, lose=False):
+        self.history = []
+        self.sent = []
+        self.drop_index = drop_index
+        self.noise = noise
+        self.lose = lose
+
+    def _processed(self, boc):
+        body = Cell.from_boc(boc).refs[0]
+        payload = body.begin_parse()
+        payload.skip_bits(512 + 32 + 64)
+        out_msgs = []
+        for i, action in iter_dict(payload.load_dict(), 16):
+            if i == self.drop_index:
+                continue
+            msg = action.load_ref().begin_parse()
+            msg.skip_bits(4)
+            msg.load_address()
+            dest = msg.load_address()
+            out_msgs.append({"destination": dest.to_friendly(), "value": str(msg.load_coins())})
+        return {"in_msg": {"source": "", "msg_data": {"@type": "msg.dataRaw",
+                                                      "body": base64.b64encode(body.to_boc()).decode()}},
+                "out_msgs": out_msgs}
+
+    def _append(self, tx):
+        n = len(self.history)
+        tx.update({"transaction_id": {"lt": str(n), "hash": f"tx{n}"}, "utime": int(time.time())})
+        self.history.append(tx)
+
+    async def call(self, method, params):
+        if method == "sendBoc":
+            self.sent.append(params["boc"])
+            if not self.lose:
+                self._append(self._processed(params["boc"]))
+            for _ in range(self.noise):
+                self._append({"in_msg": {"source": "EQtopup", "value": "1"}, "out_msgs": []})
+            return {}
+        newest_first = self.history[::-1]
+        start = 0
+        if "lt" in params:
+            start = next(i for i, tx in enumerate(newest_first) if tx["transaction_id"]["lt"] == params["lt"])
+        return newest_first[start:start + params["limit"]]
+
+
+class TestSigning(unittest.TestCase):
+    """Ed25519 against the RFC 8032 vector"""
+
+    def test_rfc8032_vector(self):
+        self.assertEqual(public_key(SEED), PUBLIC)
+        self.assertEqual(sign(SEED, b""), SIGNATURE)
+        self.assertTrue(verify(PUBLIC, b"", SIGNATURE))
+        self.assertFalse(verify(PUBLIC, b"x", SIGNATURE))
+
+    def test_sign_many_matches_sequential_order(self):
+        messages = [bytes([i]) * (i % 7) for i in range(24)]
+        expected = [sign(SEED, message) for message in messages]
+        self.assertEqual(sign_many(SEED, messages), expected)
+        # Force the shared-memory process pool even for this small batch
+        self.assertEqual(sign_many(SEED, messages, processes=2, min_parallel=1), expected)
+
+    def test_fallback_is_refused_for_real_keys(self):
+        with mock.patch.object(signing, "nacl", None):
+            with mock.patch.dict(os.environ, {"TON_INSECURE_SIGNING": ""}):
+                with self.assertRaises(InsecureSigningError):
+                    require_constant_time()
+            with mock.patch.dict(os.environ, {"TON_INSECURE_SIGNING": "1"}):
+                require_constant_time()
+            with self.assertWarns(RuntimeWarning):
+                self.assertEqual(sign(SEED, b""), SIGNATURE)
+
+
+class TestHighloadBatchSender(unittest.TestCase):
+    """Batch packing and confirmation tracking"""
+
+    def make_transfers(self, count):
+        return [refund_transfer(i, Address(0, i.to_bytes(32, "big")), 1_000 + i) for i in range(count)]
+
+    def test_plan_respects_protocol_maximum(self):
+        sender = HighloadBatchSender(FakeWalletApi(), WALLET, SEED)
+        batches = sender.plan(self.make_transfers(600))
+        self.assertEqual([len(b.transfers) for b in batches], [MAX_MESSAGES_PER_BATCH, MAX_MESSAGES_PER_BATCH, 92])
+        self.assertEqual(len({b.query_id for b in batches}), 3)
+
+    def test_signature_covers_payload(self):
+        sender = HighloadBatchSender(FakeWalletApi(), WALLET, SEED)
+        batch = sender.plan(self.make_transfers(3))[0]
+        message = sender.sign_batch(batch)
+        body = message.refs[0].begin_parse()
+        signature = body.load_bytes(64)
+        self.assertTrue(verify(PUBLIC, sender.signing_payload(batch).hash, signature))
+
+    def test_each_transfer_is_tracked(self):
+        api = FakeWalletApi(drop_index=1)
+        sender = HighloadBatchSender(api, WALLET, SEED, batch_size=4)
+        transfers = self.make_transfers(6)
+
+        async def run():
+            batches = await sender.send(transfers)
+            return await sender.wait_for_confirmations(batches, poll_interval=0)
+
+        batches = asyncio.run(run())
+        self.assertEqual(len(api.sent), 2)
+        self.assertTrue(all(b.status == CONFIRMED for b in batches))
+        self.assertEqual([t.status for t in transfers],
+                         [CONFIRMED, FAILED, CONFIRMED, CONFIRMED, CONFIRMED, FAILED])
+        self.assertEqual(transfers[4].transaction_hash, "tx1")
+
+    def test_batch_buried_under_newer_transactions_is_not_expired(self):
+        api = FakeWalletApi(noise=250)
+        # Already past valid_until, so the first poll decides between confirmed and expired
+        sender = HighloadBatchSender(api, WALLET, SEED, ttl=-10)
+        transfers = self.make_transfers(3)
+
+        async def run():
+            return await sender.wait_for_confirmations(await sender.send(transfers), poll_interval=0)
+
+        batch, = asyncio.run(run())
+        self.assertEqual(batch.status, CONFIRMED)
+        self.assertEqual(batch.transaction_hash, "tx0")
+        self.assertEqual({t.status for t in transfers}, {CONFIRMED})
+
+    def test_lost_batch_expires(self):
+        sender = HighloadBatchSender(FakeWalletApi(noise=30, lose=True), WALLET, SEED, ttl=-10)
+        transfers = self.make_transfers(2)
+
+        async def run():
+            return await sender.wait_for_confirmations(await sender.send(transfers), poll_interval=0)
+
+        batch, = asyncio.run(run())
+        self.assertEqual(batch.status, EXPIRED)
+        self.assertEqual({t.status for t in transfers}, {EXPIRED})
+
+    def test_plain_transfer(self):
+        transfer = Transfer(WALLET.to_raw(), 5)
+        self.assertEqual(transfer.destination, WALLET)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,109 @@
+"""
+Metrics Test Suite
+Tests the Prometheus text rendering, the local exporter and the instrumented RPC and cache paths
+"""
+
+import asyncio
+import sys
+import tempfile
+import unittest
+import urllib.request
+from pathlib import Path
+from typing import Any, Dict
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from metrics import (CACHE_REQUESTS, MESSAGES_SENT, QUEUE_DEPTH, REGISTRY, Registry,  # noqa: E402
+                     serve, watch_queues)
+from rpc_cache import CachedApi, DiskCache  # noqa: E402
+from toncenter import TonApi  # noqa: E402
+
+
+class EchoApi(TonApi):
+    async def call(self, method: str, params: Dict[str, Any]) -> Any:
+        return {"method": method}
+
+
+class TestRendering(unittest.TestCase):
+    """Exposition format of each metric type"""
+
+    def test_counter_and_gauge(self):
+        registry = Registry()
+        calls = registry.counter("calls_total", "Calls", ("method",))
+        depth = registry.gauge("depth", "Depth")
+        calls.inc(method="getTransactions")
+        calls.inc(2, method="say \"hi\"")
+        depth.set(3)
+        text = registry.render()
+        self.assertIn("# TYPE calls_total counter", text)
+        self.assertIn('calls_total{method="getTransactions"} 1', text)
+        self.assertIn('calls_total{method="say \\"hi\\""} 2', text)
+        self.assertIn("depth 3", text)
+        with self.assertRaises(ValueError):
+            calls.inc(-1, method="x")
+        with self.assertRaises(ValueError):
+            calls.inc(wrong="label")
+
+    def test_histogram_buckets_are_cumulative(self):
+        registry = Registry()
+        latency = registry.histogram("latency_seconds", "Latency", ("kind",), buckets=(0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 3.0):
+            latency.observe(value, kind="deploy")
+        text = registry.render()
+        self.assertIn('latency_seconds_bucket{kind="deploy",le="0.1"} 2', text)
+        self.assertIn('latency_seconds_bucket{kind="deploy",le="1"} 3', text)
+        self.assertIn('latency_seconds_bucket{kind="deploy",le="+Inf"} 4', text)
+        self.assertIn('latency_seconds_count{kind="deploy"} 4', text)
+        self.assertIn('latency_seconds_sum{kind="deploy"} 3.65', text)
+
+    def test_duplicate_names_are_rejected(self):
+        registry = Registry()
+        registry.counter("x_total", "X")
+        with self.assertRaises(ValueError):
+            registry.gauge("x_total", "X again")
+
+
+class TestInstrumentation(unittest.TestCase):
+    """Counters fed by the tooling and the HTTP endpoint"""
+
+    def test_cache_results_and_sent_messages(self):
+        hits, misses = CACHE_REQUESTS.value(result="hit"), CACHE_REQUESTS.value(result="miss")
+        sent = MESSAGES_SENT.value(transport="jsonrpc")
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = DiskCache(Path(tmp) / "rpc.sqlite3")
+            api = CachedApi(EchoApi(), cache)
+            for _ in range(3):
+                asyncio.run(api.call("getBlockHeader", {"seqno": 1}))
+            asyncio.run(api.send_boc(b"\x00"))
+            cache.close()
+        self.assertEqual(CACHE_REQUESTS.value(result="hit"), hits + 2)
+        self.assertEqual(CACHE_REQUESTS.value(result="miss"), misses + 1)
+        self.assertEqual(MESSAGES_SENT.value(transport="jsonrpc"), sent + 1)
+        self.assertIn("ton_rpc_cache_hit_ratio", REGISTRY.render())
+
+    def test_queue_depths_follow_their_source(self):
+        sizes = {"encode": 2, "confirm": 5}
+        unwatch = watch_queues("test", lambda: dict(sizes))
+        self.assertIn('ton_queue_depth{queue="test.confirm"} 5', REGISTRY.render())
+        sizes["confirm"] = 1
+        REGISTRY.render()
+        self.assertEqual(QUEUE_DEPTH.value(queue="test.confirm"), 1)
+        unwatch()
+        self.assertEqual(QUEUE_DEPTH.value(queue="test.confirm"), 0)
+
+    def test_http_exporter(self):
+        registry = Registry()
+        registry.counter("scrapes_total", "Scrapes").inc()
+        server = serve(0, registry=registry)
+        try:
+            url = f"http://127.0.0.1:{server.server_port}/metrics"
+            with urllib.request.urlopen(url, timeout=5) as response:
+                self.assertTrue(response.headers["Content-Type"].startswith("text/plain"))
+                self.assertIn("scrapes_total 1", response.read().decode())
+        finally:
+            server.shutdown()
+            server.server_close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+"""
+Data Model Test Suite
+Tests the slotted records, the struct-of-arrays tables and their binary round trip
+"""
+
+import json
+import sys
+import tempfile
+import tracemalloc
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from models import Deployment, Order, OrderTable, Payment, PaymentTable  # noqa: E402
+
+
+def make_payment(i: int) -> Payment:
+    return Payment(order_id=i, query_id=i << 32, amount=10 ** 9, value=10 ** 9 + i,
+                   source=f"EQpayer{i % 7}", lt=1000 + i, transaction_hash=f"{i:043d}=")
+
+
+class TestRecords(unittest.TestCase):
+    """Records read like the dicts they replace"""
+
+    def test_dict_style_access(self):
+        order = Order(3, True, "Shirt", "ab" * 32, 10 ** 9)
+        self.assertEqual(order["paid"], True)
+        self.assertEqual(order.get("missing", 0), 0)
+        self.assertEqual(dict(order), {"order_id": 3, "paid": True, "product_details": "Shirt",
+                                       "image_hash": "ab" * 32, "price": 10 ** 9})
+        with self.assertRaises(KeyError):
+            order["keys"]
+        with self.assertRaises(AttributeError):
+            order.extra = 1
+
+    def test_derived_fields_and_json(self):
+        payment = Payment(order_id=1, query_id=0, amount=500, value=400)
+        self.assertEqual(Payment.from_dict(dict(payment.to_dict(), sufficient=False)), payment)
+        deployment = Deployment("0:ab", "tx", "block", public_key="pub")
+        self.assertEqual(json.loads(json.dumps(deployment.to_dict()))["status"], "deployed")
+
+
+class TestTables(unittest.TestCase):
+    """Columns, interning and serialization"""
+
+    def test_order_table_round_trip(self):
+        orders = [Order(i, i % 3 == 0, f"Product {i % 4}", f"{i:064x}", i * 10 ** 7) for i in range(1, 101)]
+        table = OrderTable.from_records(orders)
+        self.assertEqual(len(table), 100)
+        self.assertEqual(list(table), orders)
+        self.assertEqual(table[-1], orders[-1])
+        # Four distinct detail strings are stored once each
+        self.assertEqual(len(table.column("product_details").values), 4)
+        restored = OrderTable.from_bytes(table.to_bytes())
+        self.assertEqual(list(restored), orders)
+        with self.assertRaises(ValueError):
+            PaymentTable.from_bytes(table.to_bytes())
+
+    def test_payment_table_overwrite_and_files(self):
+        payments = [make_payment(i) for i in range(50)]
+        payments.append(Payment(order_id=99, query_id=0, amount=1))
+        table = PaymentTable.from_records(payments)
+        replacement = make_payment(7)
+        replacement.transaction_hash = "a much longer replacement hash"
+        table[7] = payments[7] = replacement
+        self.assertEqual(table[7].transaction_hash, "a much longer replacement hash")
+        self.assertIsNone(table[50].source)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = str(Path(tmp) / "payments.bin")
+            table.save(path)
+            self.assertEqual(list(PaymentTable.load(path)), payments)
+        with self.assertRaises(IndexError):
+            table[51]
+
+    def test_table_is_a_fraction_of_dicts(self):
+        count = 20_000
+
+        def allocated(build):
+            tracemalloc.start()
+            try:
+                held = build()
+                size = tracemalloc.get_traced_memory()[0]
+            finally:
+                tracemalloc.stop()
+            del held
+            return size
+
+        as_dicts = allocated(lambda: [make_payment(i).to_dict() for i in range(count)])
+        as_table = allocated(lambda: PaymentTable.from_records(make_payment(i) for i in range(count)))
+        self.assertLess(as_table * 4, as_dicts)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,130 @@
+"""
+Order Enumeration Test Suite
+Tests cell encoding and paginated order streaming against recorded cassettes
+"""
+
+import asyncio
+import hashlib
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from boc import Address, Cell, begin_cell, build_dict, dict_get, iter_dict, text_cell, load_text  # noqa: E402
+from cassette import use_cassette  # noqa: E402
+from local_chain import LocalChain  # noqa: E402
+from models import Order  # noqa: E402
+from orders import build_create_order_bodies, build_create_order_body, decode_orders_page, iter_orders  # noqa: E402
+from seed import SeedProfile, seed_model  # noqa: E402
+from signing import public_key, verify  # noqa: E402
+from toncenter import TonApi, encode_stack_entry  # noqa: E402
+
+SHOP = Address(0, bytes(32))
+
+
+def make_order_value(paid: int, details: str, image: str, price: int = 10 ** 9):
+    return (begin_cell()
+            .store_uint(paid, 32)
+            .store_ref(text_cell(details))
+            .store_bytes(hashlib.sha256(image.encode()).digest())
+            .store_coins(price))
+
+
+def orders_chain() -> LocalChain:
+    """Live source the paging cassettes were recorded from: 250 seeded orders"""
+    chain = LocalChain()
+    chain.add_account(SHOP, seed_model(SeedProfile(orders=250, seed=7)))
+    return chain
+
+
+class TestCells(unittest.TestCase):
+    """Cell hashing and BoC round trips"""
+
+    def test_empty_cell_hash(self):
+        self.assertEqual(
+            Cell().hash.hex(),
+            "96a296d224f285c67bee93c30f8a309157f0daa35dc5b87e410b78630a09cfc7")
+
+    def test_boc_round_trip(self):
+        cell = (begin_cell()
+                .store_uint(5, 3)
+                .store_coins(1_500_000_000)
+                .store_ref(text_cell("x" * 300))
+                .end_cell())
+        restored = Cell.from_boc(cell.to_boc())
+        self.assertEqual(restored.hash, cell.hash)
+        self.assertEqual(load_text(restored.begin_parse().skip_bits(3).skip_bits(36).load_ref().begin_parse()),
+                         "x" * 300)
+
+    def test_dict_round_trip(self):
+        items = {key: begin_cell().store_uint(key % 1000, 16) for key in (1, 2, 3, 17, 1000, 2 ** 32 - 1)}
+        root = build_dict(items, 32)
+        decoded = [(key, value.load_uint(16)) for key, value in iter_dict(root, 32)]
+        self.assertEqual(decoded, [(key, key % 1000) for key in sorted(items)])
+        self.assertEqual(dict_get(root, 32, 17).load_uint(16), 17)
+        self.assertIsNone(dict_get(root, 32, 18))
+        self.assertEqual([key for key, _ in iter_dict(root, 32, start=4)], [17, 1000, 2 ** 32 - 1])
+
+
+class TestCreateOrderBodies(unittest.TestCase):
+    """Signing createOrder bodies one by one and in batches"""
+
+    def test_batch_matches_single_bodies(self):
+        secret_key = b"\x07" * 32
+        orders = [(f"Product {i}", f"{i:064x}", (i + 1) * 10 ** 8, (1 << 40) + i) for i in range(6)]
+        bodies = build_create_order_bodies(orders, secret_key)
+        self.assertEqual([body.hash for body in bodies],
+                         [build_create_order_body(*order, secret_key).hash for order in orders])
+        s = bodies[3].begin_parse()
+        signature = s.load_bytes(64)
+        self.assertTrue(verify(public_key(secret_key), s.to_cell().hash, signature))
+        self.assertEqual(build_create_order_bodies([], secret_key), [])
+
+
+class TestOrderPaging(unittest.TestCase):
+    """Streaming enumeration through get_orders_page, replayed from recorded cassettes"""
+
+    def collect(self, name, **kwargs):
+        api = use_cassette(name, source=orders_chain)
+
+        async def run():
+            try:
+                return [order async for order in iter_orders(api, SHOP.to_raw(), **kwargs)]
+            finally:
+                await api.close()
+
+        return api, asyncio.run(run())
+
+    def test_decode_page(self):
+        page = build_dict({7: make_order_value(1, "Shirt", "img", 25 * 10 ** 8)}, 32)
+        self.assertEqual(decode_orders_page(page), [
+            Order(order_id=7, paid=True, product_details="Shirt", image_hash=hashlib.sha256(b"img").hexdigest(),
+                  price=25 * 10 ** 8)
+        ])
+        self.assertEqual(decode_orders_page(None), [])
+
+    def test_iter_orders_walks_all_pages(self):
+        api, result = self.collect("orders_all_pages", page_size=100)
+        self.assertEqual([order["order_id"] for order in result], list(range(1, 251)))
+        self.assertTrue(any(order["paid"] for order in result) and not all(order["paid"] for order in result))
+        self.assertEqual(len(api.cassette.interactions), 3)
+        self.assertEqual(api.cassette.interactions[1]["params"]["stack"][0], encode_stack_entry(101))
+        self.assertEqual(api.cassette.unplayed, 0)
+
+    def test_iter_orders_from_start_id(self):
+        # The contract caps pages at 100 orders however many are asked for
+        api, result = self.collect("orders_from_start_id", start_id=120, page_size=250)
+        self.assertEqual([order["order_id"] for order in result], list(range(120, 251)))
+        self.assertEqual(len(api.cassette.interactions), 2)
+        self.assertEqual(api.cassette.unplayed, 0)
+
+    def test_iter_orders_rejects_empty_pages(self):
+        with self.assertRaises(ValueError):
+            self.collect("orders_all_pages", page_size=0)
+        with self.assertRaises(TypeError):
+            TonApi()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+"""
+Order Payment Test Suite
+Tests pay_order body encoding and transaction-to-order matching
+"""
+
+import asyncio
+import base64
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from boc import text_cell  # noqa: E402
+from events import order_paid_event  # noqa: E402
+from payments import (OP_PAY_ORDER, PaymentIndex, build_payment_payload,  # noqa: E402
+                      decode_payment_payload, iter_payments, payment_payload_base64)
+from toncenter import TonApi  # noqa: E402
+
+
+def make_transaction(lt, value, body, accepted=True):
+    """Contract transaction for an inbound message; an accepted payment logs order_paid"""
+    payment = decode_payment_payload(body)
+    events = [order_paid_event(payment["order_id"], payment["query_id"], value, None)] if payment and accepted else []
+    return {
+        "transaction_id": {"lt": str(lt), "hash": f"hash{lt}"},
+        "in_msg": {
+            "source": "EQ_sender",
+            "value": str(value),
+            "msg_data": {"@type": "msg.dataRaw", "body": base64.b64encode(body.to_boc()).decode()},
+        },
+        "out_msgs": [{"destination": "", "msg_data": {
+            "@type": "msg.dataRaw", "body": base64.b64encode(event.end_cell().to_boc()).decode()}}
+            for event in events],
+    }
+
+
+class TransactionsApi(TonApi):
+    """Serves one fixed page of transactions, newest first"""
+
+    def __init__(self, transactions):
+        self.transactions = transactions
+
+    async def call(self, method, params):
+        return [] if "lt" in params else self.transactions[:params["limit"]]
+
+
+class TestPayments(unittest.TestCase):
+    """pay_order payloads and the payment index"""
+
+    def test_payload_round_trip(self):
+        payload = build_payment_payload(order_id=42, amount=1_500_000_000, query_id=9)
+        self.assertEqual(payload.begin_parse().load_uint(32), OP_PAY_ORDER)
+        self.assertEqual(decode_payment_payload(payload),
+                         {"query_id": 9, "order_id": 42, "amount": 1_500_000_000})
+        self.assertEqual(decode_payment_payload(payment_payload_base64(42, 1)),
+                         {"query_id": 0, "order_id": 42, "amount": 1})
+
+    def test_other_bodies_are_ignored(self):
+        self.assertIsNone(decode_payment_payload(None))
+        self.assertIsNone(decode_payment_payload(text_cell("order 42")))
+
+    def test_index_maps_payments_to_orders(self):
+        index = PaymentIndex()
+        added = index.add_transactions([
+            make_transaction(10, 2_000, build_payment_payload(1, 2_000)),
+            make_transaction(11, 500, build_payment_payload(2, 1_000), accepted=False),
+            make_transaction(12, 3_000, build_payment_payload(3, 3_000)),
+            make_transaction(13, 100, text_cell("comment")),
+            # Declares exactly what it sends, but the order's price is higher
+            make_transaction(14, 1, build_payment_payload(4, 1), accepted=False),
+        ])
+        self.assertEqual(added, 2)
+        self.assertIn(1, index)
+        self.assertNotIn(2, index)
+        self.assertNotIn(4, index)
+        self.assertEqual(index.payment_for(3)["transaction_hash"], "hash12")
+
+    def test_stream_skips_rejected_payments(self):
+        api = TransactionsApi([
+            make_transaction(12, 3_000, build_payment_payload(3, 3_000)),
+            make_transaction(11, 500, build_payment_payload(2, 1_000), accepted=False),
+            make_transaction(10, 2_000, build_payment_payload(1, 2_000)),
+        ])
+
+        async def collect():
+            return [payment["order_id"] async for payment in iter_payments(api, "0:00")]
+
+        self.assertEqual(asyncio.run(collect()), [3, 1])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+"""
+Pipeline Test Suite
+Tests stage overlap, ordering, failure isolation and utilization metrics
+"""
+
+import asyncio
+import sys
+import time
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from pipeline import Pipeline, Stage  # noqa: E402
+
+
+def sleeper(seconds, log=None):
+    async def stage(item):
+        await asyncio.sleep(seconds)
+        if log is not None:
+            log.append(item)
+        return item
+    return stage
+
+
+class TestPipeline(unittest.TestCase):
+    """Behaviour of Pipeline.run"""
+
+    def test_bounded_by_slowest_stage(self):
+        sent = []
+        pipeline = Pipeline([
+            Stage("encode", sleeper(0.01)),
+            Stage("send", sleeper(0.03, sent)),
+            Stage("confirm", sleeper(0.01)),
+        ])
+        started = time.perf_counter()
+        results = asyncio.run(pipeline.run(range(10)))
+        elapsed = time.perf_counter() - started
+        self.assertEqual(results, list(range(10)))
+        self.assertEqual(sent, list(range(10)))
+        # Serial execution would take 10 * 0.05s
+        self.assertLess(elapsed, 0.45)
+        metrics = {row["stage"]: row for row in pipeline.metrics()}
+        self.assertGreater(metrics["send"]["utilization"], 0.8)
+        self.assertLess(metrics["confirm"]["utilization"], 0.5)
+        self.assertGreater(metrics["encode"]["blocked_seconds"], 0)
+
+    def test_queue_depth_and_workers(self):
+        pipeline = Pipeline([Stage("encode", sleeper(0)), Stage("confirm", sleeper(0.02), workers=5, queue_depth=3)])
+        results = asyncio.run(pipeline.run(range(20)))
+        self.assertEqual(results, list(range(20)))
+        self.assertLessEqual(pipeline.stages[1].max_queue, 3)
+        self.assertLess(pipeline.elapsed, 20 * 0.02 / 2)
+
+    def test_failures_skip_later_stages(self):
+        confirmed = []
+
+        async def send(item):
+            if item == 3:
+                raise ConnectionError("endpoint down")
+            return item
+
+        pipeline = Pipeline([Stage("send", send), Stage("confirm", sleeper(0, confirmed))])
+        results = asyncio.run(pipeline.run(range(5)))
+        self.assertIsInstance(results[3], ConnectionError)
+        self.assertEqual(confirmed, [0, 1, 2, 4])
+        self.assertEqual([row["failed"] for row in pipeline.metrics()], [1, 0])
+
+    def test_rejects_bad_stages(self):
+        with self.assertRaises(ValueError):
+            Stage("send", sleeper(0), queue_depth=0)
+        with self.assertRaises(ValueError):
+            Pipeline([])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,296 @@
+"""
+Merkle Proof Test Suite
+Tests proof construction and checking, and verified account and transaction reads from a fake liteserver
+"""
+
+import asyncio
+import base64
+import json
+import sys
+import unittest
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from boc import (MERKLE_UPDATE, Address, Builder, Cell, begin_cell, build_dict, deserialize_boc,  # noqa: E402
+                 dict_path, serialize_boc, text_cell)
+from messages import internal_message  # noqa: E402
+from payments import build_payment_payload, payment_from_transaction  # noqa: E402
+from proofs import (BLOCK_INFO_TAG, BLOCK_TAG, MC_STATE_EXTRA_TAG, SHARD_STATE_TAG, BlockId,  # noqa: E402
+                    HeaderCache, ProofError, VerifiedApi, check_proof, find_shard, merkle_proof, parse_block,
+                    prune_branch)
+from toncenter import TonApi  # noqa: E402
+
+CONTRACT = Address(0, bytes.fromhex("a1" * 32))
+NEIGHBOUR = Address(0, bytes.fromhex("a2" * 32))
+STRANGER = Address(0, bytes.fromhex("b7" * 32))
+PAYER = Address(0, bytes.fromhex("3c" * 32))
+# A mainnet liteserver's answer, recorded verbatim; see TestLiteserverVector
+VECTOR = Path(__file__).resolve().parent / "vectors" / "all_shards_info.json"
+
+
+def shard_ident(workchain: int, shard: int) -> Builder:
+    return begin_cell().store_uint(0, 2).store_uint(0, 6).store_int(workchain, 32).store_uint(shard, 64)
+
+
+def account_cell(address: Address, balance: int, last_lt: int, data: Cell) -> Cell:
+    return (begin_cell()
+            .store_bit(1)
+            .store_address(address)
+            .store_uint(0, 3).store_uint(0, 3).store_uint(0, 3)  # storage used, no storage extra
+            .store_uint(1_700_000_000, 32)  # last_paid
+            .store_bit(0)  # due_payment
+            .store_uint(last_lt, 64)
+            .store_coins(balance)
+            .store_bit(0)  # extra currencies
+            .store_bit(1)  # account_active
+            .store_uint(0, 2)  # split_depth, special
+            .store_maybe_ref(Cell())
+            .store_maybe_ref(data)
+            .store_bit(0)  # library
+            .end_cell())
+
+
+def shard_state(workchain: int, accounts: Dict[Address, Cell], last: Dict[Address, Cell],
+                custom: Optional[Cell] = None) -> Cell:
+    leaves = {}
+    for address, account in accounts.items():
+        tx = last[address]
+        lt = tx.begin_parse().skip_bits(4 + 256).load_uint(64)
+        leaves[int.from_bytes(address.hash_part, "big")] = (
+            begin_cell().store_uint(0, 5).store_coins(0).store_bit(0)  # DepthBalanceInfo
+            .store_ref(account).store_bytes(tx.hash).store_uint(lt, 64))
+    b = (begin_cell()
+         .store_uint(SHARD_STATE_TAG, 32)
+         .store_int(-239, 32)
+         .store_builder(shard_ident(workchain, 1 << 63))
+         .store_uint(0, 32 + 32 + 32 + 64 + 32 + 1)
+         .store_ref(Cell())
+         .store_ref(begin_cell().store_maybe_ref(build_dict(leaves, 256)).store_coins(0).store_bit(0).end_cell())
+         .store_ref(Cell()))
+    b.store_maybe_ref(custom)
+    return b.end_cell()
+
+
+def block(workchain: int, seqno: int, state: Cell) -> Cell:
+    info = (begin_cell()
+            .store_uint(BLOCK_INFO_TAG, 32)
+            .store_uint(0, 32 + 8 + 8)
+            .store_uint(seqno, 32)
+            .store_uint(0, 32)
+            .store_builder(shard_ident(workchain, 1 << 63))
+            .store_uint(1_700_000_000 + seqno, 32)
+            .store_uint(0, 64)
+            .store_uint(0, 64)
+            .end_cell())
+    old = Cell(b"\x01", 8)
+    update_data = (bytes((MERKLE_UPDATE,)) + old.hash + state.hash
+                   + old.depth.to_bytes(2, "big") + state.depth.to_bytes(2, "big"))
+    update = Cell(update_data, len(update_data) * 8, [old, state], MERKLE_UPDATE)
+    return (begin_cell().store_uint(BLOCK_TAG, 32).store_int(-239, 32)
+            .store_ref(info).store_ref(Cell()).store_ref(update).store_ref(Cell()).end_cell())
+
+
+def shard_descr(seqno: int, root_hash: bytes) -> Cell:
+    return (begin_cell().store_bit(0).store_uint(0xb, 4).store_uint(seqno, 32).store_uint(0, 32 + 64 + 64)
+            .store_bytes(root_hash).store_bytes(bytes(32)).end_cell())
+
+
+def transaction(address: Address, lt: int, prev: Optional[Cell], in_msg: Cell) -> Cell:
+    prev_hash, prev_lt = (prev.hash, prev.begin_parse().skip_bits(4 + 256).load_uint(64)) if prev else (bytes(32), 0)
+    messages = begin_cell().store_bit(1).store_ref(in_msg).store_bit(0).end_cell()
+    return (begin_cell()
+            .store_uint(0b0111, 4).store_bytes(address.hash_part).store_uint(lt, 64)
+            .store_bytes(prev_hash).store_uint(prev_lt, 64).store_uint(1_700_000_000 + lt, 32)
+            .store_uint(0, 15).store_uint(0b1010, 4)
+            .store_ref(messages).store_coins(0).store_bit(0).store_ref(Cell()).store_ref(Cell())
+            .end_cell())
+
+
+def b64(roots: List[Cell]) -> str:
+    return base64.b64encode(serialize_boc(roots)).decode()
+
+
+class Chain:
+    """A masterchain block pointing at one basechain shard block (split in two) and its accounts"""
+
+    def __init__(self):
+        pay = internal_message(CONTRACT, 2 * 10 ** 9, build_payment_payload(7, 10 ** 9))
+        first = transaction(CONTRACT, 100, None, internal_message(CONTRACT, 10 ** 9))
+        second = transaction(CONTRACT, 200, first, pay)
+        self.transactions = [second, first]
+        neighbour_tx = transaction(NEIGHBOUR, 150, None, internal_message(NEIGHBOUR, 1))
+        self.data = text_cell("orders")
+        self.accounts = {CONTRACT: account_cell(CONTRACT, 5 * 10 ** 9, 200, self.data),
+                         NEIGHBOUR: account_cell(NEIGHBOUR, 1, 150, Cell())}
+        self.shard_state = shard_state(0, self.accounts, {CONTRACT: second, NEIGHBOUR: neighbour_tx})
+        self.shard_block = block(0, 42, self.shard_state)
+        # The account prefixes start with bit 1, so they live in the right half of a split shard
+        self.tree = (begin_cell().store_bit(1)
+                     .store_ref(shard_descr(41, bytes(32))).store_ref(shard_descr(42, self.shard_block.hash))
+                     .end_cell())
+        self.hashes = build_dict({0: begin_cell().store_ref(self.tree)}, 32)
+        self.custom = begin_cell().store_uint(MC_STATE_EXTRA_TAG, 16).store_maybe_ref(self.hashes).end_cell()
+        self.mc_state = shard_state(-1, {}, {}, self.custom)
+        self.mc_block = block(-1, 1000, self.mc_state)
+        self.trusted = BlockId(-1, 1 << 63, 1000, self.mc_block.hash, bytes(32))
+
+    def block_proof(self, root: Cell) -> Cell:
+        return merkle_proof(root, [root, root.refs[0], root.refs[2]])
+
+    def account_response(self, address: Address) -> Dict[str, Any]:
+        accounts = self.shard_state.refs[1]
+        key = int.from_bytes(address.hash_part, "big")
+        state_proof = merkle_proof(self.shard_state, [accounts, *dict_path(accounts.refs[0], 256, key)])
+        mc_state_proof = merkle_proof(self.mc_state, [self.custom, *dict_path(self.hashes, 32, 0),
+                                                      self.tree, self.tree.refs[1]])
+        account = self.accounts.get(address)
+        return {
+            "shard_proof": b64([self.block_proof(self.mc_block), mc_state_proof]),
+            "proof": b64([self.block_proof(self.shard_block), state_proof]),
+            "state": base64.b64encode(account.to_boc()).decode() if account else "",
+        }
+
+
+class FakeLiteApi(TonApi):
+    """Serves proofs from a Chain; ``tamper`` edits each answer on the way out"""
+
+    def __init__(self, chain: Chain, tamper=None):
+        self.chain = chain
+        self.tamper = tamper
+        self.calls: List[str] = []
+
+    async def call(self, method: str, params: Dict[str, Any]) -> Any:
+        self.calls.append(method)
+        if method == "liteServer.getAccountState":
+            response = self.chain.account_response(Address.parse(params["account"]))
+            return self.tamper(response) if self.tamper else response
+        if method == "getTransactions":
+            txs = [{"transaction_id": {"lt": str(tx.begin_parse().skip_bits(4 + 256).load_uint(64)),
+                                       "hash": base64.b64encode(tx.hash).decode()},
+                    "data": base64.b64encode(tx.to_boc()).decode(),
+                    "in_msg": {"value": "999999999999"}}
+                   for tx in self.chain.transactions]
+            return self.tamper(txs) if self.tamper else txs
+        raise AssertionError(method)
+
+
+class TestMerkleProofs(unittest.TestCase):
+    """Pruned trees keep the hash of the original"""
+
+    def test_proof_keeps_root_hash(self):
+        chain = Chain()
+        proof = chain.block_proof(chain.mc_block)
+        restored = Cell.from_boc(proof.to_boc())
+        self.assertEqual(check_proof(restored, chain.mc_block.hash).hash, chain.mc_block.hash)
+        with self.assertRaises(ProofError):
+            check_proof(restored, bytes(32))
+
+    def test_pruned_branch_stands_in_for_cell(self):
+        cell = text_cell("x" * 300)
+        self.assertEqual(prune_branch(cell).hash, cell.hash)
+        self.assertEqual(prune_branch(cell).depth, cell.depth)
+
+    def test_block_id_notation(self):
+        block_id = BlockId.parse(f"(-1,8000000000000000,1000):{'ab' * 32}:{'cd' * 32}")
+        self.assertEqual((block_id.workchain, block_id.shard, block_id.seqno), (-1, 1 << 63, 1000))
+        self.assertEqual(BlockId.parse(str(block_id)).root_hash, block_id.root_hash)
+        self.assertEqual(BlockId.from_json(block_id.to_json()).shard, 1 << 63)
+
+
+class TestLiteserverVector(unittest.TestCase):
+    """A real liteserver proof, so the checks are not only run against proofs built here"""
+
+    def setUp(self):
+        vector = json.loads(VECTOR.read_text())
+        self.block = BlockId.parse(vector["block"])
+        self.block_proof, self.state_proof = deserialize_boc(base64.b64decode(vector["proof"]))
+        self.shard_hashes = Cell.from_boc(base64.b64decode(vector["data"])).refs[0]
+
+    def mc_state(self) -> Cell:
+        header = parse_block(check_proof(self.block_proof, self.block.root_hash))
+        self.assertEqual((header["workchain"], header["seqno"], header["gen_utime"]), (-1, 34288980, 1700577490))
+        return check_proof(self.state_proof, header["state_hash"])
+
+    def test_block_state_and_shard_are_proven(self):
+        shard = find_shard(self.mc_state(), 0, bytes.fromhex("a1" * 32), self.shard_hashes)
+        self.assertEqual((shard["prefix"], shard["prefix_bits"]), (0, 0))
+        self.assertEqual(str(shard["block"]),
+                         "(0,8000000000000000,40138648)"
+                         ":44b279aa85da8b51bd3766f9d7361f23d1ddab4512c18396ec7e36db524def2e"
+                         ":79ee357959cdcca0686137772e4a517463aca70d983fb08cf8ddc8a08acf4e79")
+
+    def test_tampering_is_detected(self):
+        with self.assertRaises(ProofError):
+            check_proof(self.block_proof, self.block.file_hash)
+        state = self.mc_state()
+        # The proof prunes the shard hashes, so they cannot be read without the answer's data
+        with self.assertRaises(ValueError):
+            find_shard(state, 0, bytes(32))
+        hashes = self.shard_hashes
+        forged = Cell(hashes.data, hashes.bit_len, [Cell(), *hashes.refs[1:]], hashes.type_)
+        with self.assertRaises(ProofError):
+            find_shard(state, 0, bytes(32), forged)
+
+
+class TestVerifiedApi(unittest.TestCase):
+    """Account state and transactions checked against the trusted block"""
+
+    def setUp(self):
+        self.chain = Chain()
+
+    def verified(self, tamper=None) -> VerifiedApi:
+        return VerifiedApi(FakeLiteApi(self.chain, tamper), self.chain.trusted, HeaderCache())
+
+    def test_account_state(self):
+        api = self.verified()
+        info = asyncio.run(api.get_address_information(CONTRACT.to_raw()))
+        self.assertEqual(info["balance"], str(5 * 10 ** 9))
+        self.assertEqual(info["state"], "active")
+        self.assertEqual(info["last_transaction_id"]["lt"], "200")
+        self.assertEqual(asyncio.run(api.get_account_data(CONTRACT.to_raw())), self.chain.data)
+        # The shard and both block headers are verified once and reused
+        asyncio.run(api.get_address_information(NEIGHBOUR.to_raw()))
+        self.assertEqual(len(api.shards), 1)
+        self.assertEqual(len(api.headers), 2)
+
+    def test_missing_account_is_proven_absent(self):
+        info = asyncio.run(self.verified().get_address_information(STRANGER.to_raw()))
+        self.assertEqual((info["state"], info["balance"]), ("uninitialized", "0"))
+
+    def test_tampered_answers_are_rejected(self):
+        forged = account_cell(CONTRACT, 10 ** 15, 200, self.chain.data)
+
+        def swap_state(response):
+            return dict(response, state=base64.b64encode(forged.to_boc()).decode())
+
+        def other_account(response):
+            return self.chain.account_response(NEIGHBOUR)
+
+        for tamper in (swap_state, other_account):
+            with self.assertRaises(ProofError):
+                asyncio.run(self.verified(tamper).get_address_information(CONTRACT.to_raw()))
+
+        untrusted = VerifiedApi(FakeLiteApi(self.chain),
+                                BlockId(-1, 1 << 63, 1000, bytes(32), bytes(32)))
+        with self.assertRaises(ProofError):
+            asyncio.run(untrusted.get_address_information(CONTRACT.to_raw()))
+
+    def test_transactions_follow_proven_chain(self):
+        api = self.verified()
+        transactions = asyncio.run(api.get_transactions(CONTRACT.to_raw()))
+        self.assertEqual([tx["transaction_id"]["lt"] for tx in transactions], ["200", "100"])
+        # Fields are rebuilt from the verified cell, not taken from the endpoint
+        payment = payment_from_transaction(transactions[0])
+        self.assertEqual((payment["order_id"], payment["value"]), (7, 2 * 10 ** 9))
+
+        def drop_first(answer):
+            return answer[1:] if isinstance(answer, list) else answer
+
+        with self.assertRaises(ProofError):
+            asyncio.run(self.verified(drop_first).get_transactions(CONTRACT.to_raw()))
+
+
+if __name__ == "__main__":
+    unittest.main()
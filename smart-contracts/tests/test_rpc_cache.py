@@ -0,0 +1,98 @@
+"""
+RPC Cache Test Suite
+Tests that immutable responses are served from disk across clients and evicted by size
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from rpc_cache import CachedApi, DiskCache, cache_key, is_immutable  # noqa: E402
+from toncenter import TonApi, TonApiError  # noqa: E402
+
+
+class CountingApi(TonApi):
+    """Echoes the request and counts what reached the network"""
+
+    def __init__(self, fail=False):
+        self.calls = []
+        self.fail = fail
+
+    async def call(self, method, params):
+        self.calls.append(method)
+        if self.fail:
+            raise TonApiError("unavailable", 503)
+        return {"method": method, "params": params}
+
+
+class TestRpcCache(unittest.TestCase):
+    """Disk-backed caching of finalized data"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / "rpc.sqlite3"
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_immutability_rules(self):
+        self.assertTrue(is_immutable("getTransactions", {"address": "0:00", "lt": "5", "hash": "x"}))
+        self.assertFalse(is_immutable("getTransactions", {"address": "0:00", "limit": 10}))
+        self.assertTrue(is_immutable("getBlockHeader", {"workchain": -1, "seqno": 7}))
+        self.assertFalse(is_immutable("getConfigParam", {"config_id": 21}))
+        self.assertFalse(is_immutable("runGetMethod", {"method": "get_orders_page"}))
+        self.assertEqual(cache_key("m", {"a": 1, "b": 2}), cache_key("m", {"b": 2, "a": 1}))
+
+    def test_shared_across_clients(self):
+        params = {"address": "0:00", "limit": 10, "lt": "100", "hash": "abc"}
+        first = CountingApi()
+        api = CachedApi(first, DiskCache(self.path))
+        result = asyncio.run(api.get_transactions("0:00", limit=10, lt=100, tx_hash="abc"))
+        asyncio.run(api.close())
+
+        second = CountingApi()
+        api = CachedApi(second, DiskCache(self.path))
+        self.assertEqual(asyncio.run(api.call("getTransactions", params)), result)
+        asyncio.run(api.call("getMasterchainInfo", {}))
+        self.assertEqual(second.calls, ["getMasterchainInfo"])
+        self.assertEqual((api.hits, api.misses), (1, 0))
+        asyncio.run(api.close())
+
+    def test_errors_are_not_cached(self):
+        cache = DiskCache(self.path)
+        api = CachedApi(CountingApi(fail=True), cache)
+        with self.assertRaises(TonApiError):
+            asyncio.run(api.call("getBlockHeader", {"seqno": 1}))
+        self.assertEqual(len(cache), 0)
+        cache.close()
+
+    def test_lru_eviction_under_size_cap(self):
+        cache = DiskCache(self.path, max_bytes=4000)
+        for i in range(40):
+            cache.put(f"key{i}", {"payload": os.urandom(300).hex()})
+            if i >= 1:
+                cache.get("key0")  # keep the first entry hot
+        self.assertLessEqual(cache.size, 4000)
+        self.assertIn("key0", cache)
+        self.assertNotIn("key1", cache)
+        self.assertIn("key39", cache)
+        cache.close()
+
+    def test_size_total_tracks_every_writer(self):
+        first, second = DiskCache(self.path, max_bytes=6000), DiskCache(self.path, max_bytes=6000)
+        for i in range(30):
+            (first if i % 2 else second).put(f"key{i % 12}", {"payload": os.urandom(100 + 10 * i).hex()})
+        summed = first.db.execute("SELECT SUM(size) FROM entries").fetchone()[0]
+        self.assertEqual((first.size, second.size), (summed, summed))
+        self.assertLessEqual(summed, 6000)
+        first.close()
+        second.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
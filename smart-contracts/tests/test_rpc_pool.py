@@ -0,0 +1,114 @@
+"""
+RPC Pool Test Suite
+Tests latency-based routing, failover and hedged reads across endpoints
+"""
+
+import asyncio
+import importlib.util
+import os
+import sys
+import unittest
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from rpc_pool import RpcPool, connect, load_endpoints  # noqa: E402
+from toncenter import TonApi, TonApiError, ToncenterClient  # noqa: E402
+
+
+class FakeEndpoint(TonApi):
+    """Answers with its own name after a fixed delay, or fails"""
+
+    def __init__(self, name, delay=0.0, error=None):
+        self.name = name
+        self.delay = delay
+        self.error = error
+        self.calls = 0
+
+    async def call(self, method, params):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        return self.name
+
+
+class TestRpcPool(unittest.TestCase):
+    """Routing decisions of RpcPool"""
+
+    def run_calls(self, pool, method, count):
+        async def run():
+            return [await pool.call(method, {}) for _ in range(count)]
+        return asyncio.run(run())
+
+    def test_routes_to_fastest_endpoint(self):
+        fast, slow = FakeEndpoint("fast", 0.001), FakeEndpoint("slow", 0.02)
+        pool = RpcPool({"slow": slow, "fast": fast}, initial_hedge_delay=1.0)
+        results = self.run_calls(pool, "sendBoc", 20)
+        # Both get measured once, then the fast endpoint takes the traffic
+        self.assertEqual(results[-10:], ["fast"] * 10)
+        self.assertLessEqual(slow.calls, 2)
+
+    def test_hedges_slow_reads(self):
+        stuck, backup = FakeEndpoint("stuck", 5.0), FakeEndpoint("backup", 0.001)
+        pool = RpcPool({"stuck": stuck, "backup": backup}, initial_hedge_delay=0.01)
+        with mock.patch.object(pool, "ranked", return_value=["stuck", "backup"]):
+            result = asyncio.run(asyncio.wait_for(pool.call("runGetMethod", {}), 1.0))
+        self.assertEqual(result, "backup")
+        self.assertEqual(pool.hedged, 1)
+
+    def test_fails_over_and_cools_down(self):
+        broken = FakeEndpoint("broken", error=ConnectionError("refused"))
+        healthy = FakeEndpoint("healthy")
+        pool = RpcPool({"broken": broken, "healthy": healthy}, max_failures=2)
+        self.assertEqual(self.run_calls(pool, "sendBoc", 6), ["healthy"] * 6)
+        self.assertEqual(broken.calls, 2)
+        self.assertEqual(pool.ranked()[-1], "broken")
+
+    def test_answers_are_not_retried(self):
+        rejecting = FakeEndpoint("rejecting", error=TonApiError("invalid address", 416))
+        other = FakeEndpoint("other")
+        pool = RpcPool({"rejecting": rejecting, "other": other})
+        with mock.patch.object(pool, "ranked", return_value=["rejecting", "other"]):
+            with self.assertRaises(TonApiError):
+                asyncio.run(pool.call("getAddressInformation", {}))
+        self.assertEqual(other.calls, 0)
+
+        buggy = FakeEndpoint("buggy", error=KeyError("result"))
+        pool = RpcPool({"buggy": buggy, "other": other})
+        with mock.patch.object(pool, "ranked", return_value=["buggy", "other"]):
+            with self.assertRaises(KeyError):
+                asyncio.run(pool.call("sendBoc", {}))
+        self.assertEqual(other.calls, 0)
+
+    def test_rate_limits_fail_over(self):
+        limited = FakeEndpoint("limited", error=TonApiError("rate limit", 429))
+        pool = RpcPool({"limited": limited, "other": FakeEndpoint("other")})
+        with mock.patch.object(pool, "ranked", return_value=["limited", "other"]):
+            self.assertEqual(asyncio.run(pool.call("getTransactions", {})), "other")
+
+
+class TestEndpointConfig(unittest.TestCase):
+    """Endpoint configuration"""
+
+    def test_configured_endpoints(self):
+        with mock.patch.dict(os.environ, {}, clear=True):
+            self.assertEqual(load_endpoints("testnet"), ["https://testnet.toncenter.com/api/v2"])
+            self.assertEqual(load_endpoints("testnet", "tonclient"), ["https://net.ton.dev"])
+            with self.assertRaises(ValueError):
+                load_endpoints("devnet")
+
+    def test_environment_override(self):
+        with mock.patch.dict(os.environ, {"TON_ENDPOINTS": "https://a.example/api/v2, https://b.example/api/v2"}):
+            self.assertEqual(load_endpoints(), ["https://a.example/api/v2", "https://b.example/api/v2"])
+
+    @unittest.skipUnless(importlib.util.find_spec("requests"), "requests is not installed")
+    def test_connect(self):
+        with mock.patch.dict(os.environ, {"TON_RPC_CACHE": "off"}):
+            self.assertIsInstance(connect(["https://a.example/api/v2"]), ToncenterClient)
+            self.assertIsInstance(connect(["https://a.example/api/v2", "https://b.example/api/v2"]), RpcPool)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+"""
+Order Seeding Test Suite
+Tests synthetic contract state generation and shared-subtree dictionary building
+"""
+
+import random
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from boc import Cell, begin_cell, build_dict, dict_get  # noqa: E402
+from fees import PRICING_PUBLIC_KEY, FeeEstimator  # noqa: E402
+from orders import orders_from_storage  # noqa: E402
+from seed import PAID, UNPAID, SeedProfile, seed_model, seed_storage, write_state  # noqa: E402
+from snapshot import OrderSnapshot  # noqa: E402
+from storage import ContractStorage  # noqa: E402
+
+
+class TestSharedDict(unittest.TestCase):
+    """build_dict(share=True) must produce the same dictionary"""
+
+    def test_same_hash(self):
+        rng = random.Random(3)
+        values = [begin_cell().store_uint(i, 32).end_cell() for i in range(3)]
+        for keys in (range(1, 3000), rng.sample(range(1 << 32), 3000)):
+            items = {key: rng.choice(values) for key in keys}
+            self.assertEqual(build_dict(items, 32, share=True).hash, build_dict(items, 32).hash)
+
+
+class TestSeed(unittest.TestCase):
+    """Seeded state is well-formed, reproducible and shaped by the profile"""
+
+    def test_storage_is_readable(self):
+        storage = seed_storage(SeedProfile(2000, paid_ratio=0.25, seed=1))
+        snapshot = OrderSnapshot.from_storage(storage)
+        self.assertEqual(len(snapshot), 2000)
+        self.assertEqual(snapshot.last_order_id, 2000)
+        self.assertAlmostEqual(sum(snapshot.paid) / 2000, 0.25, delta=0.05)
+        first = next(orders_from_storage(storage))
+        self.assertEqual(first["order_id"], 1)
+        self.assertTrue(first["product_details"].startswith('{"sku":'))
+        self.assertGreater(first["price"], 0)
+
+    def test_reproducible_and_skewed(self):
+        profile = SeedProfile(500, detail_median=40, detail_skew=1.5, seed=9)
+        self.assertEqual(seed_storage(profile).encode().hash, seed_storage(profile).encode().hash)
+        sizes = [len(order["product_details"]) for order in orders_from_storage(seed_storage(profile))]
+        self.assertLess(min(sizes), 40)
+        self.assertGreater(max(sizes), 127)
+        fixed = SeedProfile(500, detail_median=40, detail_skew=0, seed=9)
+        self.assertEqual({len(order["product_details"]) for order in orders_from_storage(seed_storage(fixed))}, {40})
+
+    def test_paid_ratio_extremes(self):
+        for ratio, expected in ((0.0, UNPAID), (1.0, PAID)):
+            storage = seed_storage(SeedProfile(300, paid_ratio=ratio))
+            self.assertEqual(dict_get(storage.paid_status, 32, 150).load_uint(32), expected)
+
+    def test_model_accepts_orders_and_payments(self):
+        contract = seed_model(SeedProfile(1000, paid_ratio=0.0), owner_key=PRICING_PUBLIC_KEY)
+        self.assertTrue(FeeEstimator().payment(contract, 777, 10 ** 9).success)
+        self.assertTrue(FeeEstimator().create_order(contract, "Mug", "cd" * 32, 10 ** 9).success)
+        self.assertEqual(contract.storage.last_order_id, 1001)
+
+    def test_write_state(self):
+        storage = seed_storage(SeedProfile(300))
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "state.boc"
+            size, root = write_state(storage, path)
+            self.assertEqual(path.stat().st_size, size)
+            decoded = ContractStorage.decode(Cell.from_boc(path.read_bytes()))
+        self.assertEqual(decoded.encode().hash, root.hash)
+
+    def test_rejects_bad_profiles(self):
+        with self.assertRaises(ValueError):
+            SeedProfile(10, paid_ratio=1.5)
+        with self.assertRaises(ValueError):
+            SeedProfile(1 << 32)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,56 +1,90 @@
-import unittest
+"""
+Shopping Contract Test Suite
+Deploys the contract and drives createOrder through recorded toncenter cassettes
+"""
+
 import asyncio
-from tonclient.client import TonClient, ClientConfig
-from tonclient.types import DeploySet, CallSet, Signer, ParamsOfEncodeMessage, NetworkConfig, ParamsOfSendMessage, ParamsOfWaitForTransaction
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from boc import Address, begin_cell  # noqa: E402
+from cassette import use_cassette  # noqa: E402
+from emulator import parse_message, parse_state_init  # noqa: E402
+from fleet import FleetInstance  # noqa: E402
+from local_chain import GENESIS_TIME, LocalChain  # noqa: E402
+from messages import external_message  # noqa: E402
+from orders import build_create_order_body, iter_orders  # noqa: E402
+from signing import public_key, verify  # noqa: E402
+from storage import ContractStorage  # noqa: E402
+from submitter import IdempotentSubmitter  # noqa: E402
+
+CODE = begin_cell().store_uint(0xC0DE, 16).end_cell()
+OWNER = Address(0, bytes(range(32)))
+# Test key only; the pure-Python signer is acceptable here
+SECRET_KEY = b"\x21" * 32
+SHOP = FleetInstance(0, CODE, OWNER, public_key(SECRET_KEY))
+# Query ids are valid against the chain clock, so recorded messages stay byte-identical
+VALID_UNTIL = GENESIS_TIME + 600
+DEPLOY_QUERY = (VALID_UNTIL << 32) | 1
+ORDER_QUERY = (VALID_UNTIL << 32) | 2
+IMAGE_HASH = "ab" * 32
+
+
+class TestDeployMessage(unittest.TestCase):
+    """The signed external message that deploys the contract"""
+
+    def test_deploy_message_carries_state_init(self):
+        header, init, body = parse_message(SHOP.deploy_message(SECRET_KEY, DEPLOY_QUERY))
+        self.assertTrue(header["external"])
+        self.assertEqual(header["destination"], SHOP.address)
+        code, data = parse_state_init(init)
+        self.assertEqual(code.hash, CODE.hash)
+        storage = ContractStorage.decode(data)
+        self.assertEqual((storage.shard_index, storage.owner_key), (0, public_key(SECRET_KEY)))
+        signature = body.load_bytes(64)
+        self.assertTrue(verify(public_key(SECRET_KEY), body.to_cell().hash, signature))
+
+    def test_key_pair(self):
+        self.assertEqual(len(public_key(SECRET_KEY)), 32)
+        self.assertEqual(public_key(SECRET_KEY), public_key(SECRET_KEY))
+        self.assertNotEqual(public_key(SECRET_KEY), public_key(b"\x22" * 32))
+
 
 class TestShoppingContract(unittest.TestCase):
-    @classmethod
-    def setUpClass(cls):
-        network_cfg = NetworkConfig(server_address="https://net.ton.dev")
-        cls.client = TonClient(config=ClientConfig(network=network_cfg))
-        cls.abi = None
-        cls.tvc = None
-        cls.address = None
-
-    def test_compile_contract(self):
-        # Skip compilation test for now due to tonclient library limitations
-        # This test would require a different approach or library version
-        self.skipTest("Compilation test skipped - requires different tonclient API")
-
-    def test_client_connection(self):
-        """Test that the TON client can be created and connected"""
-        # Test that client was created successfully in setUpClass
-        self.assertIsNotNone(self.client)
-        self.assertTrue(hasattr(self.client, 'crypto'))
-        self.assertTrue(hasattr(self.client, 'processing'))
-        self.assertTrue(hasattr(self.client, 'abi'))
-
-    def test_key_generation(self):
-        """Test keypair generation"""
-        keypair = self.client.crypto.generate_random_sign_keys()
-        self.assertIsNotNone(keypair)
-        # KeyPair object should have public and secret attributes
-        self.assertTrue(hasattr(keypair, 'public'))
-        self.assertTrue(hasattr(keypair, 'secret'))
-        self.assertNotEqual(keypair.public, "")
-        self.assertNotEqual(keypair.secret, "")
-
-    def test_message_encoding(self):
-        """Test message encoding for deployment"""
-        # Skip this test due to ABI format complexity
-        # The ABI needs to be a proper object, not a dict
-        self.skipTest("Message encoding test skipped - requires proper ABI object format")
-
-    def test_full_deployment_mock(self):
-        """Test full deployment process with mock data"""
-        # Skip this test due to ABI format complexity
-        # The ABI needs to be a proper object, not a dict
-        self.skipTest("Full deployment mock test skipped - requires proper ABI object format")
-
-    def test_deploy_contract(self):
-        # Skip deployment test since it depends on compilation
-        # This test would require compiled contract artifacts
-        self.skipTest("Deployment test skipped - requires compiled contract")
+    """Deployment and order creation, replayed strictly from the shopping_deploy cassette"""
+
+    def test_deploy_and_create_order(self):
+        api = use_cassette("shopping_deploy", source=LocalChain)
+        submitter = IdempotentSubmitter([api], resend_interval=0)
+        address = SHOP.address.to_raw()
+
+        async def run():
+            try:
+                before = await api.get_address_information(address)
+                deployed = await submitter.submit(address, SHOP.deploy_message(SECRET_KEY, DEPLOY_QUERY),
+                                                  DEPLOY_QUERY)
+                after = await api.get_address_information(address)
+                shard, = await api.run_get_method(address, "get_shard_index")
+                body = build_create_order_body("Shirt (Size: M)", IMAGE_HASH, 25 * 10 ** 8, ORDER_QUERY, SECRET_KEY)
+                created = await submitter.submit(address, external_message(SHOP.address, body), ORDER_QUERY)
+                orders = [order async for order in iter_orders(api, address)]
+                return before, deployed, after, shard, created, orders
+            finally:
+                await api.close()
+
+        before, deployed, after, shard, created, orders = asyncio.run(run())
+        self.assertEqual(before["state"], "uninitialized")
+        self.assertTrue(deployed)
+        self.assertEqual(after["state"], "active")
+        self.assertEqual(shard, 0)
+        self.assertTrue(created)
+        self.assertEqual([(order["order_id"], order["paid"], order["product_details"], order["price"])
+                          for order in orders], [(1, False, "Shirt (Size: M)", 25 * 10 ** 8)])
+        self.assertEqual(api.cassette.unplayed, 0)
+
 
 if __name__ == "__main__":
     unittest.main()
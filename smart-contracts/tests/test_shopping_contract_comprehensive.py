@@ -5,67 +5,47 @@ Tests TON smart contract functionality for the shopping application
 
 import unittest
 import asyncio
+import base64
+import hashlib
 import json
+import os
+import sys
 import time
-from unittest.mock import Mock, patch, AsyncMock, MagicMock
-from typing import Dict, Any, Optional
+from pathlib import Path
+from unittest.mock import patch
+from typing import Callable, Dict, Any, List, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from boc import Address, Cell, load_text  # noqa: E402
+from cassette import use_cassette  # noqa: E402
+from contract_diff import WORKLOAD_KEY, build_workload  # noqa: E402
+from emulator import ShoppingContractModel, parse_message  # noqa: E402
+from events import order_paid_event  # noqa: E402
+from local_chain import GENESIS_TIME, LocalChain  # noqa: E402
+from messages import contract_address, external_message, state_init  # noqa: E402
+from orders import build_create_order_body  # noqa: E402
+from payments import PaymentIndex, payment_payload_base64  # noqa: E402
+from seed import SeedProfile, seed_model, seed_storage  # noqa: E402
+from signing import public_key, verify  # noqa: E402
+from snapshot import OrderSnapshot  # noqa: E402
+from storage import ContractStorage  # noqa: E402
+from submitter import query_processed  # noqa: E402
+
+PERF_BASELINE = Path(__file__).resolve().parent / "perf_baseline.json"
+
+SHOP = Address(0, bytes(32))
+# Test key only; the pure-Python signer is acceptable here
+SECRET_KEY = b"\x05" * 32
+ORDER_QUERY = ((GENESIS_TIME + 600) << 32) | 7
+
+
+def seeded_chain() -> LocalChain:
+    """Live source the shopping_create_order cassette was recorded from: a deployed shop with 3 orders"""
+    chain = LocalChain()
+    chain.add_account(SHOP, seed_model(SeedProfile(orders=3, seed=11), owner_key=public_key(SECRET_KEY)))
+    return chain
 
-class MockTonClient:
-    """Mock TON client for testing"""
-
-    def __init__(self, config):
-        self.config = config
-        self.crypto = MockCrypto()
-        self.processing = MockProcessing()
-        self.abi = MockAbi()
-
-    async def connect(self):
-        """Mock connection method"""
-        return True
-
-    async def disconnect(self):
-        """Mock disconnection method"""
-        return True
-
-class MockCrypto:
-    """Mock crypto operations"""
-
-    def generate_random_sign_keys(self):
-        """Generate mock keypair"""
-        return MockKeyPair()
-
-    def sign_message(self, message, keypair):
-        """Mock message signing"""
-        return {'signature': 'mock_signature'}
-
-class MockProcessing:
-    """Mock processing operations"""
-
-    async def send_message(self, message, abi):
-        """Mock message sending"""
-        return {'transaction_hash': 'mock_tx_hash'}
-
-    async def wait_for_transaction(self, message, shard_block_id):
-        """Mock transaction waiting"""
-        return {'transaction': 'completed'}
-
-class MockAbi:
-    """Mock ABI operations"""
-
-    def encode_message(self, abi, call_set, deploy_set=None, signer=None):
-        """Mock message encoding"""
-        return {'message': 'encoded_message'}
-
-    def decode_message(self, message, abi):
-        """Mock message decoding"""
-        return {'decoded': 'message_data'}
-
-class MockKeyPair:
-    """Mock keypair"""
-
-    def __init__(self):
-        self.public = 'mock_public_key_12345'
-        self.secret = 'mock_secret_key_67890'
 
 class TestShoppingContractComprehensive(unittest.TestCase):
     """Comprehensive test suite for shopping contract"""
@@ -79,7 +59,6 @@ class TestShoppingContractComprehensive(unittest.TestCase):
 
     def setUp(self):
         """Set up test fixtures"""
-        self.client = MockTonClient(None)
         self.test_order_data = {
             'productDetails': 'Test Product (Size: M, Color: Black, Qty: 2)',
             'productImage': 'https://example.com/test.jpg',
@@ -138,19 +117,16 @@ class TestShoppingContractComprehensive(unittest.TestCase):
 
     def test_keypair_generation(self):
         """Test cryptographic keypair generation"""
-        keypair = self.client.crypto.generate_random_sign_keys()
-
-        # Verify keypair structure
-        self.assertIsNotNone(keypair)
-        self.assertTrue(hasattr(keypair, 'public'))
-        self.assertTrue(hasattr(keypair, 'secret'))
+        secret = os.urandom(32)
+        public = public_key(secret)
 
         # Verify key lengths
-        self.assertGreater(len(keypair.public), 0)
-        self.assertGreater(len(keypair.secret), 0)
+        self.assertEqual(len(public), 32)
+        self.assertEqual(len(secret), 32)
 
-        # Verify keys are different
-        self.assertNotEqual(keypair.public, keypair.secret)
+        # Verify keys are different and derivation is deterministic
+        self.assertNotEqual(public, secret)
+        self.assertEqual(public_key(secret), public)
 
     def test_order_data_validation(self):
         """Test order data structure and validation"""
@@ -302,21 +278,6 @@ class TestShoppingContractComprehensive(unittest.TestCase):
         with self.assertRaises(json.JSONDecodeError):
             json.loads(malformed_json)
 
-    def test_performance_requirements(self):
-        """Test performance requirements for operations"""
-        start_time = time.time()
-
-        # Simulate basic validation operations
-        for i in range(1000):
-            order_id = i + 10000
-            self.assertIsInstance(order_id, int)
-
-        end_time = time.time()
-        duration = end_time - start_time
-
-        # Should complete within reasonable time (less than 1 second for 1000 operations)
-        self.assertLess(duration, 1.0)
-
     def test_integration_scenarios(self):
         """Test integration scenarios with mock service"""
         # Mock successful order creation
@@ -401,37 +362,164 @@ class TestShoppingContractComprehensive(unittest.TestCase):
         self.assertIn('public_tx_hash', public_data['transactionHash'])
         self.assertTrue(public_data['contractAddress'].startswith('0:'))
 
-    def test_mock_client_functionality(self):
-        """Test mock client functionality"""
-        # Test crypto operations
-        keypair = self.client.crypto.generate_random_sign_keys()
-        self.assertIsNotNone(keypair)
-
-        # Test processing operations
-        message = {'test': 'message'}
-        abi = {'test': 'abi'}
-
-        # Mock async operations
-        async def test_processing():
-            result = await self.client.processing.send_message(message, abi)
-            self.assertIsNotNone(result)
-
-        # Run async test
-        asyncio.run(test_processing())
-
-    def test_abi_operations(self):
-        """Test ABI encoding/decoding operations"""
-        # Test message encoding
-        abi = {'version': '2.0'}
-        call_set = {'function_name': 'test_function'}
-        signer = MockKeyPair()
-
-        encoded = self.client.abi.encode_message(abi, call_set, signer=signer)
-        self.assertIsNotNone(encoded)
-
-        # Test message decoding
-        decoded = self.client.abi.decode_message(encoded, abi)
-        self.assertIsNotNone(decoded)
+    def test_send_create_order(self):
+        """Test sending a signed createOrder, replayed from a recorded cassette"""
+        api = use_cassette("shopping_create_order", source=seeded_chain)
+        address = SHOP.to_raw()
+        body = build_create_order_body("Test Product", "cd" * 32, 10 ** 9, ORDER_QUERY, SECRET_KEY)
+
+        async def run():
+            try:
+                await api.send_boc(external_message(SHOP, body))
+                processed = await query_processed(api, address, ORDER_QUERY)
+                paid, = await api.run_get_method(address, "get_order_paid", [4])
+                return processed, paid
+            finally:
+                await api.close()
+
+        self.assertEqual(asyncio.run(run()), (True, 0))
+        self.assertEqual(api.cassette.unplayed, 0)
+
+    def test_create_order_encoding(self):
+        """Test createOrder message encoding and decoding"""
+        body = build_create_order_body("Test Product", "cd" * 32, 10 ** 9, ORDER_QUERY, SECRET_KEY)
+        header, init, decoded = parse_message(external_message(SHOP, body))
+        self.assertTrue(header["external"])
+        self.assertIsNone(init)
+
+        signature = decoded.load_bytes(64)
+        self.assertTrue(verify(public_key(SECRET_KEY), decoded.to_cell().hash, signature))
+        self.assertEqual(decoded.load_uint(32), 1)
+        self.assertEqual(decoded.load_uint(64), ORDER_QUERY)
+        self.assertEqual(load_text(decoded.load_ref().begin_parse()), "Test Product")
+        self.assertEqual(decoded.load_uint(256), int("cd" * 32, 16))
+        self.assertEqual(decoded.load_coins(), 10 ** 9)
+
+
+def _best_of(*funcs: Callable[[], Any], repeat: int = 5) -> List[float]:
+    """Fastest of several interleaved runs of each function: the least disturbed by the rest of the machine"""
+    best = [float("inf")] * len(funcs)
+    for _ in range(repeat):
+        for index, func in enumerate(funcs):
+            started = time.perf_counter()
+            func()
+            best[index] = min(best[index], time.perf_counter() - started)
+    return best
+
+
+def _calibration_workload():
+    """Fixed pure-Python work (hashing, integer maths, dict churn) that scales like the code under test"""
+    digest = b"calibration"
+    table = {}
+    for i in range(50_000):
+        digest = hashlib.sha256(digest).digest()
+        table[i & 1023] = int.from_bytes(digest[:8], "big") * 31 % 1_000_003
+    return table
+
+
+class TestPerformanceBudgets(unittest.TestCase):
+    """Hot paths against budgets calibrated from tests/perf_baseline.json
+
+    Each benchmark's baseline was recorded next to a calibration workload on
+    the same machine. Here the calibration runs again, interleaved with the
+    benchmark so both see the same load, and the ratio of the two calibration
+    timings scales the budget to the current machine; a budget is only
+    exceeded when the code itself got slower. ``TON_PERF_RECORD=1``
+    rewrites the baseline instead of checking it, ``TON_PERF_TOLERANCE``
+    overrides the allowed slowdown and ``TON_PERF=off`` skips the gates.
+    """
+
+    ORDERS = 200
+    ADDRESSES = 200
+    PAYMENTS = 2000
+    SNAPSHOT_ORDERS = 2000
+
+    @classmethod
+    def setUpClass(cls):
+        if os.environ.get("TON_PERF") == "off":
+            raise unittest.SkipTest("Performance gates disabled (TON_PERF=off)")
+        cls.record = os.environ.get("TON_PERF_RECORD") == "1"
+        cls.baseline = json.loads(PERF_BASELINE.read_text()) if PERF_BASELINE.exists() else {"benchmarks": {}}
+        cls.tolerance = float(os.environ.get("TON_PERF_TOLERANCE", cls.baseline.get("tolerance", 0.5)))
+        cls.measured: Dict[str, Dict[str, Any]] = {}
+
+        cls.workload = [step for step in build_workload(orders=cls.ORDERS) if step["op"] == "create_order"]
+        cls.messages = [Cell.from_boc(step["message"]) for step in cls.workload]
+        cls.owner_key = public_key(WORKLOAD_KEY)
+        cls.transactions = [{
+            "transaction_id": {"lt": str(lt), "hash": base64.b64encode(lt.to_bytes(32, "big")).decode()},
+            "in_msg": {"value": str(10 ** 9), "source": "EQpayer",
+                       "msg_data": {"@type": "msg.dataRaw", "body": payment_payload_base64(lt % 500 + 1, 10 ** 9)}},
+            "out_msgs": [{"destination": "", "msg_data": {
+                "@type": "msg.dataRaw",
+                "body": order_paid_event(lt % 500 + 1, 0, 10 ** 9, None).end_cell().to_boc_base64()}}],
+        } for lt in range(1, cls.PAYMENTS + 1)]
+        cls.snapshot_data = seed_storage(SeedProfile(orders=cls.SNAPSHOT_ORDERS, seed=1)).encode()
+
+    @classmethod
+    def tearDownClass(cls):
+        if getattr(cls, "record", False) and cls.measured:
+            PERF_BASELINE.write_text(json.dumps({
+                "tolerance": cls.baseline.get("tolerance", 0.5),
+                "benchmarks": {**cls.baseline.get("benchmarks", {}), **cls.measured},
+            }, indent=2, sort_keys=True) + "\n")
+
+    def assertWithinBudget(self, name: str, ops: int, func: Callable[[], Any]):
+        # A baseline is only as good as its floor, so recording takes more samples
+        calibration, seconds = _best_of(_calibration_workload, func, repeat=20 if self.record else 7)
+        self.measured[name] = {"seconds": round(seconds, 6), "ops": ops, "calibration": round(calibration, 6)}
+        if self.record:
+            return
+        recorded = self.baseline["benchmarks"].get(name)
+        if recorded is None:
+            self.skipTest(f"No baseline for {name}; record one with TON_PERF_RECORD=1")
+        factor = calibration / recorded["calibration"]
+        budget = recorded["seconds"] * recorded.get("ops", ops) / ops * factor * (1 + self.tolerance)
+        self.assertLessEqual(
+            seconds, budget,
+            f"{name}: {seconds * 1e3:.1f} ms for {ops} ops exceeds the {budget * 1e3:.1f} ms budget "
+            f"(baseline {recorded['seconds'] * 1e3:.1f} ms, machine factor {factor:.2f})")
+
+    def test_boc_order_payload_roundtrip(self):
+        # Signed createOrder messages; signing itself is not BoC work, so they are built once up front
+        def run():
+            for message in self.messages:
+                decoded = Cell.from_boc(message.to_boc())
+                assert decoded.hash == message.hash
+        self.assertWithinBudget("boc_order_payload_roundtrip", self.ORDERS, run)
+
+    def test_emulator_create_order_throughput(self):
+        # Ed25519 verification costs 100x more without PyNaCl than with it, and the calibration
+        # cannot tell the backends apart, so the gate measures the handler and storage work only
+        def run():
+            contract = ShoppingContractModel(ContractStorage(owner_key=self.owner_key), code=Cell())
+            for step, message in zip(self.workload, self.messages):
+                contract.now = step["now"]
+                assert contract.execute(message).success
+        with patch("emulator.verify", return_value=True) as verify:
+            self.assertWithinBudget("emulator_create_order", self.ORDERS, run)
+        self.assertTrue(verify.called)
+
+    def test_address_derivation(self):
+        owners = [Address(0, hashlib.sha256(i.to_bytes(4, "big")).digest()) for i in range(self.ADDRESSES)]
+
+        def run():
+            for owner in owners:
+                contract_address(state_init(Cell(), ContractStorage(owner=owner).encode()))
+        self.assertWithinBudget("address_derivation", self.ADDRESSES, run)
+
+    def test_payment_indexer_ingest(self):
+        def run():
+            index = PaymentIndex()
+            index.add_transactions(self.transactions)
+            assert len(index) == 500
+        self.assertWithinBudget("payment_index_ingest", self.PAYMENTS, run)
+
+    def test_order_snapshot_ingest(self):
+        def run():
+            assert len(OrderSnapshot.from_data(self.snapshot_data)) == self.SNAPSHOT_ORDERS
+        self.assertWithinBudget("order_snapshot_ingest", self.SNAPSHOT_ORDERS, run)
+
 
 if __name__ == "__main__":
     # Run comprehensive tests
@@ -0,0 +1,87 @@
+"""
+Snapshot Decoder Test Suite
+Tests columnar decoding of contract storage and incremental diffing
+"""
+
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from boc import Address, begin_cell, build_dict, text_cell  # noqa: E402
+from content_store import content_hash  # noqa: E402
+from snapshot import OrderSnapshot, diff_snapshots  # noqa: E402
+from storage import ContractStorage  # noqa: E402
+
+
+def make_storage(orders):
+    """Build contract storage from {order_id: (paid, details, image)}"""
+    return ContractStorage(
+        last_order_id=max(orders, default=0),
+        owner=Address(0, bytes(32)),
+        product_details=build_dict({i: text_cell(o[1]) for i, o in orders.items()}, 32),
+        product_images=build_dict({i: begin_cell().store_bytes(bytes.fromhex(content_hash(o[2].encode())))
+                                   for i, o in orders.items()}, 32),
+        paid_status=build_dict({i: begin_cell().store_uint(o[0], 32).store_coins(10 ** 9)
+                                for i, o in orders.items()}, 32),
+    )
+
+
+class TestOrderSnapshot(unittest.TestCase):
+    """Decoding and diffing of order snapshots"""
+
+    def setUp(self):
+        self.orders = {i: (0, f"Product {i}", f"https://example.com/{i}.jpg") for i in range(1, 51)}
+
+    def test_storage_round_trip(self):
+        storage = make_storage(self.orders)
+        decoded = ContractStorage.decode(storage.encode())
+        self.assertEqual(decoded.last_order_id, 50)
+        self.assertEqual(decoded.owner, Address(0, bytes(32)))
+        self.assertEqual(decoded.product_details.hash, storage.product_details.hash)
+
+    def test_paid_update_keeps_order_ref(self):
+        data = make_storage(self.orders).encode()
+        storage = ContractStorage.decode(data)
+        storage.paid_status = build_dict({i: begin_cell().store_uint(1, 32).store_coins(10 ** 9)
+                                          for i in self.orders}, 32)
+        updated = storage.encode()
+        # Only the root is rewritten; the order and metadata refs are the very same cells
+        self.assertIs(updated.refs[-2], data.refs[-2])
+        self.assertIs(updated.refs[-1], data.refs[-1])
+        self.assertEqual(ContractStorage.decode(updated).last_order_id, 50)
+        storage.last_order_id = 51
+        self.assertIsNot(storage.encode().refs[-2], data.refs[-2])
+
+    def test_snapshot_columns(self):
+        snapshot = OrderSnapshot.from_data(make_storage(self.orders).encode(), lt=7)
+        self.assertEqual(list(snapshot.order_ids), list(range(1, 51)))
+        self.assertEqual(len(snapshot.detail_hashes), 50 * 32)
+        self.assertEqual(snapshot.detail_hash(snapshot.index_of(3)), text_cell("Product 3").hash)
+        self.assertEqual(OrderSnapshot.from_bytes(snapshot.to_bytes()).to_bytes(), snapshot.to_bytes())
+
+    def test_diff(self):
+        previous = OrderSnapshot.from_storage(make_storage(self.orders))
+        self.orders[10] = (1, "Product 10", "https://example.com/10.jpg")
+        del self.orders[20]
+        self.orders[51] = (0, "Product 51", "https://example.com/51.jpg")
+        current = OrderSnapshot.from_storage(make_storage(self.orders))
+
+        diff = diff_snapshots(previous, current)
+        self.assertEqual(list(diff.added), [51])
+        self.assertEqual(list(diff.changed), [10])
+        self.assertEqual(list(diff.removed), [20])
+        self.assertFalse(diff_snapshots(current, current))
+
+    def test_save_and_load(self):
+        snapshot = OrderSnapshot.from_storage(make_storage(self.orders))
+        with tempfile.TemporaryDirectory() as tmp:
+            path = str(Path(tmp) / "orders.bin")
+            snapshot.save(path)
+            self.assertEqual(OrderSnapshot.load(path).to_bytes(), snapshot.to_bytes())
+
+
+if __name__ == "__main__":
+    unittest.main()
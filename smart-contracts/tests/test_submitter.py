@@ -0,0 +1,71 @@
+"""
+Idempotent Submission Test Suite
+Tests query ids and retry-safe resending of external messages
+"""
+
+import asyncio
+import sys
+import time
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from boc import begin_cell  # noqa: E402
+from submitter import IdempotentSubmitter, make_query_id, query_valid_until  # noqa: E402
+from toncenter import TonApi, TonApiError  # noqa: E402
+
+ADDRESS = "0:" + "ab" * 32
+MESSAGE = begin_cell().store_uint(1, 32).end_cell()
+
+
+class FlakyContractApi(TonApi):
+    """Drops the first sends and accepts each query id once, like the contract"""
+
+    def __init__(self, failures=2):
+        self.failures = failures
+        self.sends = 0
+        self.processed = set()
+
+    async def call(self, method, params):
+        if method == "sendBoc":
+            self.sends += 1
+            if self.sends <= self.failures:
+                raise TonApiError("timeout")
+            self.processed.add(params["boc"])
+            return {}
+        if method == "runGetMethod":
+            return {"exit_code": 0, "stack": [["num", hex(1 if self.processed else 0)]]}
+        raise AssertionError(method)
+
+
+class TestSubmitter(unittest.TestCase):
+    """Retry-safe message submission"""
+
+    def test_query_id_layout(self):
+        query_id = make_query_id(ttl=30, now=1_700_000_000)
+        self.assertEqual(query_valid_until(query_id), 1_700_000_030)
+        with self.assertRaises(ValueError):
+            make_query_id(ttl=3600)
+
+    def test_resends_until_processed(self):
+        api = FlakyContractApi(failures=2)
+        submitter = IdempotentSubmitter([api], resend_interval=0)
+        self.assertTrue(asyncio.run(submitter.submit(ADDRESS, MESSAGE, make_query_id())))
+        self.assertEqual(api.sends, 3)
+
+    def test_parallel_endpoints_send_duplicates_safely(self):
+        apis = [FlakyContractApi(failures=0) for _ in range(3)]
+        submitter = IdempotentSubmitter(apis, resend_interval=0)
+        results = asyncio.run(submitter.submit_many([(ADDRESS, MESSAGE, make_query_id())] * 2))
+        self.assertEqual(results, [True, True])
+
+    def test_gives_up_after_expiry(self):
+        api = FlakyContractApi(failures=10 ** 6)
+        submitter = IdempotentSubmitter([api], resend_interval=0)
+        expired = make_query_id(ttl=1, now=time.time() - 10)
+        self.assertFalse(asyncio.run(submitter.submit(ADDRESS, MESSAGE, expired)))
+
+
+if __name__ == "__main__":
+    unittest.main()
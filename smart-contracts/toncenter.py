@@ -0,0 +1,166 @@
+"""
+Toncenter HTTP API Client
+Async access to the TON v2 JSON-RPC API used by the Python tooling
+"""
+
+import asyncio
+import base64
+import itertools
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Union
+
+from boc import Cell
+from metrics import MESSAGES_SENT, RPC_CALLS, RPC_LATENCY
+
+TESTNET_ENDPOINT = "https://testnet.toncenter.com/api/v2"
+MAINNET_ENDPOINT = "https://toncenter.com/api/v2"
+
+
+class TonApiError(Exception):
+    """Raised when an endpoint rejects a call or a get-method fails"""
+
+    def __init__(self, message: str, code: Optional[int] = None):
+        super().__init__(message)
+        self.code = code
+
+
+def encode_stack_entry(value: Union[int, Cell]) -> List[Any]:
+    """Convert a Python value into a runGetMethod stack entry"""
+    if isinstance(value, Cell):
+        return ["tvm.Cell", value.to_boc_base64()]
+    if isinstance(value, int):
+        return ["num", hex(value)]
+    raise TypeError(f"Unsupported stack value: {value!r}")
+
+
+def decode_stack_entry(entry: Any) -> Any:
+    """Convert a runGetMethod stack entry into int, Cell, list or None"""
+    if isinstance(entry, dict):
+        # Typed tvm.* form used inside tuples and lists
+        kind = entry.get("@type", "")
+        if kind == "tvm.stackEntryNumber":
+            return int(entry["number"]["number"])
+        if kind in ("tvm.stackEntryCell", "tvm.stackEntrySlice"):
+            inner = entry.get("cell") or entry.get("slice")
+            return Cell.from_boc(inner["bytes"])
+        if kind in ("tvm.stackEntryTuple", "tvm.stackEntryList"):
+            inner = entry.get("tuple") or entry.get("list")
+            return [decode_stack_entry(e) for e in inner["elements"]]
+        if kind == "tvm.stackEntryNull":
+            return None
+        raise TonApiError(f"Unsupported stack entry: {kind}")
+
+    kind = entry[0]
+    value = entry[1] if len(entry) > 1 else None
+    if kind == "num":
+        return int(value, 16) if isinstance(value, str) else int(value)
+    if kind in ("cell", "slice"):
+        return Cell.from_boc(value["bytes"] if isinstance(value, dict) else value)
+    if kind in ("tuple", "list"):
+        return [decode_stack_entry(e) for e in value["elements"]]
+    if kind == "null":
+        return None
+    raise TonApiError(f"Unsupported stack entry: {kind}")
+
+
+class TonApi(ABC):
+    """Typed helpers over a single ``call(method, params)`` transport"""
+
+    @abstractmethod
+    async def call(self, method: str, params: Dict[str, Any]) -> Any:
+        """Send one API request and return its result"""
+
+    async def run_get_method(self, address: str, method: str,
+                             stack: Optional[List[Union[int, Cell]]] = None) -> List[Any]:
+        """Run a contract get-method and return the decoded result stack"""
+        result = await self.call("runGetMethod", {
+            "address": address,
+            "method": method,
+            "stack": [encode_stack_entry(value) for value in stack or []],
+        })
+        exit_code = result.get("exit_code", 0)
+        if exit_code not in (0, 1):
+            raise TonApiError(f"{method} failed with exit code {exit_code}", exit_code)
+        return [decode_stack_entry(entry) for entry in result.get("stack", [])]
+
+    async def get_address_information(self, address: str) -> Dict[str, Any]:
+        return await self.call("getAddressInformation", {"address": address})
+
+    async def get_account_data(self, address: str) -> Optional[Cell]:
+        """Fetch the persistent data cell (c4) of an account"""
+        info = await self.get_address_information(address)
+        data = info.get("data")
+        return Cell.from_boc(data) if data else None
+
+    async def get_transactions(self, address: str, limit: int = 20, lt: Optional[int] = None,
+                               tx_hash: Optional[str] = None, to_lt: Optional[int] = None) -> List[Dict[str, Any]]:
+        params: Dict[str, Any] = {"address": address, "limit": limit}
+        if lt is not None:
+            params["lt"] = str(lt)
+        if tx_hash is not None:
+            params["hash"] = tx_hash
+        if to_lt is not None:
+            params["to_lt"] = str(to_lt)
+        return await self.call("getTransactions", params)
+
+    async def get_masterchain_info(self) -> Dict[str, Any]:
+        return await self.call("getMasterchainInfo", {})
+
+    async def get_config_param(self, config_id: int) -> Cell:
+        """Fetch a blockchain configuration parameter as a cell"""
+        result = await self.call("getConfigParam", {"config_id": config_id})
+        return Cell.from_boc(result["config"]["bytes"])
+
+    async def send_boc(self, boc: Union[bytes, Cell]) -> Any:
+        """Broadcast a serialized external message"""
+        if isinstance(boc, Cell):
+            boc = boc.to_boc()
+        result = await self.call("sendBoc", {"boc": base64.b64encode(boc).decode()})
+        MESSAGES_SENT.inc(transport="jsonrpc")
+        return result
+
+    async def close(self):
+        pass
+
+
+class ToncenterClient(TonApi):
+    """JSON-RPC transport for a single toncenter-compatible endpoint"""
+
+    def __init__(self, endpoint: str = TESTNET_ENDPOINT, api_key: Optional[str] = None, timeout: float = 10.0):
+        import requests
+
+        self.endpoint = endpoint.rstrip("/")
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers["Content-Type"] = "application/json"
+        if api_key:
+            self.session.headers["X-API-Key"] = api_key
+        self._ids = itertools.count(1)
+
+    async def call(self, method: str, params: Dict[str, Any]) -> Any:
+        payload = {"id": next(self._ids), "jsonrpc": "2.0", "method": method, "params": params}
+        started = time.perf_counter()
+        try:
+            result = await asyncio.to_thread(self._post, payload)
+        except Exception:
+            RPC_CALLS.inc(method=method, outcome="error")
+            raise
+        finally:
+            RPC_LATENCY.observe(time.perf_counter() - started, method=method)
+        RPC_CALLS.inc(method=method, outcome="ok")
+        return result
+
+    def _post(self, payload: Dict[str, Any]) -> Any:
+        response = self.session.post(f"{self.endpoint}/jsonRPC", json=payload, timeout=self.timeout)
+        try:
+            data = response.json()
+        except ValueError:
+            # Proxies in front of the endpoint answer 502/504 with an HTML page
+            raise TonApiError(f"HTTP {response.status_code} without a JSON body", response.status_code) from None
+        if not data.get("ok", "result" in data):
+            raise TonApiError(str(data.get("error", "unknown error")), data.get("code"))
+        return data["result"]
+
+    async def close(self):
+        self.session.close()